@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from typing import Dict, List, Tuple
 
 from ofrak.component.unpacker import UnpackerError
 from ofrak.model.viewable_tag_model import AttributesType
@@ -86,7 +87,23 @@ class CapstoneInstructionAnalyzer(InstructionAnalyzer):
         super().__init__(resource_factory, data_service, resource_service)
         self._disassembler_service = disassembler_service
 
-    async def analyze(self, resource: Resource, config=None) -> Instruction:
+    async def analyze_batch(self, resources: List[Resource], config=None) -> List[Instruction]:
+        # Instructions are analyzed together with their siblings, so only look up the mode and
+        # address of each parent block once
+        parent_blocks: Dict[bytes, Tuple[Addressable, InstructionSetMode]] = dict()
+        instructions = []
+        for resource in resources:
+            parent_id = resource.get_model().parent_id
+            if parent_id not in parent_blocks:
+                parent_blocks[parent_id] = await self._get_parent_block_and_mode(resource)
+            parent_block, mode = parent_blocks[parent_id]
+            instructions.append(await self._analyze_instruction(resource, parent_block, mode))
+        return instructions
+
+    @staticmethod
+    async def _get_parent_block_and_mode(
+        resource: Resource,
+    ) -> Tuple[Addressable, InstructionSetMode]:
         parent_block = await resource.get_parent_as_view(Addressable)
         mode: InstructionSetMode
         if parent_block.resource.has_tag(BasicBlock):
@@ -94,6 +111,11 @@ class CapstoneInstructionAnalyzer(InstructionAnalyzer):
             mode = bb_attrs.mode  # type: ignore
         else:
             mode = InstructionSetMode.NONE
+        return parent_block, mode
+
+    async def _analyze_instruction(
+        self, resource: Resource, parent_block: Addressable, mode: InstructionSetMode
+    ) -> Instruction:
         instruction_data = await resource.get_data()
         program_attrs = await resource.analyze(ProgramAttributes)
 
@@ -270,6 +270,21 @@ export class RemoteResource extends Resource {
     this.update();
   }
 
+  async data_summary_tiles(range, max_tiles) {
+    const params = new URLSearchParams({ max_tiles: JSON.stringify(max_tiles) });
+    if (range) {
+      params.set("range", JSON.stringify(range));
+    }
+    return await fetch(`${this.uri}/data_summary_tiles?${params}`).then(
+      async (r) => {
+        if (!r.ok) {
+          throw Error(JSON.stringify(await r.json(), undefined, 2));
+        }
+        return r.json();
+      }
+    );
+  }
+
   async analyze() {
     const analyze_results = await fetch(`${this.uri}/analyze`, {
       method: "POST",
@@ -473,6 +488,29 @@ export class RemoteResource extends Resource {
     return remote_models_to_resources(matching_models);
   }
 
+  async search_data(query, is_regex, max_matches) {
+    const results = await fetch(`${this.uri}/search_data`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify([query, is_regex, max_matches]),
+    }).then(async (r) => {
+      if (!r.ok) {
+        throw Error(JSON.stringify(await r.json(), undefined, 2));
+      }
+      return await r.json();
+    });
+    const resources = remote_models_to_resources(
+      results.map(([model, offset, match]) => model)
+    );
+    return results.map(([model, offset, match], i) => ({
+      resource: resources[i],
+      offset: offset,
+      match: match,
+    }));
+  }
+
   async update_script() {
     await fetch(`${this.uri}/get_script`, {
       method: "GET",
@@ -0,0 +1,95 @@
+"""
+Benchmark `TarUnpacker` and `ZipUnpacker`, which read archives in-process, against the way they
+used to unpack: extracting the archive to a temporary directory with an external tool, then
+reading it back with `FilesystemRoot.initialize_from_disk`. The archives contain many small files
+spread over several folders. Each way is timed a few times and the fastest run is kept, since
+creating many resources makes single runs noisy.
+
+Usage: python benchmarks/archive_unpack.py [FILE_COUNT]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+from ofrak import OFRAK, Resource
+from ofrak.core.filesystem import FilesystemRoot
+from ofrak.core.tar import TarArchive
+from ofrak.core.zip import ZipArchive
+
+FILES_PER_FOLDER = 100
+RUNS = 3
+
+
+def create_archives(file_count: int, file_size: int, directory: str) -> List[str]:
+    source_dir = os.path.join(directory, "source")
+    for i in range(file_count):
+        folder = os.path.join(source_dir, f"folder{i // FILES_PER_FOLDER}")
+        if i % FILES_PER_FOLDER == 0:
+            os.makedirs(folder)
+        with open(os.path.join(folder, f"file{i}.txt"), "wb") as f:
+            f.write((b"%d: ofrak benchmark file\n" % i * (file_size // 16 + 1))[:file_size])
+    tar_path = os.path.join(directory, "archive.tar")
+    zip_path = os.path.join(directory, "archive.zip")
+    subprocess.run(["tar", "--xattrs", "-C", source_dir, "-cf", tar_path, "."], check=True)
+    subprocess.run(["zip", "-qr", zip_path, "."], cwd=source_dir, check=True)
+    return [tar_path, zip_path]
+
+
+async def extract_and_initialize_from_disk(resource: Resource):
+    if resource.has_tag(TarArchive):
+        view: FilesystemRoot = await resource.view_as(TarArchive)
+        command = ["tar", "--xattrs", "-xf", "archive"]
+    else:
+        view = await resource.view_as(ZipArchive)
+        command = ["unzip", "-q", "archive"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(os.path.join(temp_dir, "archive"), "wb") as f:
+            f.write(await resource.get_data())
+        subprocess.run(command, cwd=temp_dir, check=True)
+        os.remove(os.path.join(temp_dir, "archive"))
+        await view.initialize_from_disk(temp_dir)
+
+
+async def unpack(resource: Resource):
+    await resource.unpack()
+
+
+async def time_unpacking(
+    archive_path: str, unpack_archive: Callable[[Resource], Awaitable[None]]
+) -> float:
+    unpack_times = []
+    for _ in range(RUNS):
+        # Use a new context each time, so that the resources of a run do not slow down the next one
+        ofrak_context = await OFRAK().create_ofrak_context()
+        resource = await ofrak_context.create_root_resource_from_file(archive_path)
+        await resource.identify()
+        start = time.perf_counter()
+        await unpack_archive(resource)
+        unpack_times.append(time.perf_counter() - start)
+        await ofrak_context.shutdown_context()
+    return min(unpack_times)
+
+
+async def main(file_count: int, file_size: int):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'archive':>12} {'extract to disk (s)':>20} {'in-process (s)':>16} {'files/s':>10}")
+        for archive_path in create_archives(file_count, file_size, directory):
+            disk_time = await time_unpacking(archive_path, extract_and_initialize_from_disk)
+            in_process_time = await time_unpacking(archive_path, unpack)
+            print(
+                f"{os.path.basename(archive_path):>12} {disk_time:>20.2f} "
+                f"{in_process_time:>16.2f} {file_count / in_process_time:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        )
+    )
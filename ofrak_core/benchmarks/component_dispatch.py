@@ -0,0 +1,61 @@
+"""
+Benchmark finding the components to auto-run on a resource by filtering every registered component,
+against looking up the components targeting the resource's tags in the component locator's index,
+for a resource of each tag.
+
+Usage: python benchmarks/component_dispatch.py [REPEAT]
+"""
+import asyncio
+import sys
+import time
+
+from ofrak import OFRAK
+from ofrak.model.component_filters import ComponentAndMetaFilter
+from ofrak.model.job_request_model import JobMultiComponentRequest
+from ofrak.service.component_locator_i import ComponentLocatorInterface
+from ofrak.service.job_service import (
+    JobService,
+    _ComponentAutoRunRequest,
+    _build_auto_run_filter,
+    _build_tag_filter,
+)
+
+
+async def main(repeat: int):
+    ofrak_context = await OFRAK().create_ofrak_context()
+    component_locator = await ofrak_context.injector.get_instance(ComponentLocatorInterface)
+    job_service = await ofrak_context.injector.get_instance(JobService)
+    auto_run_filter = _build_auto_run_filter(
+        JobMultiComponentRequest(
+            b"", b"", all_unpackers=True, all_identifiers=True, all_analyzers=True
+        )
+    )
+    # A resource is tagged with a tag and all of its base tags
+    resource_tags = [tuple(tag.tag_classes()) for tag in ofrak_context.get_all_tags()]
+    component_filters = [
+        ComponentAndMetaFilter(auto_run_filter, _build_tag_filter(tags)) for tags in resource_tags
+    ]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for component_filter in component_filters:
+            component_locator.get_components_matching_filter(component_filter)
+    filtered_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for tags, component_filter in zip(resource_tags, component_filters):
+            job_service._get_components_for_request(
+                _ComponentAutoRunRequest(b"", component_filter, tags)
+            )
+    indexed_time = time.perf_counter() - start
+
+    await ofrak_context.shutdown_context()
+    dispatch_count = repeat * len(resource_tags)
+    print(f"Dispatch cost per resource over {len(resource_tags)} tag sets:")
+    print(f"{1e6 * filtered_time / dispatch_count:>10.1f} us filtering all components")
+    print(f"{1e6 * indexed_time / dispatch_count:>10.1f} us with the target index")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,69 @@
+"""
+Benchmark searching the data of a root model with the `DataService` across input sizes, with and
+without a search index: the time to build the index, and to search for bytes and regular
+expressions which occur rarely in the data.
+
+Usage: python benchmarks/data_search.py [MAX_SIZE_MB]
+"""
+import asyncio
+import re
+import sys
+import time
+
+from ofrak.service.data_service import DataService
+
+QUERIES = [b"ofrak needle", re.compile(rb"ofrak n\w{3}le"), re.compile(rb"[\x20-\x7e]{4}needle")]
+
+
+def create_data(size: int) -> bytes:
+    # Machine code and strings, like the sections of typical firmware, with a few needles
+    chunk = bytes(range(256)) * 8 + b"\x00".join(
+        b"ofrak benchmark string %d" % i for i in range(100)
+    )
+    data = bytearray((chunk * (size // len(chunk) + 1))[:size])
+    for offset in range(0, size - 12, size // 8):
+        data[offset : offset + 12] = b"ofrak needle"
+    return bytes(data)
+
+
+async def time_searches(data_service: DataService) -> list:
+    times = []
+    for query in QUERIES:
+        start = time.perf_counter()
+        await data_service.search(b"root", query)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+async def main(max_size_mb: int):
+    print(
+        f"{'size (MB)':>10} {'index':>8} "
+        + " ".join(f"{'query %d' % i:>9} {'indexed':>9}" for i in range(len(QUERIES)))
+    )
+    size_mb = 1
+    while size_mb <= max_size_mb:
+        data = create_data(size_mb * 2**20)
+        data_service = DataService()
+        await data_service.create_root(b"root", data)
+        unindexed_times = await time_searches(data_service)
+
+        data_service.enable_search_index()
+        start = time.perf_counter()
+        # The first search waits for the index to be built
+        await data_service.search(b"root", b"\x00\x00\x00", max_matches=1)
+        index_time = time.perf_counter() - start
+        indexed_times = await time_searches(data_service)
+        data_service.disable_search_index()
+
+        print(
+            f"{size_mb:>10} {index_time:>8.3f} "
+            + " ".join(
+                f"{unindexed:>9.3f} {indexed:>9.3f}"
+                for unindexed, indexed in zip(unindexed_times, indexed_times)
+            )
+        )
+        size_mb *= 4
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 256))
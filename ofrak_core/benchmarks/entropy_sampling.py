@@ -0,0 +1,89 @@
+"""
+Benchmark the ways `DataSummaryAnalyzer` can compute the entropy and magnitude samples of data
+across input sizes: the C extension followed by sampling its result in Python (as it used to) or
+with NumPy, and the NumPy implementation, which only computes the entropy of sampled windows when
+they are far apart. The C extension is skipped if it is not built.
+
+Usage: python benchmarks/entropy_sampling.py [MAX_SIZE_MB]
+"""
+import math
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+from ofrak.core.entropy.entropy_numpy import sample_entropy_numpy, sample_numpy
+
+try:
+    from ofrak.core.entropy.entropy_c import entropy_c
+except ImportError:
+    entropy_c = None
+
+WINDOW_SIZE = 256
+MAX_SAMPLES = 2**20
+
+
+def create_data(size: int) -> bytes:
+    # Alternate random bytes, text and zeros, so that every window size has varied entropy
+    chunk = (
+        os.urandom(0x4000)
+        + b"".join(b"%d: ofrak benchmark line\n" % i for i in range(600))
+        + b"\x00" * 0x2000
+    )
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def sample_in_python(data: bytes) -> bytes:
+    if len(data) <= MAX_SAMPLES:
+        return data
+    skip = len(data) / MAX_SAMPLES
+    return bytes(data[math.floor(i * skip)] for i in range(MAX_SAMPLES))
+
+
+def c_with_python_sampling(data: bytes) -> bytes:
+    return sample_in_python(entropy_c(data, WINDOW_SIZE, lambda percent: None))
+
+
+def c_with_numpy_sampling(data: bytes) -> bytes:
+    return sample_numpy(entropy_c(data, WINDOW_SIZE, lambda percent: None), MAX_SAMPLES)
+
+
+def numpy(data: bytes) -> bytes:
+    return sample_entropy_numpy(data, WINDOW_SIZE, MAX_SAMPLES)
+
+
+def time_function(function: Callable[[bytes], bytes], data: bytes) -> float:
+    start = time.perf_counter()
+    function(data)
+    return time.perf_counter() - start
+
+
+def format_time(duration: Optional[float]) -> str:
+    return f"{duration:>14.3f}" if duration is not None else f"{'-':>14}"
+
+
+def main(max_size_mb: int):
+    print(
+        f"{'size (MB)':>10} {'C + Python':>14} {'C + NumPy':>14} {'NumPy':>14} "
+        f"{'magnitude Py':>14} {'magnitude NumPy':>16}"
+    )
+    size_mb = 1
+    while size_mb <= max_size_mb:
+        data = create_data(size_mb * 2**20)
+        c_python_time, c_numpy_time = None, None
+        if entropy_c is not None:
+            c_python_time = time_function(c_with_python_sampling, data)
+            c_numpy_time = time_function(c_with_numpy_sampling, data)
+        numpy_time = time_function(numpy, data)
+        magnitude_python_time = time_function(sample_in_python, data)
+        magnitude_numpy_time = time_function(lambda d: sample_numpy(d, MAX_SAMPLES), data)
+        print(
+            f"{size_mb:>10} {format_time(c_python_time)} {format_time(c_numpy_time)} "
+            f"{format_time(numpy_time)} {format_time(magnitude_python_time)} "
+            f"{magnitude_numpy_time:>16.3f}"
+        )
+        size_mb *= 4
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
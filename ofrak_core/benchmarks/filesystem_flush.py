@@ -0,0 +1,100 @@
+"""
+Benchmark `FilesystemRoot.flush_to_disk`, which resolves the paths of all entries in one walk of the
+tree and writes files with a pool of threads, against the way it used to flush: getting the path
+and children of one entry at a time, and writing each file from the event loop. The filesystem
+contains many small files spread over nested folders.
+
+Usage: python benchmarks/filesystem_flush.py [FILE_COUNT] [FILE_SIZE]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+from ofrak import OFRAK
+from ofrak.core.filesystem import FilesystemEntry, FilesystemRoot
+from ofrak.service.resource_service_i import ResourceFilter
+
+FILES_PER_FOLDER = 100
+FOLDERS_PER_FOLDER = 10
+
+
+def create_tree(file_count: int, file_size: int, directory: str):
+    for i in range(file_count):
+        folder_index = i // FILES_PER_FOLDER
+        folder = os.path.join(
+            directory,
+            f"folder{folder_index // FOLDERS_PER_FOLDER}",
+            f"subfolder{folder_index % FOLDERS_PER_FOLDER}",
+        )
+        if i % FILES_PER_FOLDER == 0:
+            os.makedirs(folder)
+        with open(os.path.join(folder, f"file{i}.txt"), "wb") as f:
+            f.write((b"%d: ofrak benchmark file\n" % i * (file_size // 16 + 1))[:file_size])
+
+
+async def flush_one_entry_at_a_time(filesystem_root: FilesystemRoot, root_path: str):
+    # Folders and files only, which is all the benchmark tree contains
+    entries = list(
+        await filesystem_root.resource.get_children_as_view(
+            FilesystemEntry, r_filter=ResourceFilter(tags=(FilesystemEntry,))
+        )
+    )
+    while len(entries) > 0:
+        entry = entries.pop(0)
+        entry_name = os.path.join(root_path, await entry.get_path())
+        if entry.is_folder():
+            os.makedirs(entry_name, exist_ok=True)
+            entries.extend(
+                await entry.resource.get_children_as_view(
+                    FilesystemEntry, r_filter=ResourceFilter(tags=(FilesystemEntry,))
+                )
+            )
+        else:
+            with open(entry_name, "wb") as f:
+                f.write(await entry.resource.get_data())
+            entry.apply_stat_attrs(entry_name)
+
+
+async def flush_to_disk(filesystem_root: FilesystemRoot, root_path: str):
+    await filesystem_root.flush_to_disk(root_path)
+
+
+async def time_flush(
+    source_dir: str,
+    flush: Callable[[FilesystemRoot, str], Awaitable[None]],
+) -> float:
+    # Use a new context each time, so that the resources of a run do not slow down the next one
+    ofrak_context = await OFRAK().create_ofrak_context()
+    resource = await ofrak_context.create_root_resource("filesystem", b"", tags=(FilesystemRoot,))
+    filesystem_root = await resource.view_as(FilesystemRoot)
+    await filesystem_root.initialize_from_disk(source_dir)
+    with tempfile.TemporaryDirectory() as flush_dir:
+        start = time.perf_counter()
+        await flush(filesystem_root, flush_dir)
+        flush_time = time.perf_counter() - start
+    await ofrak_context.shutdown_context()
+    return flush_time
+
+
+async def main(file_count: int, file_size: int):
+    with tempfile.TemporaryDirectory() as source_dir:
+        create_tree(file_count, file_size, source_dir)
+        one_at_a_time = await time_flush(source_dir, flush_one_entry_at_a_time)
+        concurrent = await time_flush(source_dir, flush_to_disk)
+    print(f"{'files':>8} {'one at a time (s)':>18} {'flush_to_disk (s)':>18} {'files/s':>10}")
+    print(
+        f"{file_count:>8} {one_at_a_time:>18.2f} {concurrent:>18.2f} "
+        f"{file_count / concurrent:>10.0f}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 50_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        )
+    )
@@ -0,0 +1,78 @@
+"""
+Benchmark the two ways `GzipUnpacker` decompresses gzip data (in-process with zlib, or with pigz)
+across input sizes, and print the smallest compressed size above which pigz is always faster. Also
+print the size `measure_pigz_min_compressed_size` picks at runtime from timings on two sizes only,
+to check it against the full benchmark. Either can be set as
+`ofrak.core.gzip.PIGZ_MIN_COMPRESSED_SIZE` to skip the measurement at runtime.
+
+Usage: python benchmarks/gzip_unpack.py [MAX_SIZE_MB]
+"""
+import asyncio
+import sys
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from ofrak.core.gzip import (
+    PIGZ,
+    create_gzip_measurement_data,
+    decompress_gzip,
+    decompress_gzip_with_pigz,
+    measure_pigz_min_compressed_size,
+)
+
+REPEAT = 3
+
+
+async def time_decompression(decompress: Callable[[bytes], Awaitable[bytes]], data: bytes) -> float:
+    best_time = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await decompress(data)
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time
+
+
+async def in_process(data: bytes) -> bytes:
+    return decompress_gzip(data)
+
+
+def find_crossover(results: List[Tuple[int, float, float]]) -> Optional[int]:
+    """
+    :param results: compressed size, in-process time and pigz time of each input, by increasing size
+    :return: the smallest compressed size from which pigz is faster for all larger inputs, if any
+    """
+    crossover = None
+    for compressed_size, in_process_time, pigz_time in reversed(results):
+        if pigz_time >= in_process_time:
+            break
+        crossover = compressed_size
+    return crossover
+
+
+async def main(max_size: int):
+    if not await PIGZ.is_tool_installed():
+        sys.exit("pigz is not installed")
+
+    results = []
+    print(f"{'compressed size':>16} {'in-process (s)':>16} {'pigz (s)':>16}")
+    size = 0x1000
+    while size <= max_size:
+        data = create_gzip_measurement_data(size)
+        assert decompress_gzip(data) == await decompress_gzip_with_pigz(data)
+        in_process_time = await time_decompression(in_process, data)
+        pigz_time = await time_decompression(decompress_gzip_with_pigz, data)
+        results.append((len(data), in_process_time, pigz_time))
+        print(f"{len(data):>16} {in_process_time:>16.6f} {pigz_time:>16.6f}")
+        size *= 4
+
+    crossover = find_crossover(results)
+    if crossover is None:
+        print("pigz is never faster on these inputs")
+    else:
+        print(f"pigz is faster from {crossover} bytes")
+    print(f"Size measured at runtime: {await measure_pigz_min_compressed_size()} bytes")
+
+
+if __name__ == "__main__":
+    max_size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    asyncio.run(main(max_size_mb * 1024 * 1024))
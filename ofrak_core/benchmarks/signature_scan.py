@@ -0,0 +1,75 @@
+"""
+Benchmark finding the signatures of known formats in data across input sizes: running binwalk's
+signature scan on a file (as `BinwalkAnalyzer` does), if binwalk is installed, and the
+`SignatureScanner` (as `SignatureAnalyzer` does), on random data and on random data with compressed
+streams and archives in it.
+
+Usage: python benchmarks/signature_scan.py [MAX_SIZE_MB]
+"""
+import gzip
+import io
+import os
+import sys
+import tarfile
+import tempfile
+import time
+import zlib
+
+import ofrak.core  # noqa: F401 (registers the signatures of the formats)
+from ofrak.core.signatures import SignatureScanner
+
+try:
+    import binwalk
+
+    BINWALK_INSTALLED = True
+except ImportError:
+    BINWALK_INSTALLED = False
+
+
+def create_data(size: int, with_formats: bool) -> bytes:
+    chunk = os.urandom(0x10000)
+    if with_formats:
+        tar_buffer = io.BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode="w") as tar:
+            info = tarfile.TarInfo("payload")
+            info.size = 0x1000
+            tar.addfile(info, io.BytesIO(os.urandom(0x1000)))
+        chunk += gzip.compress(b"ofrak" * 1000) + zlib.compress(b"ofrak" * 1000)
+        chunk += tar_buffer.getvalue()
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def time_binwalk(data: bytes) -> float:
+    with tempfile.NamedTemporaryFile() as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        start = time.perf_counter()
+        binwalk.scan(temp_file.name, signature=True, quiet=True)
+        return time.perf_counter() - start
+
+
+def time_scanner(scanner: SignatureScanner, data: bytes) -> float:
+    start = time.perf_counter()
+    scanner.scan(memoryview(data))
+    return time.perf_counter() - start
+
+
+def main(max_size_mb: int):
+    scanner = SignatureScanner.from_registered_signatures()
+    print(
+        f"{'size (MB)':>10} {'binwalk':>12} {'scanner':>12} {'binwalk (f)':>12} "
+        f"{'scanner (f)':>12}"
+    )
+    size_mb = 1
+    while size_mb <= max_size_mb:
+        times = []
+        for with_formats in (False, True):
+            data = create_data(size_mb * 2**20, with_formats)
+            times.append(time_binwalk(data) if BINWALK_INSTALLED else float("nan"))
+            times.append(time_scanner(scanner, data))
+        print(f"{size_mb:>10} " + " ".join(f"{duration:>12.3f}" for duration in times))
+        size_mb *= 4
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -0,0 +1,69 @@
+"""
+Benchmark the ways strings can be found in data across input sizes: running GNU `strings` and
+parsing its output (as `StringsAnalyzer` used to), and the regular expression and NumPy
+implementations of `find_strings`, for ASCII strings only and for all encodings.
+
+Usage: python benchmarks/strings_scan.py [MAX_SIZE_MB]
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict
+
+from ofrak.core.strings_analyzer import StringEncoding, _find_strings_re, _find_strings_numpy
+
+MIN_LENGTH = 8
+ALL_ENCODINGS = tuple(StringEncoding)
+
+
+def create_data(size: int) -> bytes:
+    # Random bytes with ASCII and UTF-16 strings, like the sections of typical firmware
+    chunk = (
+        os.urandom(0x1000)
+        + b"\x00".join(b"ofrak benchmark string %d" % i for i in range(100))
+        + "".join(f"ofrak UTF-16 string {i}\0" for i in range(50)).encode("utf-16-le")
+    )
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def gnu_strings(data: bytes) -> Dict[int, str]:
+    output = subprocess.run(
+        ["strings", "-t", "d", f"-{MIN_LENGTH}"], input=data, stdout=subprocess.PIPE, check=True
+    ).stdout
+    strings = {}
+    for line in output.decode("ascii").splitlines():
+        offset, _, string = line.strip().partition(" ")
+        strings[int(offset)] = string
+    return strings
+
+
+def time_function(function: Callable[[bytes], object], data: bytes) -> float:
+    start = time.perf_counter()
+    function(data)
+    return time.perf_counter() - start
+
+
+def main(max_size_mb: int):
+    print(
+        f"{'size (MB)':>10} {'GNU strings':>12} {'regex':>12} {'NumPy':>12} "
+        f"{'regex (all)':>12} {'NumPy (all)':>12}"
+    )
+    size_mb = 1
+    while size_mb <= max_size_mb:
+        data = create_data(size_mb * 2**20)
+        times = [
+            time_function(gnu_strings, data),
+            time_function(lambda d: _find_strings_re(d, MIN_LENGTH, (StringEncoding.ASCII,)), data),
+            time_function(
+                lambda d: _find_strings_numpy(d, MIN_LENGTH, (StringEncoding.ASCII,)), data
+            ),
+            time_function(lambda d: _find_strings_re(d, MIN_LENGTH, ALL_ENCODINGS), data),
+            time_function(lambda d: _find_strings_numpy(d, MIN_LENGTH, ALL_ENCODINGS), data),
+        ]
+        print(f"{size_mb:>10} " + " ".join(f"{duration:>12.3f}" for duration in times))
+        size_mb *= 4
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -1,8 +1,8 @@
-from ofrak.component.analyzer import Analyzer
+from ofrak.component.analyzer import Analyzer, BatchAnalyzer
 from ofrak.component.identifier import Identifier
 from ofrak.component.modifier import Modifier
 from ofrak.component.packer import Packer
-from ofrak.component.unpacker import Unpacker
+from ofrak.component.unpacker import Unpacker, BatchUnpacker
 from ofrak.model.resource_model import ResourceAttributes, ResourceModel, Data
 from ofrak.model.tag_model import ResourceTag
 from ofrak.ofrak_context import OFRAK, OFRAKContext
@@ -50,6 +50,12 @@ class GUICommand(OfrakCommandRunsScript):
             action="store_true",
             help="Enable CORS for debugging.",
         )
+        gui_parser.add_argument(
+            "--enable-search-index",
+            action="store_true",
+            help="Index the data of resources in the background, so that searching their data "
+            "only reads the parts which may match (requires NumPy).",
+        )
         self.add_ofrak_arguments(gui_parser)
         return gui_parser
 
@@ -65,5 +71,6 @@ class GUICommand(OfrakCommandRunsScript):
             ofrak_context=ofrak_context,
             open_in_browser=(not args.no_browser),
             enable_cors=(args.enable_cors),
+            enable_search_index=args.enable_search_index,
         )
         await server.run_until_cancelled()
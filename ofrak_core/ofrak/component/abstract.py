@@ -4,6 +4,7 @@ import logging
 from abc import ABC, abstractmethod
 from subprocess import CalledProcessError
 from typing import (
+    Awaitable,
     Dict,
     Iterable,
     List,
@@ -12,6 +13,8 @@ from typing import (
     Any,
     cast,
     Tuple,
+    Sequence,
+    Union,
 )
 
 from ofrak.component.interface import ComponentInterface
@@ -30,12 +33,14 @@ from ofrak.model.resource_model import (
     ResourceContext,
     MutableResourceModel,
 )
+from ofrak.model.telemetry_model import ComponentRunTelemetry, get_current_component_run
 from ofrak.model.viewable_tag_model import ResourceViewContext
 from ofrak.resource import Resource, ResourceFactory, save_resources
 from ofrak.service.data_service_i import DataServiceInterface
 from ofrak.service.dependency_handler import DependencyHandlerFactory
 from ofrak.service.resource_service_i import ResourceServiceInterface
 from ofrak_type.error import NotFoundError
+from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
 
@@ -90,8 +95,21 @@ class AbstractComponent(ComponentInterface[CC], ABC):
         )
         if config is None and self._default_config is not None:
             config = dataclasses.replace(self._default_config)
+        await self._run_handling_errors(self._run(resource, config))
+
+        (component_result,) = await self._save_run_results(
+            job_id,
+            (resource_id,),
+            (component_context,),
+            job_context,
+            resource_context,
+            resource_view_context,
+        )
+        return component_result
+
+    async def _run_handling_errors(self, run: Awaitable[None]):
         try:
-            await self._run(resource, config)
+            await run
         except FileNotFoundError as e:
             # Check if the problem was that one of the dependencies is missing
             missing_file = e.filename
@@ -102,6 +120,37 @@ class AbstractComponent(ComponentInterface[CC], ABC):
         except CalledProcessError as e:
             raise ComponentSubprocessError(e)
 
+    async def _save_run_results(
+        self,
+        job_id: bytes,
+        resource_ids: Sequence[bytes],
+        component_contexts: Sequence[ComponentContext],
+        job_context: Optional[JobRunContext],
+        resource_context: ResourceContext,
+        resource_view_context: ResourceViewContext,
+    ) -> List[ComponentRunResult]:
+        """
+        Apply the changes made by the component running on each of the resources, register the
+        dependencies of the results, and save all modified resources.
+
+        :param job_id:
+        :param resource_ids: The resources the component ran on
+        :param component_contexts: The component context of each run, in the same order as
+        `resource_ids`
+        :param job_context:
+        :param resource_context: The resource context shared by all runs
+        :param resource_view_context: The resource view context shared by all runs
+        :return: The result of each run, in the same order as `resource_ids`
+        """
+        run_telemetry = get_current_component_run()
+        if run_telemetry is not None:
+            await self._measure_data_usage(run_telemetry, component_contexts, resource_context)
+
+        if len(component_contexts) == 1:
+            component_context = component_contexts[0]
+        else:
+            component_context = _merge_component_contexts(component_contexts)
+
         deleted_resource_models: List[MutableResourceModel] = list()
 
         for deleted_r_id in component_context.resources_deleted:
@@ -133,12 +182,23 @@ class AbstractComponent(ComponentInterface[CC], ABC):
         )
         patch_results = await self.apply_all_patches(component_context)
         await dependency_handler.handle_post_patch_dependencies(patch_results)
-        dependency_handler.create_component_dependencies(self.get_id(), self.get_version())
-        dependency_handler.create_resource_dependencies(self.get_id())
+        # Dependencies are registered for each run separately, so that the results of each run
+        # only depend on what was accessed during that run
+        for resource_id, run_component_context in zip(resource_ids, component_contexts):
+            run_dependency_handler = self._dependency_handler_factory.create(
+                self._resource_service,
+                self._data_service,
+                run_component_context,
+                resource_context,
+            )
+            run_dependency_handler.create_component_dependencies(self.get_id(), self.get_version())
+            run_dependency_handler.create_resource_dependencies(self.get_id(), resource_id)
 
         # Get modified resources
         modified_resource_models: Dict[bytes, MutableResourceModel] = dict()
         modified_resource_ids = component_context.get_modified_resource_ids()
+        for run_component_context in component_contexts:
+            modified_resource_ids.update(run_component_context.get_modified_resource_ids())
         for modified_r_id in modified_resource_ids:
             mutable_resource_model = resource_context.resource_models.get(modified_r_id)
             if mutable_resource_model:
@@ -153,12 +213,7 @@ class AbstractComponent(ComponentInterface[CC], ABC):
         data_ids_to_models = await dependency_handler.map_data_ids_to_resources(
             patch_result.data_id for patch_result in patch_results
         )
-        for m in data_ids_to_models.values():
-            modified_resource_ids.add(m.id)
-
-        # Exclude deleted resources from `modified_resource_ids`
-        # (deleting and modifying are handled separately)
-        modified_resource_ids.difference_update(component_context.resources_deleted)
+        patched_resource_ids = {m.id for m in data_ids_to_models.values()}
 
         # Save modified resources
         await self._save_resources(
@@ -170,13 +225,73 @@ class AbstractComponent(ComponentInterface[CC], ABC):
             component_context,
         )
 
-        component_result = ComponentRunResult(
-            {self.get_id()},
-            modified_resource_ids,
-            component_context.resources_deleted,
-            component_context.resources_created,
-        )
-        return component_result
+        if len(component_contexts) == 1:
+            modified_resource_ids.update(patched_resource_ids)
+            # Exclude deleted resources from `modified_resource_ids`
+            # (deleting and modifying are handled separately)
+            modified_resource_ids.difference_update(component_context.resources_deleted)
+            return [
+                ComponentRunResult(
+                    {self.get_id()},
+                    modified_resource_ids,
+                    component_context.resources_deleted,
+                    component_context.resources_created,
+                )
+            ]
+
+        # The resource context is shared by all runs, so only include the resources which were
+        # actually patched in the result of each run
+        patched_data_ids = {patch_result.data_id for patch_result in patch_results}
+        patched_resource_ids = {
+            resource_m.id
+            for data_id, resource_m in data_ids_to_models.items()
+            if data_id in patched_data_ids
+        }
+        component_results = []
+        for run_component_context in component_contexts:
+            run_modified_resource_ids = run_component_context.get_modified_resource_ids()
+            run_modified_resource_ids.update(patched_resource_ids)
+            run_modified_resource_ids.difference_update(component_context.resources_deleted)
+            component_results.append(
+                ComponentRunResult(
+                    {self.get_id()},
+                    run_modified_resource_ids,
+                    run_component_context.resources_deleted,
+                    run_component_context.resources_created,
+                )
+            )
+        return component_results
+
+    async def _measure_data_usage(
+        self,
+        run_telemetry: ComponentRunTelemetry,
+        component_contexts: Iterable[ComponentContext],
+        resource_context: ResourceContext,
+    ):
+        """
+        Add how much data the component read and wrote, and how many resources it created, to the
+        telemetry of the run. Must be called before the patches of the run are applied.
+        """
+        created_data_ids = []
+        for component_context in component_contexts:
+            for access_tracker in component_context.access_trackers.values():
+                run_telemetry.bytes_read += sum(
+                    data_range.length()
+                    for data_range in Range.merge_ranges(access_tracker.data_accessed)
+                )
+            for modification_tracker in component_context.modification_trackers.values():
+                run_telemetry.bytes_written += sum(
+                    len(data_patch.data) for data_patch in modification_tracker.data_patches
+                )
+            run_telemetry.resources_created += len(component_context.resources_created)
+            for resource_id in component_context.resources_created:
+                data_id = resource_context.resource_models[resource_id].data_id
+                if data_id is not None:
+                    created_data_ids.append(data_id)
+        # Resources mapping their parent's data do not add new data
+        for data_model in await self._data_service.get_by_ids(created_data_ids):
+            if not data_model.is_mapped():
+                run_telemetry.bytes_written += data_model.range.length()
 
     @abstractmethod
     async def _run(self, resource: Resource, config: CC):
@@ -210,7 +325,9 @@ class AbstractComponent(ComponentInterface[CC], ABC):
 
     @staticmethod
     def _get_default_config_from_method(
-        component_method: Callable[[Any, Resource, CC], Any]
+        component_method: Union[
+            Callable[[Any, Resource, CC], Any], Callable[[Any, List[Resource], CC], Any]
+        ]
     ) -> Optional[CC]:
         run_signature = inspect.signature(component_method)
         config_arg_type = run_signature.parameters["config"]
@@ -254,6 +371,121 @@ class AbstractComponent(ComponentInterface[CC], ABC):
             f"{self.get_id().decode()} has already been run on resource {resource.get_id().hex()}"
         )
 
+    def _has_component_run(self, resource: Resource) -> bool:
+        """
+        Check whether this version of the component already ran on the resource, in which case it
+        should not run again.
+        """
+        if resource.has_component_run(self.get_id(), self.get_version()):
+            self._log_component_has_run_warning(resource)
+            return True
+        if resource.has_component_run(self.get_id()):
+            self._log_component_has_run_warning(resource)
+            raise NotImplementedError(
+                "If the component has already run (but on a different "
+                "version), we should remove the dependencies"
+            )
+        return False
+
+
+class AbstractBatchComponent(AbstractComponent[CC], ABC):
+    """
+    A component which can run on many resources in one call. When the same component needs to
+    run on many resources at once (for example, analyzing all the symbols of an ELF to get them
+    as views), the job service passes all of them to a single call of `run_batch`, which sets up
+    the contexts, fetches the resources and saves the results once for the whole batch, instead of
+    once per resource. If the batch fails, the component runs on each resource alone, so that only
+    the resources it fails on fail.
+    """
+
+    async def run_batch(
+        self,
+        job_id: bytes,
+        resource_ids: Sequence[bytes],
+        job_contexts: Sequence[JobRunContext],
+        resource_context: ResourceContext,
+        resource_view_context: ResourceViewContext,
+        config: CC,
+    ) -> List[ComponentRunResult]:
+        """
+        Run the component on each of the given resources.
+
+        Each resource still gets its own component context, so the dependencies registered for the
+        results on each resource are the same as if the component ran on that resource alone.
+
+        :param job_id:
+        :param resource_ids:
+        :param job_contexts: The job context of each run, in the same order as `resource_ids`
+        :param resource_context:
+        :param resource_view_context:
+        :param config:
+        :return: The result of running the component on each resource, in the same order as
+        `resource_ids`
+        """
+        missing_resource_ids = [
+            resource_id
+            for resource_id in resource_ids
+            if resource_id not in resource_context.resource_models
+        ]
+        for resource_model in await self._resource_service.get_by_ids(missing_resource_ids):
+            resource_context.resource_models[resource_model.id] = MutableResourceModel.from_model(
+                resource_model
+            )
+
+        component_contexts = []
+        resources = []
+        for resource_id, job_context in zip(resource_ids, job_contexts):
+            component_context = ComponentContext(self.get_id(), self.get_version())
+            resource = await self._resource_factory.create(
+                job_id,
+                resource_id,
+                resource_context,
+                resource_view_context,
+                component_context,
+                job_context,
+            )
+            component_contexts.append(component_context)
+            resources.append(resource)
+        if config is None and self._default_config is not None:
+            config = dataclasses.replace(self._default_config)
+        await self._run_handling_errors(self._run_batch(resources, config))
+
+        # The job contexts are only needed by the resources used while running the component
+        return await self._save_run_results(
+            job_id,
+            resource_ids,
+            component_contexts,
+            None,
+            resource_context,
+            resource_view_context,
+        )
+
+    @abstractmethod
+    async def _run_batch(self, resources: List[Resource], config: CC):
+        raise NotImplementedError()
+
+
+def _merge_component_contexts(component_contexts: Iterable[ComponentContext]) -> ComponentContext:
+    """
+    Combine the modifications, created and deleted resources of several runs of the same component
+    into one component context, so they can be applied and saved together.
+    """
+    merged_context: Optional[ComponentContext] = None
+    for component_context in component_contexts:
+        if merged_context is None:
+            merged_context = ComponentContext(
+                component_context.component_id, component_context.component_version
+            )
+        for resource_id, modification_tracker in component_context.modification_trackers.items():
+            merged_context.modification_trackers[resource_id].data_patches.extend(
+                modification_tracker.data_patches
+            )
+        merged_context.resources_created.update(component_context.resources_created)
+        merged_context.resources_deleted.update(component_context.resources_deleted)
+    if merged_context is None:
+        raise ValueError("Cannot merge an empty collection of component contexts")
+    return merged_context
+
 
 class ComponentMissingDependencyError(RuntimeError):
     def __init__(
@@ -1,10 +1,10 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Type, Tuple, Generic, TypeVar, Union, cast, Iterable, Optional
+from typing import Type, Tuple, Generic, TypeVar, Union, cast, Iterable, Optional, List, Sequence
 
 from ofrak.resource import Resource
 
-from ofrak.component.abstract import AbstractComponent
+from ofrak.component.abstract import AbstractComponent, AbstractBatchComponent
 from ofrak.model.component_model import CC
 from ofrak.model.resource_model import ResourceAttributes
 from ofrak.model.viewable_tag_model import ViewableResourceTag
@@ -106,15 +106,12 @@ class Analyzer(AbstractComponent, Generic[CC, AnalyzerReturnType], ABC):
         return cls._get_default_config_from_method(cls.analyze)
 
     async def _run(self, resource: Resource, config: CC):
-        if resource.has_component_run(self.get_id(), self.get_version()):
-            return self._log_component_has_run_warning(resource)
-        if resource.has_component_run(self.get_id()):
-            self._log_component_has_run_warning(resource)
-            raise NotImplementedError(
-                "If the component has already run (but on a different "
-                "version), we should remove the dependencies"
-            )
+        if self._has_component_run(resource):
+            return
         analysis_results = await self.analyze(resource, config)
+        self._add_analysis_results(resource, analysis_results)
+
+    def _add_analysis_results(self, resource: Resource, analysis_results: AnalyzerReturnType):
         attributes = self.get_attributes_from_results(analysis_results)
         for attrs in attributes:
             resource.add_attributes(attrs)
@@ -123,3 +120,55 @@ class Analyzer(AbstractComponent, Generic[CC, AnalyzerReturnType], ABC):
         attribute_types = self.get_outputs_as_attribute_types()
         for attribute_type in attribute_types:
             resource.add_component_for_attributes(self.get_id(), self.get_version(), attribute_type)
+
+
+class BatchAnalyzer(Analyzer[CC, AnalyzerReturnType], AbstractBatchComponent[CC], ABC):
+    """
+    Analyzers which analyze many resources in one call. This is worthwhile for analyzers which
+    typically run on very many small resources at once (such as ELF symbols or instructions),
+    where the cost of running a component on each resource separately would dominate the
+    analysis itself, or where some of the work can be shared between resources.
+    """
+
+    @abstractmethod
+    async def analyze_batch(
+        self, resources: List[Resource], config: CC
+    ) -> Sequence[AnalyzerReturnType]:
+        """
+        Analyze each of the resources to extract specific
+        [ResourceAttributes][ofrak.model.resource_model.ResourceAttributes].
+
+        Users should not call this method directly; rather, they should run
+        [Resource.run][ofrak.resource.Resource.run] or
+        [Resource.analyze][ofrak.resource.Resource.analyze].
+
+        :param resources: The resources that are being analyzed
+        :param config: Optional config for analyzing, shared by all the resources. If an
+        implementation provides a default, this default will always be used when config would
+        otherwise be None.
+        :return: The analysis results of each resource, in the same order as `resources`
+        """
+        raise NotImplementedError()
+
+    async def analyze(self, resource: Resource, config: CC) -> AnalyzerReturnType:
+        (analysis_results,) = await self.analyze_batch([resource], config)
+        return analysis_results
+
+    @classmethod
+    def get_default_config(cls) -> Optional[CC]:
+        return cls._get_default_config_from_method(cls.analyze_batch)
+
+    async def _run_batch(self, resources: List[Resource], config: CC):
+        resources_to_analyze = [
+            resource for resource in resources if not self._has_component_run(resource)
+        ]
+        if not resources_to_analyze:
+            return
+        all_analysis_results = await self.analyze_batch(resources_to_analyze, config)
+        if len(all_analysis_results) != len(resources_to_analyze):
+            raise AnalyzerError(
+                f"Analyzer {type(self).__name__} returned {len(all_analysis_results)} results "
+                f"for a batch of {len(resources_to_analyze)} resources"
+            )
+        for resource, analysis_results in zip(resources_to_analyze, all_analysis_results):
+            self._add_analysis_results(resource, analysis_results)
@@ -0,0 +1,529 @@
+"""
+Helpers for components running [external tools][ofrak.model.component_model.ComponentExternalTool]
+on resource data, without writing the data to a temporary file on disk first.
+
+The preferred way to give data to a tool is to pipe it to its standard input with
+[run_tool][ofrak.component.external_tool.run_tool]. Tools which need to read their input from a
+path (for instance, because they seek in it) can be given the path of an in-memory file created by
+[tool_input_path][ofrak.component.external_tool.tool_input_path]. Tools which write several output
+files can write them to a [scratch_directory][ofrak.component.external_tool.scratch_directory],
+which is in a tmpfs when one with enough free space is available.
+
+All tools are run through the
+[EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR], which bounds how
+many tool processes run at once, so that auto-running components on many resources concurrently
+does not start more processes than the host can handle.
+"""
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from subprocess import CalledProcessError, CompletedProcess
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Sequence, Tuple
+
+from ofrak.model.data_model import LazyData
+from ofrak_type.range import Range
+
+# Root of the tmpfs in which scratch directories are created; set to None to always use the
+# default temporary directory
+SCRATCH_TMPFS_ROOT: Optional[str] = "/dev/shm"
+# A scratch directory is only created in the tmpfs if it has at least this many times the expected
+# size of the data written to the scratch directory free, since a tmpfs is backed by memory and
+# is often small (64MB by default in Docker containers)
+SCRATCH_TMPFS_HEADROOM = 4
+
+
+@dataclass
+class ExternalToolStats:
+    """
+    Measurements of the processes of an external tool run through an
+    [ExternalToolExecutor][ofrak.component.external_tool.ExternalToolExecutor].
+
+    :ivar runs: number of processes of the tool which finished
+    :ivar failures: number of processes which returned a non-zero exit code or could not be started
+    :ivar running: number of processes currently running
+    :ivar queued: number of processes currently waiting for a free slot
+    :ivar max_running: highest number of processes which ran at once
+    :ivar max_queued: highest number of processes which waited for a free slot at once
+    :ivar wait_time: total time processes waited for a free slot, in seconds
+    :ivar run_time: total time processes ran, in seconds
+    :ivar bytes_in: total size of the data piped to the standard input of processes
+    :ivar bytes_out: total size of the standard output and error collected from processes
+    """
+
+    runs: int = 0
+    failures: int = 0
+    running: int = 0
+    queued: int = 0
+    max_running: int = 0
+    max_queued: int = 0
+    wait_time: float = 0.0
+    run_time: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+class ExternalToolExecutor:
+    """
+    Bound the number of external tool processes running at once, both in total and for each tool,
+    and keep [measurements][ofrak.component.external_tool.ExternalToolStats] of the processes of
+    each tool. Processes which cannot start right away wait in a queue, and start in the order they
+    were requested as soon as a slot for their tool is free.
+
+    Tools are identified by the name of the executable they run (for instance, `7zz`).
+
+    :ivar max_processes: Maximum number of tool processes running at once
+    :ivar tool_limits: Maximum number of processes running at once for specific tools, by name
+    """
+
+    def __init__(
+        self, max_processes: Optional[int] = None, tool_limits: Optional[Dict[str, int]] = None
+    ):
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.tool_limits: Dict[str, int] = dict(tool_limits or {})
+        self._stats: Dict[str, ExternalToolStats] = dict()
+        self._running = 0
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+
+    def set_tool_limit(self, tool: str, limit: Optional[int]):
+        """
+        Set the maximum number of processes of a tool running at once, on top of the overall limit.
+
+        :param tool: Name of the tool
+        :param limit: Maximum number of processes, or `None` to only apply the overall limit
+        """
+        if limit is None:
+            self.tool_limits.pop(tool, None)
+        else:
+            self.tool_limits[tool] = limit
+        self._wake_waiters()
+
+    def get_stats(self) -> Dict[str, ExternalToolStats]:
+        """
+        Get the measurements of each tool which was run, by tool name.
+        """
+        return self._stats
+
+    def reset_stats(self):
+        """
+        Clear the measurements of all tools, except for processes currently running or queued.
+        """
+        self._stats = {
+            tool: ExternalToolStats(running=stats.running, queued=stats.queued)
+            for tool, stats in self._stats.items()
+            if stats.running or stats.queued
+        }
+
+    @asynccontextmanager
+    async def process_slot(self, tool: str) -> AsyncIterator[ExternalToolStats]:
+        """
+        Wait for a free slot for a process of a tool, and hold it while in the context. Tools run
+        with [run][ofrak.component.external_tool.ExternalToolExecutor.run] get a slot
+        automatically; this is for processes started by other means, for instance to read their
+        output as a stream.
+
+        :param tool: Name of the tool
+        :return: The measurements of the tool, which can be completed with `bytes_in` and
+        `bytes_out`
+        """
+        stats = self._stats.setdefault(tool, ExternalToolStats())
+        wait_start = time.perf_counter()
+        if self._waiters or not self._can_start(tool):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append((tool, waiter))
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # A slot was given to this process just as it got cancelled; pass it on
+                    self._release(tool)
+                else:
+                    self._waiters.remove((tool, waiter))
+                raise
+            finally:
+                stats.queued -= 1
+        else:
+            self._acquire(tool)
+        run_start = time.perf_counter()
+        stats.wait_time += run_start - wait_start
+        try:
+            yield stats
+        except BaseException:
+            stats.failures += 1
+            raise
+        finally:
+            stats.runs += 1
+            stats.run_time += time.perf_counter() - run_start
+            self._release(tool)
+
+    async def run(
+        self,
+        cmd: Sequence[str],
+        input_data: Optional[bytes] = None,
+        check: bool = True,
+        cwd: Optional[str] = None,
+    ) -> CompletedProcess:
+        """
+        Run an external tool once a slot for it is free. See
+        [run_tool][ofrak.component.external_tool.run_tool].
+        """
+        async with self.process_slot(os.path.basename(cmd[0])) as stats:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL if input_data is None else asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+            )
+            stdout, stderr = await proc.communicate(input_data)
+            assert proc.returncode is not None
+            stats.bytes_in += len(input_data or b"")
+            stats.bytes_out += len(stdout) + len(stderr)
+            if proc.returncode:
+                stats.failures += 1
+        if check and proc.returncode:
+            raise CalledProcessError(proc.returncode, list(cmd), stdout, stderr)
+        return CompletedProcess(list(cmd), proc.returncode, stdout, stderr)
+
+    def _can_start(self, tool: str) -> bool:
+        if self._running >= self.max_processes:
+            return False
+        tool_limit = self.tool_limits.get(tool)
+        return tool_limit is None or self._stats[tool].running < tool_limit
+
+    def _acquire(self, tool: str):
+        stats = self._stats[tool]
+        self._running += 1
+        stats.running += 1
+        stats.max_running = max(stats.max_running, stats.running)
+
+    def _release(self, tool: str):
+        self._running -= 1
+        self._stats[tool].running -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        # Start the first queued processes whose tools have a free slot; a process waiting for a
+        # busy tool does not hold up the processes of other tools queued after it
+        for tool, waiter in list(self._waiters):
+            if self._running >= self.max_processes:
+                break
+            if waiter.done():
+                continue
+            if self._can_start(tool):
+                self._waiters.remove((tool, waiter))
+                self._acquire(tool)
+                waiter.set_result(None)
+
+
+EXTERNAL_TOOL_EXECUTOR = ExternalToolExecutor()
+
+
+async def run_tool(
+    cmd: Sequence[str],
+    input_data: Optional[bytes] = None,
+    check: bool = True,
+    cwd: Optional[str] = None,
+) -> CompletedProcess:
+    """
+    Run an external tool, piping data to its standard input and collecting its output, like
+    `subprocess.run`. The tool waits for a free slot in the
+    [EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR] before it
+    starts.
+
+    :param cmd: The command to run
+    :param input_data: Data to write to the standard input of the tool; if `None`, the tool gets no
+    standard input
+    :param check: Whether to raise an error if the tool returns a non-zero exit code
+    :param cwd: The directory to run the tool in, if not the current directory
+
+    :raises CalledProcessError: if `check` is set and the tool returns a non-zero exit code; the
+    error has the standard output and error of the tool
+    :return: The completed process, with its return code, standard output and standard error
+    """
+    return await EXTERNAL_TOOL_EXECUTOR.run(cmd, input_data, check, cwd)
+
+
+async def write_tool_input(proc: asyncio.subprocess.Process, input_data: bytes) -> None:
+    """
+    Write data to the standard input of a running tool and close it, for tools whose output is
+    read as a stream while the input is written. The tool may exit without reading all its input.
+
+    :param proc: A process started with `stdin=asyncio.subprocess.PIPE`
+    :param input_data: Data to write to the standard input of the tool
+    """
+    assert proc.stdin is not None
+    try:
+        proc.stdin.write(input_data)
+        await proc.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        proc.stdin.close()
+
+
+@contextmanager
+def tool_input_path(data: bytes, suffix: str = "") -> Iterator[str]:
+    """
+    Get a path from which external tools can read some data, for tools which cannot read their
+    input from a pipe. The data is in an anonymous in-memory file (see `memfd_create(2)`) where
+    available, so nothing is written to disk; the path is only valid inside the context.
+
+    :param data: The data the tool reads
+    :param suffix: Suffix the path must end with, for tools which check the file extension. Since
+    the path of an in-memory file cannot have one, the data is then written to a file in a
+    [scratch_directory][ofrak.component.external_tool.scratch_directory] instead.
+
+    :return: The path of a file containing the data
+    """
+    input_file = ToolInputFile(data, suffix)
+    try:
+        yield input_file.path
+    finally:
+        input_file.close()
+
+
+class ToolInputFile:
+    """
+    A file from which external tools can read some data, like
+    [tool_input_path][ofrak.component.external_tool.tool_input_path], which lasts until it is
+    closed or garbage-collected rather than for a context. This is for data which tools are run on
+    several times, at different times.
+
+    :ivar path: The path of the file containing the data
+    """
+
+    def __init__(self, data: bytes, suffix: str = ""):
+        self._finalizer: weakref.finalize
+        if suffix or not _memfd_supported():
+            scratch_dir = tempfile.mkdtemp(dir=_get_scratch_root(len(data)))
+            self.path = os.path.join(scratch_dir, f"input{suffix}")
+            with open(self.path, "wb") as f:
+                f.write(data)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, scratch_dir, ignore_errors=True)
+            return
+
+        fd = os.memfd_create("ofrak_tool_input", os.MFD_CLOEXEC)
+        self._finalizer = weakref.finalize(self, os.close, fd)
+        with open(fd, "wb", closefd=False) as f:
+            f.write(data)
+        # The path of the file through the /proc of this process (rather than /proc/self) can be
+        # opened by child processes, even though they do not inherit the file descriptor
+        self.path = f"/proc/{os.getpid()}/fd/{fd}"
+
+    def close(self):
+        """
+        Delete the file; its path can no longer be read.
+        """
+        self._finalizer()
+
+
+class ToolOutputData(LazyData):
+    """
+    Standard output of an external tool, such as a file extracted from an archive to the standard
+    output, where the tool is only run the first time the data is read.
+
+    !!! warning
+
+        Data is read synchronously, so the tool runs with `subprocess.run` on the thread reading
+        the data, outside of the
+        [EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR]. The event
+        loop is blocked until the tool exits, and tools run this way do not count towards the
+        limit of concurrent tools.
+
+    The output is kept until all of it is read, so that reading several ranges of it only runs the
+    tool once.
+    """
+
+    def __init__(self, cmd: Sequence[str], size: int, input_file: Optional[ToolInputFile] = None):
+        """
+        :param cmd: The command printing the data to its standard output
+        :param size: Size of the output of the command
+        :param input_file: File the command reads, which is kept until the command has run
+        """
+        self._cmd = list(cmd)
+        self._size = size
+        self._input_file = input_file
+        self._output: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def read(self, data_range: Range) -> bytes:
+        output = self._output
+        if output is None:
+            output = subprocess.run(self._cmd, capture_output=True, check=True).stdout
+            if len(output) != self._size:
+                raise ValueError(
+                    f"Command {self._cmd} output {len(output)} bytes instead of {self._size}"
+                )
+            # The input is no longer needed by this command; it is deleted once no other data
+            # reads it
+            self._input_file = None
+        if data_range.length() == self._size:
+            # The whole data is read, after which the data model keeps it instead
+            self._output = None
+        else:
+            self._output = output
+        return output[data_range.start : data_range.end]
+
+
+class ToolOutputDirectory:
+    """
+    Directory to which an external tool writes several files at once, such as all the members of
+    a solid archive, where the tool is only run the first time one of the files is needed. This is
+    for files which are much cheaper to extract all at once than one by one; the data of each file
+    is read from the directory as
+    [ToolOutputFileData][ofrak.component.external_tool.ToolOutputFileData].
+
+    The directory is a [scratch_directory][ofrak.component.external_tool.scratch_directory] which
+    lasts until it is closed or garbage-collected, that is until the data of all its files has
+    been read or discarded.
+
+    !!! warning
+
+        When the tool is first run by reading a file, it runs with `subprocess.run` on the thread
+        reading the data, outside of the
+        [EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR], like
+        for [ToolOutputData][ofrak.component.external_tool.ToolOutputData]. It only runs through
+        the executor when run with [extract][ofrak.component.external_tool.ToolOutputDirectory.extract].
+
+    :ivar path: The path of the directory
+    """
+
+    def __init__(
+        self,
+        get_cmd: Callable[[str], Sequence[str]],
+        size_hint: int = 0,
+        input_file: Optional[ToolInputFile] = None,
+    ):
+        """
+        :param get_cmd: Function returning the command writing the files to the directory at the
+        given path
+        :param size_hint: Expected size of the files written to the directory
+        :param input_file: File the command reads, which is kept until the command has run
+        """
+        self.path = tempfile.mkdtemp(dir=_get_scratch_root(size_hint))
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+        self._cmd = list(get_cmd(self.path))
+        self._input_file = input_file
+        self._extracted = False
+
+    async def extract(self) -> None:
+        """
+        Run the tool in the
+        [EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR], unless it
+        already ran.
+        """
+        if not self._extracted:
+            await run_tool(self._cmd)
+            self._set_extracted()
+
+    def extract_sync(self) -> None:
+        """
+        Run the tool synchronously with `subprocess.run`, unless it already ran.
+        """
+        if not self._extracted:
+            subprocess.run(self._cmd, capture_output=True, check=True)
+            self._set_extracted()
+
+    def _set_extracted(self):
+        self._extracted = True
+        # The input is no longer needed by this command; it is deleted once no other data reads it
+        self._input_file = None
+
+    def close(self):
+        """
+        Delete the directory and the files in it.
+        """
+        self._finalizer()
+
+
+class ToolOutputFileData(LazyData):
+    """
+    Data of a file written by an external tool to a
+    [ToolOutputDirectory][ofrak.component.external_tool.ToolOutputDirectory], where the tool is only
+    run the first time the data of any file of the directory is read. The directory is kept until
+    the data of this file is read in full, after which the data model keeps the data instead.
+    """
+
+    def __init__(self, directory: ToolOutputDirectory, path: str, size: int):
+        """
+        :param directory: The directory the tool writes the file to
+        :param path: Path of the file, relative to the directory
+        :param size: Size of the file
+        """
+        self._directory: Optional[ToolOutputDirectory] = directory
+        self._path = path
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def read(self, data_range: Range) -> bytes:
+        directory = self._directory
+        if directory is None:
+            raise ValueError(f"The data of {self._path} was already read in full")
+        directory.extract_sync()
+        path = os.path.join(directory.path, self._path)
+        file_size = os.path.getsize(path)
+        if file_size != self._size:
+            raise ValueError(
+                f"Command wrote {file_size} bytes to {self._path} instead of {self._size}"
+            )
+        with open(path, "rb") as f:
+            f.seek(data_range.start)
+            data = f.read(data_range.length())
+        if data_range.length() == self._size:
+            # The whole data is read, after which the data model keeps it instead
+            self._directory = None
+        return data
+
+
+@contextmanager
+def scratch_directory(size_hint: int = 0) -> Iterator[str]:
+    """
+    Create a temporary directory for the input and output files of external tools, which is
+    deleted when leaving the context. It is created in the tmpfs at `SCRATCH_TMPFS_ROOT` if it has
+    enough free space for the expected size of the files, and in the default temporary directory
+    otherwise.
+
+    :param size_hint: Expected size of the files written to the directory, such as the size of the
+    data a tool extracts files from
+
+    :return: The path of the directory
+    """
+    scratch_dir = tempfile.mkdtemp(dir=_get_scratch_root(size_hint))
+    try:
+        yield scratch_dir
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def _get_scratch_root(size_hint: int) -> Optional[str]:
+    if SCRATCH_TMPFS_ROOT is None or not os.access(SCRATCH_TMPFS_ROOT, os.W_OK | os.X_OK):
+        return None
+    try:
+        statvfs = os.statvfs(SCRATCH_TMPFS_ROOT)
+    except OSError:
+        return None
+    if statvfs.f_bavail * statvfs.f_frsize < size_hint * SCRATCH_TMPFS_HEADROOM:
+        return None
+    return SCRATCH_TMPFS_ROOT
+
+
+def _memfd_supported() -> bool:
+    return (
+        sys.platform.startswith("linux")
+        and hasattr(os, "memfd_create")
+        and os.path.isdir(f"/proc/{os.getpid()}/fd")
+    )
@@ -0,0 +1,150 @@
+"""
+A pool of worker processes shared by the components which run CPU-bound functions outside of the
+event loop, such as the [DataSummaryAnalyzer][ofrak.core.entropy.DataSummaryAnalyzer], so that
+each of these components does not start a pool of its own.
+
+Resource data can be shared with the workers through an in-memory file, which they map, with
+[share_data][ofrak.component.process_pool.share_data], rather than pickled and copied through a
+pipe with each function call.
+"""
+import asyncio
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from ofrak.component.external_tool import tool_input_path
+
+T = TypeVar("T")
+
+# Data smaller than this is cheaper to pickle along with a function call than to copy into a new
+# in-memory file
+SHARED_DATA_MIN_SIZE = 0x10000
+
+
+class ComponentProcessPool:
+    """
+    Run functions in a pool of worker processes, which is started the first time it is used. If
+    the pool breaks while running a function (for instance, because a worker was killed), it is
+    replaced by a new pool and the function runs again.
+
+    :ivar max_workers: Number of worker processes, by default the number of CPUs
+    :ivar max_retries: Number of times a function runs again after its pool broke before giving up
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_retries: int = 10):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_retries = max_retries
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run a function in a worker process. The function and its arguments must be picklable.
+
+        :param func: The function to run
+        :param args: The arguments of the function
+
+        :raises RuntimeError: if the pool broke more than `max_retries` times running the function
+        :return: The return value of the function
+        """
+        for _ in range(self.max_retries + 1):
+            executor = self._get_executor()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                # Other functions which ran in the same pool may have replaced it already
+                if self._executor is executor:
+                    self._executor = None
+                    executor.shutdown(wait=False)
+        raise RuntimeError(
+            f"Process pool broke more than {self.max_retries} times running {func.__name__}. "
+            f"Aborting."
+        )
+
+    def shutdown(self):
+        """
+        Stop the worker processes, after they finish running the functions they were sent. The
+        pool starts again if it is used afterwards.
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown()
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+
+COMPONENT_PROCESS_POOL = ComponentProcessPool()
+
+
+@dataclass(frozen=True)
+class SharedData:
+    """
+    Reference to some data, which can be sent to a worker process of the
+    [COMPONENT_PROCESS_POOL][ofrak.component.process_pool.COMPONENT_PROCESS_POOL] without copying
+    the data, and read there with [open_shared_data][ofrak.component.process_pool.open_shared_data].
+
+    :ivar size: Size of the data
+    :ivar path: Path of the in-memory file holding the data, unless it is small
+    :ivar data: The data itself, if it is small enough to be sent along with its reference
+    """
+
+    size: int
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+
+
+@contextmanager
+def share_data(data: bytes) -> Iterator[SharedData]:
+    """
+    Copy data into an in-memory file (see
+    [tool_input_path][ofrak.component.external_tool.tool_input_path]), which worker processes can
+    map instead of receiving a copy of the data. The file is deleted when leaving the context, so
+    the workers must be done reading it by then. Data smaller than `SHARED_DATA_MIN_SIZE` is not
+    copied, but sent along with its reference.
+
+    :param data: The data to share
+
+    :return: A reference to the data, to send to workers
+    """
+    if len(data) < SHARED_DATA_MIN_SIZE:
+        yield SharedData(len(data), data=data)
+        return
+    with tool_input_path(data) as path:
+        yield SharedData(len(data), path=path)
+
+
+@contextmanager
+def open_shared_data(shared_data: SharedData) -> Iterator[memoryview]:
+    """
+    Read data shared by [share_data][ofrak.component.process_pool.share_data], from a worker
+    process. The view of the data is only valid inside the context, and no reference to it (such as
+    a NumPy array created from it) may outlive the context.
+
+    :param shared_data: The reference to the data
+
+    :return: A read-only view of the data
+    """
+    if shared_data.path is None:
+        assert shared_data.data is not None
+        yield memoryview(shared_data.data)
+        return
+    with open(shared_data.path, "rb") as f:
+        mapped_file = mmap.mmap(f.fileno(), shared_data.size, access=mmap.ACCESS_READ)
+    data = memoryview(mapped_file)
+    try:
+        yield data
+    finally:
+        try:
+            data.release()
+            mapped_file.close()
+        except BufferError:
+            # The view is still referenced, for instance by the traceback of an error; the file is
+            # unmapped once that reference is garbage collected
+            pass
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, Optional, List
+from collections import defaultdict
+from typing import Dict, Tuple, Optional, List, Set
 
-from ofrak.component.abstract import AbstractComponent
+from ofrak.component.abstract import AbstractComponent, AbstractBatchComponent
 from ofrak.component.analyzer import Analyzer
 from ofrak.component.identifier import Identifier
 from ofrak.component.modifier import Modifier
@@ -13,6 +14,7 @@ from ofrak.model.component_filters import (
     ComponentNotMetaFilter,
 )
 from ofrak.model.component_model import CC
+from ofrak.model.resource_model import Data, StaleResource
 from ofrak.model.tag_model import ResourceTag
 from ofrak.resource import Resource, ResourceFactory
 from ofrak.service.component_locator_i import (
@@ -20,6 +22,7 @@ from ofrak.service.component_locator_i import (
 )
 from ofrak.service.data_service_i import DataServiceInterface
 from ofrak.service.resource_service_i import ResourceServiceInterface
+from ofrak_type.range import Range
 
 
 class UnpackerError(RuntimeError):
@@ -72,15 +75,14 @@ class Unpacker(AbstractComponent[CC], ABC):
         return cls._get_default_config_from_method(cls.unpack)
 
     async def _run(self, resource: Resource, config: CC):
-        if resource.has_component_run(self.get_id(), self.get_version()):
-            return self._log_component_has_run_warning(resource)
-        if resource.has_component_run(self.get_id()):
-            self._log_component_has_run_warning(resource)
-            raise NotImplementedError(
-                "If the component has already run (but on a different "
-                "version), we should remove the dependencies"
-            )
+        if self._has_component_run(resource):
+            return
+        previous_children = await self._delete_stale_children(resource)
         await self.unpack(resource, config)
+        await self._keep_unchanged_children(resource, previous_children)
+        self._finish_unpacking(resource)
+
+    def _finish_unpacking(self, resource: Resource):
         resource.add_component(self.get_id(), self.get_version())
         self._validate_unpacked_children(resource)
         # Identify which packers ran (if any) and clear that record, so that it will be allowed
@@ -89,6 +91,66 @@ class Unpacker(AbstractComponent[CC], ABC):
         for packer_id in packer_ids:
             resource.remove_component(packer_id)
 
+    @staticmethod
+    async def _delete_stale_children(resource: Resource) -> List[Resource]:
+        """
+        Delete the children left over from a previous unpacking of the resource which was since
+        invalidated (for example, because the data it unpacked was modified), so that they are
+        replaced by the freshly unpacked children.
+
+        :return: The other children of the resource
+        """
+        previous_children = []
+        for child in await resource.get_children():
+            if child.has_attributes(StaleResource):
+                await child.delete()
+            else:
+                previous_children.append(child)
+        return previous_children
+
+    async def _keep_unchanged_children(
+        self, resource: Resource, previous_children: List[Resource]
+    ) -> None:
+        """
+        Keep the children left over from a previous unpacking of the resource which are the same as
+        freshly unpacked children (mapping the same range of the resource's data, with the same tags
+        and attributes), deleting the fresh duplicates, so that they keep their IDs, descendants and
+        analysis results. Previous children whose attributes are not those of the fresh child
+        mapping the same range, with the same tags, are deleted instead, as are previous children
+        created by this unpacker mapping a range which no fresh child maps (for example, because
+        the layout of the data changed).
+        """
+        if not previous_children:
+            return
+        previous_children_by_range: Dict[Range, List[Resource]] = defaultdict(list)
+        for child in previous_children:
+            child_range = await _get_mapped_range(child)
+            if child_range is not None:
+                previous_children_by_range[child_range].append(child)
+        if not previous_children_by_range:
+            return
+        previous_child_ids = {child.get_id() for child in previous_children}
+        for child in await resource.get_children():
+            if child.get_id() in previous_child_ids or child.has_attributes(StaleResource):
+                continue
+            child_range = await _get_mapped_range(child)
+            if child_range is None:
+                continue
+            same_range_children = previous_children_by_range.get(child_range, [])
+            for previous_child in list(same_range_children):
+                if not all(previous_child.has_tag(tag) for tag in child.get_tags()):
+                    continue
+                same_range_children.remove(previous_child)
+                if _has_same_attributes(previous_child, child):
+                    await child.delete()
+                    break
+                await previous_child.delete()
+        children_created = _get_children_created_by(resource, self.get_id())
+        for unmatched_children in previous_children_by_range.values():
+            for previous_child in unmatched_children:
+                if previous_child.get_id() in children_created:
+                    await previous_child.delete()
+
     def _get_which_packers_ran(self, resource: Resource) -> Tuple[bytes, ...]:
         unpackers_ran = self._component_locator.get_components_matching_filter(
             ComponentAndMetaFilter(
@@ -158,3 +220,81 @@ class Unpacker(AbstractComponent[CC], ABC):
                     f"patterns this unpacker should create: "
                     f"{', '.join([str(descendant_tag) for descendant_tag in self.children])}"
                 )
+
+
+class BatchUnpacker(Unpacker[CC], AbstractBatchComponent[CC], ABC):
+    """
+    Unpackers which unpack many resources in one call, so that the cost of running a component,
+    and any work common to the resources (like reading their shared parent), is paid once for
+    the whole batch.
+    """
+
+    @abstractmethod
+    async def unpack_batch(self, resources: List[Resource], config: CC) -> None:
+        """
+        Unpack each of the given resources.
+
+        Users should not call this method directly; rather, they should run
+        [Resource.run][ofrak.resource.Resource.run] or
+        [Resource.unpack][ofrak.resource.Resource.unpack].
+
+        :param resources: The resources that are being unpacked
+        :param config: Optional config for unpacking, shared by all the resources. If an
+        implementation provides a default, this default will always be used when config would
+        otherwise be None.
+        """
+        raise NotImplementedError()
+
+    async def unpack(self, resource: Resource, config: CC) -> None:
+        await self.unpack_batch([resource], config)
+
+    @classmethod
+    def get_default_config(cls) -> Optional[CC]:
+        return cls._get_default_config_from_method(cls.unpack_batch)
+
+    async def _run_batch(self, resources: List[Resource], config: CC):
+        resources_to_unpack = [
+            resource for resource in resources if not self._has_component_run(resource)
+        ]
+        if not resources_to_unpack:
+            return
+        previous_children = [
+            await self._delete_stale_children(resource) for resource in resources_to_unpack
+        ]
+        await self.unpack_batch(resources_to_unpack, config)
+        for resource, resource_previous_children in zip(resources_to_unpack, previous_children):
+            await self._keep_unchanged_children(resource, resource_previous_children)
+            self._finish_unpacking(resource)
+
+
+async def _get_mapped_range(child: Resource) -> Optional[Range]:
+    """
+    Get the range of its parent's data which a child maps, or None if it does not map any.
+    """
+    if child.get_data_id() is None:
+        return None
+    child_range = await child.get_data_range_within_parent()
+    if child_range.length() == 0:
+        return None
+    return child_range
+
+
+def _get_children_created_by(resource: Resource, component_id: bytes) -> Set[bytes]:
+    """
+    Get the IDs of the children of a resource created by a component, which are known from the
+    dependencies of their staleness on the resource's data.
+    """
+    return {
+        dependency.dependent_resource_id
+        for dependency in resource.get_model().data_dependencies.keys()
+        if dependency.attributes is StaleResource and dependency.component_id == component_id
+    }
+
+
+def _has_same_attributes(previous_child: Resource, child: Resource) -> bool:
+    # The previous child may have been analyzed since it was unpacked
+    previous_attributes = previous_child.get_model().attributes
+    return all(
+        previous_attributes.get(attributes_type) == attributes
+        for attributes_type, attributes in child.get_model().attributes.items()
+    )
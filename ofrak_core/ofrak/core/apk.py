@@ -2,12 +2,14 @@ import asyncio
 import os
 import pathlib
 import sys
-import tempfile
+import zipfile
+from io import BytesIO
 from subprocess import CalledProcessError
 from dataclasses import dataclass
 
 from ofrak.core.filesystem import File, Folder
 
+from ofrak.component.external_tool import run_tool, scratch_directory, tool_input_path
 from ofrak.component.packer import Packer
 
 from ofrak.resource import Resource
@@ -16,7 +18,7 @@ from ofrak.component.unpacker import Unpacker
 from ofrak.component.identifier import Identifier
 
 from ofrak.model.component_model import ComponentConfig, ComponentExternalTool
-from ofrak.core.zip import ZipArchive, UNZIP_TOOL
+from ofrak.core.zip import ZipArchive
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import Magic, MagicMimeIdentifier
 from ofrak_type.range import Range
@@ -104,25 +106,19 @@ class ApkUnpacker(Unpacker[None]):
         """
         apk = await resource.view_as(Apk)
         data = await resource.get_data()
-        with tempfile.NamedTemporaryFile() as temp_file:
-            temp_file.write(data)
-            temp_file.flush()
-            with tempfile.TemporaryDirectory() as temp_flush_dir:
-                cmd = [
-                    "apktool",
-                    "decode",
-                    "--output",
-                    temp_flush_dir,
-                    "--force",
-                    temp_file.name,
-                ]
-                proc = await asyncio.create_subprocess_exec(
-                    *cmd,
-                )
-                returncode = await proc.wait()
-                if proc.returncode:
-                    raise CalledProcessError(returncode=returncode, cmd=cmd)
-                await apk.initialize_from_disk(temp_flush_dir)
+        with tool_input_path(data, suffix=".apk") as apk_path, scratch_directory(
+            len(data)
+        ) as temp_flush_dir:
+            cmd = [
+                "apktool",
+                "decode",
+                "--output",
+                temp_flush_dir,
+                "--force",
+                apk_path,
+            ]
+            await run_tool(cmd)
+            await apk.initialize_from_disk(temp_flush_dir)
 
 
 @dataclass
@@ -157,83 +153,55 @@ class ApkPacker(Packer[ApkPackerConfig]):
         """
         apk = await resource.view_as(Apk)
         temp_flush_dir = await apk.flush_to_disk()
-        apk_suffix = ".apk"
-        with tempfile.NamedTemporaryFile(suffix=apk_suffix) as temp_apk:
+        with scratch_directory(await resource.get_data_length()) as temp_dir:
+            temp_apk_name = os.path.join(temp_dir, "output.apk")
             apk_cmd = [
                 "apktool",
                 "build",
                 "--force-all",
                 temp_flush_dir,
                 "--output",
-                temp_apk.name,
+                temp_apk_name,
             ]
-            apk_proc = await asyncio.create_subprocess_exec(
-                *apk_cmd,
-            )
-            apk_returncode = await apk_proc.wait()
-            if apk_proc.returncode:
-                raise CalledProcessError(returncode=apk_returncode, cmd=apk_cmd)
+            await run_tool(apk_cmd)
             if not config.sign_apk:
-                # Close the file handle and reopen, to avoid observed situations where temp.read()
-                # was not returning data
-                with open(temp_apk.name, "rb") as file_handle:
+                with open(temp_apk_name, "rb") as file_handle:
                     new_data = file_handle.read()
             else:
-                with tempfile.TemporaryDirectory() as signed_apk_temp_dir:
-                    java_cmd = [
-                        "java",
-                        "-jar",
-                        _UberApkSignerTool.JAR_PATH,
-                        "--apks",
-                        temp_apk.name,
-                        "--out",
-                        signed_apk_temp_dir,
-                        "--allowResign",
-                    ]
-                    java_proc = await asyncio.create_subprocess_exec(
-                        *java_cmd,
-                    )
-                    java_returncode = await java_proc.wait()
-                    if java_proc.returncode:
-                        raise CalledProcessError(returncode=java_returncode, cmd=java_cmd)
-                    signed_apk_filename = (
-                        os.path.basename(temp_apk.name)[: -len(apk_suffix)]
-                        + "-aligned-debugSigned.apk"
-                    )
-                    signed_file_name = os.path.join(
-                        signed_apk_temp_dir,
-                        signed_apk_filename,
-                    )
-                    with open(signed_file_name, "rb") as file_handle:
-                        new_data = file_handle.read()
+                signed_apk_temp_dir = os.path.join(temp_dir, "signed")
+                java_cmd = [
+                    "java",
+                    "-jar",
+                    _UberApkSignerTool.JAR_PATH,
+                    "--apks",
+                    temp_apk_name,
+                    "--out",
+                    signed_apk_temp_dir,
+                    "--allowResign",
+                ]
+                await run_tool(java_cmd)
+                signed_file_name = os.path.join(
+                    signed_apk_temp_dir,
+                    "output-aligned-debugSigned.apk",
+                )
+                with open(signed_file_name, "rb") as file_handle:
+                    new_data = file_handle.read()
             assert len(new_data) != 0
             resource.queue_patch(Range(0, await resource.get_data_length()), new_data)
 
 
 class ApkIdentifier(Identifier):
     targets = (File, GenericBinary)
-    external_dependencies = (UNZIP_TOOL,)
 
     async def identify(self, resource: Resource, config=None) -> None:
         await resource.run(MagicMimeIdentifier)
         magic = resource.get_attributes(Magic)
         if magic is not None and magic.mime in ["application/java-archive", "application/zip"]:
-            with tempfile.NamedTemporaryFile(suffix=".zip") as temp_file:
-                temp_file.write(await resource.get_data())
-                temp_file.flush()
-                unzip_cmd = [
-                    "unzip",
-                    "-l",
-                    temp_file.name,
-                ]
-                unzip_proc = await asyncio.create_subprocess_exec(
-                    *unzip_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await unzip_proc.communicate()
-                if unzip_proc.returncode:
-                    raise CalledProcessError(returncode=unzip_proc.returncode, cmd=unzip_cmd)
-
-                if b"androidmanifest.xml" in stdout.lower():
-                    resource.add_tag(Apk)
+            # Only the central directory of the archive is read to list its members
+            try:
+                with zipfile.ZipFile(BytesIO(await resource.get_data())) as zip_file:
+                    member_names = zip_file.namelist()
+            except zipfile.BadZipFile:
+                return
+            if any("androidmanifest.xml" in name.lower() for name in member_names):
+                resource.add_tag(Apk)
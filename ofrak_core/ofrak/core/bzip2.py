@@ -1,12 +1,14 @@
 import bz2
 import logging
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.resource import Resource
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import MagicDescriptionIdentifier, MagicMimeIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
@@ -64,5 +66,16 @@ class Bzip2Packer(Packer[None]):
         resource.queue_patch(Range(0, original_size), bzip2_compressed)
 
 
+def _parse_bzip2_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    block_size = data[offset + 3] - ord("0")
+    if not 1 <= block_size <= 9:
+        return None
+    # The first block, or the end of an empty stream
+    if data[offset + 4 : offset + 10] not in (b"1AY&SY", b"\x17rE8P\x90"):
+        return None
+    return f"bzip2 compressed data, block size = {block_size}00k", None
+
+
 MagicMimeIdentifier.register(Bzip2Data, "application/x-bzip2")
 MagicDescriptionIdentifier.register(Bzip2Data, lambda s: s.startswith("BZip2 archive"))
+SignatureScanner.register(Bzip2Data, b"BZh", _parse_bzip2_signature)
@@ -1,29 +1,46 @@
-import asyncio
 import logging
-import tempfile
+import os
+import stat
+import struct
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from subprocess import CalledProcessError
+from io import BytesIO
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
 from ofrak.component.analyzer import Analyzer
 from ofrak.component.packer import Packer
-from ofrak.component.unpacker import Unpacker
+from ofrak.component.unpacker import Unpacker, UnpackerError
 from ofrak.core.binary import GenericBinary
-from ofrak.core.filesystem import File, Folder, FilesystemRoot, SpecialFileType
+from ofrak.core.filesystem import (
+    File,
+    Folder,
+    FilesystemRoot,
+    SpecialFileType,
+    SymbolicLink,
+    normalize_archive_path,
+)
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier, Magic
-from ofrak.model.component_model import ComponentExternalTool
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak.resource import Resource
 from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
 
-CPIO_TOOL = ComponentExternalTool(
-    "cpio",
-    "https://www.gnu.org/software/cpio/",
-    install_check_arg="--help",
-    apt_package="cpio",
-    brew_package="cpio",
-)
+_NEWC_MAGIC = b"070701"
+_CRC_MAGIC = b"070702"
+_ODC_MAGIC = b"070707"
+# The binary format stores its magic number 0o070707 as a 16-bit integer in either byte order
+_BINARY_MAGIC_LE = b"\xc7\x71"
+_BINARY_MAGIC_BE = b"\x71\xc7"
+_NEWC_HEADER_SIZE = 110
+_ODC_HEADER_SIZE = 76
+_BINARY_HEADER_SIZE = 26
+# Sizes of the fields following the magic, in hexadecimal (newc) or octal (odc) digits
+_NEWC_FIELD_SIZES: Tuple[int, ...] = (8,) * 13
+_ODC_FIELD_SIZES: Tuple[int, ...] = (6, 6, 6, 6, 6, 6, 6, 11, 6, 11)
+_TRAILER_NAME = "TRAILER!!!"
+_CPIO_BLOCK_SIZE = 512
 
 
 class CpioArchiveType(Enum):
@@ -78,77 +95,386 @@ class CpioFilesystemAnalyzer(Analyzer[None, CpioFilesystem]):
 class CpioUnpacker(Unpacker[None]):
     """
     Unpack a CPIO archive.
+
+    The archive is parsed in-process (binary, odc, newc and crc formats), and each entry is added
+    to the filesystem directly with its stat. Hard-linked files are all added with the data of
+    the link group, wherever it is stored in the archive.
     """
 
     targets = (CpioFilesystem,)
     children = (File, Folder, SpecialFileType)
-    external_dependencies = (CPIO_TOOL,)
 
     async def unpack(self, resource: Resource, config=None):
         cpio_v = await resource.view_as(CpioFilesystem)
-        resource_data = await cpio_v.resource.get_data()
-        with tempfile.TemporaryDirectory() as temp_flush_dir:
-            cmd = [
-                "cpio",
-                "-id",
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=temp_flush_dir,
-            )
-            await proc.communicate(input=resource_data)
-            if proc.returncode:
-                raise CalledProcessError(returncode=proc.returncode, cmd=cmd)
-            await cpio_v.initialize_from_disk(temp_flush_dir)
+        entries = list(_read_cpio_entries(await cpio_v.resource.get_data()))
+        # Check the archive entries to ensure none unpack to a parent directory
+        entry_paths = [normalize_archive_path(entry.name) for entry in entries]
+
+        # Hard links (regular files with several links) share the data of one entry of their group
+        link_group_data: Dict[Tuple[int, int], bytes] = dict()
+        pending_links: Dict[Tuple[int, int], List[Tuple[str, _CpioEntry]]] = defaultdict(list)
+        for entry, path in zip(entries, entry_paths):
+            if path is None:
+                continue
+            if stat.S_ISREG(entry.stat.st_mode) and entry.stat.st_nlink > 1:
+                link_group = (entry.stat.st_dev, entry.stat.st_ino)
+                if len(entry.data) > 0:
+                    link_group_data[link_group] = entry.data
+                    for pending_path, pending_entry in pending_links.pop(link_group, []):
+                        await cpio_v.add_entry(
+                            pending_path, pending_entry.get_stat(len(entry.data)), {}, entry.data
+                        )
+                elif link_group in link_group_data:
+                    data = link_group_data[link_group]
+                    await cpio_v.add_entry(path, entry.get_stat(len(data)), {}, data)
+                    continue
+                else:
+                    pending_links[link_group].append((path, entry))
+                    continue
+            await cpio_v.add_entry(path, entry.stat, {}, entry.data)
+
+        # Link groups whose data was never found are empty files
+        for link_group_entries in pending_links.values():
+            for pending_path, pending_entry in link_group_entries:
+                await cpio_v.add_entry(pending_path, pending_entry.stat, {}, b"")
+
+
+@dataclass
+class _CpioEntry:
+    name: str
+    stat: os.stat_result
+    data: bytes
+
+    def get_stat(self, size: int) -> os.stat_result:
+        stat_values = list(self.stat)
+        stat_values[stat.ST_SIZE] = size
+        return os.stat_result(
+            stat_values,
+            {"st_mtime": self.stat.st_mtime, "st_rdev": self.stat.st_rdev},
+        )
+
+
+def _read_cpio_entries(data: bytes) -> Iterator[_CpioEntry]:
+    """
+    Parse the entries of a CPIO archive, up to its trailer.
+
+    :raises UnpackerError: if the archive is truncated or an entry has an unknown format
+    """
+    offset = 0
+    while True:
+        magic = data[offset : offset + 6]
+        if magic in (_NEWC_MAGIC, _CRC_MAGIC):
+            header_size = _NEWC_HEADER_SIZE
+            fields = _read_ascii_fields(data, offset, _NEWC_FIELD_SIZES, 16)
+            (
+                ino,
+                mode,
+                uid,
+                gid,
+                nlink,
+                mtime,
+                file_size,
+                dev_major,
+                dev_minor,
+                rdev_major,
+                rdev_minor,
+                name_size,
+                _,
+            ) = fields
+            dev = os.makedev(dev_major, dev_minor)
+            rdev = os.makedev(rdev_major, rdev_minor)
+            alignment = 4
+        elif magic == _ODC_MAGIC:
+            header_size = _ODC_HEADER_SIZE
+            fields = _read_ascii_fields(data, offset, _ODC_FIELD_SIZES, 8)
+            dev, ino, mode, uid, gid, nlink, rdev, mtime, name_size, file_size = fields
+            alignment = 1
+        elif magic[:2] in (_BINARY_MAGIC_LE, _BINARY_MAGIC_BE):
+            header_size = _BINARY_HEADER_SIZE
+            byte_order = "<" if magic[:2] == _BINARY_MAGIC_LE else ">"
+            if offset + header_size > len(data):
+                raise UnpackerError(f"Truncated CPIO header at offset {offset:#x}")
+            (
+                _,
+                dev,
+                ino,
+                mode,
+                uid,
+                gid,
+                nlink,
+                rdev,
+                mtime_high,
+                mtime_low,
+                name_size,
+                file_size_high,
+                file_size_low,
+            ) = struct.unpack_from(f"{byte_order}13H", data, offset)
+            mtime = (mtime_high << 16) | mtime_low
+            file_size = (file_size_high << 16) | file_size_low
+            alignment = 2
+        else:
+            raise UnpackerError(f"Unknown CPIO header magic {magic!r} at offset {offset:#x}")
+
+        name_start = offset + header_size
+        name = (
+            data[name_start : name_start + name_size]
+            .rstrip(b"\x00")
+            .decode("utf-8", "surrogateescape")
+        )
+        data_start = _align(name_start + name_size, alignment)
+        data_end = data_start + file_size
+        if data_end > len(data):
+            raise UnpackerError(f"Truncated CPIO entry {name} at offset {offset:#x}")
+        if name == _TRAILER_NAME:
+            return
+
+        yield _CpioEntry(
+            name,
+            os.stat_result(
+                (mode, ino, dev, nlink, uid, gid, file_size, mtime, mtime, mtime),
+                {"st_mtime": float(mtime), "st_rdev": rdev},
+            ),
+            data[data_start:data_end],
+        )
+        offset = _align(data_end, alignment)
+
+
+def _read_ascii_fields(
+    data: bytes, offset: int, field_sizes: Tuple[int, ...], base: int
+) -> List[int]:
+    fields = []
+    field_offset = offset + 6
+    try:
+        for field_size in field_sizes:
+            fields.append(int(data[field_offset : field_offset + field_size], base))
+            field_offset += field_size
+    except ValueError:
+        raise UnpackerError(f"Invalid or truncated CPIO header at offset {offset:#x}")
+    return fields
+
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
 
 
 class CpioPacker(Packer[None]):
     """
     Pack files into a CPIO archive.
+
+    The entries of the filesystem are written in-process in the format of the original archive
+    (binary, odc, newc or crc), in the deterministic order of
+    [get_entries_with_paths][ofrak.core.filesystem.FilesystemRoot.get_entries_with_paths], reading
+    the data of one file at a time. Entries are numbered from 1 as they are written, and get a
+    single link each, so that no two entries are taken for hard links to the same file.
     """
 
     targets = (CpioFilesystem,)
-    external_dependencies = (CPIO_TOOL,)
 
     async def pack(self, resource: Resource, config=None):
         cpio_v: CpioFilesystem = await resource.view_as(CpioFilesystem)
-        temp_flush_dir = await cpio_v.flush_to_disk()
-        cpio_format = cpio_v.archive_type.value
-        list_files_cmd = [
-            "find",
-            "-print",
-        ]
-        list_files_proc = await asyncio.create_subprocess_exec(
-            *list_files_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=temp_flush_dir,
-        )
-        list_files_list, stderr = await list_files_proc.communicate()
-        if list_files_proc.returncode:
-            raise CalledProcessError(returncode=list_files_proc.returncode, cmd=list_files_cmd)
-
-        cpio_pack_cmd = [
-            "cpio",
-            "-o",
-            f"--format={cpio_format}",
-        ]
-        cpio_pack_proc = await asyncio.create_subprocess_exec(
-            *cpio_pack_cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=temp_flush_dir,
-        )
-        cpio_pack_output, stderr = await cpio_pack_proc.communicate(input=list_files_list)
-        if cpio_pack_proc.returncode:
-            raise CalledProcessError(returncode=cpio_pack_proc.returncode, cmd=cpio_pack_cmd)
+        write_entry = _CPIO_ENTRY_WRITERS.get(cpio_v.archive_type)
+        if write_entry is None:
+            raise NotImplementedError(
+                f"Packing CPIO archives of type {cpio_v.archive_type.name} is not supported"
+            )
+        # The byte order of binary archives is only told by their magic bytes
+        if (
+            cpio_v.archive_type is CpioArchiveType.BINARY
+            and await resource.get_data(Range(0, len(_BINARY_MAGIC_BE))) == _BINARY_MAGIC_BE
+        ):
+            write_entry = _write_big_endian_binary_entry
+
+        archive = BytesIO()
+        for ino, (path, entry) in enumerate(await cpio_v.get_entries_with_paths(), start=1):
+            entry_stat = entry.get_stat_or_default()
+            if entry.is_file():
+                data = await entry.resource.get_data()
+            elif entry.is_link():
+                data = os.fsencode((await entry.resource.view_as(SymbolicLink)).source_path)
+            else:
+                data = b""
+            nlink = 2 if entry.is_folder() else 1
+            write_entry(archive, path, entry_stat, ino, nlink, data)
+        write_entry(archive, _TRAILER_NAME, _TRAILER_STAT, 0, 1, b"")
+        # Like cpio, pad the archive to a whole number of blocks
+        archive.write(b"\x00" * (-archive.tell() % _CPIO_BLOCK_SIZE))
+
         # Passing in the original range effectively replaces the original data with the new data
-        resource.queue_patch(Range(0, await resource.get_data_length()), cpio_pack_output)
+        resource.queue_patch(Range(0, await resource.get_data_length()), archive.getvalue())
+
+
+def _write_newc_entry(
+    archive: BinaryIO,
+    name: str,
+    entry_stat: os.stat_result,
+    ino: int,
+    nlink: int,
+    data: bytes,
+    magic: bytes = _NEWC_MAGIC,
+):
+    encoded_name = os.fsencode(name) + b"\x00"
+    rdev = entry_stat.st_rdev or 0
+    check = sum(data) & 0xFFFFFFFF if magic == _CRC_MAGIC else 0
+    fields = (
+        ino,
+        entry_stat.st_mode,
+        entry_stat.st_uid,
+        entry_stat.st_gid,
+        nlink,
+        int(entry_stat.st_mtime),
+        len(data),
+        0,
+        0,
+        os.major(rdev),
+        os.minor(rdev),
+        len(encoded_name),
+        check,
+    )
+    archive.write(magic + b"".join(b"%08X" % (field & 0xFFFFFFFF) for field in fields))
+    archive.write(encoded_name)
+    archive.write(b"\x00" * (-archive.tell() % 4))
+    archive.write(data)
+    archive.write(b"\x00" * (-archive.tell() % 4))
+
+
+def _write_crc_entry(
+    archive: BinaryIO, name: str, entry_stat: os.stat_result, ino: int, nlink: int, data: bytes
+):
+    _write_newc_entry(archive, name, entry_stat, ino, nlink, data, _CRC_MAGIC)
+
+
+def _write_odc_entry(
+    archive: BinaryIO, name: str, entry_stat: os.stat_result, ino: int, nlink: int, data: bytes
+):
+    encoded_name = os.fsencode(name) + b"\x00"
+    fields = (
+        0,
+        ino,
+        entry_stat.st_mode,
+        entry_stat.st_uid,
+        entry_stat.st_gid,
+        nlink,
+        entry_stat.st_rdev or 0,
+        int(entry_stat.st_mtime),
+        len(encoded_name),
+        len(data),
+    )
+    archive.write(_ODC_MAGIC)
+    for field, field_size in zip(fields, _ODC_FIELD_SIZES):
+        archive.write(b"%0*o" % (field_size, field & ((1 << (3 * field_size)) - 1)))
+    archive.write(encoded_name)
+    archive.write(data)
+
+
+def _write_binary_entry(
+    archive: BinaryIO,
+    name: str,
+    entry_stat: os.stat_result,
+    ino: int,
+    nlink: int,
+    data: bytes,
+    byte_order: str = "<",
+):
+    encoded_name = os.fsencode(name) + b"\x00"
+    mtime = int(entry_stat.st_mtime)
+    fields = (
+        0o070707,
+        0,
+        ino,
+        entry_stat.st_mode,
+        entry_stat.st_uid,
+        entry_stat.st_gid,
+        nlink,
+        entry_stat.st_rdev or 0,
+        mtime >> 16,
+        mtime,
+        len(encoded_name),
+        len(data) >> 16,
+        len(data),
+    )
+    archive.write(struct.pack(byte_order + "13H", *(field & 0xFFFF for field in fields)))
+    archive.write(encoded_name)
+    archive.write(b"\x00" * (-archive.tell() % 2))
+    archive.write(data)
+    archive.write(b"\x00" * (-archive.tell() % 2))
+
+
+def _write_big_endian_binary_entry(
+    archive: BinaryIO, name: str, entry_stat: os.stat_result, ino: int, nlink: int, data: bytes
+):
+    _write_binary_entry(archive, name, entry_stat, ino, nlink, data, ">")
+
+
+_CPIO_ENTRY_WRITERS: Dict[
+    CpioArchiveType, Callable[[BinaryIO, str, os.stat_result, int, int, bytes], None]
+] = {
+    CpioArchiveType.BINARY: _write_binary_entry,
+    CpioArchiveType.OLD_ASCII: _write_odc_entry,
+    CpioArchiveType.NEW_ASCII: _write_newc_entry,
+    CpioArchiveType.CRC_ASCII: _write_crc_entry,
+}
+_TRAILER_STAT = os.stat_result((0,) * 10, {"st_rdev": 0})
+
+
+def _parse_cpio_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    first_entry = _read_ascii_entry_header(data, offset)
+    if first_entry is None:
+        return None
+    magic, name, name_size, file_size, entry_end = first_entry
+    archive_type = {
+        _NEWC_MAGIC: "SVR4 with no CRC",
+        _CRC_MAGIC: "SVR4 with CRC",
+        _ODC_MAGIC: "pre-SVR4 or odc",
+    }[magic]
+    description = (
+        f'ASCII cpio archive ({archive_type}), file name: "{name}", file name length: '
+        f'"0x{name_size:08X}", file size: "0x{file_size:08X}"'
+    )
+    # The archive ends after its trailer; its length is unknown if an entry before it is invalid
+    entry_name = name
+    while entry_name != _TRAILER_NAME:
+        entry = _read_ascii_entry_header(data, entry_end)
+        if entry is None:
+            return description, None
+        _, entry_name, _, _, entry_end = entry
+    return description, entry_end - offset
+
+
+def _read_ascii_entry_header(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[bytes, str, int, int, int]]:
+    """
+    Read the header of an entry of an ASCII CPIO archive.
+
+    :return: The magic of the entry, its name, the size of its name and data, and the offset of its
+    end, or None if the header is invalid or the entry is truncated
+    """
+    magic = bytes(data[offset : offset + 6])
+    if magic in (_NEWC_MAGIC, _CRC_MAGIC):
+        header_size, field_sizes, base, alignment = _NEWC_HEADER_SIZE, _NEWC_FIELD_SIZES, 16, 4
+    elif magic == _ODC_MAGIC:
+        header_size, field_sizes, base, alignment = _ODC_HEADER_SIZE, _ODC_FIELD_SIZES, 8, 1
+    else:
+        return None
+    try:
+        fields = _read_ascii_fields(
+            bytes(data[offset : offset + header_size]), 0, field_sizes, base
+        )
+    except UnpackerError:
+        return None
+    if magic == _ODC_MAGIC:
+        name_size, file_size = fields[8], fields[9]
+    else:
+        file_size, name_size = fields[6], fields[11]
+    name_start = offset + header_size
+    name = bytes(data[name_start : name_start + name_size]).rstrip(b"\x00")
+    entry_end = _align(_align(name_start + name_size, alignment) + file_size, alignment)
+    if entry_end > len(data):
+        return None
+    return magic, name.decode("utf-8", "surrogateescape"), name_size, file_size, entry_end
 
 
 MagicMimeIdentifier.register(CpioFilesystem, "application/x-cpio")
 MagicDescriptionIdentifier.register(CpioFilesystem, lambda s: "cpio archive" in s)
+for _cpio_magic in (_NEWC_MAGIC, _CRC_MAGIC, _ODC_MAGIC):
+    SignatureScanner.register(CpioFilesystem, _cpio_magic, _parse_cpio_signature)
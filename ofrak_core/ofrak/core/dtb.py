@@ -7,7 +7,7 @@ import os
 import struct
 from dataclasses import dataclass
 from enum import Enum
-from typing import Union, List, Tuple
+from typing import Optional, Union, List, Tuple
 
 import fdt
 
@@ -19,6 +19,7 @@ from ofrak.model.viewable_tag_model import AttributesType
 from ofrak.resource import Resource
 from ofrak.service.resource_service_i import ResourceFilter, ResourceSort
 from ofrak.core import GenericBinary, MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak.model.component_model import CC
 from ofrak.model.resource_model import index
 from ofrak_type.range import Range
@@ -402,5 +403,24 @@ def _prop_from_fdt(p: fdt.items.Property) -> Tuple[DtbPropertyType, bytes]:
     return _p_type, _p_data
 
 
+def _parse_dtb_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    (
+        total_size,
+        structure_offset,
+        strings_offset,
+        reserved_map_offset,
+        version,
+        last_compatible_version,
+    ) = struct.unpack_from(">6I", data, offset + 4)
+    if not last_compatible_version <= version <= 17:
+        return None
+    if not max(structure_offset, strings_offset, reserved_map_offset) < total_size:
+        return None
+    return f"Flattened device tree, size: {total_size} bytes, version: {version}", total_size
+
+
 MagicMimeIdentifier.register(DeviceTreeBlob, "Device Tree Blob")
 MagicDescriptionIdentifier.register(DeviceTreeBlob, lambda s: "device tree blob" in s.lower())
+SignatureScanner.register(
+    DeviceTreeBlob, struct.pack(">I", DTB_MAGIC_SIGNATURE), _parse_dtb_signature
+)
@@ -1,8 +1,8 @@
 import io
 import logging
-from typing import Optional, TypeVar
+from typing import Dict, Iterable, List, Optional, TypeVar
 
-from ofrak.component.analyzer import Analyzer
+from ofrak.component.analyzer import Analyzer, BatchAnalyzer
 from ofrak.core import NamedProgramSection
 from ofrak.core.architecture import ProgramAttributes
 from ofrak.core.elf.model import (
@@ -170,19 +170,22 @@ class ElfSegmentAnalyzer(Analyzer[None, ElfSegment]):
         )
 
 
-class ElfSectionHeaderAttributesAnalyzer(Analyzer[None, ElfSectionHeader]):
+class ElfSectionHeaderAttributesAnalyzer(BatchAnalyzer[None, ElfSectionHeader]):
     """
-    Deserialize an [ElfSectionHeader][ofrak.core.elf.model.ElfSectionHeader].
+    Deserialize [ElfSectionHeaders][ofrak.core.elf.model.ElfSectionHeader]. All the section
+    headers analyzed at once are deserialized in one batch.
     """
 
     id = b"ElfSectionHeaderAttributesAnalyzer"
     targets = (ElfSectionHeader,)
     outputs = (ElfSectionHeader,)
 
-    async def analyze(self, resource: Resource, config=None) -> ElfSectionHeader:
-        section_structure = await resource.view_as(ElfSectionStructure)
-        deserializer = await _create_deserializer(resource)
-        return self.deserialize(deserializer, section_structure.section_index)
+    async def analyze_batch(self, resources: List[Resource], config=None) -> List[ElfSectionHeader]:
+        section_headers = []
+        for resource, deserializer in zip(resources, await _create_deserializers(resources)):
+            section_structure = await resource.view_as(ElfSectionStructure)
+            section_headers.append(self.deserialize(deserializer, section_structure.section_index))
+        return section_headers
 
     @classmethod
     def deserialize(cls, deserializer: BinaryDeserializer, elf_index: int) -> ElfSectionHeader:
@@ -213,21 +216,22 @@ class ElfSectionHeaderAttributesAnalyzer(Analyzer[None, ElfSectionHeader]):
         )
 
 
-class ElfSymbolAttributesAnalyzer(Analyzer[None, ElfSymbol]):
+class ElfSymbolAttributesAnalyzer(BatchAnalyzer[None, ElfSymbol]):
     """
-    Deserialize an [ElfSymbol][ofrak.core.elf.model.ElfSymbol], an entry in the ELF symbol
-    table.
+    Deserialize [ElfSymbols][ofrak.core.elf.model.ElfSymbol], the entries in the ELF symbol
+    table. All the symbols analyzed at once are deserialized in one batch.
     """
 
     id = b"ElfSymbolAnalyzer"
     targets = (ElfSymbol,)
     outputs = (ElfSymbol,)
 
-    async def analyze(self, resource: Resource, config=None) -> ElfSymbol:
-        symbol_structure = await resource.view_as(ElfSymbolStructure)
-        deserializer = await _create_deserializer(resource)
-
-        return self.deserialize(deserializer, symbol_structure.symbol_index)
+    async def analyze_batch(self, resources: List[Resource], config=None) -> List[ElfSymbol]:
+        symbols = []
+        for resource, deserializer in zip(resources, await _create_deserializers(resources)):
+            symbol_structure = await resource.view_as(ElfSymbolStructure)
+            symbols.append(self.deserialize(deserializer, symbol_structure.symbol_index))
+        return symbols
 
     @classmethod
     def deserialize(cls, deserializer: BinaryDeserializer, elf_index: int) -> ElfSymbol:
@@ -390,13 +394,41 @@ class ElfProgramAttributesAnalyzer(Analyzer[None, ProgramAttributes]):
 
 
 async def _create_deserializer(resource: Resource) -> BinaryDeserializer:
-    elf_r = await resource.get_only_ancestor(ResourceFilter(tags=(Elf,)))
-    e_basic_header = await elf_r.get_only_child_as_view(
-        ElfBasicHeader, ResourceFilter.with_tags(ElfBasicHeader)
-    )
+    e_basic_header = await _get_elf_basic_header(resource)
     deserializer = BinaryDeserializer(
         io.BytesIO(await resource.get_data()),
         endianness=e_basic_header.get_endianness(),
         word_size=int(e_basic_header.get_bitwidth().get_word_size()),
     )
     return deserializer
+
+
+async def _create_deserializers(resources: Iterable[Resource]) -> List[BinaryDeserializer]:
+    """
+    Create a deserializer for each resource, like `_create_deserializer`, only looking up the ELF
+    basic header once for all the resources with the same parent (e.g. all the symbols in a symbol
+    table).
+    """
+    e_basic_headers: Dict[Optional[bytes], ElfBasicHeader] = dict()
+    deserializers = []
+    for resource in resources:
+        parent_id = resource.get_model().parent_id
+        e_basic_header = e_basic_headers.get(parent_id)
+        if e_basic_header is None:
+            e_basic_header = await _get_elf_basic_header(resource)
+            e_basic_headers[parent_id] = e_basic_header
+        deserializers.append(
+            BinaryDeserializer(
+                io.BytesIO(await resource.get_data()),
+                endianness=e_basic_header.get_endianness(),
+                word_size=int(e_basic_header.get_bitwidth().get_word_size()),
+            )
+        )
+    return deserializers
+
+
+async def _get_elf_basic_header(resource: Resource) -> ElfBasicHeader:
+    elf_r = await resource.get_only_ancestor(ResourceFilter(tags=(Elf,)))
+    return await elf_r.get_only_child_as_view(
+        ElfBasicHeader, ResourceFilter.with_tags(ElfBasicHeader)
+    )
@@ -1,7 +1,8 @@
+import struct
 from abc import abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
 
 from ofrak.model.viewable_tag_model import AttributesType
 
@@ -17,6 +18,7 @@ from ofrak.service.resource_service_i import (
     ResourceSort,
 )
 from ofrak.core.magic import MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak_type.bit_width import BitWidth
 from ofrak_type.endianness import Endianness
 from ofrak_type.memory_permissions import MemoryPermissions
@@ -881,4 +883,30 @@ class Elf(Program):
         )
 
 
+def _parse_elf_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    elf_class, elf_data, elf_version = struct.unpack_from("BBB", data, offset + 4)
+    if elf_class not in (1, 2) or elf_data not in (1, 2) or elf_version != 1:
+        return None
+    e_type, e_machine = struct.unpack_from("<HH" if elf_data == 1 else ">HH", data, offset + 16)
+    try:
+        machine = ElfMachine(e_machine).name
+    except ValueError:
+        machine = f"machine {e_machine}"
+    elf_type = _ELF_TYPE_DESCRIPTIONS.get(e_type, f"type {e_type}")
+    # The length is left unknown, so that the signatures of the data in the file are found too
+    return (
+        f"ELF, {32 * elf_class}-bit {'LSB' if elf_data == 1 else 'MSB'} {elf_type}, {machine}",
+        None,
+    )
+
+
+_ELF_TYPE_DESCRIPTIONS = {
+    ElfType.ET_REL.value: "relocatable",
+    ElfType.ET_EXEC.value: "executable",
+    ElfType.ET_DYN.value: "shared object",
+    ElfType.ET_CORE.value: "core file",
+}
+
+
 MagicDescriptionIdentifier.register(Elf, lambda s: s.startswith("ELF "))
+SignatureScanner.register(Elf, b"\x7fELF", _parse_elf_signature)
@@ -1,27 +1,58 @@
 import asyncio
 import ctypes
+import hashlib
 import logging
 import math
-from concurrent.futures import ProcessPoolExecutor
-from concurrent.futures.process import BrokenProcessPool
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
 
 from ofrak.component.analyzer import Analyzer
+from ofrak.component.process_pool import (
+    COMPONENT_PROCESS_POOL,
+    SharedData,
+    open_shared_data,
+    share_data,
+)
 from ofrak.model.resource_model import ResourceAttributes
 from ofrak.resource import Resource, ResourceFactory
 from ofrak.service.data_service_i import DataServiceInterface
 from ofrak.service.resource_service_i import ResourceServiceInterface
+from ofrak_type.range import Range
+
+if TYPE_CHECKING:
+    from ofrak.core.entropy.pyramid import DataSummaryPyramid
 
 LOGGER = logging.getLogger(__name__)
 
 
 C_LOG_TYPE = ctypes.CFUNCTYPE(None, ctypes.c_uint8)
 
+# Number of resources whose last summary is kept by the `DataSummaryAnalyzer`
+SUMMARY_CACHE_SIZE = 32
+# Size of the chunks of data compared to find which parts of the data of a resource changed since
+# it was last summarized
+SUMMARY_CHUNK_SIZE = 0x10000
+
+
+try:
+    from ofrak.core.entropy.entropy_numpy import (
+        entropy_numpy,
+        sample_entropy_numpy,
+        sample_numpy,
+    )
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 try:
     from ofrak.core.entropy.entropy_c import entropy_c as entropy_func
 except:
-    from ofrak.core.entropy.entropy_py import entropy_py as entropy_func
+    if NUMPY_AVAILABLE:
+        entropy_func = entropy_numpy
+    else:
+        from ofrak.core.entropy.entropy_py import entropy_py as entropy_func
 
 
 @dataclass(**ResourceAttributes.DATACLASS_PARAMS)
@@ -39,10 +70,33 @@ class DataSummary(ResourceAttributes):
     magnitude_samples: bytes
 
 
+@dataclass
+class _DataSummaryState:
+    """
+    Summary of the data of a resource, with the digests of chunks of the data it was computed
+    from, so that the summary can be updated once the data is patched.
+    """
+
+    data_length: int
+    chunk_digests: List[bytes]
+    entropy_samples: bytes
+    magnitude_samples: bytes
+    pyramid: Optional["DataSummaryPyramid"] = None
+
+
 class DataSummaryAnalyzer(Analyzer[None, DataSummary]):
     """
     Analyze binary data and return summaries of its structure via the entropy and magnitude of
     its bytes.
+
+    The analyzer keeps the summaries of the resources it analyzed last. When one of them is
+    analyzed again after its data was patched, only the entropy of the windows overlapping the
+    patched chunks of data is computed again.
+
+    The analyzer also provides a [DataSummaryPyramid][ofrak.core.entropy.pyramid.DataSummaryPyramid]
+    of the data of a resource on demand, for viewers zooming into the data. It is not part of the
+    `DataSummary` attributes, which are sent whole along with the resource, and is updated like the
+    entropy samples when the data is patched.
     """
 
     targets = ()  # Target any resource with data
@@ -55,33 +109,113 @@ class DataSummaryAnalyzer(Analyzer[None, DataSummary]):
         resource_service: ResourceServiceInterface,
     ):
         super().__init__(resource_factory, data_service, resource_service)
-        self.pool = ProcessPoolExecutor()
-        self.max_analysis_retries = 10
+        self._summary_states: "OrderedDict[bytes, _DataSummaryState]" = OrderedDict()
 
-    async def analyze(self, resource: Resource, config=None, depth=0) -> DataSummary:
-        if depth > self.max_analysis_retries:
-            raise RuntimeError(
-                f"Analysis process killed more than {self.max_analysis_retries} times. Aborting."
-            )
+    async def analyze(self, resource: Resource, config=None) -> DataSummary:
+        state = await self._summarize(resource, build_pyramid=False)
+        return DataSummary(state.entropy_samples, state.magnitude_samples)
+
+    async def get_data_summary_pyramid(self, resource: Resource) -> "DataSummaryPyramid":
+        """
+        Get the summaries of the data of a resource at several resolutions, building them the first
+        time they are requested. The resource is analyzed again first if its data was patched.
 
+        :param resource: The resource whose data to summarize
+
+        :raises ModuleNotFoundError: if NumPy, which builds the summaries, is not installed
+        :return: The summaries of the data of the resource
+        """
+        if not NUMPY_AVAILABLE:
+            raise ModuleNotFoundError("NumPy is required to build data summary pyramids")
+        if not resource.has_component_run(self.get_id()):
+            await resource.run(DataSummaryAnalyzer)
+        state = self._summary_states.get(resource.get_id())
+        if state is None or state.pyramid is None:
+            state = await self._summarize(resource, build_pyramid=True)
+        assert state.pyramid is not None
+        return state.pyramid
+
+    async def _summarize(self, resource: Resource, build_pyramid: bool) -> _DataSummaryState:
         data = await resource.get_data()
-        # Run blocking computations in separate processes
-        try:
-            entropy = await asyncio.get_running_loop().run_in_executor(
-                self.pool, sample_entropy, data, resource.get_id()
+        previous_state = self._summary_states.pop(resource.get_id(), None)
+        previous_pyramid = None
+        if previous_state is not None:
+            # The pyramid stays in this process, so that it is not copied to and from the worker
+            previous_pyramid = previous_state.pyramid
+            previous_state = replace(previous_state, pyramid=None)
+        # Run blocking computations in a separate process, which maps the data instead of
+        # receiving a copy of it
+        with share_data(data) as shared_data:
+            state, patch_ranges = await COMPONENT_PROCESS_POOL.run(
+                summarize_data, shared_data, resource.get_id(), previous_state
             )
-            magnitude = await asyncio.get_running_loop().run_in_executor(
-                self.pool, sample_magnitude, data
+        # NumPy releases the GIL while summarizing tiles, so the pyramid is built or updated in a
+        # thread rather than on the event loop
+        loop = asyncio.get_running_loop()
+        if patch_ranges is not None and previous_pyramid is not None:
+            await loop.run_in_executor(None, previous_pyramid.update, data, patch_ranges)
+            state.pyramid = previous_pyramid
+        elif build_pyramid:
+            from ofrak.core.entropy.pyramid import DataSummaryPyramid
+
+            state.pyramid = await loop.run_in_executor(None, DataSummaryPyramid, data)
+        self._summary_states[resource.get_id()] = state
+        while len(self._summary_states) > SUMMARY_CACHE_SIZE:
+            self._summary_states.popitem(last=False)
+        return state
+
+
+def summarize_data(
+    shared_data: SharedData,
+    resource_id: bytes,
+    previous_state: Optional[_DataSummaryState] = None,
+) -> Tuple[_DataSummaryState, Optional[List[Range]]]:  # pragma: no cover
+    """
+    Summarize some data shared with [share_data][ofrak.component.process_pool.share_data]. If the
+    summary of a previous version of the data of the same length is given, only the entropy of the
+    windows overlapping the chunks of data which changed is computed, and the ranges of these
+    chunks are returned along with the summary, so that other summaries of the previous version
+    (like its pyramid) can be updated the same way. Otherwise, the ranges are `None`.
+    """
+    with open_shared_data(shared_data) as data:
+        return _summarize_data(data, resource_id, previous_state)
+
+
+def _summarize_data(
+    data: memoryview, resource_id: bytes, previous_state: Optional[_DataSummaryState]
+) -> Tuple[_DataSummaryState, Optional[List[Range]]]:  # pragma: no cover
+    chunk_digests = [
+        hashlib.blake2b(data[i : i + SUMMARY_CHUNK_SIZE], digest_size=16).digest()
+        for i in range(0, len(data), SUMMARY_CHUNK_SIZE)
+    ]
+    magnitude_samples = bytes(sample_magnitude(data))
+    if previous_state is not None and previous_state.data_length == len(data):
+        patch_ranges = [
+            Range(i * SUMMARY_CHUNK_SIZE, min((i + 1) * SUMMARY_CHUNK_SIZE, len(data)))
+            for i, (previous_digest, digest) in enumerate(
+                zip(previous_state.chunk_digests, chunk_digests)
+            )
+            if previous_digest != digest
+        ]
+        # Past some point, it is faster to compute the entropy of all the data at once
+        if sum(patch_range.length() for patch_range in patch_ranges) <= len(data) // 2:
+            entropy_samples = update_entropy_samples(
+                data, previous_state.entropy_samples, patch_ranges
+            )
+            return (
+                _DataSummaryState(len(data), chunk_digests, entropy_samples, magnitude_samples),
+                patch_ranges,
             )
-            return DataSummary(entropy, magnitude)
-        except BrokenProcessPool:
-            # If the previous one was aborted, try again with a new pool
-            self.pool = ProcessPoolExecutor()
-            return await self.analyze(resource, config=config, depth=depth + 1)
+    return (
+        _DataSummaryState(
+            len(data), chunk_digests, sample_entropy(data, resource_id), magnitude_samples
+        ),
+        None,
+    )
 
 
 def sample_entropy(
-    data: bytes, resource_id: bytes, window_size=256, max_samples=2**20
+    data: Union[bytes, memoryview], resource_id: bytes, window_size=256, max_samples=2**20
 ) -> bytes:  # pragma: no cover
     """
     Return a list of entropy values where each value represents the Shannon entropy of the byte
@@ -100,20 +234,87 @@ def sample_entropy(
     def log_percent(percent):  # pragma: no cover
         LOGGER.info(f"Entropy calculation {percent}% complete for {resource_id.hex()}")
 
+    if NUMPY_AVAILABLE and (
+        entropy_func is entropy_numpy or len(data) - window_size > max_samples * window_size
+    ):
+        # Once the sampled windows do not overlap, computing only their entropy with NumPy reads
+        # each byte at most once, and beats computing the entropy of every window in C
+        return sample_entropy_numpy(data, window_size, max_samples, log_percent)
+
     result = entropy_func(data, window_size, log_percent)
 
     if len(result) <= max_samples:
         return result
 
     # Sample the calculated array if it is too large
+    if NUMPY_AVAILABLE:
+        return sample_numpy(result, max_samples)
     skip = len(result) / max_samples
     return bytes(result[math.floor(i * skip)] for i in range(max_samples))
 
 
-def sample_magnitude(data: bytes, max_samples=2**20) -> bytes:  # pragma: no cover
+def update_entropy_samples(
+    data: Union[bytes, memoryview],
+    entropy_samples: bytes,
+    patch_ranges: Iterable[Range],
+    window_size=256,
+    max_samples=2**20,
+) -> bytes:  # pragma: no cover
+    """
+    Update the result of `sample_entropy` for data which was patched without changing its length,
+    only computing the entropy of the sampled windows which overlap the patched ranges.
+
+    :param data: The patched data
+    :param entropy_samples: The entropy samples of the data before it was patched
+    :param patch_ranges: The ranges of the data which were patched, such as the ranges of a
+    `DataPatchesResult`
+
+    :return: The entropy samples of the patched data
+    """
+    window_count = len(data) - window_size
+    if len(data) < 256 or window_count <= 0:
+        return b""
+    sample_count = min(window_count, max_samples)
+    skip = window_count / sample_count
+    updated_samples = bytearray(entropy_samples)
+    for patch_range in Range.merge_ranges(patch_ranges):
+        # Windows starting in this range overlap the patch
+        first_window = max(patch_range.start - window_size + 1, 0)
+        end_window = min(patch_range.end, window_count)
+        first_sample = _get_first_sample_from(first_window, skip)
+        end_sample = min(_get_first_sample_from(end_window, skip), sample_count)
+        if first_sample >= end_sample:
+            continue
+        first_sampled_window = math.floor(first_sample * skip)
+        last_sampled_window = math.floor((end_sample - 1) * skip)
+        entropy = entropy_func(
+            data[first_sampled_window : last_sampled_window + window_size + 1],
+            window_size,
+            lambda percent: None,
+        )
+        for sample in range(first_sample, end_sample):
+            updated_samples[sample] = entropy[math.floor(sample * skip) - first_sampled_window]
+    return bytes(updated_samples)
+
+
+def _get_first_sample_from(window: int, skip: float) -> int:
+    """
+    Return the first sample taken from a window at or after the given one, when taking one sample
+    every `skip` windows.
+    """
+    sample = max(math.ceil(window / skip) - 1, 0)
+    while math.floor(sample * skip) < window:
+        sample += 1
+    return sample
+
+
+def sample_magnitude(
+    data: Union[bytes, memoryview], max_samples=2**20
+) -> bytes:  # pragma: no cover
+    if NUMPY_AVAILABLE:
+        return sample_numpy(data, max_samples)
     if len(data) < max_samples:
-        # TODO: Should this be a shallow copy instead?
-        return data
+        return bytes(data)
     else:
         skip = len(data) / max_samples
         return bytes(data[math.floor(i * skip)] for i in range(max_samples))
@@ -0,0 +1,196 @@
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+# Number of windows whose entropy is computed at once by the sliding window, bounding the memory
+# used to about 128 bytes per window
+SLIDING_WINDOWS_PER_CHUNK = 2**20
+# Number of windows whose histograms are computed at once when sampling, bounding the memory used
+# to about `16 * window_size` bytes per window
+SAMPLED_WINDOWS_PER_CHUNK = 2**12
+# Computing the entropy of every window with the sliding window costs about as much per window as
+# adding this many bytes to the histogram of a sampled window
+SLIDING_WINDOW_COST = 16
+
+
+def entropy_numpy(
+    data: Union[bytes, memoryview],
+    window_size: int,
+    log_percent: Optional[Callable[[int], None]] = None,
+) -> bytes:
+    """
+    Return a list of entropy values where each value represents the Shannon entropy of the byte
+    value distribution over a fixed-size, sliding window.
+
+    Rather than updating a histogram as the window slides, the change in entropy between
+    consecutive windows is computed for all windows at once. It only depends on how many times
+    the byte leaving the window and the byte entering it occur in the window, which are found by
+    sorting the positions of the data by byte value: the occurrences of a byte value within
+    `window_size` of a position are then contiguous. The entropy of each window is the cumulative
+    sum of these changes.
+    """
+    window_count = len(data) - window_size
+    if window_count <= 0:
+        return b""
+    data_array = np.frombuffer(data, dtype=np.uint8)
+    entropy_terms = _get_entropy_terms(window_size)
+    result = np.empty(window_count, dtype=np.uint8)
+    for chunk_start in range(0, window_count, SLIDING_WINDOWS_PER_CHUNK):
+        chunk_end = min(chunk_start + SLIDING_WINDOWS_PER_CHUNK, window_count)
+        chunk_data = data_array[chunk_start : chunk_end + window_size]
+        # Start each chunk from the histogram of its first window, so that floating point error
+        # does not accumulate across chunks
+        first_histogram = np.bincount(chunk_data[:window_size], minlength=256)
+        entropy_changes = _get_entropy_changes(chunk_data, window_size, entropy_terms)
+        chunk_entropy: np.ndarray = np.empty(chunk_end - chunk_start, dtype=np.float64)
+        chunk_entropy[0] = np.sum(entropy_terms[first_histogram])
+        np.cumsum(entropy_changes[:-1], out=chunk_entropy[1:])
+        chunk_entropy[1:] += chunk_entropy[0]
+        result[chunk_start:chunk_end] = _scale_entropy(chunk_entropy)
+        _log_progress(log_percent, chunk_start, chunk_end, window_count)
+    return result.tobytes()
+
+
+def sample_entropy_numpy(
+    data: Union[bytes, memoryview],
+    window_size: int,
+    max_samples: int,
+    log_percent: Optional[Callable[[int], None]] = None,
+) -> bytes:
+    """
+    Return `max_samples` evenly spaced values of `entropy_numpy(data, window_size)`, or all of
+    them if there are not more than that.
+
+    If the samples are far apart compared to the window size, only the entropy of the sampled
+    windows is computed, from their histograms.
+    """
+    window_count = len(data) - window_size
+    if window_count <= 0:
+        return b""
+    if window_count * SLIDING_WINDOW_COST <= max_samples * window_size:
+        return sample_numpy(entropy_numpy(data, window_size, log_percent), max_samples)
+
+    data_array = np.frombuffer(data, dtype=np.uint8)
+    window_starts = sample_indexes(window_count, max_samples)
+    return window_entropy_numpy(data_array, window_starts, window_size, log_percent).tobytes()
+
+
+def window_entropy_numpy(
+    data_array: np.ndarray,
+    window_starts: np.ndarray,
+    window_size: int,
+    log_percent: Optional[Callable[[int], None]] = None,
+) -> np.ndarray:
+    """
+    Return the entropy of the windows of the data starting at the given offsets, computed from
+    their histograms. This is faster than computing the entropy of every window with
+    `entropy_numpy` when the windows are far apart.
+    """
+    entropy_terms = _get_entropy_terms(window_size)
+    window_offsets = np.arange(window_size, dtype=np.int64)
+    result = np.empty(len(window_starts), dtype=np.uint8)
+    for chunk_start in range(0, len(window_starts), SAMPLED_WINDOWS_PER_CHUNK):
+        chunk_window_starts = window_starts[chunk_start : chunk_start + SAMPLED_WINDOWS_PER_CHUNK]
+        chunk_size = len(chunk_window_starts)
+        # Count the bytes of all windows with one bincount, offsetting the bytes of each window so
+        # that it gets its own 256 bins
+        window_bytes = data_array[chunk_window_starts[:, None] + window_offsets]
+        histogram_indexes = np.arange(0, chunk_size * 256, 256, dtype=np.int64)[:, None]
+        histogram_indexes = histogram_indexes + window_bytes
+        histograms = np.bincount(histogram_indexes.ravel(), minlength=chunk_size * 256)
+        entropy = entropy_terms[histograms].reshape(chunk_size, 256).sum(axis=1)
+        result[chunk_start : chunk_start + chunk_size] = _scale_entropy(entropy)
+        _log_progress(log_percent, chunk_start, chunk_start + chunk_size, len(window_starts))
+    return result
+
+
+def sample_numpy(data: Union[bytes, memoryview], max_samples: int) -> bytes:
+    """
+    Return `max_samples` evenly spaced bytes of the data, or all of it if it is not longer than
+    that.
+    """
+    if len(data) <= max_samples:
+        return bytes(data)
+    data_array = np.frombuffer(data, dtype=np.uint8)
+    return data_array[sample_indexes(len(data), max_samples)].tobytes()
+
+
+def sample_indexes(length: int, max_samples: int) -> np.ndarray:
+    """
+    Return the indexes of `max_samples` evenly spaced elements of a sequence of the given length,
+    which are `math.floor(i * (length / max_samples))` for each sample `i`, or all the indexes of
+    the sequence if it is not longer than `max_samples`.
+    """
+    if length <= max_samples:
+        return np.arange(length, dtype=np.int64)
+    skip = length / max_samples
+    return np.floor(np.arange(max_samples, dtype=np.float64) * skip).astype(np.int64)
+
+
+def _get_entropy_terms(window_size: int) -> np.ndarray:
+    """
+    Return the term of the normalized Shannon entropy of a window for a byte value occurring
+    `count` times in it, for each `count` from 0 to `window_size + 1`. The last term is never
+    part of the entropy of a window, it is only there so that indexing it does not fail.
+    """
+    probabilities = np.arange(window_size + 2, dtype=np.float64) / window_size
+    terms: np.ndarray = np.zeros(window_size + 2, dtype=np.float64)
+    terms[1:-1] = probabilities[1:-1] * np.log2(probabilities[1:-1])
+    return terms / -np.log2(window_size)
+
+
+def _get_entropy_changes(
+    data_array: np.ndarray, window_size: int, entropy_terms: np.ndarray
+) -> np.ndarray:
+    """
+    Return the change in entropy from each window of the data to the next.
+    """
+    data_length = len(data_array)
+    window_count = data_length - window_size
+    # Sort the positions by byte value, so that positions with the same byte value are contiguous
+    # and in increasing order. The keys of different byte values are far enough apart that
+    # positions `window_size` before or after a key are only near keys of the same byte value.
+    sorted_positions = np.argsort(data_array, kind="stable")
+    sorted_keys = data_array[sorted_positions].astype(np.int64) * (data_length + window_size + 1)
+    sorted_keys += sorted_positions
+    sorted_indexes = np.arange(data_length, dtype=np.int64)
+
+    # Occurrences of the byte at each position in the window starting at that position
+    occurrences_from: np.ndarray = np.empty(data_length, dtype=np.int64)
+    occurrences_from[sorted_positions] = (
+        np.searchsorted(sorted_keys, sorted_keys + window_size) - sorted_indexes
+    )
+    removed_counts = occurrences_from[:window_count]
+    # Occurrences of the byte at each position in the window ending just before that position
+    occurrences_until: np.ndarray = np.empty(data_length, dtype=np.int64)
+    occurrences_until[sorted_positions] = sorted_indexes - np.searchsorted(
+        sorted_keys, sorted_keys - window_size
+    )
+    added_counts = occurrences_until[window_size:]
+
+    entropy_changes = (
+        entropy_terms[removed_counts - 1]
+        - entropy_terms[removed_counts]
+        + entropy_terms[added_counts + 1]
+        - entropy_terms[added_counts]
+    )
+    # The histogram does not change if the byte leaving the window is the one entering it
+    entropy_changes[data_array[:window_count] == data_array[window_size:]] = 0.0
+    return entropy_changes
+
+
+def _scale_entropy(entropy: np.ndarray) -> np.ndarray:
+    # Add a small amount to absorb floating point error, which could otherwise round a maximal
+    # entropy down to 254
+    return np.clip(np.floor(255.0 * entropy + 1e-9), 0, 255).astype(np.uint8)
+
+
+def _log_progress(
+    log_percent: Optional[Callable[[int], None]], start: int, end: int, total: int
+) -> None:
+    if log_percent is None:
+        return
+    # Log when crossing a multiple of 10%
+    percent = end * 100 // total // 10 * 10
+    if percent > start * 100 // total // 10 * 10:
+        log_percent(percent)
@@ -1,10 +1,12 @@
 import logging
 import math
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Union
 
 
 def entropy_py(
-    data: bytes, window_size: int, log_percent: Optional[Callable[[int], None]] = None
+    data: Union[bytes, memoryview],
+    window_size: int,
+    log_percent: Optional[Callable[[int], None]] = None,
 ) -> bytes:
     """
     Return a list of entropy values where each value represents the Shannon entropy of the byte
@@ -16,7 +18,8 @@ def entropy_py(
         # Sort of hacky way to know we are being called from the tests and don't need to log this
         logging.warning(
             f"Using the Python implementation of the Shannon entropy calculation! This is potentially "
-            f"very slow, and is only used when the C extension cannot be built/found."
+            f"very slow, and is only used when the C extension cannot be built/found and NumPy is not "
+            f"installed."
         )
 
     # Create a histogram, and populate it with initial values
@@ -0,0 +1,219 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from ofrak.core.entropy.entropy_numpy import window_entropy_numpy
+from ofrak_type.range import Range
+
+# Maximum number of tiles in the finest level of a pyramid; the tiles of the data of larger
+# resources are made larger to stay under it
+MAX_BASE_TILES = 2**22
+# Number of tiles of a level summarized by each tile of the next level
+PYRAMID_FANOUT = 4
+
+# Rows of the array of summaries of each level
+ENTROPY_MIN, ENTROPY_MAX, ENTROPY_MEAN, MAGNITUDE_MIN, MAGNITUDE_MAX, MAGNITUDE_MEAN = range(6)
+
+
+@dataclass
+class DataSummaryTiles:
+    """
+    Summaries of the consecutive tiles of one level of a
+    [DataSummaryPyramid][ofrak.core.entropy.pyramid.DataSummaryPyramid] covering a range of data.
+    Each summary has one byte per tile.
+
+    :ivar level: The level of the tiles, 0 being the finest
+    :ivar tile_size: Number of bytes of data covered by each tile (the last tile of the data may be
+    shorter)
+    :ivar data_range: The range of data covered by the tiles
+    :ivar entropy_min: Lowest entropy of the windows in each tile
+    :ivar entropy_max: Highest entropy of the windows in each tile
+    :ivar entropy_mean: Mean entropy of the windows in each tile
+    :ivar magnitude_min: Lowest byte value in each tile
+    :ivar magnitude_max: Highest byte value in each tile
+    :ivar magnitude_mean: Mean byte value in each tile
+    """
+
+    level: int
+    tile_size: int
+    data_range: Range
+    entropy_min: bytes
+    entropy_max: bytes
+    entropy_mean: bytes
+    magnitude_min: bytes
+    magnitude_max: bytes
+    magnitude_mean: bytes
+
+
+class DataSummaryPyramid:
+    """
+    Summaries of the entropy and magnitude of some data at several resolutions, so that any range
+    of the data can be displayed at any zoom level by reading a number of summaries proportional to
+    the number of tiles displayed, rather than to the size of the range.
+
+    The data is split into tiles of `tile_size` bytes in the finest level (level 0), and each tile
+    of a level summarizes `PYRAMID_FANOUT` tiles of the level below it, up to a level with a single
+    tile. Each tile has the lowest, highest and mean entropy of the windows of data in it and the
+    lowest, highest and mean value of its bytes, each stored in one byte.
+
+    :ivar data_length: Length of the summarized data
+    :ivar window_size: Size of the windows over which entropy is computed; windows start at
+    multiples of the window size, except for the last one, which ends at the end of the data
+    :ivar tile_size: Number of bytes of data covered by each tile of level 0
+    """
+
+    def __init__(self, data: Union[bytes, memoryview], window_size: int = 256):
+        self.data_length = len(data)
+        self.window_size = window_size
+        self.tile_size = window_size
+        while self.data_length > self.tile_size * MAX_BASE_TILES:
+            self.tile_size *= 2
+        self._levels: List[np.ndarray] = []
+
+        data_array = np.frombuffer(data, dtype=np.uint8)
+        tile_count = -(-self.data_length // self.tile_size)
+        self._levels.append(self._summarize_base_tiles(data_array, 0, tile_count))
+        while tile_count > 1:
+            tile_count = -(-tile_count // PYRAMID_FANOUT)
+            self._levels.append(self._summarize_tiles(len(self._levels), 0, tile_count))
+
+    @property
+    def level_count(self) -> int:
+        return len(self._levels)
+
+    def get_tile_size(self, level: int) -> int:
+        return self.tile_size * PYRAMID_FANOUT**level
+
+    def get_level(self, data_range: Range, max_tiles: int) -> int:
+        """
+        Get the finest level at which a range of the data is covered by at most `max_tiles` tiles,
+        or the coarsest level if there is none.
+        """
+        for level in range(self.level_count):
+            first_tile, end_tile = self._get_tiles_covering(level, data_range)
+            if end_tile - first_tile <= max_tiles:
+                return level
+        return self.level_count - 1
+
+    def get_tiles(self, level: int, data_range: Range) -> DataSummaryTiles:
+        """
+        Get the summaries of the tiles of a level covering a range of the data.
+
+        :raises ValueError: if the level does not exist
+        """
+        if not 0 <= level < self.level_count:
+            raise ValueError(
+                f"Level {level} does not exist, the pyramid has {self.level_count} levels"
+            )
+        tile_size = self.get_tile_size(level)
+        first_tile, end_tile = self._get_tiles_covering(level, data_range)
+        summaries = self._levels[level][:, first_tile:end_tile]
+        return DataSummaryTiles(
+            level,
+            tile_size,
+            Range(
+                min(first_tile * tile_size, self.data_length),
+                min(end_tile * tile_size, self.data_length),
+            ),
+            *(summary.tobytes() for summary in summaries),
+        )
+
+    def update(self, data: Union[bytes, memoryview], patch_ranges: Iterable[Range]):
+        """
+        Update the summaries of the tiles overlapping ranges of the data which were patched, without
+        changing the length of the data.
+
+        :param data: The patched data
+        :param patch_ranges: The ranges of the data which were patched
+        """
+        if len(data) != self.data_length:
+            raise ValueError(
+                f"Cannot update the summaries of {self.data_length} bytes with {len(data)} bytes "
+                f"of data"
+            )
+        data_array = np.frombuffer(data, dtype=np.uint8)
+        last_window_start = max(self.data_length - self.window_size, 0)
+        for patch_range in Range.merge_ranges(patch_ranges):
+            first_tile = patch_range.start // self.tile_size
+            end_tile = -(-patch_range.end // self.tile_size)
+            if patch_range.end > last_window_start:
+                # The last window of the data belongs to the last tile, but may start before it
+                end_tile = -(-self.data_length // self.tile_size)
+            self._levels[0][:, first_tile:end_tile] = self._summarize_base_tiles(
+                data_array, first_tile, end_tile
+            )
+            for level in range(1, self.level_count):
+                first_tile //= PYRAMID_FANOUT
+                end_tile = -(-end_tile // PYRAMID_FANOUT)
+                self._levels[level][:, first_tile:end_tile] = self._summarize_tiles(
+                    level, first_tile, end_tile
+                )
+
+    def _get_tiles_covering(self, level: int, data_range: Range):
+        tile_size = self.get_tile_size(level)
+        start = min(max(data_range.start, 0), self.data_length)
+        end = min(max(data_range.end, start), self.data_length)
+        return start // tile_size, -(-end // tile_size)
+
+    def _get_tile_lengths(self, level: int, first_tile: int, end_tile: int) -> np.ndarray:
+        tile_size = self.get_tile_size(level)
+        tile_starts = np.arange(first_tile, end_tile, dtype=np.int64) * tile_size
+        return np.minimum(tile_starts + tile_size, self.data_length) - tile_starts
+
+    def _summarize_base_tiles(
+        self, data_array: np.ndarray, first_tile: int, end_tile: int
+    ) -> np.ndarray:
+        summaries = np.zeros((6, end_tile - first_tile), dtype=np.uint8)
+        if first_tile == end_tile:
+            return summaries
+        start = first_tile * self.tile_size
+        end = min(end_tile * self.tile_size, self.data_length)
+        tile_data = data_array[start:end]
+        tile_offsets = np.arange(0, end - start, self.tile_size, dtype=np.int64)
+        summaries[MAGNITUDE_MIN] = np.minimum.reduceat(tile_data, tile_offsets)
+        summaries[MAGNITUDE_MAX] = np.maximum.reduceat(tile_data, tile_offsets)
+        tile_sums = np.add.reduceat(tile_data, tile_offsets, dtype=np.uint64)
+        summaries[MAGNITUDE_MEAN] = _divide_rounded(
+            tile_sums, np.diff(tile_offsets, append=end - start)
+        )
+
+        if self.data_length < self.window_size:
+            return summaries
+        # Tiles are a whole number of windows, so the windows of each tile start at a multiple of
+        # the window size in it; the last window of the data ends at its end
+        window_starts = np.arange(start, end - self.window_size + 1, self.window_size)
+        if end == self.data_length and self.data_length % self.window_size != 0:
+            window_starts = np.append(window_starts, self.data_length - self.window_size)
+        window_entropy = window_entropy_numpy(data_array, window_starts, self.window_size)
+        window_offsets = tile_offsets // self.window_size
+        summaries[ENTROPY_MIN] = np.minimum.reduceat(window_entropy, window_offsets)
+        summaries[ENTROPY_MAX] = np.maximum.reduceat(window_entropy, window_offsets)
+        window_sums = np.add.reduceat(window_entropy, window_offsets, dtype=np.uint64)
+        window_counts = np.diff(window_offsets, append=len(window_entropy))
+        summaries[ENTROPY_MEAN] = _divide_rounded(window_sums, window_counts)
+        return summaries
+
+    def _summarize_tiles(self, level: int, first_tile: int, end_tile: int) -> np.ndarray:
+        # Summarize the tiles of a level from those of the level below
+        first_child = first_tile * PYRAMID_FANOUT
+        end_child = min(end_tile * PYRAMID_FANOUT, self._levels[level - 1].shape[1])
+        children = self._levels[level - 1][:, first_child:end_child]
+        child_offsets = np.arange(0, end_child - first_child, PYRAMID_FANOUT)
+        # Means are weighted by the length of each child, since the last tile may be shorter
+        child_lengths = self._get_tile_lengths(level - 1, first_child, end_child)
+        lengths = np.add.reduceat(child_lengths, child_offsets)
+
+        summaries = np.empty((6, len(child_offsets)), dtype=np.uint8)
+        for row in (ENTROPY_MIN, MAGNITUDE_MIN):
+            summaries[row] = np.minimum.reduceat(children[row], child_offsets)
+        for row in (ENTROPY_MAX, MAGNITUDE_MAX):
+            summaries[row] = np.maximum.reduceat(children[row], child_offsets)
+        for row in (ENTROPY_MEAN, MAGNITUDE_MEAN):
+            sums = np.add.reduceat(children[row] * child_lengths, child_offsets)
+            summaries[row] = _divide_rounded(sums, lengths)
+        return summaries
+
+
+def _divide_rounded(dividends: np.ndarray, divisors: np.ndarray) -> np.ndarray:
+    return (dividends + divisors // 2) // divisors
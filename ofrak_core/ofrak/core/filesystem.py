@@ -1,14 +1,20 @@
+import asyncio
 import os
 import stat
 import tempfile
-from dataclasses import dataclass
-from typing import Dict, Iterable, Optional, Type, Union
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
 
 try:
     import xattr
 except ImportError:
     import ofrak.core.xattr_stub as xattr  # type: ignore[no-redef]
 
+from ofrak.component.unpacker import UnpackerError
+from ofrak.model.component_model import ComponentConfig
+from ofrak.model.data_model import LazyData
 from ofrak.model.viewable_tag_model import AttributesType
 from ofrak.resource import Resource
 
@@ -21,6 +27,14 @@ from ofrak.service.resource_service_i import (
     ResourceFilterCondition,
 )
 
+# FilesystemRoot.flush_to_disk writes files in batches of up to this many files or bytes, each
+# written by one thread, so that the cost of handing work to a thread is shared by many small files
+FLUSH_BATCH_FILES = 256
+FLUSH_BATCH_BYTES = 16 * 1024 * 1024
+# Maximum number of batches being written at once; the data of a file is only read once its batch
+# can be written, so this bounds the data held in memory for writing
+FLUSH_MAX_PENDING_BATCHES = 8
+
 
 @dataclass
 class FilesystemEntry(ResourceView):
@@ -31,6 +45,16 @@ class FilesystemEntry(ResourceView):
     name: str
     stat: Optional[os.stat_result]
     xattrs: Optional[Dict[str, bytes]]
+    # Parent of the entry, linked by get_path and FilesystemRoot so that the path of the entry can
+    # be computed without querying its ancestors; a FilesystemRoot for entries at the root of a
+    # filesystem, or None if not linked yet
+    _parent: Optional[Union["FilesystemEntry", "FilesystemRoot"]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def get_special_field_names(cls) -> Set[str]:
+        return super().get_special_field_names() | {"_parent"}
 
     @index
     def Name(self) -> str:
@@ -108,10 +132,17 @@ class FilesystemEntry(ResourceView):
         """
         Get a folder's path, with the `FilesystemRoot` as the path root.
 
+        Once the path of an entry is known, it is computed from the names of its cached ancestors,
+        without querying them again.
+
         :return: The full path name, with the `FilesystemRoot` ancestor as the path root
         """
-        path = [self.get_name()]
+        cached_location = self._get_cached_location()
+        if cached_location is not None:
+            return cached_location[1]
 
+        path = [self.get_name()]
+        entry = self
         for a in await self.resource.get_ancestors(
             r_filter=ResourceFilter(
                 tags=(FilesystemEntry, FilesystemRoot),
@@ -119,13 +150,36 @@ class FilesystemEntry(ResourceView):
             )
         ):
             if (a is None) or (a.has_tag(FilesystemRoot)):
+                if a is not None:
+                    entry._parent = await a.view_as(FilesystemRoot)
                 break
             a_view = await a.view_as(FilesystemEntry)
+            entry._parent = a_view
+            entry = a_view
             path.append(a_view.get_name())
         path.reverse()
 
         return os.path.join(*path)
 
+    def _get_cached_location(self) -> Optional[Tuple[bytes, str]]:
+        """
+        Compute the path of this entry from the names of its linked ancestors.
+
+        :return: The resource ID of the `FilesystemRoot` of the entry and the path of the entry in
+        it, or `None` if not all of its ancestors are linked
+        """
+        names = []
+        entry: Optional[Union[FilesystemEntry, FilesystemRoot]] = self
+        while isinstance(entry, FilesystemEntry):
+            if entry._deleted:
+                return None
+            names.append(entry.get_name())
+            entry = entry._parent
+        if entry is None or entry._deleted:
+            return None
+        names.reverse()
+        return entry.resource.get_id(), os.path.join(*names)
+
     def apply_stat_attrs(self, path: str):
         """
         Set file mode and access times of a path on disk to match the attributes stored on this
@@ -134,13 +188,57 @@ class FilesystemEntry(ResourceView):
         :param path: Path on disk to set attributes of.
         """
         if self.stat:
-            os.chown(path, self.stat.st_uid, self.stat.st_gid)
+            _chown(path, self.stat.st_uid, self.stat.st_gid)
             os.chmod(path, self.stat.st_mode)
             os.utime(path, (self.stat.st_atime, self.stat.st_mtime))
         if self.xattrs:
             for attr, value in self.xattrs.items():
                 xattr.setxattr(path, attr, value)
 
+    def get_stat_or_default(self) -> os.stat_result:
+        """
+        Get the stat of the entry, with the file type bits of its mode set to match its type. If
+        the entry has no stat, get a default one instead: owned by root, with mode 0o644 (0o755
+        for folders, 0o777 for symbolic links) and all times zero, so that the entry is packed
+        the same way every time.
+
+        :raises ValueError: if the entry is a device with no stat, since its device number is
+        unknown
+        """
+        file_type: int
+        if self.is_folder():
+            file_type, default_permissions = stat.S_IFDIR, 0o755
+        elif self.is_link():
+            file_type, default_permissions = stat.S_IFLNK, 0o777
+        elif self.is_fifo_pipe():
+            file_type, default_permissions = stat.S_IFIFO, 0o644
+        elif self.is_block_device():
+            file_type, default_permissions = stat.S_IFBLK, 0o644
+        elif self.is_character_device():
+            file_type, default_permissions = stat.S_IFCHR, 0o644
+        else:
+            file_type, default_permissions = stat.S_IFREG, 0o644
+
+        if self.stat is None:
+            if self.is_device():
+                raise ValueError(f"Device {self.name} has no stat, so its device number is unknown")
+            return os.stat_result(
+                (file_type | default_permissions, 0, 0, 1, 0, 0, 0, 0, 0, 0), {"st_rdev": 0}
+            )
+        if stat.S_IFMT(self.stat.st_mode) == file_type:
+            return self.stat
+        stat_values = list(self.stat)
+        stat_values[stat.ST_MODE] = file_type | stat.S_IMODE(self.stat.st_mode)
+        return os.stat_result(
+            stat_values,
+            {
+                "st_atime": self.stat.st_atime,
+                "st_mtime": self.stat.st_mtime,
+                "st_ctime": self.stat.st_ctime,
+                "st_rdev": self.stat.st_rdev,
+            },
+        )
+
     def is_file(self) -> bool:
         return self.resource.has_tag(File)
 
@@ -264,10 +362,30 @@ class FilesystemRoot(ResourceView):
     Any resource that contains a file tree should inherit the `FilesystemRoot` class.
     """
 
+    # Entries of this filesystem by path, built on the first lookup and kept up to date as entries
+    # are added, removed and renamed through this view
+    _entries_by_path: Optional[Dict[str, FilesystemEntry]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def get_special_field_names(cls) -> Set[str]:
+        return super().get_special_field_names() | {"_entries_by_path"}
+
     async def initialize_from_disk(
         self,
         path: str,
     ):
+        """
+        Adds the folders, files and special files in a directory on disk to this `FilesystemRoot`.
+
+        The directory is walked once, while a pool of threads reads the contents of the files. The
+        entries of each folder are then created in one batch, as children of the folder resource
+        created before them, so that importing a large tree does not search the descendants of
+        this `FilesystemRoot` for the parent of each entry.
+
+        :param path: the directory whose contents to add
+        """
         root_path = os.path.normpath(path)
 
         if not os.path.exists(root_path):
@@ -279,107 +397,147 @@ class FilesystemRoot(ResourceView):
                 f"Could not initialize from disk. Found a file instead of a directory: {root_path}"
             )
 
-        for root, dirs, files in os.walk(root_path):
-            for d in sorted(dirs):
-                absolute_path = os.path.join(root, d)
-                relative_path = os.path.join(os.path.relpath(root, root_path), d)
-                folder_attributes_stat = os.lstat(absolute_path)
-
-                mode = folder_attributes_stat.st_mode
-                mode_tests = [
-                    stat.S_ISCHR,
-                    stat.S_ISBLK,
-                    stat.S_ISFIFO,
-                    stat.S_ISSOCK,
-                    stat.S_ISDOOR,
-                    stat.S_ISPORT,
-                    stat.S_ISWHT,
-                    stat.S_ISREG,
-                ]
-                for mode_test in mode_tests:
-                    if mode_test(mode) != 0:
-                        raise NotImplementedError(
-                            f"Directory {absolute_path} has an unsupported special file type: "
-                            f"{stat.S_IFMT(mode):o}. {mode_test.__name__} should be false."
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor() as read_executor:
+            # The entries in each directory, by path relative to the root path, along with the
+            # pending read of their data if they are files
+            directory_entries: List[
+                Tuple[str, List[Tuple[FilesystemEntry, Optional[Awaitable[bytes]]]]]
+            ] = []
+            for root, dirs, files in os.walk(root_path):
+                relative_root = os.path.relpath(root, root_path)
+                entries: List[Tuple[FilesystemEntry, Optional[Awaitable[bytes]]]] = []
+                directory_entries.append((relative_root, entries))
+                for d in sorted(dirs):
+                    absolute_path = os.path.join(root, d)
+                    relative_path = os.path.normpath(os.path.join(relative_root, d))
+                    folder_attributes_stat = os.lstat(absolute_path)
+
+                    mode = folder_attributes_stat.st_mode
+                    mode_tests = [
+                        stat.S_ISCHR,
+                        stat.S_ISBLK,
+                        stat.S_ISFIFO,
+                        stat.S_ISSOCK,
+                        stat.S_ISDOOR,
+                        stat.S_ISPORT,
+                        stat.S_ISWHT,
+                        stat.S_ISREG,
+                    ]
+                    for mode_test in mode_tests:
+                        if mode_test(mode) != 0:
+                            raise NotImplementedError(
+                                f"Directory {absolute_path} has an unsupported special file type: "
+                                f"{stat.S_IFMT(mode):o}. {mode_test.__name__} should be false."
+                            )
+
+                    folder_attributes_xattr = self._get_xattr_map(absolute_path)
+                    if os.path.islink(absolute_path):
+                        entries.append(
+                            (
+                                SymbolicLink(
+                                    relative_path,
+                                    folder_attributes_stat,
+                                    folder_attributes_xattr,
+                                    os.readlink(absolute_path),
+                                ),
+                                None,
+                            )
                         )
-
-                folder_attributes_xattr = self._get_xattr_map(absolute_path)
-                if os.path.islink(absolute_path):
-                    await self.add_special_file_entry(
-                        relative_path,
-                        SymbolicLink(
-                            relative_path,
-                            folder_attributes_stat,
-                            folder_attributes_xattr,
-                            os.readlink(absolute_path),
-                        ),
-                    )
-                else:
-                    await self.add_folder(
-                        relative_path,
-                        folder_attributes_stat,
-                        folder_attributes_xattr,
-                    )
-            for f in sorted(files):
-                absolute_path = os.path.join(root, f)
-                relative_path = os.path.normpath(os.path.join(os.path.relpath(root, root_path), f))
-                file_attributes_stat = os.lstat(absolute_path)
-
-                mode = file_attributes_stat.st_mode
-                mode_tests = [
-                    stat.S_ISSOCK,
-                    stat.S_ISDOOR,
-                    stat.S_ISPORT,
-                    stat.S_ISWHT,
-                    stat.S_ISDIR,
-                ]
-                for mode_test in mode_tests:
-                    if mode_test(mode) != 0:
+                    else:
+                        entries.append(
+                            (Folder(d, folder_attributes_stat, folder_attributes_xattr), None)
+                        )
+                for f in sorted(files):
+                    absolute_path = os.path.join(root, f)
+                    relative_path = os.path.normpath(os.path.join(relative_root, f))
+                    file_attributes_stat = os.lstat(absolute_path)
+
+                    mode = file_attributes_stat.st_mode
+                    mode_tests = [
+                        stat.S_ISSOCK,
+                        stat.S_ISDOOR,
+                        stat.S_ISPORT,
+                        stat.S_ISWHT,
+                        stat.S_ISDIR,
+                    ]
+                    for mode_test in mode_tests:
+                        if mode_test(mode) != 0:
+                            raise NotImplementedError(
+                                f"Directory {absolute_path} has an unsupported special file type: "
+                                f"{stat.S_IFMT(mode):o}. {mode_test.__name__} should be false."
+                            )
+
+                    file_attributes_xattr = self._get_xattr_map(absolute_path)
+                    if os.path.islink(absolute_path):
+                        entries.append(
+                            (
+                                SymbolicLink(
+                                    relative_path,
+                                    file_attributes_stat,
+                                    file_attributes_xattr,
+                                    os.readlink(absolute_path),
+                                ),
+                                None,
+                            )
+                        )
+                    elif os.path.isfile(absolute_path):
+                        entries.append(
+                            (
+                                File(f, file_attributes_stat, file_attributes_xattr),
+                                loop.run_in_executor(read_executor, _read_file, absolute_path),
+                            )
+                        )
+                    elif stat.S_ISFIFO(mode):
+                        entries.append(
+                            (
+                                FIFOPipe(
+                                    relative_path, file_attributes_stat, file_attributes_xattr
+                                ),
+                                None,
+                            )
+                        )
+                    elif stat.S_ISBLK(mode):
+                        entries.append(
+                            (
+                                BlockDevice(
+                                    relative_path, file_attributes_stat, file_attributes_xattr
+                                ),
+                                None,
+                            )
+                        )
+                    elif stat.S_ISCHR(mode):
+                        entries.append(
+                            (
+                                CharacterDevice(
+                                    relative_path, file_attributes_stat, file_attributes_xattr
+                                ),
+                                None,
+                            )
+                        )
+                    else:
                         raise NotImplementedError(
-                            f"Directory {absolute_path} has an unsupported special file type: "
-                            f"{stat.S_IFMT(mode):o}. {mode_test.__name__} should be false."
+                            f"File {absolute_path} appeared to be a supported "
+                            f"type but did not match any of the known cases to "
+                            f"create a resource. Stat: {stat.S_IFMT(mode):o}"
                         )
 
-                file_attributes_xattr = self._get_xattr_map(absolute_path)
-                if os.path.islink(absolute_path):
-                    await self.add_special_file_entry(
-                        relative_path,
-                        SymbolicLink(
-                            relative_path,
-                            file_attributes_stat,
-                            file_attributes_xattr,
-                            os.readlink(absolute_path),
-                        ),
-                    )
-                elif os.path.isfile(absolute_path):
-                    with open(absolute_path, "rb") as fh:
-                        await self.add_file(
-                            relative_path,
-                            fh.read(),
-                            file_attributes_stat,
-                            file_attributes_xattr,
-                        )
-                elif stat.S_ISFIFO(mode):
-                    await self.add_special_file_entry(
-                        relative_path,
-                        FIFOPipe(relative_path, file_attributes_stat, file_attributes_xattr),
-                    )
-                elif stat.S_ISBLK(mode):
-                    await self.add_special_file_entry(
-                        relative_path,
-                        BlockDevice(relative_path, file_attributes_stat, file_attributes_xattr),
-                    )
-                elif stat.S_ISCHR(mode):
-                    await self.add_special_file_entry(
-                        relative_path,
-                        CharacterDevice(relative_path, file_attributes_stat, file_attributes_xattr),
-                    )
-                else:
-                    raise NotImplementedError(
-                        f"File {absolute_path} appeared to be a supported "
-                        f"type but did not match any of the known cases to "
-                        f"create a resource. Stat: {stat.S_IFMT(mode):o}"
-                    )
+            # Resources of the folders created so far, by path relative to the root path. Since
+            # os.walk lists a directory before its subdirectories, the parent of each batch of
+            # entries is created before it.
+            folders: Dict[str, Resource] = {".": self.resource}
+            for relative_root, entries in directory_entries:
+                entries_data = [
+                    b"" if read_data is None else await read_data for _, read_data in entries
+                ]
+                children = await folders[relative_root].create_children_from_views(
+                    [entry for entry, _ in entries], entries_data
+                )
+                for (entry, _), child in zip(entries, children):
+                    if isinstance(entry, Folder):
+                        folders[os.path.normpath(os.path.join(relative_root, entry.name))] = child
+        # The entries are indexed again with a single query on the next lookup
+        self._entries_by_path = None
 
     async def flush_to_disk(
         self,
@@ -389,6 +547,10 @@ class FilesystemRoot(ResourceView):
         Writes this `FilesystemRoot`'s `FilesystemEntry` descendants to directory. If a target path
         is not provided, the output is written to a temporary directory.
 
+        The paths of all entries are resolved in one walk of the tree, and all folders are created
+        first. Files are then written by a pool of threads, while the other entries are created,
+        and the stat and xattrs of all entries but folders are applied in a final pass.
+
         :return: the root directory containing the flushed filesystem
         """
         if path is None:
@@ -396,89 +558,136 @@ class FilesystemRoot(ResourceView):
         else:
             root_path = path
 
-        entries = [
-            f
-            for f in await self.resource.get_children_as_view(
-                FilesystemEntry, r_filter=ResourceFilter(tags=(FilesystemEntry,))
-            )
-        ]
-        while len(entries) > 0:
-            entry = entries.pop(0)
-            entry_path = await entry.get_path()
-            if entry.is_link():
-                link_name = os.path.join(root_path, entry_path)
-                if not os.path.exists(link_name):
-                    link_view = await entry.resource.view_as(SymbolicLink)
-                    os.symlink(link_view.source_path, link_name)
-                assert len(list(await entry.resource.get_children())) == 0
-                if entry.stat:
-                    # https://docs.python.org/3/library/os.html#os.supports_follow_symlinks
-                    if os.chown in os.supports_follow_symlinks:
-                        os.chown(
-                            link_name, entry.stat.st_uid, entry.stat.st_gid, follow_symlinks=False
-                        )
-                    if os.chmod in os.supports_follow_symlinks:
-                        os.chmod(link_name, entry.stat.st_mode, follow_symlinks=False)
-                    if os.utime in os.supports_follow_symlinks:
-                        os.utime(
-                            link_name,
-                            (entry.stat.st_atime, entry.stat.st_mtime),
-                            follow_symlinks=False,
-                        )
-                if entry.xattrs:
-                    for attr, value in entry.xattrs.items():
-                        xattr.setxattr(link_name, attr, value, symlink=True)  # Don't follow links
-            elif entry.is_folder():
+        entries = await self.get_entries_with_paths()
+        for entry_path, entry in entries:
+            if entry.is_folder():
                 folder_name = os.path.join(root_path, entry_path)
                 if not os.path.exists(folder_name):
                     os.makedirs(folder_name)
-                for child in await entry.resource.get_children_as_view(
-                    FilesystemEntry, r_filter=ResourceFilter(tags=(FilesystemEntry,))
-                ):
-                    entries.append(child)
-            elif entry.is_file():
-                file_name = os.path.join(root_path, entry_path)
-                with open(file_name, "wb") as f:
-                    f.write(await entry.resource.get_data())
-                entry.apply_stat_attrs(file_name)
-            elif entry.is_device():
-                device_name = os.path.join(root_path, entry_path)
-                if entry.stat is None:
-                    raise ValueError(
-                        f"Cannot create a device {entry_path} for a "
-                        f"BlockDevice or CharacterDevice resource with no stat!"
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor() as write_executor:
+            pending_batches: Set[asyncio.Future] = set()
+            batch: List[Tuple[str, bytes]] = []
+            batch_size = 0
+
+            async def write_batch():
+                nonlocal pending_batches, batch, batch_size
+                if len(pending_batches) >= FLUSH_MAX_PENDING_BATCHES:
+                    done, pending_batches = await asyncio.wait(
+                        pending_batches, return_when=asyncio.FIRST_COMPLETED
                     )
-                os.mknod(device_name, entry.stat.st_mode, entry.stat.st_rdev)
-                entry.apply_stat_attrs(device_name)
-            elif entry.is_fifo_pipe():
-                fifo_name = os.path.join(root_path, entry_path)
-                if entry.stat is None:
-                    raise ValueError(
-                        f"Cannot create a fifo {entry_path} for a FIFOPipe resource "
-                        "with no stat!"
+                    for written_batch in done:
+                        written_batch.result()
+                pending_batches.add(loop.run_in_executor(write_executor, _write_files, batch))
+                batch = []
+                batch_size = 0
+
+            # Entries whose stat and xattrs are applied once all entries are created
+            created_entries: List[Tuple[str, FilesystemEntry]] = []
+            for entry_path, entry in entries:
+                entry_name = os.path.join(root_path, entry_path)
+                if entry.is_link():
+                    if not os.path.exists(entry_name):
+                        link_view = await entry.resource.view_as(SymbolicLink)
+                        os.symlink(link_view.source_path, entry_name)
+                    assert len(list(await entry.resource.get_children())) == 0
+                elif entry.is_folder():
+                    continue
+                elif entry.is_file():
+                    data = await entry.resource.get_data()
+                    batch.append((entry_name, data))
+                    batch_size += len(data)
+                    if len(batch) >= FLUSH_BATCH_FILES or batch_size >= FLUSH_BATCH_BYTES:
+                        await write_batch()
+                elif entry.is_device():
+                    if entry.stat is None:
+                        raise ValueError(
+                            f"Cannot create a device {entry_path} for a "
+                            f"BlockDevice or CharacterDevice resource with no stat!"
+                        )
+                    os.mknod(entry_name, entry.stat.st_mode, entry.stat.st_rdev)
+                elif entry.is_fifo_pipe():
+                    if entry.stat is None:
+                        raise ValueError(
+                            f"Cannot create a fifo {entry_path} for a FIFOPipe resource "
+                            "with no stat!"
+                        )
+                    os.mkfifo(entry_name, entry.stat.st_mode)
+                else:
+                    entry_info = f"Stat: {stat.S_IFMT(entry.stat.st_mode):o}" if entry.stat else ""
+                    raise NotImplementedError(
+                        f"FilesystemEntry {entry_path} has an unknown or "
+                        f"unsupported filesystem type! Unable to create it "
+                        f"on-disk. {entry_info}"
                     )
-                os.mkfifo(fifo_name, entry.stat.st_mode)
-                entry.apply_stat_attrs(fifo_name)
-            else:
-                entry_info = f"Stat: {stat.S_IFMT(entry.stat.st_mode):o}" if entry.stat else ""
-                raise NotImplementedError(
-                    f"FilesystemEntry {entry_path} has an unknown or "
-                    f"unsupported filesystem type! Unable to create it "
-                    f"on-disk. {entry_info}"
+                created_entries.append((entry_name, entry))
+            if len(batch) > 0:
+                await write_batch()
+            await asyncio.gather(*pending_batches)
+
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        write_executor,
+                        _apply_stat_attrs,
+                        created_entries[i : i + FLUSH_BATCH_FILES],
+                    )
+                    for i in range(0, len(created_entries), FLUSH_BATCH_FILES)
                 )
+            )
 
         return root_path
 
+    async def get_entries_with_paths(self) -> List[Tuple[str, FilesystemEntry]]:
+        """
+        Gets all of this `FilesystemRoot`'s `FilesystemEntry` descendants along with their paths,
+        in a deterministic order: each folder comes before its contents, and the entries of a
+        folder are sorted by name. Only metadata is loaded, so packers can go through the entries
+        and read the data of one file at a time.
+
+        :return: the path (with this `FilesystemRoot` as the path root) and view of each entry
+        """
+        entries: List[Tuple[str, FilesystemEntry]] = []
+        await self._add_entries(self.resource, "", entries)
+        return entries
+
+    async def _add_entries(
+        self, parent: Resource, parent_path: str, entries: List[Tuple[str, FilesystemEntry]]
+    ):
+        children = await parent.get_children_as_view(
+            FilesystemEntry, r_filter=ResourceFilter(tags=(FilesystemEntry,))
+        )
+        for child in sorted(children, key=lambda child: child.get_name()):
+            child_path = os.path.join(parent_path, child.get_name())
+            entries.append((child_path, child))
+            if child.is_folder():
+                await self._add_entries(child.resource, child_path, entries)
+
     async def get_entry(self, path: str):
         """
-        Searches this `FilesystemRoot`'s descendants for a filesystem entry with a given path,
-            and returns that entry if found.
+        Gets the filesystem entry with a given path among this `FilesystemRoot`'s descendants.
+
+        Entries are looked up in an index of this filesystem's paths, which is built on the first
+        lookup and kept up to date as entries are added, removed and renamed through this
+        `FilesystemRoot`. Entries added by other means are searched for among the descendants with
+        the same base name, then added to the index.
 
         :param path: the path of the `FilesystemEntry` to search for, with this `FilesystemRoot` as
         the path root
 
         :return: the descendant `FilesystemEntry`, if found; otherwise, returns `None`
         """
+        path = os.path.normpath(path)
+        location = (self.resource.get_id(), path)
+        entries_by_path = await self._get_entries_by_path()
+        entry = entries_by_path.get(path)
+        if entry is not None:
+            if entry._get_cached_location() == location:
+                return entry
+            # The entry was deleted or renamed since it was indexed
+            del entries_by_path[path]
+
         basename = os.path.basename(path)
         # only searching paths with the same base name should reduce the search space by quite a lot
         descendants = await self.resource.get_descendants_as_view(
@@ -489,10 +698,50 @@ class FilesystemRoot(ResourceView):
         )
 
         for d in descendants:
-            if await d.get_path() == os.path.normpath(path):
+            if await d.get_path() == path and d._get_cached_location() == location:
+                entries_by_path[path] = d
                 return d
         return None
 
+    async def _get_entries_by_path(self) -> Dict[str, FilesystemEntry]:
+        if self._entries_by_path is None:
+            entries = await self.resource.get_descendants_as_view(
+                FilesystemEntry, r_filter=ResourceFilter(tags=(FilesystemEntry,))
+            )
+            children_by_parent_id: Dict[bytes, List[FilesystemEntry]] = defaultdict(list)
+            for entry in entries:
+                parent_id = entry.resource.get_model().parent_id
+                assert parent_id is not None, "A descendant of the filesystem has no parent"
+                children_by_parent_id[parent_id].append(entry)
+
+            entries_by_path: Dict[str, FilesystemEntry] = dict()
+            parents: List[Tuple[Union[FilesystemRoot, FilesystemEntry], str]] = [(self, "")]
+            while len(parents) > 0:
+                parent, parent_path = parents.pop()
+                for entry in children_by_parent_id[parent.resource.get_id()]:
+                    entry._parent = parent
+                    entry_path = os.path.join(parent_path, entry.get_name())
+                    entries_by_path[entry_path] = entry
+                    # The entries of a nested filesystem are not entries of this one
+                    if not entry.resource.has_tag(FilesystemRoot):
+                        parents.append((entry, entry_path))
+            self._entries_by_path = entries_by_path
+        return self._entries_by_path
+
+    async def _index_entry(
+        self, entry_resource: Resource, parent: Union["FilesystemRoot", FilesystemEntry]
+    ):
+        """
+        Add an entry created under the given parent to the index of paths, if it was built.
+        """
+        if self._entries_by_path is None:
+            return
+        entry = await entry_resource.view_as(FilesystemEntry)
+        entry._parent = parent
+        location = entry._get_cached_location()
+        if location is not None:
+            self._entries_by_path[location[1]] = entry
+
     async def list_dir(self) -> dict:
         """
         Enumerates a `FilesystemRoot`'s children, much like `os.listdir`.
@@ -533,19 +782,25 @@ class FilesystemRoot(ResourceView):
         split_dir = os.path.normpath(path).rstrip("/").lstrip("/").split("/")
 
         parent: Union[FilesystemRoot, Folder] = self
+        parent_entry: Union[FilesystemRoot, FilesystemEntry] = self
+        folder_path = ""
         for directory in split_dir:
-            folder_entries = await parent.list_dir()
+            folder_path = os.path.join(folder_path, directory)
+            entry = await self.get_entry(folder_path)
 
-            if directory not in folder_entries.keys():
+            if entry is None:
                 new_missing_folder = await parent.resource.create_child_from_view(
                     Folder(directory, folder_stat_result, folder_xattrs),
                     data=b"",
                     additional_tags=tags,
                     additional_attributes=attributes,
                 )
+                await self._index_entry(new_missing_folder, parent_entry)
                 parent = await new_missing_folder.view_as(Folder)
+                parent_entry = parent
             else:
-                parent = await folder_entries[directory].resource.view_as(Folder)
+                parent = await entry.resource.view_as(Folder)
+                parent_entry = entry
 
         if type(parent) is FilesystemRoot:
             assert len(split_dir) == 0  # Only case this should happen
@@ -561,7 +816,7 @@ class FilesystemRoot(ResourceView):
     async def add_file(
         self,
         path: str,
-        data: bytes,
+        data: Union[bytes, LazyData],
         file_stat_result: Optional[os.stat_result] = None,
         file_xattrs: Optional[Dict[str, bytes]] = None,
         tags: Iterable[ResourceTag] = (),
@@ -572,7 +827,8 @@ class FilesystemRoot(ResourceView):
         parent [Folders][ofrak.core.filesystem.Folder] as needed.
 
         :param path: the path that will contain the `File` to be added
-        :param data: contents of the file being added
+        :param data: contents of the file being added, either as bytes or as
+        [LazyData][ofrak.model.data_model.LazyData] which is only read as needed
         :param file_stat_result: the filesystem attributes associated with the file
         :param file_xattrs: xattrs for the file
         :param tags: the list of tags to be added to the new resource, the File tag is added by
@@ -598,6 +854,7 @@ class FilesystemRoot(ResourceView):
             additional_tags=tags,
             additional_attributes=attributes,
         )
+        await self._index_entry(new_file, parent_folder)
         return new_file
 
     async def remove_file(self, path: str) -> None:
@@ -609,6 +866,58 @@ class FilesystemRoot(ResourceView):
         file_to_remove = await self.get_entry(path)
         await file_to_remove.resource.delete()
         await file_to_remove.resource.save()
+        if self._entries_by_path is not None:
+            removed_path = os.path.normpath(path)
+            removed_paths = [
+                entry_path
+                for entry_path in self._entries_by_path
+                if entry_path == removed_path or entry_path.startswith(removed_path + "/")
+            ]
+            for entry_path in removed_paths:
+                del self._entries_by_path[entry_path]
+
+    async def rename_entry(self, path: str, new_name: str) -> FilesystemEntry:
+        """
+        Renames a [FilesystemEntry][ofrak.core.filesystem.FilesystemEntry] of a `FilesystemRoot`,
+        keeping it in the same folder.
+
+        :param path: the path of the entry to rename
+        :param new_name: the new name of the entry
+
+        :raises ValueError: if there is no entry with the given path, if the new name is not a
+        valid file name, or if an entry with the new name already exists in the folder
+
+        :return: the renamed `FilesystemEntry`
+        """
+        if new_name in ("", ".", "..") or "/" in new_name:
+            raise ValueError(f"Cannot rename {path} to invalid name {new_name!r}")
+        entry = await self.get_entry(path)
+        if entry is None:
+            raise ValueError(f"Cannot rename {path}, which does not exist")
+        old_path = await entry.get_path()
+        new_path = os.path.join(os.path.dirname(old_path), new_name)
+        if await self.get_entry(new_path) is not None:
+            raise ValueError(f"Cannot rename {path} to {new_path}, which already exists")
+
+        entry.name = new_name
+        all_view_attrs: Dict[
+            Type[ResourceAttributes], ResourceAttributes
+        ] = entry.get_attributes_instances()
+        entry.resource.add_attributes(all_view_attrs[AttributesType[FilesystemEntry]])
+        await entry.resource.save()
+
+        if self._entries_by_path is not None:
+            # Move the entry and everything under it to their new paths
+            moved_paths = [
+                entry_path
+                for entry_path in self._entries_by_path
+                if entry_path == old_path or entry_path.startswith(old_path + "/")
+            ]
+            for entry_path in moved_paths:
+                self._entries_by_path[
+                    new_path + entry_path[len(old_path) :]
+                ] = self._entries_by_path.pop(entry_path)
+        return entry
 
     async def add_special_file_entry(
         self,
@@ -651,11 +960,146 @@ class FilesystemRoot(ResourceView):
             additional_tags=tags,
             additional_attributes=attributes,
         )
+        await self._index_entry(new_entry, parent_folder)
         return new_entry
 
+    async def add_entry(
+        self,
+        path: str,
+        entry_stat_result: os.stat_result,
+        entry_xattrs: Optional[Dict[str, bytes]] = None,
+        data: Union[bytes, LazyData] = b"",
+    ) -> Resource:
+        """
+        Adds a [FilesystemEntry][ofrak.core.filesystem.FilesystemEntry] of the type given by the
+        mode of its stat to a `FilesystemRoot`, creating all parent
+        [Folders][ofrak.core.filesystem.Folder] as needed. This is meant for unpackers which read
+        the entries of an archive along with their stat, rather than extracting them to disk.
+
+        If the entry is a folder which already exists (for instance, because an entry inside it
+        was added first), its stat and xattrs are updated.
+
+        :param path: the path of the entry to be added
+        :param entry_stat_result: the filesystem attributes associated with the entry
+        :param entry_xattrs: xattrs for the entry
+        :param data: contents of the entry if it is a file, or path pointed to if it is a symbolic
+        link
+
+        :raises NotImplementedError: if the mode is not one of a supported type of entry
+
+        :return: the `FilesystemEntry` resource that was added to the `FilesystemRoot`
+        """
+        mode = entry_stat_result.st_mode
+        if stat.S_ISREG(mode):
+            return await self.add_file(path, data, entry_stat_result, entry_xattrs)
+        elif stat.S_ISDIR(mode):
+            folder = await self.add_folder(path, entry_stat_result, entry_xattrs)
+            if folder.stat != entry_stat_result or folder.xattrs != entry_xattrs:
+                folder.xattrs = entry_xattrs
+                await folder.set_stat(entry_stat_result)
+            return folder.resource
+
+        special_file_view: SpecialFileType
+        if stat.S_ISLNK(mode):
+            assert isinstance(data, bytes)
+            special_file_view = SymbolicLink(
+                path, entry_stat_result, entry_xattrs, os.fsdecode(data)
+            )
+        elif stat.S_ISFIFO(mode):
+            special_file_view = FIFOPipe(path, entry_stat_result, entry_xattrs)
+        elif stat.S_ISBLK(mode):
+            special_file_view = BlockDevice(path, entry_stat_result, entry_xattrs)
+        elif stat.S_ISCHR(mode):
+            special_file_view = CharacterDevice(path, entry_stat_result, entry_xattrs)
+        else:
+            raise NotImplementedError(
+                f"Entry {path} has an unsupported special file type: {stat.S_IFMT(mode):o}"
+            )
+        return await self.add_special_file_entry(path, special_file_view)
+
     @classmethod
     def _get_xattr_map(cls, path):
         xattr_dict = {}
         for attr in xattr.listxattr(path, symlink=True):  # Don't follow links
             xattr_dict[attr] = xattr.getxattr(path, attr)
         return xattr_dict
+
+
+@dataclass
+class ArchiveUnpackerConfig(ComponentConfig):
+    """
+    Configuration of unpackers of archives which can create their files with lazy data.
+
+    :ivar lazy_members: Whether to only list the members of the archive when unpacking, creating
+    files whose data is only extracted from the archive the first time it is read (for instance, by
+    an identifier), rather than extracting all members up front
+    """
+
+    lazy_members: bool
+
+
+def _write_files(files: List[Tuple[str, bytes]]):
+    for path, data in files:
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def _apply_stat_attrs(entries: List[Tuple[str, FilesystemEntry]]):
+    for path, entry in entries:
+        _apply_entry_stat_attrs(entry, path)
+
+
+def _apply_entry_stat_attrs(entry: FilesystemEntry, path: str):
+    if not entry.is_link():
+        entry.apply_stat_attrs(path)
+        return
+    if entry.stat:
+        # https://docs.python.org/3/library/os.html#os.supports_follow_symlinks
+        if os.chown in os.supports_follow_symlinks:
+            _chown(path, entry.stat.st_uid, entry.stat.st_gid, follow_symlinks=False)
+        if os.chmod in os.supports_follow_symlinks:
+            os.chmod(path, entry.stat.st_mode, follow_symlinks=False)
+        if os.utime in os.supports_follow_symlinks:
+            os.utime(
+                path,
+                (entry.stat.st_atime, entry.stat.st_mtime),
+                follow_symlinks=False,
+            )
+    if entry.xattrs:
+        for attr, value in entry.xattrs.items():
+            xattr.setxattr(path, attr, value, symlink=True)  # Don't follow links
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def normalize_archive_path(path: str) -> Optional[str]:
+    """
+    Normalize the path of an archive member, relative to the root of the archive. Like most
+    archivers, leading slashes are stripped.
+
+    :param path: the path of the member as stored in the archive
+
+    :raises UnpackerError: if the member would be extracted to a parent directory of the root
+
+    :return: the normalized path, or `None` if the member is the root itself
+    """
+    normalized_path = os.path.normpath(path.lstrip("/"))
+    if normalized_path == ".":
+        return None
+    if normalized_path == ".." or normalized_path.startswith("../"):
+        raise UnpackerError(
+            f"Archive contains a file {path} that would extract to a parent directory "
+            f"{normalized_path}."
+        )
+    return normalized_path
+
+
+def _chown(path: str, uid: int, gid: int, follow_symlinks: bool = True):
+    try:
+        os.chown(path, uid, gid, follow_symlinks=follow_symlinks)
+    except PermissionError:
+        # Only privileged users can give a file away; keep the current owner
+        pass
@@ -1,15 +1,25 @@
 import asyncio
 import logging
-import tempfile
-from gzip import GzipFile
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from gzip import GzipFile, compress as gzip_compress
 from io import BytesIO
 from subprocess import CalledProcessError
+from typing import Iterator, List, Optional, Tuple, Union
 
+from ofrak.component.external_tool import run_tool
 from ofrak.component.packer import Packer
-from ofrak.component.unpacker import Unpacker
+from ofrak.component.unpacker import Unpacker, UnpackerError
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
-from ofrak.model.component_model import ComponentExternalTool
+from ofrak.core.signatures import SignatureData, SignatureScanner
+from ofrak.model.component_model import ComponentConfig, ComponentExternalTool
+from ofrak.model.data_model import LazyData
 from ofrak.resource import Resource
 from ofrak_type.range import Range
 
@@ -19,6 +29,35 @@ PIGZ = ComponentExternalTool(
     "pigz", "https://zlib.net/pigz/", "--help", apt_package="pigz", brew_package="pigz"
 )
 
+# Gzip data at least this long is decompressed by pigz (if it is installed), which decompresses,
+# checksums and writes in separate threads, while for shorter data, spawning pigz and piping the
+# data through it costs more than it saves. If None, this size is measured on this machine with
+# `measure_pigz_min_compressed_size`, the first time gzip data of at least
+# `PIGZ_MEASUREMENT_MIN_SIZE` bytes is unpacked.
+PIGZ_MIN_COMPRESSED_SIZE: Optional[float] = None
+PIGZ_MEASUREMENT_MIN_SIZE = 4 * 1024 * 1024
+
+# Sizes of the generated data which both ways of decompressing are timed on, to measure the fixed
+# cost and the cost per byte of each
+PIGZ_MEASUREMENT_DATA_SIZES = (256 * 1024, 4 * 1024 * 1024)
+
+# Size of the chunks of gzip data fed to zlib by the in-process decompression
+GZIP_CHUNK_SIZE = 1024 * 1024
+
+# Decompressed gzip data at least this long is not kept by the in-process decompression, which
+# instead keeps checkpoints every `GZIP_INDEX_SPAN` bytes to decompress ranges of it when they are read
+GZIP_INDEX_MIN_SIZE = 64 * 1024 * 1024
+GZIP_INDEX_SPAN = 1024 * 1024
+
+# Size of the blocks of data compressed independently when packing gzip data with several threads
+GZIP_BLOCK_SIZE = 128 * 1024
+
+_DEFLATE_WINDOW_SIZE = 32 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_GZIP_FLAG_EXTRA = 0x04
+_GZIP_FLAG_NAME = 0x08
+
 
 class GzipData(GenericBinary):
     """
@@ -32,65 +71,381 @@ class GzipData(GenericBinary):
 class GzipUnpacker(Unpacker[None]):
     """
     Unpack (decompress) a gzip file.
+
+    Gzip data is decompressed in-process, unless `pigz` is installed and decompresses data this
+    long faster (see `PIGZ_MIN_COMPRESSED_SIZE`). When decompressing in-process, decompressed data
+    of at least `GZIP_INDEX_MIN_SIZE` bytes is not kept, but decompressed again as it is read.
     """
 
     id = b"GzipUnpacker"
     targets = (GzipData,)
     children = (GenericBinary,)
-    external_dependencies = (PIGZ,)
 
     async def unpack(self, resource: Resource, config=None):
-        # Create temporary file with .gz extension
-        with tempfile.NamedTemporaryFile(suffix=".gz") as temp_file:
-            temp_file.write(await resource.get_data())
-            temp_file.flush()
-            cmd = [
-                "pigz",
-                "-d",
-                "-c",
-                temp_file.name,
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+        data = await resource.get_data()
+        decompressed_data: Union[bytes, GzipLazyData]
+        if await _should_use_pigz(len(data)):
+            decompressed_data = await decompress_gzip_with_pigz(data)
+        elif len(data) > GZIP_CHUNK_SIZE:
+            # zlib releases the GIL while decompressing large chunks, so decompressing in a thread
+            # lets other components run in the meantime
+            decompressed_data = await asyncio.get_running_loop().run_in_executor(
+                None, decompress_gzip_lazily, data
             )
-            stdout, stderr = await proc.communicate()
-            data = stdout
-            if proc.returncode:
-                # Forward any gzip warning message and continue
-                if proc.returncode == -2 or proc.returncode == 2:
-                    LOGGER.warning(stderr)
-                    data = stdout
-                else:
-                    raise CalledProcessError(returncode=proc.returncode, cmd=cmd)
-
-            await resource.create_child(
-                tags=(GenericBinary,),
-                data=data,
+        else:
+            decompressed_data = decompress_gzip_lazily(data)
+
+        await resource.create_child(
+            tags=(GenericBinary,),
+            data=decompressed_data,
+        )
+
+
+def decompress_gzip(data: bytes) -> bytes:
+    """
+    Decompress gzip data in-process, feeding it to zlib in chunks of `GZIP_CHUNK_SIZE` bytes.
+
+    As with `gzip` and `pigz`, the data may consist of several concatenated gzip members, and any
+    trailing bytes after the last member are ignored with a warning.
+
+    :raises UnpackerError: if the data is not valid gzip data or is truncated
+    """
+    return b"".join(
+        decompressed_chunk
+        for _, decompressed_chunk in _decompress_gzip_chunks(memoryview(data), _GzipCheckpoint())
+    )
+
+
+def decompress_gzip_lazily(data: bytes) -> Union[bytes, "GzipLazyData"]:
+    """
+    Decompress gzip data like [decompress_gzip][ofrak.core.gzip.decompress_gzip], but if the
+    decompressed data is at least `GZIP_INDEX_MIN_SIZE` bytes long, only keep an index of it, as
+    [GzipLazyData][ofrak.core.gzip.GzipLazyData].
+
+    :raises UnpackerError: if the data is not valid gzip data or is truncated
+    """
+    checkpoints: List[_GzipCheckpoint] = []
+    decompressed_chunks: Optional[List[bytes]] = []
+    decompressed_size = 0
+    for _, decompressed_chunk in _decompress_gzip_chunks(
+        memoryview(data), _GzipCheckpoint(), checkpoints
+    ):
+        decompressed_size += len(decompressed_chunk)
+        if decompressed_chunks is not None:
+            decompressed_chunks.append(decompressed_chunk)
+            if decompressed_size >= GZIP_INDEX_MIN_SIZE:
+                decompressed_chunks = None
+    if decompressed_chunks is not None:
+        return b"".join(decompressed_chunks)
+    return GzipLazyData(data, checkpoints, decompressed_size)
+
+
+class GzipLazyData(LazyData):
+    """
+    Decompressed gzip data, of which only ranges are decompressed when they are read. Ranges are
+    decompressed from the nearest checkpoint before them, saved every `GZIP_INDEX_SPAN` bytes of
+    decompressed data (or less) when the data was first decompressed.
+    """
+
+    def __init__(self, data: bytes, checkpoints: List["_GzipCheckpoint"], decompressed_size: int):
+        self._data = data
+        self._checkpoints = checkpoints
+        self._checkpoint_offsets = [checkpoint.decompressed_offset for checkpoint in checkpoints]
+        self._decompressed_size = decompressed_size
+
+    def __len__(self) -> int:
+        return self._decompressed_size
+
+    def read(self, data_range: Range) -> bytes:
+        if data_range.length() == 0:
+            return b""
+        checkpoint = self._checkpoints[bisect_right(self._checkpoint_offsets, data_range.start) - 1]
+        decompressed_chunks = []
+        for chunk_offset, decompressed_chunk in _decompress_gzip_chunks(
+            memoryview(self._data), checkpoint
+        ):
+            chunk_end = chunk_offset + len(decompressed_chunk)
+            if chunk_end > data_range.start:
+                decompressed_chunks.append(
+                    decompressed_chunk[
+                        max(0, data_range.start - chunk_offset) : data_range.end - chunk_offset
+                    ]
+                )
+            if chunk_end >= data_range.end:
+                break
+        return b"".join(decompressed_chunks)
+
+
+@dataclass
+class _GzipCheckpoint:
+    """
+    State of the decompression of gzip data: the offsets of the next compressed byte to decompress
+    and of the next decompressed byte, and the state of the decompressor of the current member (or
+    `None` before a new member).
+    """
+
+    compressed_offset: int = 0
+    decompressed_offset: int = 0
+    decompressor: Optional["zlib._Decompress"] = None
+
+
+def _decompress_gzip_chunks(
+    data: memoryview,
+    checkpoint: _GzipCheckpoint,
+    checkpoints: Optional[List[_GzipCheckpoint]] = None,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Decompress gzip data from a checkpoint, yielding chunks of at most `GZIP_INDEX_SPAN`
+    decompressed bytes along with their offset in the decompressed data. If `checkpoints` is given,
+    the checkpoint before decompressing each chunk is appended to it.
+    """
+    compressed_offset = checkpoint.compressed_offset
+    decompressed_offset = checkpoint.decompressed_offset
+    decompressor = checkpoint.decompressor.copy() if checkpoint.decompressor else None
+    while True:
+        if decompressor is None or decompressor.eof:
+            if compressed_offset >= len(data):
+                return
+            if data[compressed_offset : compressed_offset + len(_GZIP_MAGIC)] != _GZIP_MAGIC:
+                if compressed_offset == 0:
+                    raise UnpackerError("Data does not start with a gzip header")
+                LOGGER.warning(
+                    f"Ignoring {len(data) - compressed_offset} trailing bytes after gzip data"
+                )
+                return
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if checkpoints is not None:
+            checkpoints.append(
+                _GzipCheckpoint(compressed_offset, decompressed_offset, decompressor.copy())
             )
 
+        compressed_chunk = data[compressed_offset : compressed_offset + GZIP_CHUNK_SIZE]
+        if len(compressed_chunk) == 0:
+            raise UnpackerError("Gzip data is truncated")
+        try:
+            decompressed_chunk = decompressor.decompress(compressed_chunk, GZIP_INDEX_SPAN)
+        except zlib.error as e:
+            raise UnpackerError(f"Invalid gzip data: {e}") from e
+        if decompressor.eof:
+            compressed_offset += len(compressed_chunk) - len(decompressor.unused_data)
+        else:
+            compressed_offset += len(compressed_chunk) - len(decompressor.unconsumed_tail)
+        yield decompressed_offset, decompressed_chunk
+        decompressed_offset += len(decompressed_chunk)
+
 
-class GzipPacker(Packer[None]):
+async def decompress_gzip_with_pigz(data: bytes) -> bytes:
+    """
+    Decompress gzip data with `pigz`.
+    """
+    cmd = [
+        "pigz",
+        "-d",
+        "-c",
+    ]
+    result = await run_tool(cmd, input_data=data, check=False)
+    if result.returncode:
+        # Forward any gzip warning message and continue
+        if result.returncode == -2 or result.returncode == 2:
+            LOGGER.warning(result.stderr)
+        else:
+            raise CalledProcessError(
+                returncode=result.returncode, cmd=cmd, output=result.stdout, stderr=result.stderr
+            )
+    return result.stdout
+
+
+_measured_pigz_min_compressed_size: Optional[float] = None
+
+
+async def _should_use_pigz(compressed_size: int) -> bool:
+    global _measured_pigz_min_compressed_size
+    pigz_min_compressed_size = PIGZ_MIN_COMPRESSED_SIZE
+    if pigz_min_compressed_size is None:
+        pigz_min_compressed_size = _measured_pigz_min_compressed_size
+    if pigz_min_compressed_size is not None:
+        return compressed_size >= pigz_min_compressed_size and await PIGZ.is_tool_installed()
+    # Measuring costs more than pigz could save on shorter data
+    if compressed_size < PIGZ_MEASUREMENT_MIN_SIZE or not await PIGZ.is_tool_installed():
+        return False
+    # Concurrent unpackers may measure it more than once, which is harmless
+    pigz_min_compressed_size = await measure_pigz_min_compressed_size()
+    _measured_pigz_min_compressed_size = pigz_min_compressed_size
+    LOGGER.info(f"pigz decompresses gzip data faster from {pigz_min_compressed_size} bytes")
+    return compressed_size >= pigz_min_compressed_size
+
+
+async def measure_pigz_min_compressed_size() -> float:
+    """
+    Measure from which compressed size `pigz` decompresses gzip data faster than the in-process
+    decompression on this machine. Both are timed on generated data of each of the
+    `PIGZ_MEASUREMENT_DATA_SIZES`, from which the fixed cost and the cost per byte of each are
+    estimated.
+
+    :return: The smallest compressed size for which `pigz` is faster, or infinity if it is never
+    faster
+    """
+    small_size, small_in_process_time, small_pigz_time = await _time_gzip_decompression(
+        PIGZ_MEASUREMENT_DATA_SIZES[0]
+    )
+    large_size, large_in_process_time, large_pigz_time = await _time_gzip_decompression(
+        PIGZ_MEASUREMENT_DATA_SIZES[1]
+    )
+    in_process_time_per_byte = (large_in_process_time - small_in_process_time) / (
+        large_size - small_size
+    )
+    pigz_time_per_byte = (large_pigz_time - small_pigz_time) / (large_size - small_size)
+    if pigz_time_per_byte >= in_process_time_per_byte:
+        return float("inf")
+    in_process_fixed_time = small_in_process_time - in_process_time_per_byte * small_size
+    pigz_fixed_time = small_pigz_time - pigz_time_per_byte * small_size
+    return max(
+        (pigz_fixed_time - in_process_fixed_time) / (in_process_time_per_byte - pigz_time_per_byte),
+        0.0,
+    )
+
+
+async def _time_gzip_decompression(size: int) -> Tuple[int, float, float]:
+    """
+    Time decompressing generated gzip data in-process (in a thread, as `GzipUnpacker` does) and
+    with `pigz`, keeping the fastest of a few runs of each.
+
+    :return: The compressed size of the data, the in-process time and the `pigz` time
+    """
+    data = create_gzip_measurement_data(size)
+    loop = asyncio.get_running_loop()
+    in_process_time = float("inf")
+    pigz_time = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        await loop.run_in_executor(None, decompress_gzip, data)
+        in_process_time = min(in_process_time, time.perf_counter() - start)
+        start = time.perf_counter()
+        await decompress_gzip_with_pigz(data)
+        pigz_time = min(pigz_time, time.perf_counter() - start)
+    return len(data), in_process_time, pigz_time
+
+
+def create_gzip_measurement_data(size: int) -> bytes:
+    """
+    Create gzip data of `size` bytes once decompressed, half random bytes and half text, for a
+    compression ratio close to that of typical firmware.
+    """
+    chunks = []
+    chunks_size = 0
+    while chunks_size < size:
+        chunks.append(os.urandom(0x800))
+        chunks.append(b"".join(b"%d: ofrak measurement line\n" % i for i in range(80)))
+        chunks_size += len(chunks[-2]) + len(chunks[-1])
+    return gzip_compress(b"".join(chunks)[:size], compresslevel=1)
+
+
+@dataclass
+class GzipPackerConfig(ComponentConfig):
+    """
+    :ivar compression_level: Compression level, from 0 (no compression) to 9 (best compression)
+    :ivar threads: Number of threads compressing the data. With more than one thread, the data is
+    split in blocks of `GZIP_BLOCK_SIZE` bytes compressed independently, like `pigz` does. 0 uses
+    one thread per CPU.
+    """
+
+    compression_level: int = 9
+    threads: int = 0
+
+
+class GzipPacker(Packer[GzipPackerConfig]):
     """
     Pack data into a compressed gzip file.
     """
 
     targets = (GzipData,)
-    external_dependencies = (PIGZ,)
 
-    async def pack(self, resource: Resource, config=None):
+    async def pack(self, resource: Resource, config: Optional[GzipPackerConfig] = None):
+        if config is None:
+            config = GzipPackerConfig()
         gzip_view = await resource.view_as(GzipData)
+        gzip_child_r = await gzip_view.get_file()
+        gzip_data = await gzip_child_r.get_data()
 
-        result = BytesIO()
-        with GzipFile(fileobj=result, mode="w") as gzip_file:
-            gzip_child_r = await gzip_view.get_file()
-            gzip_data = await gzip_child_r.get_data()
-            gzip_file.write(gzip_data)
+        threads = config.threads or os.cpu_count() or 1
+        if threads == 1 or len(gzip_data) <= GZIP_BLOCK_SIZE:
+            result = BytesIO()
+            with GzipFile(
+                fileobj=result, mode="w", compresslevel=config.compression_level
+            ) as gzip_file:
+                gzip_file.write(gzip_data)
+            compressed_data = result.getvalue()
+        else:
+            compressed_data = await asyncio.get_running_loop().run_in_executor(
+                None, compress_gzip_blocks, gzip_data, config.compression_level, threads
+            )
 
         original_gzip_size = await gzip_view.resource.get_data_length()
-        resource.queue_patch(Range(0, original_gzip_size), result.getvalue())
+        resource.queue_patch(Range(0, original_gzip_size), compressed_data)
+
+
+def compress_gzip_blocks(data: bytes, compression_level: int, threads: int) -> bytes:
+    """
+    Compress data into a single gzip member, compressing blocks of `GZIP_BLOCK_SIZE` bytes in
+    parallel threads, like `pigz` does.
+
+    Each block is compressed into raw deflate data ending on a byte boundary, so that the compressed
+    blocks can be concatenated. Compressing each block with the end of the previous block as
+    dictionary keeps the compression ratio close to that of compressing the data as a single block.
+    """
+    data_view = memoryview(data)
+    block_starts = range(0, len(data), GZIP_BLOCK_SIZE)
+
+    def compress_block(block_start: int) -> bytes:
+        block_end = block_start + GZIP_BLOCK_SIZE
+        if block_start == 0:
+            compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        else:
+            dictionary = data_view[max(0, block_start - _DEFLATE_WINDOW_SIZE) : block_start]
+            compressor = zlib.compressobj(
+                compression_level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary
+            )
+        compressed_block = compressor.compress(data_view[block_start:block_end])
+        if block_end >= len(data):
+            return compressed_block + compressor.flush(zlib.Z_FINISH)
+        else:
+            return compressed_block + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        compressed_blocks = executor.map(compress_block, block_starts)
+        crc = zlib.crc32(data)
+        compressed_data = b"".join(compressed_blocks)
+
+    if compression_level == 9:
+        extra_flags = 2
+    elif compression_level == 1:
+        extra_flags = 4
+    else:
+        extra_flags = 0
+    # Magic, deflate method, no flags, modification time, extra flags, unknown OS
+    header = struct.pack("<2sBBIBB", _GZIP_MAGIC, 8, 0, int(time.time()), extra_flags, 255)
+    trailer = struct.pack("<II", crc, len(data) & 0xFFFFFFFF)
+    return header + compressed_data + trailer
+
+
+def _parse_gzip_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    flags, mtime = struct.unpack_from("<BI", data, offset + 3)
+    # The high bits of the flags are reserved
+    if flags & 0xE0:
+        return None
+    description = "gzip compressed data"
+    if flags & _GZIP_FLAG_NAME:
+        name_start = offset + 10
+        if flags & _GZIP_FLAG_EXTRA:
+            (extra_length,) = struct.unpack_from("<H", data, name_start)
+            name_start += 2 + extra_length
+        name = bytes(data[name_start : name_start + 256]).partition(b"\0")[0]
+        description += f', has original file name: "{name.decode("latin-1")}"'
+    if mtime:
+        description += ", last modified: " + time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(mtime))
+    return description, None
 
 
 MagicMimeIdentifier.register(GzipData, "application/gzip")
 MagicDescriptionIdentifier.register(GzipData, lambda s: s.startswith("gzip compressed data"))
+SignatureScanner.register(GzipData, _GZIP_MAGIC + b"\x08", _parse_gzip_signature)
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from typing import Optional, Tuple
 
 
-from ofrak.component.analyzer import Analyzer
+from ofrak.component.analyzer import Analyzer, BatchAnalyzer
 from ofrak.component.modifier import Modifier
 from ofrak.core.architecture import ProgramAttributes
 from ofrak.core.memory_region import MemoryRegion
@@ -96,9 +96,11 @@ class RegisterUsage(ResourceAttributes):
     registers_written: Tuple[str, ...]
 
 
-class InstructionAnalyzer(Analyzer[None, Instruction], ABC):
+class InstructionAnalyzer(BatchAnalyzer[None, Instruction], ABC):
     """
-    Analyze an [instruction][ofrak.core.instruction.Instruction] and extract its attributes.
+    Analyze [instructions][ofrak.core.instruction.Instruction] and extract their attributes. All
+    the instructions analyzed at once (e.g. all the instructions of a basic block) are analyzed in
+    one batch.
     """
 
     id = b"InstructionAnalyzer"
@@ -1,8 +1,9 @@
 import logging
 import os
+import struct
 from dataclasses import dataclass
 from io import BytesIO
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
 
 from pycdlib import PyCdlib
 
@@ -12,6 +13,7 @@ from ofrak.component.unpacker import Unpacker
 from ofrak.core.binary import GenericBinary
 from ofrak.core.filesystem import FilesystemRoot, File, Folder
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak.model.resource_model import ResourceAttributes
 from ofrak.model.resource_model import index
 from ofrak.resource import Resource
@@ -21,6 +23,8 @@ from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
 
+_ISO9660_SYSTEM_AREA_SIZE = 0x8000
+
 
 @dataclass(**ResourceAttributes.DATACLASS_PARAMS)
 class ISO9660ImageAttributes(ResourceAttributes):
@@ -320,5 +324,24 @@ class ISO9660Packer(Packer[None]):
         resource.queue_patch(Range(0, await resource.get_data_length()), iso_data)
 
 
+def _parse_iso9660_signature(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[str, Optional[int]]]:
+    # The primary volume descriptor follows the 32 KiB system area
+    descriptor = offset + _ISO9660_SYSTEM_AREA_SIZE
+    if data[descriptor] != 1 or data[descriptor + 6] != 1:
+        return None
+    volume_name = bytes(data[descriptor + 40 : descriptor + 72]).decode("ascii").rstrip()
+    (volume_block_count,) = struct.unpack_from("<I", data, descriptor + 80)
+    (block_size,) = struct.unpack_from("<H", data, descriptor + 128)
+    return (
+        f'ISO 9660 CD-ROM filesystem data, volume name: "{volume_name}"',
+        volume_block_count * block_size or None,
+    )
+
+
 MagicMimeIdentifier.register(ISO9660Image, "application/x-iso9660-image")
 MagicDescriptionIdentifier.register(ISO9660Image, lambda s: s.startswith("ISO 9660 CD"))
+SignatureScanner.register(
+    ISO9660Image, b"CD001", _parse_iso9660_signature, magic_offset=_ISO9660_SYSTEM_AREA_SIZE + 1
+)
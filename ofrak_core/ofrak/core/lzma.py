@@ -1,17 +1,43 @@
+import asyncio
+import itertools
 import logging
 import lzma
+import os
+import struct
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from io import BytesIO
-from typing import Union
+from typing import List, Optional, Tuple, Union
 
 from ofrak.component.packer import Packer
-from ofrak.component.unpacker import Unpacker
+from ofrak.component.unpacker import Unpacker, UnpackerError
 from ofrak.resource import Resource
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
+from ofrak.model.component_model import ComponentConfig
+from ofrak.model.data_model import LazyData
 from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
 
+# Size of the blocks of data compressed independently when packing xz data with several threads;
+# like `xz -T`, three times the dictionary size of the default preset
+XZ_BLOCK_SIZE = 3 * 8 * 1024 * 1024
+
+# Decompressed xz data at least this long is decompressed as it is read, if it is split in blocks
+XZ_INDEX_MIN_SIZE = 64 * 1024 * 1024
+
+# Size of the chunks of data decompressed at once when reading part of an xz stream
+_XZ_READ_CHUNK_SIZE = 1024 * 1024
+
+_XZ_HEADER_MAGIC = b"\xfd7zXZ\x00"
+_XZ_FOOTER_MAGIC = b"YZ"
+_XZ_HEADER_SIZE = 12
+_XZ_FOOTER_SIZE = 12
+
 
 class LzmaData(GenericBinary):
     """
@@ -34,6 +60,11 @@ class XzData(GenericBinary):
 class LzmaUnpacker(Unpacker[None]):
     """
     Unpack (decompress) an LZMA | XZ file.
+
+    If xz data consists of several blocks (as written by `xz -T` or `xz --block-size`, or by
+    `LzmaPacker` with several threads) and its decompressed data is at least `XZ_INDEX_MIN_SIZE`
+    bytes long, it is not decompressed up front: each block is decompressed as it is read. The
+    blocks are found in the index at the end of each xz stream.
     """
 
     id = b"LzmaUnpacker"
@@ -43,16 +74,29 @@ class LzmaUnpacker(Unpacker[None]):
     async def unpack(self, resource: Resource, config=None):
         file_data = BytesIO(await resource.get_data())
 
-        format = lzma.FORMAT_AUTO
+        format: int = lzma.FORMAT_AUTO
 
         if resource.has_tag(XzData):
             format = lzma.FORMAT_XZ
         elif resource.has_tag(LzmaData):
             format = lzma.FORMAT_ALONE
 
-        lzma_entry_data = None
+        lzma_entry_data: Optional[Union[bytes, XzLazyData]] = None
         compressed_data = file_data.read()
 
+        if format == lzma.FORMAT_XZ:
+            xz_blocks = _get_xz_blocks(compressed_data)
+            if (
+                xz_blocks is not None
+                and len(xz_blocks) > 1
+                and sum(block.decompressed_size for block in xz_blocks) >= XZ_INDEX_MIN_SIZE
+            ):
+                await resource.create_child(
+                    tags=(GenericBinary,),
+                    data=XzLazyData(compressed_data, xz_blocks),
+                )
+                return
+
         try:
             lzma_entry_data = lzma.decompress(compressed_data, format)
         except lzma.LZMAError:
@@ -68,19 +112,39 @@ class LzmaUnpacker(Unpacker[None]):
             raise lzma.LZMAError("Decompressed LZMA data is null")
 
 
-class LzmaPacker(Packer[None]):
+@dataclass
+class LzmaPackerConfig(ComponentConfig):
+    """
+    :ivar threads: Number of threads compressing xz data. With more than one thread, the data is
+    split in blocks of `XZ_BLOCK_SIZE` bytes, each compressed into its own xz stream. 0 uses one
+    thread per CPU. LZMA data is always compressed by a single thread.
+    """
+
+    threads: int = 0
+
+
+class LzmaPacker(Packer[LzmaPackerConfig]):
     """
     Pack data into a compressed LZMA | XZ file.
     """
 
     targets = (LzmaData, XzData)
 
-    async def pack(self, resource: Resource, config=None):
+    async def pack(self, resource: Resource, config: Optional[LzmaPackerConfig] = None):
+        if config is None:
+            config = LzmaPackerConfig()
         lzma_format, tag = await self._get_lzma_format_and_tag(resource)
         lzma_file: Union[XzData, LzmaData] = await resource.view_as(tag)
 
         lzma_child = await lzma_file.get_child()
-        lzma_compressed = lzma.compress(await lzma_child.resource.get_data(), lzma_format)
+        lzma_child_data = await lzma_child.resource.get_data()
+        threads = config.threads or os.cpu_count() or 1
+        if lzma_format == lzma.FORMAT_XZ and threads > 1 and len(lzma_child_data) > XZ_BLOCK_SIZE:
+            lzma_compressed = await asyncio.get_running_loop().run_in_executor(
+                None, compress_xz_blocks, lzma_child_data, threads
+            )
+        else:
+            lzma_compressed = lzma.compress(lzma_child_data, lzma_format)
 
         original_size = await lzma_file.resource.get_data_length()
         resource.queue_patch(Range(0, original_size), lzma_compressed)
@@ -99,7 +163,204 @@ class LzmaPacker(Packer[None]):
         return lzma_format, tag
 
 
+def compress_xz_blocks(data: bytes, threads: int) -> bytes:
+    """
+    Compress data into concatenated xz streams, each compressing a block of `XZ_BLOCK_SIZE` bytes,
+    in parallel threads. Concatenated streams are valid xz data, which `xz` and `lzma.decompress`
+    decompress as a whole.
+    """
+    data_view = memoryview(data)
+
+    def compress_block(block_start: int) -> bytes:
+        return lzma.compress(data_view[block_start : block_start + XZ_BLOCK_SIZE], lzma.FORMAT_XZ)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return b"".join(executor.map(compress_block, range(0, len(data), XZ_BLOCK_SIZE)))
+
+
+@dataclass
+class _XzBlock:
+    """
+    :ivar stream_start: Offset of the header of the stream the block is part of
+    :ivar compressed_range: Range of the block in the compressed data, without its padding
+    :ivar decompressed_size: Size of the decompressed data of the block
+    """
+
+    stream_start: int
+    compressed_range: Range
+    decompressed_size: int
+
+
+class XzLazyData(LazyData):
+    """
+    Decompressed xz data made of several blocks, of which only the blocks overlapping the ranges
+    read are decompressed.
+    """
+
+    def __init__(self, data: bytes, blocks: List[_XzBlock]):
+        self._data = data
+        self._blocks = blocks
+        self._block_offsets = [
+            0,
+            *itertools.accumulate(block.decompressed_size for block in blocks),
+        ]
+
+    def __len__(self) -> int:
+        return self._block_offsets[-1]
+
+    def read(self, data_range: Range) -> bytes:
+        decompressed_chunks = []
+        block_index = bisect_right(self._block_offsets, data_range.start) - 1
+        while block_index < len(self._blocks) and self._block_offsets[block_index] < data_range.end:
+            block = self._blocks[block_index]
+            block_offset = self._block_offsets[block_index]
+            decompressed_chunks.append(
+                self._read_block(
+                    block,
+                    data_range.intersect(
+                        Range.from_size(block_offset, block.decompressed_size)
+                    ).translate(-block_offset),
+                )
+            )
+            block_index += 1
+        return b"".join(decompressed_chunks)
+
+    def _read_block(self, block: _XzBlock, data_range: Range) -> bytes:
+        decompressor = lzma.LZMADecompressor(lzma.FORMAT_XZ)
+        # A block is decompressed on its own, after the header of its stream (which gives the type
+        # of its check); its data is output before the decompressor needs the rest of the stream
+        data = memoryview(self._data)
+        decompressor.decompress(data[block.stream_start : block.stream_start + _XZ_HEADER_SIZE])
+        compressed_data: Union[bytes, memoryview] = data[
+            block.compressed_range.start : block.compressed_range.end
+        ]
+        decompressed_chunks = []
+        chunk_offset = 0
+        while chunk_offset < data_range.end:
+            decompressed_chunk = decompressor.decompress(compressed_data, _XZ_READ_CHUNK_SIZE)
+            # The decompressor keeps any input it did not decompress yet
+            compressed_data = b""
+            if not decompressed_chunk and decompressor.needs_input:
+                raise UnpackerError("Truncated xz block")
+            chunk_end = chunk_offset + len(decompressed_chunk)
+            if chunk_end > data_range.start:
+                decompressed_chunks.append(
+                    decompressed_chunk[
+                        max(0, data_range.start - chunk_offset) : data_range.end - chunk_offset
+                    ]
+                )
+            chunk_offset = chunk_end
+        return b"".join(decompressed_chunks)
+
+
+def _get_xz_blocks(data: bytes) -> Optional[List[_XzBlock]]:
+    """
+    Find the blocks of the streams of xz data and their decompressed sizes, without decompressing
+    them, by reading the stream footers and indexes from the end of the data.
+
+    :return: The blocks of the data, or `None` if the data is not only made of xz streams
+    """
+    # Blocks of each stream, from the last stream
+    streams_blocks: List[List[_XzBlock]] = []
+    stream_end = len(data)
+    while stream_end > 0:
+        # Streams may be followed by stream padding, made of null 4-byte words
+        while stream_end >= 4 and data[stream_end - 4 : stream_end] == b"\x00" * 4:
+            stream_end -= 4
+        if stream_end == 0:
+            break
+        if (
+            stream_end < _XZ_HEADER_SIZE + _XZ_FOOTER_SIZE
+            or data[stream_end - len(_XZ_FOOTER_MAGIC) : stream_end] != _XZ_FOOTER_MAGIC
+        ):
+            return None
+        footer_start = stream_end - _XZ_FOOTER_SIZE
+        backward_size = int.from_bytes(data[footer_start + 4 : footer_start + 8], "little")
+        index_start = footer_start - (backward_size + 1) * 4
+        if index_start < _XZ_HEADER_SIZE or data[index_start] != 0:
+            return None
+
+        record_count, offset = _read_xz_vli(data, index_start + 1)
+        records = []
+        blocks_size = 0
+        for _ in range(record_count):
+            unpadded_size, offset = _read_xz_vli(data, offset)
+            block_decompressed_size, offset = _read_xz_vli(data, offset)
+            if offset > footer_start:
+                return None
+            records.append((unpadded_size, block_decompressed_size))
+            # Blocks are padded to a multiple of 4 bytes
+            blocks_size += (unpadded_size + 3) & ~3
+
+        stream_start = index_start - blocks_size - _XZ_HEADER_SIZE
+        if (
+            stream_start < 0
+            or data[stream_start : stream_start + len(_XZ_HEADER_MAGIC)] != _XZ_HEADER_MAGIC
+        ):
+            return None
+        stream_blocks = []
+        block_start = stream_start + _XZ_HEADER_SIZE
+        for unpadded_size, block_decompressed_size in records:
+            stream_blocks.append(
+                _XzBlock(
+                    stream_start,
+                    Range.from_size(block_start, unpadded_size),
+                    block_decompressed_size,
+                )
+            )
+            block_start += (unpadded_size + 3) & ~3
+        streams_blocks.append(stream_blocks)
+        stream_end = stream_start
+    return [block for stream_blocks in reversed(streams_blocks) for block in stream_blocks]
+
+
+def _read_xz_vli(data: bytes, offset: int) -> Tuple[int, int]:
+    """
+    Read a variable-length integer, made of 7-bit little-endian groups.
+
+    :return: The integer, and the offset right after it
+    """
+    value = 0
+    for i in range(9):
+        if offset + i >= len(data):
+            break
+        byte = data[offset + i]
+        value |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            return value, offset + i + 1
+    # Invalid integers make the index invalid, which is caught by the caller's bound checks
+    return value, len(data)
+
+
+def _parse_lzma_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    properties, dictionary_size, uncompressed_size = struct.unpack_from("<BIq", data, offset)
+    # Dictionary sizes are 2^n or 2^n + 2^(n-1) bytes
+    lowest_bit = dictionary_size & -dictionary_size
+    if not dictionary_size or dictionary_size not in (lowest_bit, lowest_bit * 3):
+        return None
+    # The size is unknown (-1) or reasonable, and the range coder starts with a null byte
+    if not -1 <= uncompressed_size < 2**40 or data[offset + 13] != 0:
+        return None
+    return (
+        f"LZMA compressed data, properties: 0x{properties:02X}, dictionary size: "
+        f"{dictionary_size} bytes, uncompressed size: {uncompressed_size} bytes",
+        None,
+    )
+
+
+def _parse_xz_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    # The stream flags are protected by a CRC32
+    stream_flags = bytes(data[offset + 6 : offset + 8])
+    (flags_crc,) = struct.unpack_from("<I", data, offset + 8)
+    if stream_flags[0] != 0 or stream_flags[1] & 0xF0 or zlib.crc32(stream_flags) != flags_crc:
+        return None
+    return "XZ compressed data", None
+
+
 MagicMimeIdentifier.register(LzmaData, "application/x-lzma")
 MagicMimeIdentifier.register(XzData, "application/x-xz")
 MagicDescriptionIdentifier.register(LzmaData, lambda s: s.startswith("LZMA compressed data"))
 MagicDescriptionIdentifier.register(XzData, lambda s: s.startswith("XZ compressed data"))
+# The default properties (lc=3, lp=0, pb=2), and a dictionary size of at least 64 KiB
+SignatureScanner.register(LzmaData, b"\x5d\x00\x00", _parse_lzma_signature)
+SignatureScanner.register(XzData, _XZ_HEADER_MAGIC, _parse_xz_signature)
@@ -1,12 +1,13 @@
-import asyncio
-import tempfile
-from subprocess import CalledProcessError
+import struct
+from typing import Optional, Tuple
 
+from ofrak.component.external_tool import run_tool
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.resource import Resource
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 
 from ofrak.model.component_model import CC, ComponentExternalTool
 from ofrak_type.range import Range
@@ -36,27 +37,14 @@ class LzoUnpacker(Unpacker[None]):
     external_dependencies = (LZOP,)
 
     async def unpack(self, resource: Resource, config: CC) -> None:
-        with tempfile.NamedTemporaryFile(suffix=".lzo") as compressed_file:
-            compressed_file.write(await resource.get_data())
-            compressed_file.flush()
-
-            cmd = [
-                "lzop",
-                "-d",
-                "-f",
-                "-c",
-                compressed_file.name,
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await proc.communicate()
-            if proc.returncode:
-                raise CalledProcessError(returncode=proc.returncode, cmd=cmd)
-
-            await resource.create_child(tags=(GenericBinary,), data=stdout)
+        cmd = [
+            "lzop",
+            "-d",
+            "-f",
+            "-c",
+        ]
+        result = await run_tool(cmd, input_data=await resource.get_data())
+        await resource.create_child(tags=(GenericBinary,), data=result.stdout)
 
 
 class LzoPacker(Packer[None]):
@@ -72,29 +60,23 @@ class LzoPacker(Packer[None]):
         child_file = await lzo_view.get_child()
         uncompressed_data = await child_file.resource.get_data()
 
-        with tempfile.NamedTemporaryFile(suffix=".lzo") as uncompressed_file:
-            uncompressed_file.write(uncompressed_data)
-            uncompressed_file.flush()
-
-            cmd = [
-                "lzop",
-                "-f",
-                "-c",
-                uncompressed_file.name,
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await proc.communicate()
-            if proc.returncode:
-                raise CalledProcessError(returncode=proc.returncode, cmd=cmd)
-
-            compressed_data = stdout
-            original_size = await lzo_view.resource.get_data_length()
-            resource.queue_patch(Range(0, original_size), compressed_data)
+        cmd = [
+            "lzop",
+            "-f",
+            "-c",
+        ]
+        result = await run_tool(cmd, input_data=uncompressed_data)
+
+        compressed_data = result.stdout
+        original_size = await lzo_view.resource.get_data_length()
+        resource.queue_patch(Range(0, original_size), compressed_data)
+
+
+def _parse_lzo_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    (version,) = struct.unpack_from(">H", data, offset + 9)
+    return f"lzop compressed data - version {version >> 12}.{version & 0xFFF:03x}", None
 
 
 MagicMimeIdentifier.register(LzoData, "application/x-lzop")
 MagicDescriptionIdentifier.register(LzoData, lambda s: s.lower().startswith("lzop compressed data"))
+SignatureScanner.register(LzoData, b"\x89LZO\x00\r\n\x1a\n", _parse_lzo_signature)
@@ -1,6 +1,7 @@
+import struct
 from dataclasses import dataclass
 from enum import Enum
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Tuple
 
 from ofrak.core.program import Program
 from ofrak.core.program_section import NamedProgramSection
@@ -11,6 +12,7 @@ from ofrak.service.resource_service_i import (
     ResourceFilter,
 )
 from ofrak.core.magic import MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak_type.error import NotFoundError
 
 
@@ -293,4 +295,22 @@ class Pe(Program):
             return None
 
 
+def _parse_pe_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    # The DOS header points to the PE header
+    (pe_header_offset,) = struct.unpack_from("<I", data, offset + 0x3C)
+    if not 0x40 <= pe_header_offset < 0x10000:
+        return None
+    pe_header = offset + pe_header_offset
+    if data[pe_header : pe_header + 4] != b"PE\x00\x00":
+        return None
+    (optional_header_magic,) = struct.unpack_from("<H", data, pe_header + 24)
+    if optional_header_magic == PeOptionalHeaderMagic.IMAGE_NT_OPTIONAL_HDR64_MAGIC.value:
+        pe_format = "PE32+"
+    else:
+        pe_format = "PE32"
+    # The length is left unknown, so that the signatures of the data in the file are found too
+    return f"Microsoft executable, portable ({pe_format})", None
+
+
 MagicDescriptionIdentifier.register(Pe, lambda s: s.startswith("PE32"))
+SignatureScanner.register(Pe, b"MZ", _parse_pe_signature)
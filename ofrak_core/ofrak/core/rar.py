@@ -1,14 +1,34 @@
-import asyncio
-import tempfile
+import json
+import os
+import stat
 from dataclasses import dataclass
-from subprocess import CalledProcessError
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Union
 
+from ofrak.component.external_tool import (
+    ToolInputFile,
+    ToolOutputData,
+    ToolOutputDirectory,
+    ToolOutputFileData,
+    run_tool,
+    scratch_directory,
+    tool_input_path,
+)
 from ofrak.component.unpacker import Unpacker
 from ofrak.core.binary import GenericBinary
-from ofrak.core.filesystem import FilesystemRoot, File, Folder, SpecialFileType
+from ofrak.core.filesystem import (
+    ArchiveUnpackerConfig,
+    FilesystemRoot,
+    File,
+    Folder,
+    SpecialFileType,
+    normalize_archive_path,
+)
 
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
-from ofrak.model.component_model import CC, ComponentExternalTool
+from ofrak.core.signatures import SignatureData, SignatureScanner
+from ofrak.model.component_model import ComponentExternalTool
+from ofrak.model.data_model import LazyData
 from ofrak.resource import Resource
 
 UNAR = ComponentExternalTool(
@@ -19,6 +39,14 @@ UNAR = ComponentExternalTool(
     brew_package="unar",
 )
 
+LSAR = ComponentExternalTool(
+    "lsar",
+    "https://theunarchiver.com/command-line",
+    "--help",
+    apt_package="unar",
+    brew_package="unar",
+)
+
 
 @dataclass
 class RarArchive(GenericBinary, FilesystemRoot):
@@ -27,40 +55,145 @@ class RarArchive(GenericBinary, FilesystemRoot):
     """
 
 
-class RarUnpacker(Unpacker[None]):
+class RarUnpacker(Unpacker[ArchiveUnpackerConfig]):
     """
     Unpack RAR archives using the free `unrar` tool.
+
+    By default, all members are extracted up front. With
+    `ArchiveUnpackerConfig(lazy_members=True)`, the archive is only listed with `lsar`, and each
+    file is only extracted (with `unar -o -`) the first time its data is read. Extracting a member
+    of a solid archive decompresses all the members stored before it, so for solid archives the
+    whole archive is extracted to a scratch directory the first time any file is read, and all
+    files are then read from there.
+
+    !!! warning
+
+        The data of lazy members is
+        [ToolOutputData][ofrak.component.external_tool.ToolOutputData] or
+        [ToolOutputFileData][ofrak.component.external_tool.ToolOutputFileData], which blocks the
+        event loop while the tool extracts the member or the archive. These extractions run
+        outside of the
+        [EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR], so they do
+        not count towards its limits.
     """
 
     targets = (RarArchive,)
     children = (File, Folder, SpecialFileType)
-    external_dependencies = (UNAR,)
-
-    async def unpack(self, resource: Resource, config: CC):
-        with tempfile.NamedTemporaryFile(
-            suffix=".rar"
-        ) as temp_archive, tempfile.TemporaryDirectory() as temp_dir:
-            temp_archive.write(await resource.get_data())
-            temp_archive.flush()
+    external_dependencies = (UNAR, LSAR)
 
+    async def unpack(self, resource: Resource, config: Optional[ArchiveUnpackerConfig] = None):
+        data = await resource.get_data()
+        rar_view = await resource.view_as(RarArchive)
+        if config is not None and config.lazy_members:
+            await self._unpack_lazy_members(rar_view, data)
+            return
+        with tool_input_path(data, suffix=".rar") as archive_path, scratch_directory(
+            len(data)
+        ) as temp_dir:
             cmd = [
                 "unar",
                 "-no-directory",
                 "-no-recursion",
-                temp_archive.name,
+                archive_path,
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                cwd=temp_dir,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
+            await run_tool(cmd, cwd=temp_dir)
 
-            rar_view = await resource.view_as(RarArchive)
             await rar_view.initialize_from_disk(temp_dir)
 
+    @staticmethod
+    async def _unpack_lazy_members(rar_view: RarArchive, data: bytes):
+        # The archive is kept for as long as any file has not been extracted from it yet
+        archive_file = ToolInputFile(data, suffix=".rar")
+        listing = await run_tool(["lsar", "-json", archive_file.path])
+        members = json.loads(listing.stdout)["lsarContents"]
+        # Check the archive member files to ensure none unpack to a parent directory
+        member_paths = [normalize_archive_path(member["XADFileName"]) for member in members]
+        # Extracting any member of a solid archive decompresses the members before it, so the
+        # members of solid archives are all extracted at once, and only once
+        output_dir: Optional[ToolOutputDirectory] = None
+        if any(_is_solid_member(member) for member in members):
+            output_dir = ToolOutputDirectory(
+                lambda path: [
+                    "unar",
+                    "-quiet",
+                    "-no-directory",
+                    "-no-recursion",
+                    "-output-directory",
+                    path,
+                    archive_file.path,
+                ],
+                len(data),
+                archive_file,
+            )
+        for member, path in zip(members, member_paths):
+            if path is None:
+                continue
+            member_stat = _get_member_stat(member)
+            member_data: Union[bytes, LazyData]
+            if stat.S_ISREG(member_stat.st_mode) and output_dir is not None:
+                member_data = ToolOutputFileData(output_dir, path, member_stat.st_size)
+            elif stat.S_ISREG(member_stat.st_mode):
+                extract_cmd = [
+                    "unar",
+                    "-quiet",
+                    "-no-recursion",
+                    "-output-directory",
+                    "-",
+                    "-indexes",
+                    archive_file.path,
+                    str(member["XADIndex"]),
+                ]
+                member_data = ToolOutputData(extract_cmd, member_stat.st_size, archive_file)
+            elif stat.S_ISLNK(member_stat.st_mode):
+                member_data = member.get("XADLinkDestination", "").encode()
+            else:
+                member_data = b""
+            await rar_view.add_entry(path, member_stat, {}, member_data)
+
+
+def _is_solid_member(member: Dict[str, Any]) -> bool:
+    # lsar lists where each member of a solid archive is in the solid stream it is compressed in
+    return bool(member.get("XADIsSolid")) or "XADSolidObject" in member
+
+
+def _get_member_stat(member: Dict[str, Any]) -> os.stat_result:
+    is_dir = member.get("XADIsDirectory")
+    permissions = stat.S_IMODE(member.get("XADPosixPermissions", 0o755 if is_dir else 0o644))
+    if is_dir:
+        mode = stat.S_IFDIR | permissions
+    elif member.get("XADIsLink"):
+        mode = stat.S_IFLNK | permissions
+    else:
+        mode = stat.S_IFREG | permissions
+    size = member.get("XADFileSize", 0)
+    modified = member.get("XADLastModificationDate")
+    # lsar lists dates like "2023-05-01 10:00:00 +0200"
+    mtime = int(datetime.strptime(modified, "%Y-%m-%d %H:%M:%S %z").timestamp()) if modified else 0
+    return os.stat_result(
+        (
+            mode,
+            0,
+            0,
+            1,
+            member.get("XADPosixUser", 0),
+            member.get("XADPosixGroup", 0),
+            size,
+            mtime,
+            mtime,
+            mtime,
+        )
+    )
+
+
+def _parse_rar_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    if data[offset + 6] == 0:
+        return "RAR archive data, version 4.x", None
+    if data[offset + 6 : offset + 8] == b"\x01\x00":
+        return "RAR archive data, version 5.x", None
+    return None
+
 
 MagicMimeIdentifier.register(RarArchive, "application/x-rar-compressed")
 MagicMimeIdentifier.register(RarArchive, "application/vnd.rar")
 MagicDescriptionIdentifier.register(RarArchive, lambda s: "rar archive" in s.lower())
+SignatureScanner.register(RarArchive, b"Rar!\x1a\x07", _parse_rar_signature)
@@ -1,24 +1,48 @@
-import asyncio
 import logging
 import os
-import tempfile
+import re
+import stat
+import struct
+import time
 from dataclasses import dataclass
-from subprocess import CalledProcessError
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
+from ofrak.component.external_tool import (
+    ToolInputFile,
+    ToolOutputData,
+    ToolOutputDirectory,
+    ToolOutputFileData,
+    run_tool,
+    scratch_directory,
+    tool_input_path,
+)
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.resource import Resource
 from ofrak.core.binary import GenericBinary
-from ofrak.core.filesystem import File, Folder, FilesystemRoot, SpecialFileType
+from ofrak.core.filesystem import (
+    ArchiveUnpackerConfig,
+    File,
+    Folder,
+    FilesystemRoot,
+    SpecialFileType,
+    normalize_archive_path,
+)
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 
 from ofrak.model.component_model import ComponentExternalTool
+from ofrak.model.data_model import LazyData
 from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
 
 SEVEN_ZIP = ComponentExternalTool("7zz", "https://www.7-zip.org", "--help", brew_package="sevenzip")
 
+# Unix mode string in the attributes listed by `7zz l -slt`, for instance "drwxr-xr-x"
+_SEVEN_ZIP_MODE_PATTERN = re.compile(r"^[-dlcbps][-rwxsStT]{9}$")
+_SEVEN_ZIP_MTIME_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(\.\d+)?$")
+
 
 @dataclass
 class SevenZFilesystem(GenericBinary, FilesystemRoot):
@@ -27,35 +51,172 @@ class SevenZFilesystem(GenericBinary, FilesystemRoot):
     """
 
 
-class SevenZUnpacker(Unpacker[None]):
+class SevenZUnpacker(Unpacker[ArchiveUnpackerConfig]):
     """
     Unpack (decompress) a 7z file.
+
+    By default, all members are extracted up front. With
+    `ArchiveUnpackerConfig(lazy_members=True)`, the archive is only listed, and each file is only
+    extracted (with `7zz x -so`) the first time its data is read. Extracting a single member of a
+    solid archive decompresses all the members stored before it, so for solid archives the whole
+    archive is extracted to a scratch directory the first time any file is read (or when unpacking,
+    if the archive has symbolic links), and all files are then read from there.
+
+    !!! warning
+
+        The data of lazy members is
+        [ToolOutputData][ofrak.component.external_tool.ToolOutputData] or
+        [ToolOutputFileData][ofrak.component.external_tool.ToolOutputFileData], which blocks the
+        event loop while the tool extracts the member or the archive. These extractions run
+        outside of the
+        [EXTERNAL_TOOL_EXECUTOR][ofrak.component.external_tool.EXTERNAL_TOOL_EXECUTOR], so they do
+        not count towards its limits.
     """
 
     targets = (SevenZFilesystem,)
     children = (File, Folder, SpecialFileType)
     external_dependencies = (SEVEN_ZIP,)
 
-    async def unpack(self, resource: Resource, config=None):
+    async def unpack(self, resource: Resource, config: Optional[ArchiveUnpackerConfig] = None):
         seven_zip_v = await resource.view_as(SevenZFilesystem)
         resource_data = await seven_zip_v.resource.get_data()
-        with tempfile.NamedTemporaryFile() as temp_file:
-            temp_file.write(resource_data)
-            temp_file.flush()
-            with tempfile.TemporaryDirectory() as temp_flush_dir:
-                cmd = [
-                    "7zz",
-                    "x",
-                    f"-o{temp_flush_dir}",
-                    temp_file.name,
-                ]
-                proc = await asyncio.create_subprocess_exec(
-                    *cmd,
-                )
-                returncode = await proc.wait()
-                if proc.returncode:
-                    raise CalledProcessError(returncode=returncode, cmd=cmd)
-                await seven_zip_v.initialize_from_disk(temp_flush_dir)
+        if config is not None and config.lazy_members:
+            await self._unpack_lazy_members(seven_zip_v, resource_data)
+            return
+        with tool_input_path(resource_data) as archive_path, scratch_directory(
+            len(resource_data)
+        ) as temp_flush_dir:
+            cmd = [
+                "7zz",
+                "x",
+                f"-o{temp_flush_dir}",
+                archive_path,
+            ]
+            await run_tool(cmd)
+            await seven_zip_v.initialize_from_disk(temp_flush_dir)
+
+    @staticmethod
+    async def _unpack_lazy_members(seven_zip_v: SevenZFilesystem, resource_data: bytes):
+        # The archive is kept for as long as any file has not been extracted from it yet
+        archive_file = ToolInputFile(resource_data)
+        listing = (await run_tool(["7zz", "l", "-slt", archive_file.path])).stdout.decode(
+            errors="surrogateescape"
+        )
+        members = list(_parse_7z_listing(listing))
+        # Extracting any member of a solid archive decompresses the members before it, so the
+        # members of solid archives are all extracted at once, and only once
+        output_dir: Optional[ToolOutputDirectory] = None
+        if _parse_7z_archive_properties(listing).get("Solid") != "-":
+            output_dir = ToolOutputDirectory(
+                lambda path: ["7zz", "x", f"-o{path}", archive_file.path],
+                len(resource_data),
+                archive_file,
+            )
+        # Check the archive member files to ensure none unpack to a parent directory
+        member_paths = [normalize_archive_path(member.path) for member in members]
+        for member, path in zip(members, member_paths):
+            if path is None:
+                continue
+            extract_cmd = ["7zz", "x", "-so", "-spd", archive_file.path, "--", member.path]
+            data: Union[bytes, LazyData]
+            if stat.S_ISREG(member.stat.st_mode):
+                if output_dir is not None:
+                    data = ToolOutputFileData(output_dir, path, member.stat.st_size)
+                else:
+                    data = ToolOutputData(extract_cmd, member.stat.st_size, archive_file)
+            elif stat.S_ISLNK(member.stat.st_mode):
+                if output_dir is not None:
+                    await output_dir.extract()
+                    data = os.fsencode(os.readlink(os.path.join(output_dir.path, path)))
+                else:
+                    data = (await run_tool(extract_cmd)).stdout
+            else:
+                data = b""
+            await seven_zip_v.add_entry(path, member.stat, {}, data)
+
+
+@dataclass
+class _SevenZipMember:
+    path: str
+    stat: os.stat_result
+
+
+def _parse_7z_listing(listing: str) -> Iterator[_SevenZipMember]:
+    """
+    Parse the technical listing of an archive printed by `7zz l -slt`, in which each member is a
+    block of "Key = Value" lines, after a line of dashes.
+    """
+    _, _, members_listing = listing.partition("\n----------\n")
+    for block in members_listing.split("\n\n"):
+        properties = _parse_7z_properties(block)
+        if "Path" in properties:
+            yield _SevenZipMember(properties["Path"], _get_7z_member_stat(properties))
+
+
+def _parse_7z_archive_properties(listing: str) -> Dict[str, str]:
+    """
+    Parse the properties of the archive itself (such as "Solid = +") in the technical listing
+    printed by `7zz l -slt`, which come before the line of dashes.
+    """
+    archive_listing, _, _ = listing.partition("\n----------\n")
+    return _parse_7z_properties(archive_listing)
+
+
+def _parse_7z_properties(block: str) -> Dict[str, str]:
+    properties: Dict[str, str] = dict()
+    for line in block.splitlines():
+        key, sep, value = line.partition(" = ")
+        if sep:
+            properties[key] = value
+    return properties
+
+
+def _get_7z_member_stat(properties: Dict[str, str]) -> os.stat_result:
+    attributes = properties.get("Attributes", "").split()
+    mode_strings = [
+        attribute for attribute in attributes if _SEVEN_ZIP_MODE_PATTERN.match(attribute)
+    ]
+    is_dir = properties.get("Folder") == "+" or (bool(attributes) and "D" in attributes[0])
+    if mode_strings:
+        mode = _parse_mode_string(mode_strings[0])
+    elif is_dir:
+        mode = stat.S_IFDIR | 0o755
+    else:
+        mode = stat.S_IFREG | 0o644
+    if is_dir and not stat.S_ISDIR(mode):
+        mode = stat.S_IFDIR | stat.S_IMODE(mode)
+    size = int(properties.get("Size") or 0)
+    mtime = _parse_7z_mtime(properties.get("Modified", ""))
+    return os.stat_result((mode, 0, 0, 1, 0, 0, size, mtime, mtime, mtime))
+
+
+def _parse_mode_string(mode_string: str) -> int:
+    file_type = {
+        "-": stat.S_IFREG,
+        "d": stat.S_IFDIR,
+        "l": stat.S_IFLNK,
+        "c": stat.S_IFCHR,
+        "b": stat.S_IFBLK,
+        "p": stat.S_IFIFO,
+        "s": stat.S_IFSOCK,
+    }[mode_string[0]]
+    permissions = 0
+    for i, permission in enumerate(mode_string[1:]):
+        if permission not in "-ST":
+            permissions |= 1 << (8 - i)
+    special_bits: List[int] = [stat.S_ISUID, stat.S_ISGID, stat.S_ISVTX]
+    for i, special_bit in enumerate(special_bits):
+        if mode_string[3 * (i + 1)] in "sStT":
+            permissions |= special_bit
+    return file_type | permissions
+
+
+def _parse_7z_mtime(modified: str) -> int:
+    # 7-Zip lists modification times in local time, with up to 100ns precision
+    match = _SEVEN_ZIP_MTIME_PATTERN.match(modified)
+    if match is None:
+        return 0
+    return int(time.mktime(time.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")))
 
 
 class SevenzPacker(Packer[None]):
@@ -70,7 +231,7 @@ class SevenzPacker(Packer[None]):
         seven_zip_v: SevenZFilesystem = await resource.view_as(SevenZFilesystem)
         temp_flush_dir = await seven_zip_v.flush_to_disk()
         temp_flush_dir = os.path.join(temp_flush_dir, ".")
-        with tempfile.TemporaryDirectory() as temp_dir:
+        with scratch_directory(await resource.get_data_length()) as temp_dir:
             temp_name = os.path.join(temp_dir, "temp.7z")
             cmd = [
                 "7zz",
@@ -78,17 +239,28 @@ class SevenzPacker(Packer[None]):
                 temp_name,
                 temp_flush_dir,
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
+            await run_tool(cmd)
             with open(temp_name, "rb") as f:
                 new_data = f.read()
             # Passing in the original range effectively replaces the original data with the new data
             resource.queue_patch(Range(0, await resource.get_data_length()), new_data)
 
 
+def _parse_seven_zip_signature(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[str, Optional[int]]]:
+    major_version, minor_version, _, next_header_offset, next_header_size = struct.unpack_from(
+        "<BBIQQ", data, offset + 6
+    )
+    if major_version != 0:
+        return None
+    # The next header follows the 32 bytes of the start header and the packed streams
+    return (
+        f"7-zip archive data, version {major_version}.{minor_version}",
+        32 + next_header_offset + next_header_size,
+    )
+
+
 MagicMimeIdentifier.register(SevenZFilesystem, "application/x-7z-compressed")
 MagicDescriptionIdentifier.register(SevenZFilesystem, lambda s: s.startswith("7-zip archive"))
+SignatureScanner.register(SevenZFilesystem, b"7z\xbc\xaf\x27\x1c", _parse_seven_zip_signature)
@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ofrak.resource import Resource, ResourceFactory
+
+from ofrak.model.resource_model import ResourceAttributes
+
+from ofrak.component.analyzer import Analyzer
+from ofrak.component.process_pool import (
+    COMPONENT_PROCESS_POOL,
+    SharedData,
+    open_shared_data,
+    share_data,
+)
+
+from ofrak.core.binary import GenericBinary
+from ofrak.core.filesystem import File
+from ofrak.core.signatures import SignatureMatch, SignatureScanner
+from ofrak.model.tag_model import ResourceTag
+from ofrak.service.data_service_i import DataServiceInterface
+from ofrak.service.resource_service_i import ResourceServiceInterface
+
+
+@dataclass(**ResourceAttributes.DATACLASS_PARAMS)
+class SignatureAttributes(ResourceAttributes):
+    """
+    Signatures of known formats found in the data of a resource.
+
+    :ivar offsets: Description of the header found at each offset
+    :ivar tags: Tag of the format found at each offset
+    """
+
+    offsets: Dict[int, str]
+    tags: Dict[int, ResourceTag]
+
+
+class SignatureAnalyzer(Analyzer[None, SignatureAttributes]):
+    """
+    Find the signatures of known formats at any offset in the data of a resource, with the
+    signatures registered with the [SignatureScanner][ofrak.core.signatures.SignatureScanner].
+
+    Unlike the [BinwalkAnalyzer][ofrak.core.binwalk.BinwalkAnalyzer], it needs no external tool,
+    but it only finds the formats which OFRAK components handle, rather than binwalk's hundreds of
+    signatures.
+    """
+
+    targets = (GenericBinary, File)
+    outputs = (SignatureAttributes,)
+
+    def __init__(
+        self,
+        resource_factory: ResourceFactory,
+        data_service: DataServiceInterface,
+        resource_service: ResourceServiceInterface,
+    ):
+        super().__init__(resource_factory, data_service, resource_service)
+        self._scanner: Optional[Tuple[int, SignatureScanner]] = None
+
+    async def analyze(self, resource: Resource, config=None) -> SignatureAttributes:
+        data = await resource.get_data()
+        with share_data(data) as shared_data:
+            matches = await COMPONENT_PROCESS_POOL.run(
+                scan_shared_data, shared_data, self._get_scanner()
+            )
+        return SignatureAttributes(
+            {match.offset: match.description for match in matches},
+            {match.offset: match.tag for match in matches},
+        )
+
+    def _get_scanner(self) -> SignatureScanner:
+        # The scanner is built again if signatures were registered since it was built
+        signature_count = SignatureScanner.get_registered_signature_count()
+        if self._scanner is None or self._scanner[0] != signature_count:
+            self._scanner = (signature_count, SignatureScanner.from_registered_signatures())
+        return self._scanner[1]
+
+
+def scan_shared_data(
+    shared_data: SharedData, scanner: SignatureScanner
+) -> List[SignatureMatch]:  # pragma: no cover
+    with open_shared_data(shared_data) as data:
+        return scanner.scan(data)
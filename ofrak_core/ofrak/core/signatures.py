@@ -0,0 +1,144 @@
+"""
+Scanner finding the signatures of known formats (the magic bytes of their headers) at any offset in
+some data, like binwalk's signature scan.
+"""
+import struct
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from ofrak.core.strings import compile_strings_pattern
+from ofrak.model.tag_model import ResourceTag
+
+# The data scanned for signatures: resource data, or the memory mapping of it shared with a process
+SignatureData = Union[bytes, memoryview]
+# Parse the header of a format starting at an offset of some data, returning a description of the
+# header and the length of the data in the format if it is known, or None if the header is not valid
+SignatureParser = Callable[[SignatureData, int], Optional[Tuple[str, Optional[int]]]]
+
+
+# Not frozen, since mypy takes the callable fields of frozen dataclasses for methods
+@dataclass
+class Signature:
+    """
+    Signature of a format.
+
+    :ivar tag: The tag of data in the format
+    :ivar magic: The bytes which data in the format has at `magic_offset`
+    :ivar parse: Function parsing the header of the format, called at each offset where the magic
+    bytes are found; it must be defined at the top level of a module, since scans run in a separate
+    process
+    :ivar magic_offset: The offset of the magic bytes from the start of data in the format
+    """
+
+    tag: ResourceTag
+    magic: bytes
+    parse: SignatureParser
+    magic_offset: int = 0
+
+
+@dataclass
+class SignatureMatch:
+    """
+    A signature found at an offset of some data.
+
+    :ivar offset: The offset of the start of the data in the format
+    :ivar tag: The tag of the format
+    :ivar description: Description of the header of the format found there
+    :ivar length: The length of the data in the format, if its header tells it
+    """
+
+    offset: int
+    tag: ResourceTag
+    description: str
+    length: Optional[int]
+
+
+class SignatureScanner:
+    """
+    Find the signatures of known formats at any offset of some data.
+
+    The magic bytes of all the signatures are compiled into a single regular expression, arranged as
+    a trie, so the data is read once however many signatures there are. The header found at each
+    offset where some magic bytes occur is then parsed, which rules out most false positives.
+
+    Like binwalk, the scanner does not look for signatures in the data of a format whose length is
+    known, so the files of an archive are not reported along with the archive. Formats whose
+    contents are worth reporting, such as executables, leave their length unknown.
+
+    Formats register their signatures with `SignatureScanner.register`, next to their
+    `MagicMimeIdentifier` and `MagicDescriptionIdentifier` registrations.
+    """
+
+    _signatures: List[Signature] = []
+
+    def __init__(self, signatures: Iterable[Signature]):
+        self._signatures_by_magic: Dict[bytes, List[Signature]] = {}
+        for signature in signatures:
+            self._signatures_by_magic.setdefault(signature.magic, []).append(signature)
+        # The magic bytes starting with each byte, longest first
+        self._magics_by_first_byte: Dict[int, List[bytes]] = {}
+        for magic in sorted(self._signatures_by_magic, key=len, reverse=True):
+            self._magics_by_first_byte.setdefault(magic[0], []).append(magic)
+        self._pattern = compile_strings_pattern(self._signatures_by_magic)
+
+    @classmethod
+    def register(
+        cls, tag: ResourceTag, magic: bytes, parse: SignatureParser, magic_offset: int = 0
+    ):
+        """
+        Register the signature of a format, found by the scanners built with
+        `SignatureScanner.from_registered_signatures` afterwards.
+        """
+        if not magic:
+            raise ValueError(f"The signature of {tag.__name__} has no magic bytes")
+        cls._signatures.append(Signature(tag, magic, parse, magic_offset))
+
+    @classmethod
+    def from_registered_signatures(cls) -> "SignatureScanner":
+        return cls(cls._signatures)
+
+    @classmethod
+    def get_registered_signature_count(cls) -> int:
+        return len(cls._signatures)
+
+    def scan(self, data: SignatureData) -> List[SignatureMatch]:
+        """
+        Find the signatures in some data.
+
+        :return: The signatures found, in increasing order of offset, at most one per offset
+        """
+        matches: List[SignatureMatch] = []
+        # Signatures are not looked for in the data of the last format found whose length is known
+        skip_end = 0
+        magic_match = self._pattern.search(data)
+        while magic_match is not None:
+            position = magic_match.start()
+            match = self._parse_signatures_at(data, position, skip_end)
+            if match is not None:
+                matches.append(match)
+                # Lengths past the end of the data are those of truncated or corrupted headers
+                if match.length is not None and match.offset + match.length <= len(data):
+                    skip_end = max(skip_end, match.offset + match.length)
+            # Magic bytes in the skipped data belong to signatures starting in it, which are skipped
+            magic_match = self._pattern.search(data, max(position + 1, skip_end))
+        matches.sort(key=lambda match: match.offset)
+        return matches
+
+    def _parse_signatures_at(
+        self, data: SignatureData, position: int, skip_end: int
+    ) -> Optional[SignatureMatch]:
+        for magic in self._magics_by_first_byte[data[position]]:
+            if data[position : position + len(magic)] != magic:
+                continue
+            for signature in self._signatures_by_magic[magic]:
+                start = position - signature.magic_offset
+                if start < skip_end:
+                    continue
+                try:
+                    parsed = signature.parse(data, start)
+                except (struct.error, IndexError, ValueError, UnicodeDecodeError):
+                    parsed = None
+                if parsed is not None:
+                    description, length = parsed
+                    return SignatureMatch(start, signature.tag, description, length)
+        return None
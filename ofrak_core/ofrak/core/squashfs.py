@@ -1,15 +1,42 @@
 import asyncio
+import functools
 import logging
-import tempfile
+import lzma
+import os
+import stat
+import struct
+import time
+import zlib
 from dataclasses import dataclass
+from itertools import accumulate
 from subprocess import CalledProcessError
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
 
+try:
+    import lzo
+except ImportError:
+    lzo = None
+
+try:
+    import lz4.block
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from ofrak.component.abstract import ComponentMissingDependencyError
+from ofrak.component.external_tool import run_tool, scratch_directory, tool_input_path
 from ofrak.component.packer import Packer
-from ofrak.component.unpacker import Unpacker
+from ofrak.component.unpacker import Unpacker, UnpackerError
+from ofrak.model.data_model import LazyData
 from ofrak.resource import Resource
 from ofrak.core.filesystem import File, Folder, FilesystemRoot, SpecialFileType
 
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 
 from ofrak.core.binary import GenericBinary
 from ofrak.model.component_model import ComponentExternalTool
@@ -52,6 +79,65 @@ class _UnsquashfsV45Tool(ComponentExternalTool):
 
 UNSQUASHFS = _UnsquashfsV45Tool()
 
+_SQUASHFS_MAGIC = 0x73717368
+_SUPERBLOCK = struct.Struct("<IIIIIHHHHHHQQQQQQQQ")
+_FRAGMENT_ENTRY = struct.Struct("<QII")
+_INODE_HEADER = struct.Struct("<HHHHII")
+_DIRECTORY_HEADER = struct.Struct("<III")
+_DIRECTORY_ENTRY = struct.Struct("<HhHH")
+# Size of the fixed part of the largest inode type (extended file)
+_INODE_MAX_BODY_SIZE = 40
+_METADATA_BLOCK_SIZE = 8192
+_METADATA_SIZE_MASK = 0x7FFF
+_METADATA_UNCOMPRESSED = 0x8000
+_SQUASHFS_BLOCK_SIZE_MASK = 0xFFFFFF
+_SQUASHFS_BLOCK_UNCOMPRESSED = 0x1000000
+_SQUASHFS_NO_FRAGMENT = 0xFFFFFFFF
+_SQUASHFS_NO_XATTRS = 0xFFFFFFFF
+_SQUASHFS_NO_TABLE = 0xFFFFFFFFFFFFFFFF
+_SQUASHFS_NO_XATTRS_FLAG = 0x200
+_XATTR_VALUE_OUT_OF_LINE = 0x100
+_XATTR_PREFIXES = {0: "user.", 1: "trusted.", 2: "security."}
+# Number of decompressed fragment blocks kept, since the files sharing a fragment block are
+# usually read one after the other
+_FRAGMENT_CACHE_SIZE = 8
+
+_GZIP_COMPRESSION = 1
+_LZMA_COMPRESSION = 2
+_LZO_COMPRESSION = 3
+_XZ_COMPRESSION = 4
+_LZ4_COMPRESSION = 5
+_ZSTD_COMPRESSION = 6
+
+_BASIC_DIRECTORY = 1
+_BASIC_FILE = 2
+_BASIC_SYMLINK = 3
+_BASIC_BLOCK_DEVICE = 4
+_BASIC_CHARACTER_DEVICE = 5
+_BASIC_FIFO = 6
+_BASIC_SOCKET = 7
+_EXTENDED_DIRECTORY = 8
+_EXTENDED_FILE = 9
+_EXTENDED_SYMLINK = 10
+_EXTENDED_BLOCK_DEVICE = 11
+_EXTENDED_CHARACTER_DEVICE = 12
+_INODE_FILE_TYPES = {
+    _BASIC_DIRECTORY: stat.S_IFDIR,
+    _BASIC_FILE: stat.S_IFREG,
+    _BASIC_SYMLINK: stat.S_IFLNK,
+    _BASIC_BLOCK_DEVICE: stat.S_IFBLK,
+    _BASIC_CHARACTER_DEVICE: stat.S_IFCHR,
+    _BASIC_FIFO: stat.S_IFIFO,
+    _BASIC_SOCKET: stat.S_IFSOCK,
+    _EXTENDED_DIRECTORY: stat.S_IFDIR,
+    _EXTENDED_FILE: stat.S_IFREG,
+    _EXTENDED_SYMLINK: stat.S_IFLNK,
+    _EXTENDED_BLOCK_DEVICE: stat.S_IFBLK,
+    _EXTENDED_CHARACTER_DEVICE: stat.S_IFCHR,
+    13: stat.S_IFIFO,
+    14: stat.S_IFSOCK,
+}
+
 
 @dataclass
 class SquashfsFilesystem(GenericBinary, FilesystemRoot):
@@ -61,36 +147,453 @@ class SquashfsFilesystem(GenericBinary, FilesystemRoot):
 
 
 class SquashfsUnpacker(Unpacker[None]):
-    """Unpack a SquashFS filesystem."""
+    """
+    Unpack a SquashFS filesystem.
+
+    SquashFS 4.0 filesystems are read in-process: the tree of entries (with stat and xattrs) is
+    built from the inode and directory tables only, and the data of each file is only decompressed
+    when it is read, one block at a time. gzip, lzma and xz compression are supported out of the
+    box; lzo, lz4 and zstd need the optional `python-lzo`, `lz4` and `zstandard` packages,
+    installed with `pip install ofrak[squashfs]`.
+
+    Other filesystems (older versions, or compressions which cannot be decompressed in-process)
+    are extracted to disk with `unsquashfs` instead.
+    """
 
     targets = (SquashfsFilesystem,)
     children = (File, Folder, SpecialFileType)
-    external_dependencies = (UNSQUASHFS,)
 
     async def unpack(self, resource: Resource, config=None):
-        with tempfile.NamedTemporaryFile() as temp_file:
-            resource_data = await resource.get_data()
-            temp_file.write(resource_data)
-            temp_file.flush()
-
-            with tempfile.TemporaryDirectory() as temp_flush_dir:
-                cmd = [
-                    "unsquashfs",
-                    "-no-exit-code",
-                    "-force",
-                    "-dest",
-                    temp_flush_dir,
-                    temp_file.name,
-                ]
-                proc = await asyncio.create_subprocess_exec(
-                    *cmd,
+        squashfs_view = await resource.view_as(SquashfsFilesystem)
+        resource_data = await resource.get_data()
+        try:
+            image: Optional[_SquashfsImage] = _SquashfsImage(resource_data)
+        except _UnsupportedSquashfsError as e:
+            LOGGER.info(f"Cannot read SquashFS filesystem in-process ({e}), using unsquashfs")
+            image = None
+
+        if image is not None:
+            await self._add_directory_entries(squashfs_view, image, image.root_inode, "")
+            return
+
+        if not await UNSQUASHFS.is_tool_installed():
+            raise ComponentMissingDependencyError(self, UNSQUASHFS)
+        with tool_input_path(resource_data) as squashfs_path, scratch_directory(
+            len(resource_data)
+        ) as temp_flush_dir:
+            cmd = [
+                "unsquashfs",
+                "-no-exit-code",
+                "-force",
+                "-dest",
+                temp_flush_dir,
+                squashfs_path,
+            ]
+            await run_tool(cmd)
+            await squashfs_view.initialize_from_disk(temp_flush_dir)
+
+    async def _add_directory_entries(
+        self,
+        squashfs_view: "SquashfsFilesystem",
+        image: "_SquashfsImage",
+        directory_inode: "_SquashfsInode",
+        directory_path: str,
+    ):
+        for name, inode in image.list_directory(directory_inode):
+            path = os.path.join(directory_path, name)
+            data: Union[bytes, LazyData] = b""
+            if stat.S_ISREG(inode.stat.st_mode):
+                data = SquashfsFileData(image, inode)
+            elif stat.S_ISLNK(inode.stat.st_mode):
+                data = inode.symlink_target
+            await squashfs_view.add_entry(path, inode.stat, inode.xattrs, data)
+            if stat.S_ISDIR(inode.stat.st_mode):
+                await self._add_directory_entries(squashfs_view, image, inode, path)
+
+
+class SquashfsFileData(LazyData):
+    """
+    Data of a file in a SquashFS filesystem, decompressed block by block as it is read.
+    """
+
+    def __init__(self, image: "_SquashfsImage", inode: "_SquashfsInode"):
+        self._image = image
+        self._inode = inode
+
+    def __len__(self) -> int:
+        return self._inode.stat.st_size
+
+    def read(self, data_range: Range) -> bytes:
+        block_size = self._image.block_size
+        chunks = []
+        first_block = data_range.start // block_size
+        last_block = (data_range.end - 1) // block_size
+        for block_index in range(first_block, last_block + 1):
+            block = self._image.read_file_block(self._inode, block_index)
+            block_start = block_index * block_size
+            chunks.append(
+                block[max(data_range.start - block_start, 0) : data_range.end - block_start]
+            )
+        return b"".join(chunks)
+
+
+class _UnsupportedSquashfsError(Exception):
+    pass
+
+
+@dataclass
+class _SquashfsInode:
+    stat: os.stat_result
+    xattrs: Dict[str, bytes]
+    # Directories: reference to the listing in the directory table, and its size
+    directory_block: int = 0
+    directory_offset: int = 0
+    directory_size: int = 0
+    # Files: offset of the first data block, size of each block and its offset from the first one,
+    # and the fragment holding the tail
+    blocks_start: int = 0
+    block_sizes: Tuple[int, ...] = ()
+    block_offsets: Tuple[int, ...] = ()
+    fragment_index: int = _SQUASHFS_NO_FRAGMENT
+    fragment_offset: int = 0
+    # Symbolic links
+    symlink_target: bytes = b""
+
+
+class _SquashfsImage:
+    """
+    Reader of the metadata and data of a SquashFS 4.0 filesystem, following the layout described
+    in https://dr-emann.github.io/squashfs/.
+    """
+
+    def __init__(self, data: bytes):
+        if len(data) < _SUPERBLOCK.size:
+            raise UnpackerError("Data is too short to be a SquashFS filesystem")
+        (
+            magic,
+            self.inode_count,
+            _,
+            self.block_size,
+            fragment_count,
+            compression_id,
+            _,
+            self.flags,
+            id_count,
+            version_major,
+            version_minor,
+            root_inode_ref,
+            _,
+            id_table_start,
+            xattr_id_table_start,
+            self.inode_table_start,
+            self.directory_table_start,
+            fragment_table_start,
+            _,
+        ) = _SUPERBLOCK.unpack_from(data)
+        if magic != _SQUASHFS_MAGIC:
+            raise _UnsupportedSquashfsError("not a little-endian SquashFS filesystem")
+        if (version_major, version_minor) != (4, 0):
+            raise _UnsupportedSquashfsError(f"version {version_major}.{version_minor}")
+        self._decompress = _get_decompressor(compression_id)
+        self._data = data
+        self._metadata_blocks: Dict[int, Tuple[bytes, int]] = dict()
+        self._read_fragment_block = functools.lru_cache(maxsize=_FRAGMENT_CACHE_SIZE)(
+            self._read_fragment_block_uncached
+        )
+
+        self._ids = struct.unpack(f"<{id_count}I", self._read_table(id_table_start, id_count * 4))
+        self._fragments = [
+            _FRAGMENT_ENTRY.unpack_from(fragment_table, i * _FRAGMENT_ENTRY.size)[:2]
+            for fragment_table in [
+                self._read_table(fragment_table_start, fragment_count * _FRAGMENT_ENTRY.size)
+            ]
+            for i in range(fragment_count)
+        ]
+        self._xattr_table_start, self._xattr_ids = self._read_xattr_id_table(xattr_id_table_start)
+        self.root_inode = self.read_inode(root_inode_ref)
+
+    def list_directory(self, directory_inode: _SquashfsInode) -> List[Tuple[str, _SquashfsInode]]:
+        """
+        Get the name and inode of the entries of a directory, sorted by name.
+        """
+        # The size of a listing counts the "." and ".." entries, which are not stored
+        listing = self._read_metadata(
+            self.directory_table_start + directory_inode.directory_block,
+            directory_inode.directory_offset,
+            directory_inode.directory_size - 3,
+        )
+        entries = []
+        offset = 0
+        while offset < len(listing):
+            count, inode_block, _ = _DIRECTORY_HEADER.unpack_from(listing, offset)
+            offset += _DIRECTORY_HEADER.size
+            for _ in range(count + 1):
+                inode_offset, _, _, name_size = _DIRECTORY_ENTRY.unpack_from(listing, offset)
+                offset += _DIRECTORY_ENTRY.size
+                name = os.fsdecode(listing[offset : offset + name_size + 1])
+                offset += name_size + 1
+                entries.append((name, self.read_inode((inode_block << 16) | inode_offset)))
+        return entries
+
+    def read_inode(self, inode_ref: int) -> _SquashfsInode:
+        block = self.inode_table_start + (inode_ref >> 16)
+        offset = inode_ref & 0xFFFF
+        header = self._read_metadata(block, offset, _INODE_HEADER.size)
+        inode_type, permissions, uid_index, gid_index, mtime, inode_number = _INODE_HEADER.unpack(
+            header
+        )
+        # Read enough for the largest fixed-size part of any inode type
+        body_start = offset + _INODE_HEADER.size
+        body = self._read_metadata(block, body_start, _INODE_MAX_BODY_SIZE, allow_short=True)
+
+        file_type = _INODE_FILE_TYPES.get(inode_type)
+        if file_type is None:
+            raise UnpackerError(f"Unknown SquashFS inode type {inode_type}")
+        inode_kwargs: Dict[str, Any] = dict()
+        xattr_index = _SQUASHFS_NO_XATTRS
+        rdev = 0
+        size = 0
+        nlink = 1
+        if inode_type == _BASIC_DIRECTORY:
+            block_index, nlink, size, block_offset, _ = struct.unpack_from("<IIHHI", body)
+            inode_kwargs.update(
+                directory_block=block_index, directory_offset=block_offset, directory_size=size
+            )
+        elif inode_type == _EXTENDED_DIRECTORY:
+            nlink, size, block_index, _, _, block_offset, xattr_index = struct.unpack_from(
+                "<IIIIHHI", body
+            )
+            inode_kwargs.update(
+                directory_block=block_index, directory_offset=block_offset, directory_size=size
+            )
+        elif inode_type in (_BASIC_FILE, _EXTENDED_FILE):
+            if inode_type == _BASIC_FILE:
+                blocks_start, fragment_index, fragment_offset, size = struct.unpack_from(
+                    "<IIII", body
                 )
-                returncode = await proc.wait()
-                if proc.returncode:
-                    raise CalledProcessError(returncode=returncode, cmd=cmd)
+                block_sizes_start = 16
+            else:
+                (
+                    blocks_start,
+                    size,
+                    _,
+                    nlink,
+                    fragment_index,
+                    fragment_offset,
+                    xattr_index,
+                ) = struct.unpack_from("<QQQIIII", body)
+                block_sizes_start = 40
+            block_count = size // self.block_size
+            if fragment_index == _SQUASHFS_NO_FRAGMENT and size % self.block_size:
+                block_count += 1
+            block_sizes = struct.unpack(
+                f"<{block_count}I",
+                self._read_metadata(block, body_start + block_sizes_start, block_count * 4),
+            )
+            block_offsets = (
+                0,
+                *accumulate(
+                    block_size & _SQUASHFS_BLOCK_SIZE_MASK for block_size in block_sizes[:-1]
+                ),
+            )
+            inode_kwargs.update(
+                blocks_start=blocks_start,
+                block_sizes=block_sizes,
+                block_offsets=block_offsets,
+                fragment_index=fragment_index,
+                fragment_offset=fragment_offset,
+            )
+        elif inode_type in (_BASIC_SYMLINK, _EXTENDED_SYMLINK):
+            nlink, size = struct.unpack_from("<II", body)
+            target = self._read_metadata(block, body_start + 8, size + 4, allow_short=True)
+            inode_kwargs.update(symlink_target=target[:size])
+            if inode_type == _EXTENDED_SYMLINK:
+                (xattr_index,) = struct.unpack_from("<I", target, size)
+        elif inode_type in (_BASIC_BLOCK_DEVICE, _BASIC_CHARACTER_DEVICE):
+            nlink, rdev = struct.unpack_from("<II", body)
+        elif inode_type in (_EXTENDED_BLOCK_DEVICE, _EXTENDED_CHARACTER_DEVICE):
+            nlink, rdev, xattr_index = struct.unpack_from("<III", body)
+        elif inode_type in (_BASIC_FIFO, _BASIC_SOCKET):
+            (nlink,) = struct.unpack_from("<I", body)
+        else:
+            nlink, xattr_index = struct.unpack_from("<II", body)
+
+        uid = self._ids[uid_index]
+        gid = self._ids[gid_index]
+        inode_stat = os.stat_result(
+            (file_type | permissions, inode_number, 0, nlink, uid, gid, size, mtime, mtime, mtime),
+            {"st_rdev": rdev},
+        )
+        return _SquashfsInode(inode_stat, self._read_xattrs(xattr_index), **inode_kwargs)
+
+    def read_file_block(self, inode: _SquashfsInode, block_index: int) -> bytes:
+        """
+        Get the decompressed data of a block of a file; the last block may be shorter.
+        """
+        file_size = inode.stat.st_size
+        block_length = min(self.block_size, file_size - block_index * self.block_size)
+        if block_index >= len(inode.block_sizes):
+            # The tail end of the file is in a fragment block shared with other files
+            fragment_block = self._read_fragment_block(inode.fragment_index)
+            return fragment_block[inode.fragment_offset : inode.fragment_offset + block_length]
+
+        block_start = inode.blocks_start + inode.block_offsets[block_index]
+        block_size = inode.block_sizes[block_index]
+        if block_size == 0:
+            # Sparse block
+            return b"\x00" * block_length
+        return self._read_block(block_start, block_size, block_length)
 
-                squashfs_view = await resource.view_as(SquashfsFilesystem)
-                await squashfs_view.initialize_from_disk(temp_flush_dir)
+    def _read_fragment_block_uncached(self, fragment_index: int) -> bytes:
+        fragment_start, fragment_size = self._fragments[fragment_index]
+        return self._read_block(fragment_start, fragment_size, self.block_size)
+
+    def _read_block(self, block_start: int, block_size: int, max_length: int) -> bytes:
+        compressed_size = block_size & _SQUASHFS_BLOCK_SIZE_MASK
+        block = self._data[block_start : block_start + compressed_size]
+        if block_size & _SQUASHFS_BLOCK_UNCOMPRESSED:
+            return block
+        return self._decompress(block, max_length)
+
+    def _read_metadata(
+        self, block: int, offset: int, length: int, allow_short: bool = False
+    ) -> bytes:
+        """
+        Read data from the metadata blocks starting at a given one, which are read as if they
+        were a single stream of decompressed data.
+        """
+        chunks = []
+        while length > 0:
+            if block >= len(self._data):
+                if allow_short:
+                    break
+                raise UnpackerError(f"SquashFS metadata block at {block:#x} is out of bounds")
+            block_data, next_block = self._read_metadata_block(block)
+            if offset >= len(block_data):
+                offset -= len(block_data)
+                block = next_block
+                continue
+            chunk = block_data[offset : offset + length]
+            chunks.append(chunk)
+            length -= len(chunk)
+            offset = 0
+            block = next_block
+        return b"".join(chunks)
+
+    def _read_metadata_block(self, block: int) -> Tuple[bytes, int]:
+        cached_block = self._metadata_blocks.get(block)
+        if cached_block is not None:
+            return cached_block
+        (header,) = struct.unpack_from("<H", self._data, block)
+        size = header & _METADATA_SIZE_MASK
+        block_data = self._data[block + 2 : block + 2 + size]
+        if not header & _METADATA_UNCOMPRESSED:
+            block_data = self._decompress(block_data, _METADATA_BLOCK_SIZE)
+        self._metadata_blocks[block] = (block_data, block + 2 + size)
+        return self._metadata_blocks[block]
+
+    def _read_table(self, table_start: int, length: int) -> bytes:
+        """
+        Read a table of fixed-size entries (IDs, fragments or xattr IDs), stored in metadata
+        blocks whose locations are listed at the start of the table.
+        """
+        if length == 0:
+            return b""
+        block_count = (length + _METADATA_BLOCK_SIZE - 1) // _METADATA_BLOCK_SIZE
+        block_locations = struct.unpack_from(f"<{block_count}Q", self._data, table_start)
+        return b"".join(self._read_metadata_block(location)[0] for location in block_locations)[
+            :length
+        ]
+
+    def _read_xattr_id_table(self, xattr_id_table_start: int) -> Tuple[int, List[Tuple[int, int]]]:
+        if xattr_id_table_start == _SQUASHFS_NO_TABLE or self.flags & _SQUASHFS_NO_XATTRS_FLAG:
+            return 0, []
+        xattr_table_start, xattr_id_count, _ = struct.unpack_from(
+            "<QII", self._data, xattr_id_table_start
+        )
+        block_count = (xattr_id_count * 16 + _METADATA_BLOCK_SIZE - 1) // _METADATA_BLOCK_SIZE
+        xattr_ids_data = b"".join(
+            self._read_metadata_block(location)[0]
+            for location in struct.unpack_from(
+                f"<{block_count}Q", self._data, xattr_id_table_start + 16
+            )
+        )
+        xattr_ids = [
+            cast(Tuple[int, int], struct.unpack_from("<QI", xattr_ids_data, i * 16)[:2])
+            for i in range(xattr_id_count)
+        ]
+        return cast(int, xattr_table_start), xattr_ids
+
+    def _read_xattrs(self, xattr_index: int) -> Dict[str, bytes]:
+        if xattr_index == _SQUASHFS_NO_XATTRS:
+            return {}
+        xattr_ref, xattr_count = self._xattr_ids[xattr_index]
+        block = self._xattr_table_start + (xattr_ref >> 16)
+        offset = xattr_ref & 0xFFFF
+        xattrs = {}
+        for _ in range(xattr_count):
+            xattr_type, name_size = struct.unpack("<HH", self._read_metadata(block, offset, 4))
+            name = os.fsdecode(self._read_metadata(block, offset + 4, name_size))
+            offset += 4 + name_size
+            (value_size,) = struct.unpack("<I", self._read_metadata(block, offset, 4))
+            value = self._read_metadata(block, offset + 4, value_size)
+            offset += 4 + value_size
+            if xattr_type & _XATTR_VALUE_OUT_OF_LINE:
+                # The value is stored elsewhere, and this is a reference to it
+                (value_ref,) = struct.unpack("<Q", value)
+                value_block = self._xattr_table_start + (value_ref >> 16)
+                value_offset = value_ref & 0xFFFF
+                (value_size,) = struct.unpack(
+                    "<I", self._read_metadata(value_block, value_offset, 4)
+                )
+                value = self._read_metadata(value_block, value_offset + 4, value_size)
+            prefix = _XATTR_PREFIXES.get(xattr_type & ~_XATTR_VALUE_OUT_OF_LINE, "")
+            xattrs[prefix + name] = value
+        return xattrs
+
+
+def _get_decompressor(compression_id: int) -> Callable[[bytes, int], bytes]:
+    """
+    Get a function decompressing a block of data, given at most how long the result can be.
+    """
+    if compression_id == _GZIP_COMPRESSION:
+        return lambda data, max_length: zlib.decompress(data)
+    elif compression_id == _LZMA_COMPRESSION:
+        return lambda data, max_length: _decompress_lzma(data)
+    elif compression_id == _XZ_COMPRESSION:
+        return lambda data, max_length: lzma.decompress(data, lzma.FORMAT_XZ)
+    elif compression_id == _LZO_COMPRESSION and lzo is not None:
+        return lambda data, max_length: lzo.decompress(data, False, max_length)
+    elif compression_id == _LZ4_COMPRESSION and lz4 is not None:
+        return lambda data, max_length: lz4.block.decompress(data, uncompressed_size=max_length)
+    elif compression_id == _ZSTD_COMPRESSION and zstandard is not None:
+        return lambda data, max_length: zstandard.ZstdDecompressor().decompress(
+            data, max_output_size=max_length
+        )
+    raise _UnsupportedSquashfsError(f"compression {compression_id} is not supported")
+
+
+def _decompress_lzma(data: bytes) -> bytes:
+    try:
+        return lzma.decompress(data, lzma.FORMAT_ALONE)
+    except lzma.LZMAError:
+        pass
+    # Some vendor builds of squashfs-tools leave out the uncompressed size from the header, which
+    # then only has the properties (lc, lp and pb packed in a byte) and the dictionary size
+    properties, dict_size = struct.unpack_from("<BI", data)
+    decompressor = lzma.LZMADecompressor(
+        lzma.FORMAT_RAW,
+        filters=[
+            {
+                "id": lzma.FILTER_LZMA1,
+                "lc": properties % 9,
+                "lp": properties // 9 % 5,
+                "pb": properties // 45,
+                "dict_size": dict_size,
+            }
+        ],
+    )
+    return decompressor.decompress(data[5:])
 
 
 class SquashfsPacker(Packer[None]):
@@ -104,25 +607,72 @@ class SquashfsPacker(Packer[None]):
     async def pack(self, resource: Resource, config=None):
         squashfs_view: SquashfsFilesystem = await resource.view_as(SquashfsFilesystem)
         temp_flush_dir = await squashfs_view.flush_to_disk()
-        with tempfile.NamedTemporaryFile(suffix=".sqsh", mode="rb") as temp:
+        with scratch_directory(await resource.get_data_length()) as temp_dir:
+            output_path = os.path.join(temp_dir, "output.sqsh")
             cmd = [
                 "mksquashfs",
                 temp_flush_dir,
-                temp.name,
+                output_path,
                 "-noappend",
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
-            new_data = temp.read()
+            await run_tool(cmd)
+            with open(output_path, "rb") as f:
+                new_data = f.read()
             # Passing in the original range effectively replaces the original data with the new data
             resource.queue_patch(Range(0, await resource.get_data_length()), new_data)
 
 
+def _parse_squashfs_signature(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[str, Optional[int]]]:
+    # All versions have the same magic and version fields, in the byte order of the filesystem
+    if data[offset : offset + 4] == b"hsqs":
+        byte_order, endianness = "<", "little"
+    else:
+        byte_order, endianness = ">", "big"
+    version_major, version_minor = struct.unpack_from(f"{byte_order}HH", data, offset + 28)
+    if not 1 <= version_major <= 4:
+        return None
+    description = (
+        f"Squashfs filesystem, {endianness} endian, version {version_major}.{version_minor}"
+    )
+    if (version_major, version_minor, byte_order) != (4, 0, "<"):
+        return description, None
+
+    (
+        _,
+        inode_count,
+        modification_time,
+        block_size,
+        _,
+        compression_id,
+        block_log,
+        _,
+        _,
+        _,
+        _,
+        _,
+        bytes_used,
+    ) = struct.unpack_from("<IIIIIHHHHHHQQ", data, offset)
+    if not (
+        block_size == 1 << block_log
+        and 0x1000 <= block_size <= 0x100000
+        and _GZIP_COMPRESSION <= compression_id <= _ZSTD_COMPRESSION
+        and bytes_used > 0
+    ):
+        return None
+    compression = ("gzip", "lzma", "lzo", "xz", "lz4", "zstd")[compression_id - 1]
+    created = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(modification_time))
+    return (
+        f"{description}, compression:{compression}, size: {bytes_used} bytes, {inode_count} "
+        f"inodes, blocksize: {block_size} bytes, created: {created}",
+        bytes_used,
+    )
+
+
 MagicMimeIdentifier.register(SquashfsFilesystem, "application/filesystem+sqsh")
 MagicDescriptionIdentifier.register(
     SquashfsFilesystem, lambda s: s.startswith("Squashfs filesystem")
 )
+for _squashfs_magic in (b"hsqs", b"sqsh"):
+    SignatureScanner.register(SquashfsFilesystem, _squashfs_magic, _parse_squashfs_signature)
@@ -1,11 +1,13 @@
 import re
 from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Pattern, Set
 
 from ofrak.component.modifier import Modifier, ModifierError
 from ofrak.core.binary import BinaryPatchConfig, BinaryPatchModifier, GenericText, GenericBinary
 from ofrak.core.filesystem import File
 from ofrak.model.component_model import ComponentConfig
 from ofrak.resource import Resource
+from ofrak_type.range import Range
 
 
 @dataclass
@@ -62,18 +64,107 @@ class StringFindReplaceModifier(Modifier[StringFindReplaceConfig]):
     targets = (GenericBinary, File)
 
     async def modify(self, resource: Resource, config: StringFindReplaceConfig) -> None:
-        to_find = config.to_find.encode("utf-8")
-        replace_with = config.replace_with.encode("utf-8") + (
-            b"\x00" if config.null_terminate and config.replace_with[-1] != "\x00" else b""
+        await _find_and_replace(
+            resource,
+            {config.to_find: config.replace_with},
+            config.null_terminate,
+            config.allow_overflow,
         )
-        if not config.allow_overflow and len(replace_with) > len(to_find):
+
+
+@dataclass
+class MultiStringFindReplaceConfig(ComponentConfig):
+    """
+    :var replacements: the strings to search for, each with the string to replace it with
+    :var null_terminate: add a null terminator to the replacements if True
+    :var allow_overflow: allow the replace strings to overflow the found strings if True
+    """
+
+    replacements: Dict[str, str]
+    null_terminate: bool = True
+    allow_overflow: bool = False
+
+
+class MultiStringFindReplaceModifier(Modifier[MultiStringFindReplaceConfig]):
+    """
+    Find and replace all instances of several strings, each with its replacement string, in a
+    single pass over the data. Where several strings to find occur at the same offset, the longest
+    is replaced.
+    """
+
+    targets = (GenericBinary, File)
+
+    async def modify(self, resource: Resource, config: MultiStringFindReplaceConfig) -> None:
+        await _find_and_replace(
+            resource, config.replacements, config.null_terminate, config.allow_overflow
+        )
+
+
+async def _find_and_replace(
+    resource: Resource, replacements: Dict[str, str], null_terminate: bool, allow_overflow: bool
+):
+    encoded_replacements: Dict[bytes, bytes] = {}
+    for to_find, replace_with in replacements.items():
+        if not to_find:
+            raise ModifierError("Cannot find and replace an empty string")
+        encoded_to_find = to_find.encode("utf-8")
+        encoded_replace_with = replace_with.encode("utf-8") + (
+            b"\x00" if null_terminate and not replace_with.endswith("\x00") else b""
+        )
+        if not allow_overflow and len(encoded_replace_with) > len(encoded_to_find):
             raise ModifierError(
-                f"Original string is longer than the new string ({len(to_find)} < "
-                f"{len(replace_with)})! Set config.allow_overflow = True to override this error. "
-                f"If you expect that the string to replace is null-terminated, then an overflow "
-                f"of one byte when config.null_terminate = True will not have any effect."
+                f"Original string is longer than the new string ({len(encoded_to_find)} < "
+                f"{len(encoded_replace_with)})! Set config.allow_overflow = True to override this "
+                f"error. If you expect that the string to replace is null-terminated, then an "
+                f"overflow of one byte when config.null_terminate = True will not have any effect."
             )
-        original_data = await resource.get_data()
-        offsets = [m.start() for m in re.finditer(to_find, original_data)]
-        for offset in offsets:
-            await resource.run(BinaryPatchModifier, BinaryPatchConfig(offset, replace_with))
+        encoded_replacements[encoded_to_find] = encoded_replace_with
+    if not encoded_replacements:
+        return
+
+    # Strings found do not overlap; a replacement overflowing into the next string found is cut
+    # short, as if the replacements were made one after the other
+    matches = await resource.search_data(compile_strings_pattern(encoded_replacements))
+    data_length = await resource.get_data_length()
+    for i, (offset, found) in enumerate(matches):
+        replacement = encoded_replacements[found]
+        if offset + len(replacement) > data_length:
+            raise ModifierError(
+                f"Replacing the string at {offset:#x} with {replacement!r} overflows the "
+                f"original size of the resource {resource.get_id().hex()}."
+            )
+        if i + 1 < len(matches):
+            replacement = replacement[: matches[i + 1][0] - offset]
+        resource.queue_patch(Range.from_size(offset, len(replacement)), replacement)
+
+
+def compile_strings_pattern(strings: Iterable[bytes]) -> Pattern[bytes]:
+    """
+    Compile a regular expression matching any of some strings, the longest one where several
+    match at the same offset. The strings are arranged in a trie, so that the regular expression
+    engine finds the strings starting at an offset by following a single path of the trie, rather
+    than by trying each string in turn.
+    """
+    trie: Dict[int, Any] = {}
+    # IDs of the nodes of the trie where a string ends
+    string_ends: Set[int] = set()
+    for string in strings:
+        node = trie
+        for byte in string:
+            node = node.setdefault(byte, {})
+        string_ends.add(id(node))
+
+    def compile_node(node: Dict[int, Any]) -> bytes:
+        # Nodes with a single child and no string ending there only add a byte to the pattern
+        prefix = b""
+        while len(node) == 1 and id(node) not in string_ends:
+            ((byte, node),) = node.items()
+            prefix += re.escape(bytes([byte]))
+        branches = [re.escape(bytes([byte])) + compile_node(child) for byte, child in node.items()]
+        if not branches:
+            return prefix
+        pattern = b"(?:" + b"|".join(branches) + b")"
+        # The longer strings are tried first
+        return prefix + (pattern + b"?" if id(node) in string_ends else pattern)
+
+    return re.compile(compile_node(trie), re.DOTALL)
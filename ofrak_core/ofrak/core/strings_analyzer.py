@@ -1,25 +1,68 @@
-import asyncio
-import tempfile
+import re
+import sys
+from array import array
 from dataclasses import dataclass
-from typing import Dict, Optional
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from ofrak.component.analyzer import Analyzer
+from ofrak.component.process_pool import (
+    COMPONENT_PROCESS_POOL,
+    SharedData,
+    open_shared_data,
+    share_data,
+)
 from ofrak.resource import Resource
 from ofrak.model.component_model import ComponentConfig
 from ofrak.model.resource_model import ResourceAttributes
 
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Number of characters scanned at once, bounding the memory used to scan large data
+STRINGS_SCAN_CHUNK_SIZE = 2**24
+
+
+class StringEncoding(Enum):
+    """
+    Encodings of the strings found by the
+    [StringsAnalyzer][ofrak.core.strings_analyzer.StringsAnalyzer]. Only strings of printable
+    ASCII characters (and tabs) are found, in each encoding.
+    """
+
+    ASCII = "ascii"
+    UTF16_LE = "utf-16-le"
+    UTF16_BE = "utf-16-be"
+
 
 @dataclass
 class StringsAnalyzerConfig(ComponentConfig):
     min_length: int = 8
+    encodings: Tuple[StringEncoding, ...] = (StringEncoding.ASCII,)
 
 
 @dataclass(**ResourceAttributes.DATACLASS_PARAMS)
 class StringsAttributes(ResourceAttributes):
+    """
+    Strings found in the data of a resource.
+
+    :ivar strings: The strings, by offset, in increasing order of offset
+    """
+
     strings: Dict[int, str]
 
 
 class StringsAnalyzer(Analyzer[Optional[StringsAnalyzerConfig], StringsAttributes]):
+    """
+    Find the strings of at least `min_length` printable characters in the data of a resource, like
+    GNU `strings`, in each of the configured encodings. Trailing whitespace is stripped from the
+    strings, and strings made only of whitespace are left out.
+    """
+
     targets = ()
     outputs = (StringsAttributes,)
 
@@ -29,31 +72,199 @@ class StringsAnalyzer(Analyzer[Optional[StringsAnalyzerConfig], StringsAttribute
         if config is None:
             config = StringsAnalyzerConfig()
 
+        data = await resource.get_data()
+        with share_data(data) as shared_data:
+            offsets, string_table = await COMPONENT_PROCESS_POOL.run(
+                find_shared_strings, shared_data, config.min_length, config.encodings
+            )
         strings = dict()
-        with tempfile.NamedTemporaryFile() as temp_file:
-            temp_file.write(await resource.get_data())
-            temp_file.flush()
-
-            proc = await asyncio.subprocess.create_subprocess_exec(
-                "strings",
-                "-t",
-                "d",
-                f"-{config.min_length}",
-                temp_file.name,
-                stdout=asyncio.subprocess.PIPE,
+        for offset, string in iter_strings(offsets, string_table):
+            string = string.rstrip()
+            if string:
+                strings[offset] = string
+        return StringsAttributes(strings)
+
+
+def find_shared_strings(
+    shared_data: SharedData, min_length: int, encodings: Tuple[StringEncoding, ...]
+) -> Tuple[bytes, bytes]:  # pragma: no cover
+    with open_shared_data(shared_data) as data:
+        return find_strings(data, min_length, encodings)
+
+
+def find_strings(
+    data: Union[bytes, memoryview],
+    min_length: int,
+    encodings: Tuple[StringEncoding, ...] = (StringEncoding.ASCII,),
+) -> Tuple[bytes, bytes]:
+    """
+    Find the strings of at least `min_length` printable ASCII characters or tabs in some data, in
+    each of the given encodings. The strings are returned in two columns rather than as one Python
+    object per string, which [iter_strings][ofrak.core.strings_analyzer.iter_strings] reads.
+
+    :return: The offsets of the strings, in increasing order, as an array of little-endian 64-bit
+    integers, and the table of their characters, in the same order, each string followed by a null
+    byte; strings in UTF-16 take one byte per character in the table
+    """
+    if min_length < 1:
+        raise ValueError(f"The minimum length of strings must be positive, got {min_length}")
+    if NUMPY_AVAILABLE:
+        return _find_strings_numpy(data, min_length, encodings)
+    return _find_strings_re(data, min_length, encodings)
+
+
+def iter_strings(offsets: bytes, string_table: bytes) -> Iterator[Tuple[int, str]]:
+    """
+    Iterate over the offsets and strings returned by
+    [find_strings][ofrak.core.strings_analyzer.find_strings].
+    """
+    offset_array = array("Q", offsets)
+    if sys.byteorder == "big":
+        offset_array.byteswap()
+    return zip(offset_array, string_table.decode("ascii").split("\0")[:-1])
+
+
+def _find_strings_numpy(
+    data: Union[bytes, memoryview], min_length: int, encodings: Tuple[StringEncoding, ...]
+) -> Tuple[bytes, bytes]:
+    data_array = np.frombuffer(data, dtype=np.uint8)
+    # Offsets, lengths and characters of the strings found in each encoding and alignment
+    results: List[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]] = []
+    for encoding in dict.fromkeys(encodings):
+        if encoding is StringEncoding.ASCII:
+            starts, lengths, chars = _find_runs(data_array, None, min_length)
+            results.append((starts, lengths, chars))
+            continue
+        for alignment in (0, 1):
+            pairs = data_array[alignment : alignment + (len(data_array) - alignment) // 2 * 2]
+            pairs = pairs.reshape(-1, 2)
+            if encoding is StringEncoding.UTF16_LE:
+                starts, lengths, chars = _find_runs(pairs[:, 0], pairs[:, 1], min_length)
+            else:
+                starts, lengths, chars = _find_runs(pairs[:, 1], pairs[:, 0], min_length)
+            results.append((starts * 2 + alignment, lengths, chars))
+
+    offsets = np.concatenate([starts for starts, _, _ in results] + [np.empty(0, np.int64)])
+    lengths = np.concatenate([lengths for _, lengths, _ in results] + [np.empty(0, np.int64)])
+    chars = np.concatenate([chars for _, _, chars in results] + [np.empty(0, np.uint8)])
+    # The table has a null byte after each string
+    string_table = np.insert(chars, np.cumsum(lengths), 0)
+    if len(results) > 1:
+        order = np.argsort(offsets, kind="stable")
+        offsets = offsets[order]
+        table_starts = np.cumsum(lengths + 1) - lengths - 1
+        string_table = _select_run_chars(string_table, table_starts[order], lengths[order] + 1)
+    return offsets.astype("<u8").tobytes(), string_table.tobytes()
+
+
+def _find_runs(
+    chars: "np.ndarray", zeros: Optional["np.ndarray"], min_length: int
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Find the runs of at least `min_length` printable characters, whose matching `zeros` (the other
+    bytes of UTF-16 characters) are null.
+
+    :return: The indexes of the first characters of the runs, their lengths and their characters
+    """
+    run_bounds = []
+    in_run = False
+    for chunk_start in range(0, len(chars), STRINGS_SCAN_CHUNK_SIZE):
+        chunk_end = min(chunk_start + STRINGS_SCAN_CHUNK_SIZE, len(chars))
+        # A run of `min_length` characters starting in this chunk may end in the next one
+        mask_end = min(chunk_end + min_length - 1, len(chars))
+        printable = _is_printable(chars[chunk_start:mask_end])
+        if zeros is not None:
+            printable &= zeros[chunk_start:mask_end] == 0
+        full_windows = _get_full_windows(printable, min_length)[: chunk_end - chunk_start]
+        if len(full_windows) < chunk_end - chunk_start:
+            full_windows = np.concatenate(
+                [full_windows, np.zeros(chunk_end - chunk_start - len(full_windows), dtype=bool)]
             )
+        # Windows of `min_length` printable characters start at offsets [s, e - min_length + 1)
+        # for each run [s, e) of at least `min_length` of them
+        changes = np.flatnonzero(full_windows[1:] != full_windows[:-1]) + 1
+        if full_windows[0] != in_run:
+            changes = np.concatenate([[0], changes])
+        in_run = bool(full_windows[-1])
+        run_bounds.append(changes + chunk_start)
+    bounds = np.concatenate(run_bounds + [np.empty(0, np.int64)])
+    if in_run:
+        bounds = np.concatenate([bounds, [len(chars) - min_length + 1]])
+    starts = bounds[0::2]
+    lengths = bounds[1::2] + min_length - 1 - starts
+    return starts, lengths, _select_run_chars(chars, starts, lengths)
 
-            line = await proc.stdout.readline()  # type: ignore
-            while line:
-                line = line.decode("ascii").strip()
-                try:
-                    offset, string = line.split(" ", maxsplit=1)
-                except ValueError as e:
-                    # String consisted entirely of whitespace
-                    line = await proc.stdout.readline()  # type: ignore
-                    continue
-                strings[int(offset)] = string
-                line = await proc.stdout.readline()  # type: ignore
-            await proc.wait()
 
-        return StringsAttributes(strings)
+def _select_run_chars(
+    chars: "np.ndarray", starts: "np.ndarray", lengths: "np.ndarray"
+) -> "np.ndarray":
+    # Gather the characters of the runs, a batch of runs at a time
+    selected = []
+    run_ends = np.cumsum(lengths)
+    first_run = 0
+    while first_run < len(starts):
+        batch_end = run_ends[first_run] - lengths[first_run] + STRINGS_SCAN_CHUNK_SIZE
+        end_run = max(int(np.searchsorted(run_ends, batch_end, side="right")), first_run + 1)
+        selected.append(
+            chars[_get_run_indexes(starts[first_run:end_run], lengths[first_run:end_run])]
+        )
+        first_run = end_run
+    return np.concatenate(selected + [np.empty(0, np.uint8)])
+
+
+def _is_printable(chars: "np.ndarray") -> "np.ndarray":
+    return ((chars - np.uint8(0x20)) < np.uint8(0x5F)) | (chars == ord("\t"))
+
+
+def _get_full_windows(mask: "np.ndarray", window_size: int) -> "np.ndarray":
+    """
+    Return whether each window of `window_size` consecutive elements of the mask, starting at each
+    index, is all set. Windows which would extend past the mask are dropped.
+    """
+    # Windows of doubling sizes are all set if both of their halves are
+    covered = 1
+    while covered * 2 <= window_size:
+        mask = mask[:-covered] & mask[covered:]
+        covered *= 2
+    if covered < window_size:
+        mask = mask[: covered - window_size] & mask[window_size - covered :]
+    return mask
+
+
+def _get_run_indexes(starts: "np.ndarray", lengths: "np.ndarray") -> "np.ndarray":
+    """
+    Return the indexes of all the elements of the runs [start, start + length).
+    """
+    run_ends = np.cumsum(lengths)
+    return np.arange(run_ends[-1] if len(run_ends) else 0) + np.repeat(
+        starts - (run_ends - lengths), lengths
+    )
+
+
+def _find_strings_re(
+    data: Union[bytes, memoryview], min_length: int, encodings: Tuple[StringEncoding, ...]
+) -> Tuple[bytes, bytes]:
+    strings: List[Tuple[int, bytes]] = []
+    for encoding in dict.fromkeys(encodings):
+        pattern, first_char = _STRING_PATTERNS[encoding]
+        # Runs of UTF-16 characters starting at odd and even offsets cannot overlap, since the
+        # null bytes of either are not printable in the other
+        for match in re.finditer(pattern % min_length, data):
+            if encoding is StringEncoding.ASCII:
+                strings.append((match.start(), match.group()))
+            else:
+                strings.append((match.start(), match.group()[first_char::2]))
+    strings.sort(key=lambda string: string[0])
+    offsets = array("Q", (offset for offset, _ in strings))
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets.tobytes(), b"".join(string + b"\0" for _, string in strings)
+
+
+# Patterns of the strings of each encoding, for a minimum length, and the index of the first
+# character in their matches
+_STRING_PATTERNS = {
+    StringEncoding.ASCII: (rb"[\t\x20-\x7e]{%d,}", 0),
+    StringEncoding.UTF16_LE: (rb"(?:[\t\x20-\x7e]\x00){%d,}", 0),
+    StringEncoding.UTF16_BE: (rb"(?:\x00[\t\x20-\x7e]){%d,}", 1),
+}
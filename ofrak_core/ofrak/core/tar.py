@@ -1,21 +1,33 @@
-import asyncio
-import os.path
-import tempfile
+import os
+import stat
+import tarfile
 from dataclasses import dataclass
-from subprocess import CalledProcessError
+from io import BytesIO
+from typing import Dict, Optional, Tuple
 
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker, UnpackerError
 from ofrak.resource import Resource
 from ofrak.core.binary import GenericBinary
-from ofrak.core.filesystem import FilesystemRoot, Folder, File, SpecialFileType
+from ofrak.core.filesystem import (
+    FilesystemEntry,
+    FilesystemRoot,
+    Folder,
+    File,
+    SpecialFileType,
+    SymbolicLink,
+    normalize_archive_path,
+)
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 
-from ofrak.model.component_model import CC, ComponentExternalTool
+from ofrak.model.component_model import CC
 from ofrak_type.range import Range
 
 
-TAR = ComponentExternalTool("tar", "https://www.gnu.org/software/tar/", "--help", apt_package="tar")
+_PAX_XATTR_PREFIX = "SCHILY.xattr."
+_TAR_BLOCK_SIZE = 512
+_TAR_MAGIC_OFFSET = 257
 
 
 @dataclass
@@ -28,91 +40,192 @@ class TarArchive(GenericBinary, FilesystemRoot):
 class TarUnpacker(Unpacker[None]):
     """
     Unpack a tar archive.
+
+    The archive is read in-process with `tarfile`, and each member is added to the filesystem
+    directly with its stat and xattrs (stored by GNU tar as `SCHILY.xattr.*` PAX headers).
+    Hard links are added as files with the data of the file they link to.
     """
 
     targets = (TarArchive,)
     children = (File, Folder, SpecialFileType)
-    external_dependencies = (TAR,)
 
     async def unpack(self, resource: Resource, config: CC) -> None:
-        # Write the archive data to a file
-        with tempfile.NamedTemporaryFile(suffix=".tar") as temp_archive:
-            temp_archive.write(await resource.get_data())
-            temp_archive.flush()
-
-            # Check the archive member files to ensure none unpack to a parent directory
-            cmd = [
-                "tar",
-                "-P",
-                "-tf",
-                temp_archive.name,
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await proc.communicate()
-            if proc.returncode:
-                raise CalledProcessError(returncode=proc.returncode, cmd=cmd)
-            for filename in stdout.decode().splitlines():
-                # Handles relative parent paths and rooted paths, and normalizes paths like "./../"
-                rel_filename = os.path.relpath(filename)
-                if rel_filename.startswith("../"):
-                    raise UnpackerError(
-                        f"Tar archive contains a file {filename} that would extract to a parent "
-                        f"directory {rel_filename}."
+        tar_view = await resource.view_as(TarArchive)
+        archive_data = await resource.get_data()
+        try:
+            with tarfile.open(fileobj=BytesIO(archive_data), mode="r") as tar:
+                members = tar.getmembers()
+                # Check the archive member files to ensure none unpack to a parent directory
+                member_paths = [normalize_archive_path(member.name) for member in members]
+                for member, path in zip(members, member_paths):
+                    if path is None:
+                        continue
+                    if member.isreg() and not member.issparse():
+                        # Most members are stored contiguously, skip the file object
+                        data = archive_data[member.offset_data : member.offset_data + member.size]
+                    elif member.isfile() or member.islnk():
+                        member_file = tar.extractfile(member)
+                        assert member_file is not None
+                        data = member_file.read()
+                    elif member.issym():
+                        data = os.fsencode(member.linkname)
+                    else:
+                        data = b""
+                    await tar_view.add_entry(
+                        path, _get_member_stat(member, len(data)), _get_member_xattrs(member), data
                     )
-
-            # Unpack into a temporary directory using the temporary file
-            with tempfile.TemporaryDirectory() as temp_dir:
-                command = ["tar", "--xattrs", "-C", temp_dir, "-xf", temp_archive.name]
-                proc = await asyncio.create_subprocess_exec(
-                    *command,
-                )
-                returncode = await proc.wait()
-                if returncode:
-                    raise CalledProcessError(returncode=returncode, cmd=command)
-
-                # Initialize a filesystem from the unpacked/untarred temporary folder
-                tar_view = await resource.view_as(TarArchive)
-                await tar_view.initialize_from_disk(temp_dir)
+        except tarfile.TarError as e:
+            raise UnpackerError(f"Could not read tar archive: {e}") from e
+
+
+def _get_member_stat(member: tarfile.TarInfo, size: int) -> os.stat_result:
+    file_type: int
+    if member.isdir():
+        file_type = stat.S_IFDIR
+    elif member.issym():
+        file_type = stat.S_IFLNK
+    elif member.ischr():
+        file_type = stat.S_IFCHR
+    elif member.isblk():
+        file_type = stat.S_IFBLK
+    elif member.isfifo():
+        file_type = stat.S_IFIFO
+    else:
+        # Regular files, hard links and unknown types are all extracted as regular files
+        file_type = stat.S_IFREG
+    mtime = float(member.mtime)
+    atime = float(member.pax_headers.get("atime", mtime))
+    ctime = float(member.pax_headers.get("ctime", mtime))
+    return os.stat_result(
+        (
+            file_type | stat.S_IMODE(member.mode),
+            0,
+            0,
+            1,
+            member.uid,
+            member.gid,
+            size,
+            int(atime),
+            int(mtime),
+            int(ctime),
+        ),
+        {
+            "st_atime": atime,
+            "st_mtime": mtime,
+            "st_ctime": ctime,
+            "st_rdev": os.makedev(member.devmajor, member.devminor),
+        },
+    )
+
+
+def _get_member_xattrs(member: tarfile.TarInfo) -> Dict[str, bytes]:
+    return {
+        keyword[len(_PAX_XATTR_PREFIX) :]: value.encode("utf-8", "surrogateescape")
+        for keyword, value in member.pax_headers.items()
+        if keyword.startswith(_PAX_XATTR_PREFIX)
+    }
 
 
 class TarPacker(Packer[None]):
     """
     Pack files into a tar archive.
+
+    The entries of the filesystem are written in-process with `tarfile`, in the deterministic
+    order of [get_entries_with_paths][ofrak.core.filesystem.FilesystemRoot.get_entries_with_paths],
+    reading the data of one file at a time. The archive is in the PAX format, with xattrs stored
+    as `SCHILY.xattr.*` headers like GNU tar does.
     """
 
     targets = (TarArchive,)
-    external_dependencies = (TAR,)
 
     async def pack(self, resource: Resource, config: CC) -> None:
-        # Flush the child files to the filesystem
         tar_view = await resource.view_as(TarArchive)
-        flush_dir = await tar_view.flush_to_disk()
-
-        # Pack it back into a temporary archive
-        with tempfile.NamedTemporaryFile(suffix=".tar") as temp_archive:
-            cmd = [
-                "tar",
-                "--xattrs",
-                "-C",
-                flush_dir,
-                "-cf",
-                temp_archive.name,
-                ".",
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
-
-            # Replace the original archive data
-            resource.queue_patch(Range(0, await resource.get_data_length()), temp_archive.read())
+        archive = BytesIO()
+        with tarfile.open(fileobj=archive, mode="w", format=tarfile.PAX_FORMAT) as tar:
+            for path, entry in await tar_view.get_entries_with_paths():
+                member = await _create_member(path, entry)
+                if entry.is_file():
+                    data = await entry.resource.get_data()
+                    member.size = len(data)
+                    tar.addfile(member, BytesIO(data))
+                else:
+                    tar.addfile(member)
+
+        # Replace the original archive data
+        resource.queue_patch(Range(0, await resource.get_data_length()), archive.getvalue())
+
+
+async def _create_member(path: str, entry: FilesystemEntry) -> tarfile.TarInfo:
+    entry_stat = entry.get_stat_or_default()
+    member = tarfile.TarInfo(path)
+    member.mode = stat.S_IMODE(entry_stat.st_mode)
+    member.uid = entry_stat.st_uid
+    member.gid = entry_stat.st_gid
+    # The ustar header stores whole seconds, so the entry needs no PAX header for its mtime
+    member.mtime = int(entry_stat.st_mtime)
+    if entry.is_folder():
+        member.type = tarfile.DIRTYPE
+    elif entry.is_link():
+        member.type = tarfile.SYMTYPE
+        member.linkname = (await entry.resource.view_as(SymbolicLink)).source_path
+    elif entry.is_fifo_pipe():
+        member.type = tarfile.FIFOTYPE
+    elif entry.is_device():
+        member.type = tarfile.BLKTYPE if entry.is_block_device() else tarfile.CHRTYPE
+        member.devmajor = os.major(entry_stat.st_rdev)
+        member.devminor = os.minor(entry_stat.st_rdev)
+    elif not entry.is_file():
+        raise NotImplementedError(
+            f"FilesystemEntry {path} has an unknown or unsupported filesystem type! Unable to add "
+            f"it to a tar archive."
+        )
+    if entry.xattrs:
+        member.pax_headers = {
+            f"{_PAX_XATTR_PREFIX}{name}": value.decode("utf-8", "surrogateescape")
+            for name, value in entry.xattrs.items()
+        }
+    return member
+
+
+def _parse_tar_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Check the checksum of the first header of a tar archive, and find the length of the archive by
+    walking its headers up to the null blocks ending it.
+    """
+    if not _is_valid_tar_header(data, offset):
+        return None
+    if data[offset + _TAR_MAGIC_OFFSET : offset + _TAR_MAGIC_OFFSET + 8] == b"ustar  \x00":
+        description = "POSIX tar archive (GNU)"
+    else:
+        description = "POSIX tar archive"
+    header_offset = offset
+    while _is_valid_tar_header(data, header_offset):
+        size_field = bytes(data[header_offset + 124 : header_offset + 136])
+        # GNU tar stores large sizes in base 256, flagged by the high bit of the first byte
+        if size_field[0] & 0x80:
+            size = int.from_bytes(size_field[1:], "big")
+        else:
+            size = int(size_field.strip(b"\x00 ") or b"0", 8)
+        header_offset += _TAR_BLOCK_SIZE + -(-size // _TAR_BLOCK_SIZE) * _TAR_BLOCK_SIZE
+    if data[header_offset : header_offset + _TAR_BLOCK_SIZE] == bytes(_TAR_BLOCK_SIZE):
+        header_offset += 2 * _TAR_BLOCK_SIZE
+    return description, min(header_offset, len(data)) - offset
+
+
+def _is_valid_tar_header(data: SignatureData, offset: int) -> bool:
+    header = bytes(data[offset : offset + _TAR_BLOCK_SIZE])
+    if len(header) < _TAR_BLOCK_SIZE:
+        return False
+    try:
+        checksum = int(header[148:156].strip(b"\x00 "), 8)
+    except ValueError:
+        return False
+    # The checksum is computed with the checksum field filled with spaces
+    return checksum == sum(header) - sum(header[148:156]) + 8 * ord(" ")
 
 
 MagicMimeIdentifier.register(TarArchive, "application/x-tar")
 MagicDescriptionIdentifier.register(TarArchive, lambda s: "tar archive" in s.lower())
+SignatureScanner.register(
+    TarArchive, b"ustar", _parse_tar_signature, magic_offset=_TAR_MAGIC_OFFSET
+)
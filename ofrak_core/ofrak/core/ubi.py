@@ -1,14 +1,12 @@
-import asyncio
-import tempfile
 from dataclasses import dataclass
 import logging
 from typing import List, Tuple
 import os
-from subprocess import CalledProcessError
 
 from ofrak.model.tag_model import ResourceTag
 
 from ofrak import Identifier, Analyzer
+from ofrak.component.external_tool import run_tool, scratch_directory, tool_input_path
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.model.component_model import ComponentExternalTool
@@ -130,16 +128,11 @@ class UbiAnalyzer(Analyzer[None, Ubi]):
     external_dependencies = (PY_LZO_TOOL,)
 
     async def analyze(self, resource: Resource, config=None) -> Ubi:
-        # Flush to disk
-        with tempfile.NamedTemporaryFile() as temp_file:
-            resource_data = await resource.get_data()
-            temp_file.write(resource_data)
-            temp_file.flush()
-
+        with tool_input_path(await resource.get_data()) as ubi_path:
             ubi_obj = ubireader_ubi(
                 ubi_io.ubi_file(
-                    temp_file.name,
-                    block_size=guess_peb_size(temp_file.name),
+                    ubi_path,
+                    block_size=guess_peb_size(ubi_path),
                     start_offset=0,
                     end_offset=None,
                 )
@@ -189,26 +182,18 @@ class UbiUnpacker(Unpacker[None]):
     external_dependencies = (PY_LZO_TOOL,)
 
     async def unpack(self, resource: Resource, config=None):
-        with tempfile.TemporaryDirectory() as temp_flush_dir:
-            # flush to disk
-            with open(f"{temp_flush_dir}/input.img", "wb") as temp_file:
-                resource_data = await resource.get_data()
-                temp_file.write(resource_data)
-                temp_file.flush()
-
-            # extract temp_file to temp_flush_dir
+        resource_data = await resource.get_data()
+        with tool_input_path(resource_data) as ubi_path, scratch_directory(
+            len(resource_data)
+        ) as temp_flush_dir:
+            # extract the image to temp_flush_dir
             cmd = [
                 "ubireader_extract_images",
                 "-o",
                 f"{temp_flush_dir}/output",
-                temp_file.name,
+                ubi_path,
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
+            await run_tool(cmd)
 
             ubi_view = await resource.view_as(Ubi)
 
@@ -216,7 +201,7 @@ class UbiUnpacker(Unpacker[None]):
             # `ubireader_extract_images` incorrectly appends a `ubifs` suffix despite unpacking ubi images / volumes
             for vol in ubi_view.volumes:
                 f_path = (
-                    f"{temp_flush_dir}/output/{os.path.basename(temp_file.name)}"
+                    f"{temp_flush_dir}/output/{os.path.basename(ubi_path)}"
                     f"/img-{ubi_view.image_seq}_vol-{vol.name}.ubifs"
                 )
                 with open(f_path, "rb") as f:
@@ -241,8 +226,7 @@ class UbiPacker(Packer[None]):
     async def pack(self, resource: Resource, config=None) -> None:
         ubi_view = await resource.view_as(Ubi)
 
-        # with tempfile.NamedTemporaryFile(mode="rb") as temp:
-        with tempfile.TemporaryDirectory() as temp_flush_dir:
+        with scratch_directory(await resource.get_data_length()) as temp_flush_dir:
             ubi_volumes = await resource.get_children()
             ubinize_ini_entries = []
 
@@ -288,12 +272,7 @@ vol_name={volume_view.name}
                 f"{temp_flush_dir}/output.ubi",
                 f"{temp_flush_dir}/config.ini",
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
+            await run_tool(cmd)
 
             with open(f"{temp_flush_dir}/output.ubi", "rb") as output_f:
                 packed_blob_data = output_f.read()
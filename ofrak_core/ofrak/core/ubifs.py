@@ -1,10 +1,9 @@
-import asyncio
-import tempfile
+import os
 from dataclasses import dataclass
 import logging
-from subprocess import CalledProcessError
 
 from ofrak import Identifier, Analyzer
+from ofrak.component.external_tool import run_tool, scratch_directory, tool_input_path
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.core import PY_LZO_TOOL
@@ -97,15 +96,11 @@ class UbifsAnalyzer(Analyzer[None, Ubifs]):
     external_dependencies = (PY_LZO_TOOL,)
 
     async def analyze(self, resource: Resource, config=None) -> Ubifs:
-        with tempfile.NamedTemporaryFile() as temp_file:
-            resource_data = await resource.get_data()
-            temp_file.write(resource_data)
-            temp_file.flush()
-
+        with tool_input_path(await resource.get_data()) as ubifs_path:
             ubifs_obj = ubireader_ubifs(
                 ubi_io.ubi_file(
-                    temp_file.name,
-                    block_size=guess_leb_size(temp_file.name),
+                    ubifs_path,
+                    block_size=guess_leb_size(ubifs_path),
                     start_offset=0,
                     end_offset=None,
                 )
@@ -135,26 +130,18 @@ class UbifsUnpacker(Unpacker[None]):
     external_dependencies = (PY_LZO_TOOL,)
 
     async def unpack(self, resource: Resource, config=None):
-        with tempfile.TemporaryDirectory() as temp_flush_dir:
-            # flush to disk
-            with open(f"{temp_flush_dir}/input.img", "wb") as temp_file:
-                resource_data = await resource.get_data()
-                temp_file.write(resource_data)
-                temp_file.flush()
-
+        resource_data = await resource.get_data()
+        with tool_input_path(resource_data) as ubifs_path, scratch_directory(
+            len(resource_data)
+        ) as temp_flush_dir:
             cmd = [
                 "ubireader_extract_files",
                 "-k",
                 "-o",
                 f"{temp_flush_dir}/output",
-                temp_file.name,
+                ubifs_path,
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
+            await run_tool(cmd)
 
             ubifs_view = await resource.view_as(Ubifs)
             await ubifs_view.initialize_from_disk(f"{temp_flush_dir}/output")
@@ -172,7 +159,8 @@ class UbifsPacker(Packer[None]):
         ubifs_view = await resource.view_as(Ubifs)
         flush_dir = await ubifs_view.flush_to_disk()
 
-        with tempfile.NamedTemporaryFile(mode="rb") as temp:
+        with scratch_directory(await resource.get_data_length()) as temp_dir:
+            output_path = os.path.join(temp_dir, "output.ubifs")
             cmd = [
                 "mkfs.ubifs",
                 "-m",
@@ -194,15 +182,11 @@ class UbifsPacker(Packer[None]):
                 "-F",
                 "-r",
                 flush_dir,
-                temp.name,
+                output_path,
             ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
-            new_data = temp.read()
+            await run_tool(cmd)
+            with open(output_path, "rb") as f:
+                new_data = f.read()
 
             resource.queue_patch(Range(0, await resource.get_data_length()), new_data)
 
@@ -1,5 +1,6 @@
 import io
 import struct
+import time
 import zlib
 from dataclasses import dataclass
 from enum import Enum
@@ -10,6 +11,7 @@ from ofrak.component.modifier import Modifier
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.core import ProgramAttributes, GenericBinary, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak.model.component_model import ComponentConfig
 from ofrak.model.resource_model import ResourceAttributes
 from ofrak.model.viewable_tag_model import AttributesType
@@ -601,4 +603,38 @@ class UImagePacker(Packer[None]):
         resource.queue_patch(Range(0, original_size), header_data + repacked_body_data)
 
 
+def _parse_uimage_signature(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[str, Optional[int]]]:
+    header = bytearray(data[offset : offset + UIMAGE_HEADER_LEN])
+    (
+        _,
+        ih_hcrc,
+        ih_time,
+        ih_size,
+        ih_load,
+        ih_ep,
+        ih_dcrc,
+        _,
+        _,
+        _,
+        _,
+        ih_name,
+    ) = struct.unpack(f"!IIIIIIIBBBB{UIMAGE_NAME_LEN}s", header)
+    # The header CRC is computed with the CRC field zeroed
+    header[4:8] = bytes(4)
+    if zlib.crc32(header) != ih_hcrc:
+        return None
+    created = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ih_time))
+    name = ih_name.partition(b"\x00")[0].decode("latin-1")
+    # The length is left unknown, so that the signatures of the image data are found too
+    return (
+        f"uImage header, header size: {UIMAGE_HEADER_LEN} bytes, header CRC: 0x{ih_hcrc:X}, "
+        f"created: {created}, image size: {ih_size} bytes, Data Address: 0x{ih_load:X}, "
+        f'Entry Point: 0x{ih_ep:X}, data CRC: 0x{ih_dcrc:X}, image name: "{name}"',
+        None,
+    )
+
+
 MagicDescriptionIdentifier.register(UImage, lambda s: s.startswith("u-boot legacy uImage"))
+SignatureScanner.register(UImage, struct.pack("!I", UIMAGE_MAGIC), _parse_uimage_signature)
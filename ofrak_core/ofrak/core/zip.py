@@ -1,18 +1,33 @@
-import asyncio
 import logging
+import lzma
 import os
-import tempfile
+import stat
+import struct
+import time
+import zipfile
+import zlib
 from dataclasses import dataclass
-from subprocess import CalledProcessError
+from io import BytesIO
+from typing import Iterator, Optional, Tuple, Union
 
+from ofrak.component.external_tool import run_tool
 from ofrak.component.packer import Packer
-from ofrak.component.unpacker import Unpacker
+from ofrak.component.unpacker import Unpacker, UnpackerError
 from ofrak.resource import Resource
-from ofrak.core.filesystem import File, Folder, FilesystemRoot, SpecialFileType
+from ofrak.core.filesystem import (
+    ArchiveUnpackerConfig,
+    File,
+    Folder,
+    FilesystemRoot,
+    SpecialFileType,
+    normalize_archive_path,
+)
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak.core.binary import GenericBinary
 
 from ofrak.model.component_model import ComponentExternalTool
+from ofrak.model.data_model import LazyData
 from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
@@ -32,6 +47,23 @@ UNZIP_TOOL = ComponentExternalTool(
     brew_package="unzip",
 )
 
+_ZIP_UNIX_SYSTEM = 3
+# Extra fields written by Info-ZIP: modification/access/creation times, and Unix UID/GID
+_ZIP_EXTENDED_TIMESTAMP_ID = 0x5455
+_ZIP_UNIX_OWNER_ID = 0x7875
+_ZIP_ENCRYPTED_FLAG = 0x1
+_ZIP_DATA_DESCRIPTOR_FLAG = 0x8
+_ZIP_LOCAL_HEADER_SIZE = 30
+_ZIP_END_RECORD_SIZE = 22
+# Compression methods of the zip specification, to tell zip headers apart from random data
+_ZIP_KNOWN_COMPRESSION = (0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 12, 14, 18, 19, 93, 94, 95, 96, 97, 98, 99)
+_ZIP_SUPPORTED_COMPRESSION = (
+    zipfile.ZIP_STORED,
+    zipfile.ZIP_DEFLATED,
+    zipfile.ZIP_BZIP2,
+    zipfile.ZIP_LZMA,
+)
+
 
 @dataclass
 class ZipArchive(GenericBinary, FilesystemRoot):
@@ -40,34 +72,137 @@ class ZipArchive(GenericBinary, FilesystemRoot):
     """
 
 
-class ZipUnpacker(Unpacker[None]):
+class ZipUnpacker(Unpacker[ArchiveUnpackerConfig]):
     """
     Unpack (decompress) a zip archive.
+
+    The archive is read in-process with `zipfile`, and each member is added to the filesystem
+    directly. Like `unzip`, the Unix mode, modification time and owner of members are taken from
+    the external attributes and the extended timestamp and Unix extra fields, when present.
+
+    By default, all members are decompressed up front. With
+    `ArchiveUnpackerConfig(lazy_members=True)`, files are created with
+    [ZipMemberData][ofrak.core.zip.ZipMemberData] instead, which only decompresses a member the
+    first time its data is read.
     """
 
     targets = (ZipArchive,)
     children = (File, Folder, SpecialFileType)
-    external_dependencies = (UNZIP_TOOL,)
 
-    async def unpack(self, resource: Resource, config=None):
+    async def unpack(self, resource: Resource, config: Optional[ArchiveUnpackerConfig] = None):
+        lazy_members = config is not None and config.lazy_members
         zip_view = await resource.view_as(ZipArchive)
-        with tempfile.NamedTemporaryFile(suffix=".zip") as temp_archive:
-            temp_archive.write(await resource.get_data())
-            temp_archive.flush()
-            with tempfile.TemporaryDirectory() as temp_dir:
-                cmd = [
-                    "unzip",
-                    temp_archive.name,
-                    "-d",
-                    temp_dir,
-                ]
-                proc = await asyncio.create_subprocess_exec(
-                    *cmd,
-                )
-                returncode = await proc.wait()
-                if proc.returncode:
-                    raise CalledProcessError(returncode=returncode, cmd=cmd)
-                await zip_view.initialize_from_disk(temp_dir)
+        try:
+            zip_file = zipfile.ZipFile(BytesIO(await resource.get_data()))
+            if lazy_members:
+                # The lazy members keep reading the archive, which is closed once they are deleted
+                await self._add_members(zip_view, zip_file, lazy_members)
+            else:
+                with zip_file:
+                    await self._add_members(zip_view, zip_file, lazy_members)
+        except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+            # RuntimeError is raised for encrypted members, NotImplementedError for unsupported
+            # compression methods
+            raise UnpackerError(f"Could not read zip archive: {e}") from e
+
+    @staticmethod
+    async def _add_members(zip_view: ZipArchive, zip_file: zipfile.ZipFile, lazy_members: bool):
+        members = zip_file.infolist()
+        # Check the archive member files to ensure none unpack to a parent directory
+        member_paths = [normalize_archive_path(member.filename) for member in members]
+        for member, path in zip(members, member_paths):
+            if path is None:
+                continue
+            member_stat = _get_member_stat(member, member.file_size)
+            data: Union[bytes, LazyData]
+            if member.is_dir():
+                data = b""
+            elif lazy_members and stat.S_ISREG(member_stat.st_mode):
+                _check_member_readable(member)
+                data = ZipMemberData(zip_file, member)
+            else:
+                data = zip_file.read(member)
+            await zip_view.add_entry(path, member_stat, {}, data)
+
+
+class ZipMemberData(LazyData):
+    """
+    Data of a member of a zip archive, which is decompressed as it is read. Reading a range of the
+    data decompresses the member up to the end of the range.
+    """
+
+    def __init__(self, zip_file: zipfile.ZipFile, member: zipfile.ZipInfo):
+        self._zip_file = zip_file
+        self._member = member
+
+    def __len__(self) -> int:
+        return self._member.file_size
+
+    def read(self, data_range: Range) -> bytes:
+        """
+        :raises UnpackerError: if the compressed data of the member is corrupted
+        """
+        try:
+            with self._zip_file.open(self._member) as member_file:
+                member_file.seek(data_range.start)
+                return member_file.read(data_range.length())
+        except (zipfile.BadZipFile, zlib.error, lzma.LZMAError, OSError, EOFError) as e:
+            # Each decompressor raises its own error: zlib.error for deflate, OSError for bzip2,
+            # LZMAError for lzma and EOFError for truncated data, while BadZipFile is raised for
+            # a bad header or CRC
+            raise UnpackerError(
+                f"Could not read {self._member.filename} from zip archive: {e}"
+            ) from e
+
+
+def _check_member_readable(member: zipfile.ZipInfo):
+    """
+    Check up front that a member can be decompressed, raising the same errors `zipfile` would when
+    reading it, since the data of lazy members is only read later.
+    """
+    if member.flag_bits & _ZIP_ENCRYPTED_FLAG:
+        raise RuntimeError(f"File {member.filename!r} is encrypted")
+    if member.compress_type not in _ZIP_SUPPORTED_COMPRESSION:
+        raise NotImplementedError(
+            f"Compression method {member.compress_type} of {member.filename!r} is not supported"
+        )
+
+
+def _get_member_stat(member: zipfile.ZipInfo, size: int) -> os.stat_result:
+    mode = member.external_attr >> 16 if member.create_system == _ZIP_UNIX_SYSTEM else 0
+    if member.is_dir():
+        mode = stat.S_IFDIR | (stat.S_IMODE(mode) or 0o755)
+    elif stat.S_IFMT(mode) not in (stat.S_IFREG, stat.S_IFLNK):
+        mode = stat.S_IFREG | (stat.S_IMODE(mode) or 0o644)
+
+    mtime = float(time.mktime(member.date_time + (0, 0, -1)))
+    uid, gid = 0, 0
+    for header_id, field in _get_extra_fields(member.extra):
+        if header_id == _ZIP_EXTENDED_TIMESTAMP_ID and len(field) >= 5 and field[0] & 1:
+            (mtime_int,) = struct.unpack_from("<i", field, 1)
+            mtime = float(mtime_int)
+        elif header_id == _ZIP_UNIX_OWNER_ID and len(field) >= 3:
+            uid_size = field[1]
+            if len(field) < 3 + uid_size:
+                continue
+            gid_size = field[2 + uid_size]
+            if len(field) < 3 + uid_size + gid_size:
+                continue
+            uid = int.from_bytes(field[2 : 2 + uid_size], "little")
+            gid = int.from_bytes(field[3 + uid_size : 3 + uid_size + gid_size], "little")
+
+    return os.stat_result(
+        (mode, 0, 0, 1, uid, gid, size, int(mtime), int(mtime), int(mtime)),
+        {"st_atime": mtime, "st_mtime": mtime, "st_ctime": mtime},
+    )
+
+
+def _get_extra_fields(extra: bytes) -> Iterator[Tuple[int, bytes]]:
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, offset)
+        yield header_id, extra[offset + 4 : offset + 4 + size]
+        offset += 4 + size
 
 
 class ZipPacker(Packer[None]):
@@ -82,26 +217,65 @@ class ZipPacker(Packer[None]):
         zip_view: ZipArchive = await resource.view_as(ZipArchive)
         flush_dir = await zip_view.flush_to_disk()
         temp_archive = f"{flush_dir}.zip"
-        cwd = os.getcwd()
-        os.chdir(flush_dir)
         cmd = [
             "zip",
             "-r",
             temp_archive,
             ".",
         ]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-        )
-        returncode = await proc.wait()
-        if proc.returncode:
-            raise CalledProcessError(returncode=returncode, cmd=cmd)
-        os.chdir(cwd)
+        # Run zip in the flushed directory, rather than changing the working directory of OFRAK
+        # while other components may run
+        await run_tool(cmd, cwd=flush_dir)
         with open(temp_archive, "rb") as fh:
             resource.queue_patch(Range(0, await zip_view.resource.get_data_length()), fh.read())
 
 
+def _parse_zip_local_header_signature(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[str, Optional[int]]]:
+    (
+        version,
+        flags,
+        compression,
+        _,
+        _,
+        _,
+        compressed_size,
+        uncompressed_size,
+        name_length,
+        extra_length,
+    ) = struct.unpack_from("<HHHHHIIIHH", data, offset + 4)
+    if version > 63 or compression not in _ZIP_KNOWN_COMPRESSION or not name_length:
+        return None
+    name_start = offset + _ZIP_LOCAL_HEADER_SIZE
+    name = bytes(data[name_start : name_start + name_length]).decode("utf-8")
+    description = f"Zip archive data, at least v{version // 10}.{version % 10} to extract"
+    if compressed_size:
+        description += f", compressed size: {compressed_size}"
+    if uncompressed_size:
+        description += f", uncompressed size: {uncompressed_size}"
+    description += f", name: {name}"
+    # The sizes of members followed by a data descriptor are only known after their data
+    if flags & _ZIP_DATA_DESCRIPTOR_FLAG:
+        return description, None
+    return description, _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length + compressed_size
+
+
+def _parse_zip_end_signature(
+    data: SignatureData, offset: int
+) -> Optional[Tuple[str, Optional[int]]]:
+    _, _, disk_entry_count, entry_count, _, _, comment_length = struct.unpack_from(
+        "<HHHHIIH", data, offset + 4
+    )
+    footer_length = _ZIP_END_RECORD_SIZE + comment_length
+    if disk_entry_count > entry_count or offset + footer_length > len(data):
+        return None
+    return f"End of Zip archive, footer length: {footer_length}", footer_length
+
+
 MagicMimeIdentifier.register(ZipArchive, "application/zip")
 MagicDescriptionIdentifier.register(
     ZipArchive, lambda desc: any([("Zip archive data" in s) for s in desc.split(", ")])
 )
+SignatureScanner.register(ZipArchive, b"PK\x03\x04", _parse_zip_local_header_signature)
+SignatureScanner.register(ZipArchive, b"PK\x05\x06", _parse_zip_end_signature)
@@ -1,6 +1,7 @@
 import logging
 import zlib
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 from ofrak.component.analyzer import Analyzer
 from ofrak.component.packer import Packer
@@ -8,10 +9,15 @@ from ofrak.component.unpacker import Unpacker
 from ofrak.resource import Resource
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak_type.range import Range
 
 LOGGER = logging.getLogger(__name__)
 
+# Number of bytes decompressed to check that zlib magic bytes start a zlib stream
+_ZLIB_SIGNATURE_CHECK_SIZE = 0x1000
+_ZLIB_COMPRESSION_LEVELS = ("fastest", "fast", "default", "best")
+
 
 @dataclass
 class ZlibData(GenericBinary):
@@ -78,5 +84,19 @@ class ZlibPacker(Packer[None]):
         resource.queue_patch(Range(0, original_zlib_size), zlib_compressed)
 
 
+def _parse_zlib_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    # Two bytes are a weak signature, so the start of the stream must decompress without errors
+    try:
+        zlib.decompressobj().decompress(
+            data[offset : offset + _ZLIB_SIGNATURE_CHECK_SIZE], _ZLIB_SIGNATURE_CHECK_SIZE
+        )
+    except zlib.error:
+        return None
+    compression_level = _ZLIB_COMPRESSION_LEVELS[data[offset + 1] >> 6]
+    return f"Zlib compressed data, {compression_level} compression", None
+
+
 MagicMimeIdentifier.register(ZlibData, "application/zlib")
 MagicDescriptionIdentifier.register(ZlibData, lambda s: s.startswith("zlib compressed data"))
+for _zlib_magic in (b"\x78\x01", b"\x78\x5e", b"\x78\x9c", b"\x78\xda"):
+    SignatureScanner.register(ZlibData, _zlib_magic, _parse_zlib_signature)
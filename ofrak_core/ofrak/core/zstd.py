@@ -1,13 +1,12 @@
-import asyncio
-import tempfile
 from dataclasses import dataclass
-from typing import Optional
-from subprocess import CalledProcessError
+from typing import Optional, Tuple
 
+from ofrak.component.external_tool import run_tool
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
 from ofrak.core.binary import GenericBinary
 from ofrak.core.magic import MagicMimeIdentifier, MagicDescriptionIdentifier
+from ofrak.core.signatures import SignatureData, SignatureScanner
 from ofrak.model.component_model import CC, ComponentConfig, ComponentExternalTool
 from ofrak.resource import Resource
 from ofrak_type.range import Range
@@ -28,12 +27,22 @@ class ZstdData(GenericBinary):
 
 @dataclass
 class ZstdPackerConfig(ComponentConfig):
+    """
+    :ivar compression_level: Compression level, from 1 to 22; levels above 19 use `--ultra`
+    :ivar threads: Number of zstd worker threads compressing the data; 0 uses one thread per CPU
+    """
+
     compression_level: int
+    threads: int = 0
 
 
 class ZstdUnpacker(Unpacker[None]):
     """
     Unpack (decompress) a zstd file.
+
+    Unlike gzip and xz data, the decompressed data is not read lazily from an index: neither the
+    `zstd` CLI nor the optional `zstandard` module can copy the state of a decompressor, so reads
+    could not resume from checkpoints in the middle of a frame.
     """
 
     id = b"ZstdUnpacker"
@@ -42,29 +51,13 @@ class ZstdUnpacker(Unpacker[None]):
     external_dependencies = (ZSTD,)
 
     async def unpack(self, resource: Resource, config: CC) -> None:
-        with tempfile.NamedTemporaryFile(suffix=".zstd") as compressed_file:
-            compressed_file.write(await resource.get_data())
-            compressed_file.flush()
-            output_filename = tempfile.mktemp()
-
-            cmd = [
-                "zstd",
-                "-d",
-                "-k",
-                compressed_file.name,
-                "-o",
-                output_filename,
-            ]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=cmd)
-            with open(output_filename, "rb") as f:
-                result = f.read()
-
-            await resource.create_child(tags=(GenericBinary,), data=result)
+        cmd = [
+            "zstd",
+            "-d",
+            "-c",
+        ]
+        result = await run_tool(cmd, input_data=await resource.get_data())
+        await resource.create_child(tags=(GenericBinary,), data=result.stdout)
 
 
 class ZstdPacker(Packer[ZstdPackerConfig]):
@@ -82,30 +75,27 @@ class ZstdPacker(Packer[ZstdPackerConfig]):
         child_file = await zstd_view.get_child()
         uncompressed_data = await child_file.resource.get_data()
 
-        with tempfile.NamedTemporaryFile() as uncompressed_file:
-            uncompressed_file.write(uncompressed_data)
-            uncompressed_file.flush()
-            output_filename = tempfile.mktemp()
-
-            command = ["zstd", "-T0", f"-{config.compression_level}"]
-            if config.compression_level > 19:
-                command.append("--ultra")
-            command.extend([uncompressed_file.name, "-o", output_filename])
-            proc = await asyncio.create_subprocess_exec(
-                *command,
-            )
-            returncode = await proc.wait()
-            if proc.returncode:
-                raise CalledProcessError(returncode=returncode, cmd=command)
-            with open(output_filename, "rb") as f:
-                result = f.read()
-
-            compressed_data = result
-            original_size = await zstd_view.resource.get_data_length()
-            resource.queue_patch(Range(0, original_size), compressed_data)
+        command = ["zstd", f"-T{config.threads}", f"-{config.compression_level}"]
+        if config.compression_level > 19:
+            command.append("--ultra")
+        # Give the size of the piped input, so that zstd still writes it in the frame header
+        command.extend([f"--stream-size={len(uncompressed_data)}", "-c"])
+        result = await run_tool(command, input_data=uncompressed_data)
+
+        compressed_data = result.stdout
+        original_size = await zstd_view.resource.get_data_length()
+        resource.queue_patch(Range(0, original_size), compressed_data)
+
+
+def _parse_zstd_signature(data: SignatureData, offset: int) -> Optional[Tuple[str, Optional[int]]]:
+    # The reserved bit of the frame header descriptor is unset
+    if data[offset + 4] & 0x08:
+        return None
+    return "Zstandard compressed data", None
 
 
 MagicMimeIdentifier.register(ZstdData, "application/x-zstd")
 MagicDescriptionIdentifier.register(
     ZstdData, lambda s: s.lower().startswith("zstandard compressed data")
 )
+SignatureScanner.register(ZstdData, b"\x28\xb5\x2f\xfd", _parse_zstd_signature)
@@ -4,6 +4,7 @@ import logging
 import json
 import orjson
 import os
+import re
 import sys
 import webbrowser
 from collections import defaultdict
@@ -17,12 +18,13 @@ from typing import (
     Union,
     Type,
     Callable,
+    Pattern,
     TypeVar,
     Any,
 )
 
 from aiohttp import web
-from aiohttp.web_exceptions import HTTPBadRequest
+from aiohttp.web_exceptions import HTTPBadRequest, HTTPNotImplemented
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from aiohttp.web_fileresponse import FileResponse
@@ -144,6 +146,7 @@ class AiohttpOFRAKServer:
                 web.post("/{resource_id}/analyze", self.analyze),
                 web.post("/{resource_id}/identify", self.identify),
                 web.post("/{resource_id}/data_summary", self.data_summary),
+                web.get("/{resource_id}/data_summary_tiles", self.data_summary_tiles),
                 web.get("/{resource_id}/get_parent", self.get_parent),
                 web.get("/{resource_id}/get_ancestors", self.get_ancestors),
                 web.post("/batch/get_children", self.batch_get_children),
@@ -153,6 +156,7 @@ class AiohttpOFRAKServer:
                 web.post("/{resource_id}/add_comment", self.add_comment),
                 web.post("/{resource_id}/delete_comment", self.delete_comment),
                 web.post("/{resource_id}/search_for_vaddr", self.search_for_vaddr),
+                web.post("/{resource_id}/search_data", self.search_data),
                 web.post("/{resource_id}/add_tag", self.add_tag),
                 web.get("/get_all_tags", self.get_all_tags),
                 web.get("/{resource_id}/get_script", self.get_script),
@@ -411,6 +415,52 @@ class AiohttpOFRAKServer:
 
         return json_response(await self._serialize_component_result(result))
 
+    @exceptions_to_http(SerializedError)
+    async def data_summary_tiles(self, request: Request) -> Response:
+        """
+        Get the summaries of the entropy and magnitude of a range of the data of a resource (all
+        of it by default), at the finest level of its summary pyramid which has at most
+        `max_tiles` tiles in the range, or at the given `level`. Each summary is hex-encoded, with
+        one byte per tile.
+        """
+        resource = cast(Resource, await self._get_resource_for_request(request))
+        level_param = request.query.get("level")
+        try:
+            max_tiles = int(request.query.get("max_tiles", 1024))
+            level = None if level_param is None else int(level_param)
+        except ValueError:
+            return HTTPBadRequest(reason="`max_tiles` and `level` must be integers")
+        if max_tiles < 1:
+            return HTTPBadRequest(reason="`max_tiles` must be at least 1")
+        query = get_query_string_as_pjson(request)
+        _range = self._serializer.from_pjson(query.get("range"), Optional[Range])
+        if _range is None:
+            _range = Range(0, await resource.get_data_length())
+        analyzer = self._ofrak_context.component_locator.get_by_type(DataSummaryAnalyzer)
+        try:
+            pyramid = await analyzer.get_data_summary_pyramid(resource)
+        except ModuleNotFoundError as e:
+            return HTTPNotImplemented(reason=str(e))
+        if level is None:
+            level = pyramid.get_level(_range, max_tiles)
+        elif not 0 <= level < pyramid.level_count:
+            return HTTPBadRequest(reason=f"`level` must be between 0 and {pyramid.level_count - 1}")
+        tiles = pyramid.get_tiles(level, _range)
+        return json_response(
+            {
+                "level": tiles.level,
+                "level_count": pyramid.level_count,
+                "tile_size": tiles.tile_size,
+                "range": self._serializer.to_pjson(tiles.data_range, Range),
+                "entropy_min": tiles.entropy_min.hex(),
+                "entropy_max": tiles.entropy_max.hex(),
+                "entropy_mean": tiles.entropy_mean.hex(),
+                "magnitude_min": tiles.magnitude_min.hex(),
+                "magnitude_max": tiles.magnitude_max.hex(),
+                "magnitude_mean": tiles.magnitude_mean.hex(),
+            }
+        )
+
     @exceptions_to_http(SerializedError)
     async def analyze(self, request: Request) -> Response:
         resource = await self._get_resource_for_request(request)
@@ -623,6 +673,31 @@ class AiohttpOFRAKServer:
         except NotFoundError:
             return json_response([])
 
+    @exceptions_to_http(SerializedError)
+    async def search_data(self, request: Request) -> Response:
+        """
+        Search for a string, or a regular expression, in the data of a resource and all of its
+        descendants. Each match is returned with the deepest resource containing it, its offset in
+        that resource's data and its hex-encoded bytes.
+        """
+        resource = await self._get_resource_for_request(request)
+        query, is_regex, max_matches = self._serializer.from_pjson(
+            await request.json(), Tuple[str, bool, Optional[int]]
+        )
+        search_query: Union[bytes, Pattern[bytes]] = query.encode("utf-8")
+        if is_regex:
+            try:
+                search_query = re.compile(cast(bytes, search_query))
+            except re.error as e:
+                return HTTPBadRequest(reason=f"Invalid regular expression: {e}")
+        results = await resource.search_data_in_tree(search_query, max_matches)
+        return json_response(
+            [
+                (self._serialize_resource(result_resource), offset, match.hex())
+                for result_resource, offset, match in results
+            ]
+        )
+
     @exceptions_to_http(SerializedError)
     async def add_tag(self, request: Request) -> Response:
         resource = await self._get_resource_for_request(request)
@@ -742,11 +817,19 @@ async def start_server(
     host: str,
     port: int,
     enable_cors: bool = False,
+    enable_search_index: bool = False,
 ) -> AiohttpOFRAKServer:  # pragma: no cover
     # Force using the correct PJSON serialization with the expected structure. Otherwise the
     # dependency injector may accidentally use the Stashed PJSON serialization service,
     # which returns PJSON that has a different, problematic structure.
     ofrak_context.injector.bind_factory(PJSONSerializationService)
+    if enable_search_index:
+        try:
+            # Index the data as it is unpacked, so that searches from the GUI only read what they
+            # need
+            ofrak_context.data_service.enable_search_index()
+        except ModuleNotFoundError:
+            LOGGER.warning("NumPy is not installed, searches from the GUI will read all the data")
 
     ofrak_context.injector.bind_factory(
         AiohttpOFRAKServer,
@@ -789,11 +872,12 @@ async def open_gui(
     ofrak_context: Optional[OFRAKContext] = None,
     open_in_browser: bool = True,
     enable_cors: bool = False,
+    enable_search_index: bool = False,
 ) -> AiohttpOFRAKServer:  # pragma: no cover
     if ofrak_context is None:
         ofrak_context = get_current_ofrak_context()
 
-    server = await start_server(ofrak_context, host, port, enable_cors)
+    server = await start_server(ofrak_context, host, port, enable_cors, enable_search_index)
 
     if focus_resource is None:
         url = f"http://{server._host}:{server._port}/"
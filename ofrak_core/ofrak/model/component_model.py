@@ -2,7 +2,7 @@ import asyncio
 from collections import defaultdict
 from dataclasses import dataclass, field
 from subprocess import CalledProcessError
-from typing import Dict, List, Optional, Set, Type, TypeVar
+from typing import Dict, List, Optional, Set, Tuple, Type, TypeVar
 
 from ofrak.model.data_model import DataPatch
 from ofrak.model.resource_model import ResourceAttributes
@@ -119,6 +119,8 @@ class ComponentContext:
     )
     resources_created: Set[bytes] = field(default_factory=set)
     resources_deleted: Set[bytes] = field(default_factory=set)
+    # Resources created with data mapped from their parent: (parent ID, range of the parent's data)
+    mapped_resources_created: Dict[bytes, Tuple[bytes, Range]] = field(default_factory=dict)
 
     def mark_resource_modified(self, r_id: bytes):
         # Creates a new tracker if none exists, and leaves tracker untouched if it already exists
@@ -1,3 +1,4 @@
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import List
 
@@ -53,3 +54,25 @@ class DataModel:
 
     def is_mapped(self):
         return self.root_id != self.id
+
+
+class LazyData(ABC):
+    """
+    Data which is only produced as it is read, for example by decompressing only the part of a
+    compressed blob which is read. A root data model can be created from lazy data, in which case
+    reading a range of the model's data only reads that range of the lazy data; the whole data is
+    read and stored as bytes only once all of it is read, or it is patched.
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def read(self, data_range: Range) -> bytes:
+        """
+        Read a range of the data.
+
+        :param data_range: Range of the data to read, within the bounds of the data
+        """
+        raise NotImplementedError()
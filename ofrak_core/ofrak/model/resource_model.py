@@ -488,8 +488,8 @@ class ResourceModel:
         id: bytes,
         data_id: Optional[bytes] = None,
         parent_id: Optional[bytes] = None,
-        tags: Iterable[ResourceTag] = None,
-        attributes: Iterable[ResourceAttributes] = None,
+        tags: Optional[Iterable[ResourceTag]] = None,
+        attributes: Optional[Iterable[ResourceAttributes]] = None,
         created_by_component_id: bytes = None,
         created_by_component_version: int = None,
     ) -> "ResourceModel":
@@ -915,3 +915,29 @@ class Data(ResourceAttributes):
     @index
     def Length(self) -> int:
         return self._length
+
+
+@dataclasses.dataclass(**ResourceAttributes.DATACLASS_PARAMS)
+class ComponentRun(ResourceAttributes):
+    """
+    Special attributes class standing in for the results of a component run as a whole, for
+    components whose results are not attributes of the resource they ran on (e.g. the tags added
+    by an identifier, or the children created by an unpacker). A
+    [ResourceAttributeDependency][ofrak.model.resource_model.ResourceAttributeDependency] on these
+    attributes tracks what the component read during that run, so that the run can be invalidated
+    (and the component allowed to run again) when that information changes.
+    Never actually added to a resource.
+    """
+
+
+@dataclasses.dataclass(**ResourceAttributes.DATACLASS_PARAMS)
+class StaleResource(ResourceAttributes):
+    """
+    Special attributes class marking a resource created by a component run which has since been
+    invalidated, for example a child unpacked from data which was then patched. Stale resources
+    are deleted when that component runs again, e.g. when the parent is unpacked again.
+
+    :ivar component_id: ID of the component whose run created this resource
+    """
+
+    component_id: bytes
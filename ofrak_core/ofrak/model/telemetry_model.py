@@ -0,0 +1,217 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+@dataclass
+class ComponentTelemetry:
+    """
+    Measurements of a component, either for a single run or summed over several runs.
+
+    CPU times are measured for the whole OFRAK process. Since components run concurrently, the CPU
+    time of a run also includes that of any other component running at the same time (including
+    components run by the component itself), and so does the wall time.
+
+    :ivar calls: number of runs of the component
+    :ivar wall_time: time elapsed while the component ran, in seconds
+    :ivar cpu_time: CPU time used by the OFRAK process while the component ran, in seconds
+    :ivar subprocess_time: CPU time used by the subprocesses (such as external tools) which
+    exited while the component ran, in seconds
+    :ivar bytes_read: number of bytes of resource data read by the component
+    :ivar bytes_written: number of bytes of data written by the component, either by patching
+    resources or by creating resources with new data
+    :ivar resources_created: number of resources created by the component
+    :ivar errors: number of runs of the component which raised an error
+    """
+
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    subprocess_time: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    resources_created: int = 0
+    errors: int = 0
+
+    def update(self, other: "ComponentTelemetry"):
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.subprocess_time += other.subprocess_time
+        self.bytes_read += other.bytes_read
+        self.bytes_written += other.bytes_written
+        self.resources_created += other.resources_created
+        self.errors += other.errors
+
+
+@dataclass
+class ComponentRunTelemetry(ComponentTelemetry):
+    """
+    Measurements of one run of a component.
+
+    :ivar component_id: ID of the component which ran
+    :ivar resource_ids: IDs of the resources the component ran on; a batch component runs on
+    several resources at once
+    :ivar start_time: value of `time.perf_counter()` when the run started
+    """
+
+    component_id: bytes = b""
+    resource_ids: Sequence[bytes] = ()
+    start_time: float = 0.0
+
+
+@dataclass
+class JobTelemetry:
+    """
+    Measurements of all the component runs in a job.
+
+    :ivar job_id: ID of the job
+    :ivar runs: the measurements of each run, in the order the runs finished
+    """
+
+    job_id: bytes
+    runs: List[ComponentRunTelemetry] = field(default_factory=list)
+
+    def get_component_totals(self) -> Dict[bytes, ComponentTelemetry]:
+        """
+        Sum up the measurements of the runs of each component.
+
+        :return: The total measurements of each component which ran in the job, by component ID
+        """
+        component_totals: Dict[bytes, ComponentTelemetry] = dict()
+        for run in self.runs:
+            component_total = component_totals.get(run.component_id)
+            if component_total is None:
+                component_total = ComponentTelemetry()
+                component_totals[run.component_id] = component_total
+            component_total.update(run)
+        return component_totals
+
+    def to_json(self) -> str:
+        """
+        Export the measurements as JSON, with the totals of each component (sorted by decreasing
+        wall time) as well as each run.
+        """
+        component_totals = sorted(
+            self.get_component_totals().items(),
+            key=lambda item: item[1].wall_time,
+            reverse=True,
+        )
+        return json.dumps(
+            {
+                "job_id": self.job_id.hex(),
+                "components": {
+                    component_id.decode(): asdict(component_total)
+                    for component_id, component_total in component_totals
+                },
+                "runs": [
+                    {
+                        **asdict(run),
+                        "component_id": run.component_id.decode(),
+                        "resource_ids": [resource_id.hex() for resource_id in run.resource_ids],
+                    }
+                    for run in self.runs
+                ],
+            }
+        )
+
+    def to_chrome_trace(self) -> str:
+        """
+        Export the runs in the Chrome trace event format, which can be viewed in `chrome://tracing`
+        or [Perfetto](https://ui.perfetto.dev). Each run is a complete event; runs which overlap in
+        time are placed in different rows.
+        """
+        start_time = min((run.start_time for run in self.runs), default=0.0)
+        # End time of the last run placed in each row
+        row_end_times: List[float] = []
+        trace_events: List[Dict[str, Any]] = []
+        for run in sorted(self.runs, key=lambda run: run.start_time):
+            for row, row_end_time in enumerate(row_end_times):
+                if row_end_time <= run.start_time:
+                    break
+            else:
+                row = len(row_end_times)
+                row_end_times.append(0.0)
+            row_end_times[row] = run.start_time + run.wall_time
+            trace_events.append(
+                {
+                    "name": run.component_id.decode(),
+                    "cat": "component",
+                    "ph": "X",
+                    "ts": (run.start_time - start_time) * 1e6,
+                    "dur": run.wall_time * 1e6,
+                    "pid": 0,
+                    "tid": row,
+                    "args": {
+                        "resource_ids": [resource_id.hex() for resource_id in run.resource_ids],
+                        "cpu_time": run.cpu_time,
+                        "subprocess_time": run.subprocess_time,
+                        "bytes_read": run.bytes_read,
+                        "bytes_written": run.bytes_written,
+                        "resources_created": run.resources_created,
+                        "errors": run.errors,
+                    },
+                }
+            )
+        return json.dumps(
+            {
+                "traceEvents": trace_events,
+                "displayTimeUnit": "ms",
+                "otherData": {"job_id": self.job_id.hex()},
+            }
+        )
+
+
+_CURRENT_COMPONENT_RUN: ContextVar[Optional[ComponentRunTelemetry]] = ContextVar(
+    "_CURRENT_COMPONENT_RUN", default=None
+)
+
+
+def get_current_component_run() -> Optional[ComponentRunTelemetry]:
+    """
+    Get the measurements of the component run in progress, if telemetry is being collected for it.
+    """
+    return _CURRENT_COMPONENT_RUN.get()
+
+
+@contextmanager
+def measure_component_run(
+    job_telemetry: JobTelemetry,
+    component_id: bytes,
+    resource_ids: Sequence[bytes],
+) -> Iterator[ComponentRunTelemetry]:
+    """
+    Measure a component run, and add the measurements to the telemetry of its job once it
+    finishes. While it runs, the measurements can be completed through
+    [get_current_component_run][ofrak.model.telemetry_model.get_current_component_run].
+
+    :param job_telemetry: Telemetry of the job the component runs in
+    :param component_id: ID of the component
+    :param resource_ids: IDs of the resources the component runs on
+    """
+    run_telemetry = ComponentRunTelemetry(
+        calls=1,
+        component_id=component_id,
+        resource_ids=resource_ids,
+        start_time=time.perf_counter(),
+    )
+    cpu_start_time = time.process_time()
+    subprocess_start_time = _get_subprocess_time()
+    token = _CURRENT_COMPONENT_RUN.set(run_telemetry)
+    try:
+        yield run_telemetry
+    finally:
+        _CURRENT_COMPONENT_RUN.reset(token)
+        run_telemetry.wall_time = time.perf_counter() - run_telemetry.start_time
+        run_telemetry.cpu_time = time.process_time() - cpu_start_time
+        run_telemetry.subprocess_time = _get_subprocess_time() - subprocess_start_time
+        job_telemetry.runs.append(run_telemetry)
+
+
+def _get_subprocess_time() -> float:
+    times = os.times()
+    return times.children_user + times.children_system
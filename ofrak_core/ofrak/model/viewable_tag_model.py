@@ -303,6 +303,14 @@ class ResourceViewInterface(metaclass=ViewableResourceTag):
         """
         raise NotImplementedError()
 
+    @classmethod
+    def get_special_field_names(cls) -> Set[str]:  # pragma: no cover
+        """
+        Get the names of the fields of the view which are not stored in the attributes of its
+        resource.
+        """
+        raise NotImplementedError()
+
     @classmethod  # pragma: no cover
     def create(cls: Type[RVI], resource_model: ResourceModel) -> RVI:  # pragma: no cover
         raise NotImplementedError()
@@ -333,8 +341,11 @@ class ResourceViewContext:
             for view in views_in_context.values():
                 updated_model = resource_context.resource_models[resource_id]
                 fresh_view = view.create(updated_model)
+                special_field_names = view.get_special_field_names()
                 for field in dataclasses.fields(fresh_view):
-                    if field.name == "_resource":
+                    # Special fields are not stored in attributes, so the fresh view does not know
+                    # their values
+                    if field.name in special_field_names:
                         continue
                     setattr(view, field.name, getattr(fresh_view, field.name))
 
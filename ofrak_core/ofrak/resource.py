@@ -2,6 +2,7 @@ import asyncio
 import dataclasses
 import hashlib
 import logging
+from bisect import bisect_right
 from inspect import isawaitable
 from typing import (
     BinaryIO,
@@ -17,11 +18,14 @@ from typing import (
     Sequence,
     Callable,
     Set,
+    Pattern,
+    Dict,
+    overload,
 )
 
 from ofrak.component.interface import ComponentInterface
 from ofrak.model.component_model import ComponentContext, CC, ComponentRunResult
-from ofrak.model.data_model import DataPatch
+from ofrak.model.data_model import DataPatch, LazyData
 from ofrak.model.job_model import (
     JobRunContext,
 )
@@ -242,6 +246,157 @@ class Resource:
             )
         return await self._data_service.get_data_range_within_root(self._resource.data_id)
 
+    @overload
+    async def search_data(
+        self,
+        query: bytes,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        max_matches: Optional[int] = None,
+    ) -> Tuple[int, ...]:
+        ...
+
+    @overload
+    async def search_data(
+        self,
+        query: Pattern[bytes],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        max_matches: Optional[int] = None,
+    ) -> Tuple[Tuple[int, bytes], ...]:
+        ...
+
+    async def search_data(self, query, start=None, end=None, max_matches=None):
+        """
+        Search for some bytes or a regular expression in the data of this resource. All
+        occurrences of bytes are found, even if they overlap; the matches of a regular expression
+        are found as by `re.finditer`.
+
+        :param query: The bytes or the compiled regular expression (on bytes) to search for
+        :param start: Offset in the resource's data where the search starts (0 by default)
+        :param end: Offset in the resource's data where the search ends (the end of the data by
+        default)
+        :param max_matches: The maximum number of occurrences or matches to find
+
+        :return: The offsets of the occurrences of the bytes, or the offsets and bytes of the
+        matches of the regular expression, relative to the resource's data
+        """
+        if self._resource.data_id is None:
+            raise ValueError(
+                "Resource does not have a data_id. Cannot search data of a resource with no data."
+            )
+        results = await self._data_service.search(
+            self._resource.data_id, query, start, end, max_matches
+        )
+        data_length = await self._data_service.get_data_length(self._resource.data_id)
+        start = min(max(start or 0, 0), data_length)
+        end = max(min(data_length if end is None else end, data_length), start)
+        self._component_context.access_trackers[self._resource.id].data_accessed.add(
+            Range(start, end)
+        )
+        return results
+
+    async def search_data_in_tree(
+        self, query: Union[bytes, Pattern[bytes]], max_matches: Optional[int] = None
+    ) -> List[Tuple["Resource", int, bytes]]:
+        """
+        Search for some bytes or a regular expression in the data of this resource and all of its
+        descendants, including descendants whose data is not mapped into this resource's data
+        (such as decompressed files). Each occurrence is attributed to the deepest resource whose
+        data contains it entirely, so that an occurrence in a string of a section of a file is
+        reported in that string, rather than in the section and the file.
+
+        :param query: The bytes or the compiled regular expression (on bytes) to search for
+        :param max_matches: The maximum number of occurrences or matches to find in the data of
+        each resource whose data is not mapped into another's
+
+        :return: The resource containing each occurrence or match, its offset in the resource's
+        data and the bytes found
+        """
+        resource_models: List[ResourceModel] = [self._resource]
+        resource_models.extend(
+            await self._resource_service.get_descendants_by_id(self._resource.id)
+        )
+        resource_models = [model for model in resource_models if model.data_id is not None]
+        if not resource_models:
+            return []
+        data_models = await self._data_service.get_by_ids(
+            [cast(bytes, model.data_id) for model in resource_models]
+        )
+        data_models_by_id = {
+            resource_model.id: data_model
+            for resource_model, data_model in zip(resource_models, data_models)
+        }
+
+        # Occurrences are searched in the data of each resource whose data is not mapped into its
+        # parent's, then attributed to its children whose data contains them
+        searched_models: List[ResourceModel] = []
+        children: Dict[bytes, List[ResourceModel]] = dict()
+        for resource_model in resource_models:
+            parent_data_model = data_models_by_id.get(cast(bytes, resource_model.parent_id))
+            if (
+                resource_model.id == self._resource.id
+                or parent_data_model is None
+                or parent_data_model.root_id != data_models_by_id[resource_model.id].root_id
+            ):
+                searched_models.append(resource_model)
+            else:
+                children.setdefault(cast(bytes, resource_model.parent_id), []).append(
+                    resource_model
+                )
+        for siblings in children.values():
+            siblings.sort(key=lambda model: data_models_by_id[model.id].range.start)
+        children_starts = {
+            parent_id: [data_models_by_id[model.id].range.start for model in siblings]
+            for parent_id, siblings in children.items()
+        }
+
+        results: List[Tuple[ResourceModel, int, bytes]] = []
+        for searched_model in searched_models:
+            searched_data_model = data_models_by_id[searched_model.id]
+            matches: Iterable[Tuple[int, bytes]]
+            if isinstance(query, bytes):
+                offsets = await self._data_service.search(
+                    searched_data_model.id, query, max_matches=max_matches
+                )
+                matches = [(offset, query) for offset in offsets]
+            else:
+                matches = await self._data_service.search(
+                    searched_data_model.id, query, max_matches=max_matches
+                )
+            self._component_context.access_trackers[searched_model.id].data_accessed.add(
+                Range(0, searched_data_model.range.length())
+            )
+            for offset, match in matches:
+                match_range = Range.from_size(offset, len(match)).translate(
+                    searched_data_model.range.start
+                )
+                containing_model: ResourceModel = searched_model
+                while containing_model.id in children:
+                    siblings = children[containing_model.id]
+                    # Among the children starting before the match, find one which contains it
+                    child_index = bisect_right(
+                        children_starts[containing_model.id], match_range.start
+                    )
+                    for child in reversed(siblings[:child_index]):
+                        if data_models_by_id[child.id].range.end >= match_range.end:
+                            containing_model = child
+                            break
+                    else:
+                        break
+                results.append(
+                    (
+                        containing_model,
+                        match_range.start - data_models_by_id[containing_model.id].range.start,
+                        match,
+                    )
+                )
+
+        resources = await self._create_resources(model for model, _, _ in results)
+        return [
+            (resource, offset, match) for resource, (_, offset, match) in zip(resources, results)
+        ]
+
     async def save(self):
         """
         If this resource has been modified, update the model stored in the resource service with
@@ -316,8 +471,11 @@ class Resource:
                     await self._fetch(view.resource.get_model())  # type: ignore
                 updated_model = self._resource_context.resource_models[resource_id]
                 fresh_view = view.create(updated_model)
+                special_field_names = view.get_special_field_names()
                 for field in dataclasses.fields(fresh_view):
-                    if field.name == "_resource":
+                    # Special fields are not stored in attributes, so the fresh view does not know
+                    # their values
+                    if field.name in special_field_names:
                         continue
                     setattr(view, field.name, getattr(fresh_view, field.name))
 
@@ -366,6 +524,7 @@ class Resource:
         all_identifiers: bool = False,
         all_analyzers: bool = False,
         all_packers: bool = False,
+        blacklisted_tags: Iterable[ResourceTag] = tuple(),
     ) -> ComponentRunResult:
         """
         Automatically run multiple components which may run on this resource. From an initial set
@@ -376,6 +535,8 @@ class Resource:
         :param components: Components to explicitly add to the initial set of components
         :param blacklisted_components: Components to explicitly remove to the initial set of
         components
+        :param blacklisted_tags: Components targeting these tags are removed from the initial set
+        of components
         :param all_unpackers: If true, all Unpackers are added to the initial set of components
         :param all_identifiers: If true, all Identifiers are added to the initial set of components
         :param all_analyzers: If true, all Analyzers are added to the initial set of components
@@ -392,6 +553,7 @@ class Resource:
                 all_identifiers=all_identifiers,
                 all_analyzers=all_analyzers,
                 all_packers=all_packers,
+                tags_ignored=tuple(blacklisted_tags),
             )
         )
         for deleted_id in components_result.resources_deleted:
@@ -578,7 +740,7 @@ class Resource:
         self,
         tags: Iterable[ResourceTag] = None,
         attributes: Iterable[ResourceAttributes] = None,
-        data: Optional[bytes] = None,
+        data: Optional[Union[bytes, LazyData]] = None,
         data_range: Optional[Range] = None,
     ) -> "Resource":
         """
@@ -612,12 +774,24 @@ class Resource:
         :param tags: [tags][ofrak.model.tag_model.ResourceTag] to add to the new child
         :param attributes: [attributes][ofrak.model.resource_model.ResourceAttributes] to add to
         the new child
-        :param data: The binary data for the new child. If `None` and ``data_range`` is `None`,
-        the resource has no data. Defaults to `None`.
+        :param data: The binary data for the new child, either as bytes or as
+        [LazyData][ofrak.model.data_model.LazyData] which is only read as needed. If `None` and
+        ``data_range`` is `None`, the resource has no data. Defaults to `None`.
         :param data_range: The range of the parent's data which the new child maps. If `None` (
         default), the child will not map the parent's data.
         :return:
         """
+        resource_model = await self._create_child_model(tags, attributes, data, data_range)
+        created_resource = await self._create_resource(resource_model)
+        return created_resource
+
+    async def _create_child_model(
+        self,
+        tags: Optional[Iterable[ResourceTag]],
+        attributes: Optional[Iterable[ResourceAttributes]],
+        data: Optional[Union[bytes, LazyData]],
+        data_range: Optional[Range],
+    ) -> ResourceModel:
         if data is not None and data_range is not None:
             raise ValueError(
                 "Cannot create a child from both data and data_range. These parameters are "
@@ -637,6 +811,10 @@ class Resource:
             )
             data_attrs = Data(data_range.start, data_range.length())
             attributes = [data_attrs, *attributes] if attributes else [data_attrs]
+            self._component_context.mapped_resources_created[resource_id] = (
+                self._resource.id,
+                data_range,
+            )
         elif data is not None:
             if self._resource.data_id is None:
                 raise ValueError(
@@ -663,14 +841,13 @@ class Resource:
             resource_tracker.tags_added.update(resource_model.tags)
         self._component_context.mark_resource_modified(resource_id)
         self._component_context.resources_created.add(resource_model.id)
-        created_resource = await self._create_resource(resource_model)
-        return created_resource
+        return resource_model
 
     async def create_child_from_view(
         self,
         view: RV,
         data_range: Optional[Range] = None,
-        data: Optional[bytes] = None,
+        data: Optional[Union[bytes, LazyData]] = None,
         additional_tags: Iterable[ResourceTag] = (),
         additional_attributes: Iterable[ResourceAttributes] = (),
     ) -> "Resource":
@@ -697,8 +874,9 @@ class Resource:
         [attributes][ofrak.model.resource_model.ResourceAttributes] from to populate the new child
         :param data_range: The range of the parent's data which the new child maps. If `None` (
         default), the child will not map the parent's data.
-        :param data: The binary data for the new child. If `None` and ``data_range`` is `None`,
-        the resource has no data. Defaults to `None`.
+        :param data: The binary data for the new child, either as bytes or as
+        [LazyData][ofrak.model.data_model.LazyData] which is only read as needed. If `None` and
+        ``data_range`` is `None`, the resource has no data. Defaults to `None`.
         :param additional_tags: Any [tags][ofrak.model.tag_model.ResourceTag] for the child in
         addition to those from the ``view``
         :param additional_attributes: Any
@@ -715,6 +893,37 @@ class Resource:
         )
         return new_resource
 
+    async def create_children_from_views(
+        self,
+        views: Iterable[RV],
+        data: Iterable[Optional[Union[bytes, LazyData]]],
+    ) -> List["Resource"]:
+        """
+        Create several new resources as children of this resource, each with the tags and
+        attributes defined by a [view][ofrak.model.viewable_tag_model.ViewableResourceTag] and
+        its own unmapped data, as `create_child_from_view` would. Creating children in one batch
+        is faster than creating them one at a time, since the `Resource` objects of all the
+        children are created at once.
+
+        :param views: [Resource views][ofrak.resource_view] to pull the tags and attributes of
+        each child from
+        :param data: The binary data of each child, in the same order as ``views``, either as
+        bytes or as [LazyData][ofrak.model.data_model.LazyData]; `None` for a dataless child
+        :return: The created children, in the same order as ``views``
+        """
+        resource_models = []
+        for view, child_data in zip(views, data):
+            viewable_tag: ViewableResourceTag = type(view)
+            resource_models.append(
+                await self._create_child_model(
+                    (viewable_tag,),
+                    view.get_attributes_instances().values(),
+                    child_data,
+                    None,
+                )
+            )
+        return list(await self._create_resources(resource_models))
+
     def _view_as(self, viewable_tag: Type[RV]) -> Union[RV, Awaitable[RV]]:
         """
         Try to get a view without calling any analysis, to avoid as many unnecessary
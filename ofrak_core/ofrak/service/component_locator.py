@@ -1,6 +1,7 @@
 import logging
+from collections import defaultdict
 from types import ModuleType
-from typing import List, Type, Dict, TypeVar, Optional, Set
+from typing import List, Type, Dict, TypeVar, Optional, Set, Iterable, Tuple
 
 from ofrak.component.analyzer import Analyzer
 from ofrak.component.identifier import Identifier
@@ -8,6 +9,7 @@ from ofrak.component.interface import ComponentInterface
 from ofrak.component.modifier import Modifier
 from ofrak.component.packer import Packer
 from ofrak.component.unpacker import Unpacker
+from ofrak.model.tag_model import ResourceTag
 from ofrak.service.component_locator_i import ComponentLocatorInterface, ComponentFilter
 from ofrak_type.error import NotFoundError
 
@@ -30,7 +32,7 @@ class ComponentLocator(ComponentLocatorInterface):
     Locates component singletons from their types or `id`.
     """
 
-    COMPONENT_CATEGORIES = (
+    COMPONENT_CATEGORIES: Tuple[Type[ComponentInterface], ...] = (
         Unpacker,
         Packer,
         Analyzer,
@@ -44,6 +46,12 @@ class ComponentLocator(ComponentLocatorInterface):
         }
         self._components_by_id: Dict[bytes, ComponentInterface] = {}
         self._all_components = set(self._components_by_id.values())
+        # Index of (category, target tag) -> components, rebuilt whenever components are added so
+        # that dispatching components on a resource's tags is only a few dictionary lookups
+        self._components_by_category_and_target: Dict[
+            Type[ComponentInterface], Dict[ResourceTag, Set[ComponentInterface]]
+        ] = {category: defaultdict(set) for category in ComponentLocator.COMPONENT_CATEGORIES}
+        self._components_by_target: Dict[ResourceTag, Set[ComponentInterface]] = defaultdict(set)
 
     def _resolve_id_conflict(
         self,
@@ -111,6 +119,10 @@ class ComponentLocator(ComponentLocatorInterface):
                         component, existing_component, module_priority
                     )
 
+        self._components_by_category_and_target = {
+            category: defaultdict(set) for category in ComponentLocator.COMPONENT_CATEGORIES
+        }
+        self._components_by_target = defaultdict(set)
         for component in self._components_by_id.values():
             component_category = None
             for t_component_type in self._components_by_category.keys():
@@ -137,11 +149,15 @@ class ComponentLocator(ComponentLocatorInterface):
                     )
 
             self._components_by_category[component_category].append(component)
+            for target in component.targets:
+                self._components_by_category_and_target[component_category][target].add(component)
+                self._components_by_target[target].add(component)
             LOGGER.debug(
                 f"Registered component {component.get_id().decode()} as {component_category.__name__}"
             )
 
         self._all_components = set(self._components_by_id.values())
+        self.get_components_matching_filter.cache_clear()
 
     def get_by_id(self, component_id: bytes) -> ComponentInterface:
         component = self._components_by_id.get(component_id)
@@ -162,3 +178,25 @@ class ComponentLocator(ComponentLocatorInterface):
         # will be improved by caching
 
         return component_filter.filter(self._all_components)
+
+    def get_components_targeting(
+        self,
+        tags: Iterable[ResourceTag],
+        category: Optional[Type[ComponentInterface]] = None,
+    ) -> Set[ComponentInterface]:
+        if category is None:
+            index = self._components_by_target
+        else:
+            try:
+                index = self._components_by_category_and_target[category]
+            except KeyError:
+                category_names = [category.__name__ for category in self.COMPONENT_CATEGORIES]
+                raise ValueError(
+                    f"{category.__name__} is not one of {', '.join(category_names)}"
+                ) from None
+        components: Set[ComponentInterface] = set()
+        for tag in tags:
+            targeting_components = index.get(tag)
+            if targeting_components:
+                components.update(targeting_components)
+        return components
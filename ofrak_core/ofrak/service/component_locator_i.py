@@ -1,10 +1,11 @@
 from abc import ABCMeta, abstractmethod, ABC
 from types import ModuleType
-from typing import List, Type, Optional, TypeVar, Set
+from typing import Iterable, List, Type, Optional, TypeVar, Set
 
 from dataclasses import dataclass
 
 from ofrak.component.interface import ComponentInterface
+from ofrak.model.tag_model import ResourceTag
 
 CI = TypeVar("CI", bound="ComponentInterface")
 
@@ -49,3 +50,20 @@ class ComponentLocatorInterface(metaclass=ABCMeta):
         """
         Get all components matching the given filter.
         """
+
+    @abstractmethod
+    def get_components_targeting(
+        self,
+        tags: Iterable[ResourceTag],
+        category: Optional[Type[ComponentInterface]] = None,
+    ) -> Set[ComponentInterface]:
+        """
+        Get all components which target at least one of the given tags. The tags must be strictly
+        equal, that is, super/subclasses of the tags are not checked. This is a lookup in an index
+        built when components are added, so it is much cheaper than filtering all components.
+
+        :param tags: Tags which the components should target
+        :param category: Only return components of this category (e.g. `Unpacker`), if given
+
+        :return: All components targeting at least one of the tags
+        """
@@ -0,0 +1,169 @@
+"""
+Index of the trigrams (sequences of three bytes) of some data, used by the
+[DataService][ofrak.service.data_service.DataService] to only read the parts of the data which may
+contain the bytes or pattern it searches for.
+"""
+import re
+from typing import Iterable, List, Optional, Pattern
+
+import numpy as np
+
+from ofrak_type.range import Range
+
+try:
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # pragma: no cover
+    import sre_parse  # type: ignore
+
+# Size of the blocks of data whose trigrams are indexed together
+INDEX_BLOCK_SIZE = 0x1000
+# Number of bits of the bitmap of the trigrams of each block
+INDEX_BITMAP_SIZE = 0x800
+# Number of blocks indexed at once, bounding the memory used to index large data
+INDEX_BLOCKS_PER_CHUNK = 0x1000
+# Regular expressions whose matches may be longer than this are not searched with the index
+MAX_INDEXED_PATTERN_WIDTH = 0x10000
+
+_BITMAP_HASH_SHIFT = 32 - (INDEX_BITMAP_SIZE.bit_length() - 1)
+
+
+class DataSearchIndex:
+    """
+    For each block of `INDEX_BLOCK_SIZE` bytes of some data, a bitmap of the hashes of the trigrams
+    starting in the block. Some bytes can only occur at an offset if each of their trigrams is in
+    the bitmap of the block where it starts, so only the blocks where they may occur have to be
+    searched. On text or code, that is a small fraction of the blocks; on compressed or random
+    data, most bitmaps are full and most blocks are searched.
+
+    The bitmaps take `INDEX_BITMAP_SIZE / 8` bytes for each block of data.
+    """
+
+    def __init__(self, data: bytes):
+        self.data_length = len(data)
+        block_count = -(-len(data) // INDEX_BLOCK_SIZE)
+        self._bitmaps = np.zeros((block_count, INDEX_BITMAP_SIZE // 8), dtype=np.uint8)
+        for first_block in range(0, block_count, INDEX_BLOCKS_PER_CHUNK):
+            self._index_blocks(
+                data, first_block, min(first_block + INDEX_BLOCKS_PER_CHUNK, block_count)
+            )
+
+    def update(self, data: bytes, patch_ranges: Iterable[Range]):
+        """
+        Index again the blocks of the data whose trigrams may have changed after patches which did
+        not change the length of the data.
+
+        :param data: The patched data
+        :param patch_ranges: The ranges of the data which were patched
+        """
+        if len(data) != self.data_length:
+            raise ValueError(
+                f"Cannot update the index of {self.data_length} bytes with {len(data)} bytes of data"
+            )
+        for patch_range in Range.merge_ranges(patch_ranges):
+            # Trigrams starting up to two bytes before the patch include patched bytes
+            first_block = max(patch_range.start - 2, 0) // INDEX_BLOCK_SIZE
+            end_block = -(-patch_range.end // INDEX_BLOCK_SIZE)
+            self._index_blocks(data, first_block, end_block)
+
+    def get_candidate_ranges(self, query: bytes, search_range: Range) -> List[Range]:
+        """
+        Get the ranges of the data in which `query` may start, within a range of the data. The
+        query must be at least three bytes long.
+        """
+        if len(query) < 3:
+            raise ValueError(f"Cannot search the index for less than 3 bytes, got {len(query)}")
+        first_block = search_range.start // INDEX_BLOCK_SIZE
+        # The query may start in a block, and end in the next ones
+        end_block = -(-search_range.end // INDEX_BLOCK_SIZE)
+        spanned_blocks = 1 + -(-(len(query) - 3) // INDEX_BLOCK_SIZE)
+        bitmaps = self._bitmaps[first_block : end_block + spanned_blocks - 1]
+        trigram_hashes = np.unique(_hash_trigrams(np.frombuffer(query, dtype=np.uint8)))
+        bit_masks = (np.uint8(0x80) >> (trigram_hashes & 7)).astype(np.uint8)
+        has_trigrams = (bitmaps[:, trigram_hashes >> 3] & bit_masks) != 0
+        # The trigrams of an occurrence starting in a block are in that block or the next ones
+        may_start: np.ndarray = np.zeros((end_block - first_block, len(trigram_hashes)), dtype=bool)
+        for i in range(spanned_blocks):
+            spanned = has_trigrams[i : i + end_block - first_block]
+            may_start[: len(spanned)] |= spanned
+        candidate_blocks = np.flatnonzero(may_start.all(axis=1)) + first_block
+
+        candidate_ranges: List[Range] = []
+        for block in candidate_blocks.tolist():
+            start = max(block * INDEX_BLOCK_SIZE, search_range.start)
+            end = min((block + 1) * INDEX_BLOCK_SIZE, search_range.end)
+            if candidate_ranges and candidate_ranges[-1].end == start:
+                candidate_ranges[-1] = Range(candidate_ranges[-1].start, end)
+            elif start < end:
+                candidate_ranges.append(Range(start, end))
+        return candidate_ranges
+
+    def _index_blocks(self, data: bytes, first_block: int, end_block: int):
+        start = first_block * INDEX_BLOCK_SIZE
+        end = min(end_block * INDEX_BLOCK_SIZE, self.data_length)
+        # Trigrams starting in the last block may end in the next one
+        data_array = np.frombuffer(data, dtype=np.uint8)[start : min(end + 2, self.data_length)]
+        trigram_hashes = _hash_trigrams(data_array)
+        trigram_blocks = np.arange(len(trigram_hashes), dtype=np.int64) // INDEX_BLOCK_SIZE
+        bits: np.ndarray = np.zeros((end_block - first_block, INDEX_BITMAP_SIZE), dtype=bool)
+        bits[trigram_blocks, trigram_hashes] = True
+        self._bitmaps[first_block:end_block] = np.packbits(bits, axis=1)
+
+
+def get_required_literal(pattern: Pattern[bytes]) -> Optional[bytes]:
+    """
+    Get the longest sequence of bytes which every match of a regular expression contains, if the
+    regular expression can be searched with a
+    [DataSearchIndex][ofrak.service.data_search_index.DataSearchIndex]: its matches are at most
+    `MAX_INDEXED_PATTERN_WIDTH` bytes long, and it has no anchors or lookarounds, so that searching
+    only the data around the occurrences of the sequence finds the same matches as searching all the
+    data.
+
+    :return: The sequence of at least 3 bytes, or None if there is none or if the regular expression
+    cannot be searched with an index
+    """
+    if pattern.flags & re.IGNORECASE:
+        return None
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    if parsed.getwidth()[1] > MAX_INDEXED_PATTERN_WIDTH or _has_assertions(parsed):
+        return None
+    longest_literal = b""
+    literal = bytearray()
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            literal.append(value)
+            continue
+        longest_literal = max(longest_literal, bytes(literal), key=len)
+        literal.clear()
+    longest_literal = max(longest_literal, bytes(literal), key=len)
+    return longest_literal if len(longest_literal) >= 3 else None
+
+
+def get_max_width(pattern: Pattern[bytes]) -> int:
+    """
+    Get the maximum length of the matches of a regular expression.
+    """
+    return sre_parse.parse(pattern.pattern, pattern.flags).getwidth()[1]
+
+
+def _has_assertions(parsed) -> bool:
+    if isinstance(parsed, sre_parse.SubPattern):
+        return any(_has_assertions(item) for item in parsed)
+    if isinstance(parsed, (tuple, list)):
+        if parsed and any(
+            parsed[0] is op for op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+        ):
+            return True
+        return any(_has_assertions(item) for item in parsed)
+    return False
+
+
+def _hash_trigrams(data_array: np.ndarray) -> np.ndarray:
+    if len(data_array) < 3:
+        return np.empty(0, dtype=np.int64)
+    trigrams = (
+        data_array[:-2].astype(np.uint32) << 16
+        | data_array[1:-1].astype(np.uint32) << 8
+        | data_array[2:]
+    )
+    # Multiplicative hashing spreads the trigrams of text, which only use a few byte values
+    return ((trigrams * np.uint32(0x9E3779B1)) >> np.uint32(_BITMAP_HASH_SHIFT)).astype(np.int64)
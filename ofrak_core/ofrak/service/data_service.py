@@ -1,27 +1,63 @@
+import asyncio
 import heapq
 import itertools
 from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar, Generic
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    TypeVar,
+    Generic,
+    Union,
+    cast,
+)
 
 from sortedcontainers import SortedList
 
-from ofrak.model.data_model import DataModel, DataPatch, DataPatchesResult
+from ofrak.model.data_model import DataModel, DataPatch, DataPatchesResult, LazyData
 from ofrak.service.data_service_i import DataServiceInterface
 from ofrak.service.error import OutOfBoundError, PatchOverlapError
 from ofrak_type.error import NotFoundError, AlreadyExistError
 from ofrak_type.range import Range
 
+try:
+    from ofrak.service.data_search_index import (
+        DataSearchIndex,
+        get_max_width,
+        get_required_literal,
+    )
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Searches reading at least this many bytes run in a thread, so that the event loop keeps running
+# (for instance, answering other GUI requests) until they are done; smaller searches are not worth
+# handing off
+SEARCH_IN_THREAD_MIN_SIZE = 2**20
+
 # Type alias; typechecker makes no distinction between this and bytes. It's just for humans (you?)
 DataId = bytes
 
+T = TypeVar("T")
+
 
 class DataService(DataServiceInterface):
     def __init__(self):
         self._model_store: Dict[DataId, DataModel] = dict()
         self._roots: Dict[DataId, _DataRoot] = dict()
+        # Indexes of the data of root models, being built in the background or built
+        self._search_indexes: Dict[DataId, "asyncio.Future[DataSearchIndex]"] = dict()
+        self._search_index_executor: Optional[ThreadPoolExecutor] = None
 
-    async def create_root(self, data_id: DataId, data: bytes) -> DataModel:
+    async def create_root(self, data_id: DataId, data: Union[bytes, LazyData]) -> DataModel:
         if data_id in self._model_store:
             raise AlreadyExistError(f"A model with {data_id.hex()} already exists!")
 
@@ -29,6 +65,9 @@ class DataService(DataServiceInterface):
 
         self._model_store[data_id] = new_model
         self._roots[data_id] = _DataRoot(new_model, data)
+        # Lazy data is only indexed once it is searched, which reads all of it anyway
+        if self._search_index_executor is not None and not isinstance(data, LazyData):
+            self._build_search_index(data_id)
 
         return new_model
 
@@ -90,9 +129,87 @@ class DataService(DataServiceInterface):
         root = self._get_root_by_id(model.root_id)
         if data_range is not None:
             translated_range = data_range.translate(model.range.start).intersect(root.model.range)
-            return root.data[translated_range.start : translated_range.end]
+            return root.get_data(translated_range)
         else:
-            return root.data[model.range.start : model.range.end]
+            return root.get_data(model.range)
+
+    async def search(self, data_id, query, start=None, end=None, max_matches=None):
+        model = self._get_by_id(data_id)
+        root = self._get_root_by_id(model.root_id)
+        start = min(max(start or 0, 0), model.range.length())
+        end = max(min(model.range.length() if end is None else end, model.range.length()), start)
+        search_range = Range(model.range.start + start, model.range.start + end)
+        if max_matches is None:
+            max_matches = -1
+        if search_range.length() == 0 or max_matches == 0:
+            return ()
+
+        if isinstance(query, bytes):
+            literal: Optional[bytes] = query
+        else:
+            literal = get_required_literal(query) if NUMPY_AVAILABLE else None
+        candidate_ranges = [search_range]
+        if literal is not None and len(literal) >= 3:
+            search_index = self._get_search_index(model.root_id)
+            if search_index is not None:
+                candidate_ranges = search_index.get_candidate_ranges(literal, search_range)
+
+        if isinstance(query, bytes):
+            offsets = await _run_search(
+                sum(candidate.length() for candidate in candidate_ranges),
+                _find_bytes,
+                root.data,
+                query,
+                candidate_ranges,
+                search_range.end,
+                max_matches,
+            )
+            return tuple(offset - model.range.start for offset in offsets)
+        if literal is None:
+            # Anchors and lookarounds must see the searched range as all the data
+            data = root.get_data(search_range)
+            matches = await _run_search(
+                len(data), _find_pattern, data, query, [Range(0, len(data))], max_matches
+            )
+            return tuple(
+                (offset + search_range.start - model.range.start, match)
+                for offset, match in matches
+            )
+        # Matches contain the literal, and are at most `MAX_INDEXED_PATTERN_WIDTH` bytes long, so
+        # they are all around its candidate ranges
+        max_width = get_max_width(query)
+        windows = Range.merge_ranges(
+            Range(
+                max(candidate.start - max_width, search_range.start),
+                min(candidate.end + max_width, search_range.end),
+            )
+            for candidate in candidate_ranges
+        )
+        matches = await _run_search(
+            sum(window.length() for window in windows),
+            _find_pattern,
+            root.data,
+            query,
+            windows,
+            max_matches,
+        )
+        return tuple((offset - model.range.start, match) for offset, match in matches)
+
+    def enable_search_index(self):
+        if not NUMPY_AVAILABLE:
+            raise ModuleNotFoundError("NumPy is required to index data")
+        if self._search_index_executor is None:
+            self._search_index_executor = ThreadPoolExecutor(max_workers=1)
+
+    def disable_search_index(self):
+        if self._search_index_executor is None:
+            return
+        self._search_index_executor.shutdown(wait=False)
+        self._search_index_executor = None
+        self._search_indexes.clear()
+
+    async def shutdown(self):
+        self.disable_search_index()
 
     async def apply_patches(self, patches: List[DataPatch]) -> List[DataPatchesResult]:
         patches_by_root: Dict[DataId, List[DataPatch]] = defaultdict(list)
@@ -128,6 +245,7 @@ class DataService(DataServiceInterface):
 
             del self._roots[root_model.id]
             del self._model_store[root_model.id]
+            self._search_indexes.pop(root_model.id, None)
 
         for model in mapped_to_delete.values():
             root = self._get_root_by_id(model.root_id)
@@ -148,6 +266,39 @@ class DataService(DataServiceInterface):
         else:
             return root
 
+    def _build_search_index(self, root_id: DataId) -> "asyncio.Future[DataSearchIndex]":
+        search_index = asyncio.get_running_loop().run_in_executor(
+            self._search_index_executor, DataSearchIndex, self._roots[root_id].data
+        )
+        self._search_indexes[root_id] = search_index
+        return search_index
+
+    def _get_search_index(self, root_id: DataId) -> Optional["DataSearchIndex"]:
+        """
+        Get the search index of a root if it is built, starting to build it if it is not. Searches
+        scan all the searched data until the index is built, rather than waiting for it.
+        """
+        if self._search_index_executor is None:
+            return None
+        search_index = self._search_indexes.get(root_id)
+        if search_index is None:
+            search_index = self._build_search_index(root_id)
+        if not search_index.done() or search_index.exception() is not None:
+            return None
+        return search_index.result()
+
+    def _update_search_index(self, root_id: DataId, patch_ranges: List[Range], data_resized: bool):
+        search_index = self._search_indexes.get(root_id)
+        if search_index is None:
+            return
+        if data_resized or not search_index.done() or search_index.exception() is not None:
+            # The index is built again from the patched data, rather than shifted; a build of the
+            # data before the patches is no longer needed
+            search_index.cancel()
+            self._build_search_index(root_id)
+            return
+        search_index.result().update(self._roots[root_id].data, patch_ranges)
+
     def _is_root(self, data_id: DataId) -> bool:
         return data_id in self._roots
 
@@ -229,6 +380,11 @@ class DataService(DataServiceInterface):
             if size_diff != 0:
                 root.resize_range(patch_range, size_diff)
         root.data = bytes(new_root_data)
+        self._update_search_index(
+            root_data_id,
+            affected_ranges,
+            any(size_diff != 0 for _, _, size_diff in finalized_ordered_patches),
+        )
 
         return [
             DataPatchesResult(data_id, results_for_id)
@@ -236,7 +392,42 @@ class DataService(DataServiceInterface):
         ]
 
 
-T = TypeVar("T")
+async def _run_search(search_size: int, find: Callable[..., T], *args) -> T:
+    # The data searched is immutable (patches replace it), so it can be searched in a thread while
+    # the event loop runs
+    if search_size < SEARCH_IN_THREAD_MIN_SIZE:
+        return find(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, find, *args)
+
+
+def _find_bytes(
+    data: bytes, query: bytes, ranges: List[Range], end: int, max_matches: int
+) -> List[int]:
+    # Find the occurrences of the query starting in the ranges and ending before `end`
+    offsets: List[int] = []
+    for search_range in ranges:
+        offset = data.find(query, search_range.start, min(search_range.end + len(query) - 1, end))
+        while offset >= 0 and len(offsets) != max_matches:
+            offsets.append(offset)
+            offset = data.find(query, offset + 1, min(search_range.end + len(query) - 1, end))
+        if len(offsets) == max_matches:
+            break
+    return offsets
+
+
+def _find_pattern(
+    data: bytes, pattern: Pattern[bytes], ranges: List[Range], max_matches: int
+) -> List[Tuple[int, bytes]]:
+    matches: List[Tuple[int, bytes]] = []
+    search_end = 0
+    for search_range in ranges:
+        # Matches do not overlap, even across ranges
+        for match in pattern.finditer(data, max(search_range.start, search_end), search_range.end):
+            matches.append((match.start(), match.group()))
+            search_end = match.end()
+            if len(matches) == max_matches:
+                return matches
+    return matches
 
 
 class _ShiftBreaksSortError(RuntimeError):
@@ -281,13 +472,38 @@ class _DataRoot:
     A root data model which may have other data models mapped into it
     """
 
+    # The data of the root, or None while it is only readable through `_lazy_data`
+    _data: Optional[bytes]
+    _lazy_data: Optional[LazyData]
+
     @property
     def length(self) -> int:
-        return len(self.data)
+        if self._data is None:
+            return len(cast(LazyData, self._lazy_data))
+        return len(self._data)
 
-    def __init__(self, model: DataModel, data: bytes):
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            # Once all the lazy data is read, it is kept so it is never read again
+            lazy_data = cast(LazyData, self._lazy_data)
+            self._data = lazy_data.read(Range(0, len(lazy_data)))
+            self._lazy_data = None
+        return self._data
+
+    @data.setter
+    def data(self, data: bytes):
+        self._data = data
+        self._lazy_data = None
+
+    def __init__(self, model: DataModel, data: Union[bytes, LazyData]):
         self.model: DataModel = model
-        self.data = data
+        self._data = None
+        self._lazy_data = None
+        if isinstance(data, LazyData):
+            self._lazy_data = data
+        else:
+            self._data = data
         self._children: Dict[DataId, DataModel] = dict()
 
         # A pair of sorted 2D arrays, where each "point" in the grid is a set of children's data IDs
@@ -299,6 +515,11 @@ class _DataRoot:
         self._grid_starts_first: _GridXAxisT = []  # X axis is range starts, Y axis is ends
         self._grid_ends_first: _GridXAxisT = []  # X axis is range ends, Y axis is starts
 
+    def get_data(self, data_range: Range) -> bytes:
+        if self._data is None and data_range.length() < self.length:
+            return cast(LazyData, self._lazy_data).read(data_range)
+        return self.data[data_range.start : data_range.end]
+
     def get_children(self) -> Iterable[DataModel]:
         return self._children.values()
 
@@ -1,19 +1,20 @@
 from abc import ABCMeta, abstractmethod
-from typing import List, Iterable, Optional
+from typing import List, Iterable, Optional, Pattern, Tuple, Union, overload
 
-from ofrak.model.data_model import DataModel, DataPatch, DataPatchesResult
+from ofrak.model.data_model import DataModel, DataPatch, DataPatchesResult, LazyData
 from ofrak.service.abstract_ofrak_service import AbstractOfrakService
 from ofrak_type.range import Range
 
 
 class DataServiceInterface(AbstractOfrakService, metaclass=ABCMeta):
     @abstractmethod
-    async def create_root(self, data_id: bytes, data: bytes) -> DataModel:
+    async def create_root(self, data_id: bytes, data: Union[bytes, LazyData]) -> DataModel:
         """
         Create a root data model with its own data bytes.
 
         :param data_id: Unique ID for the new data model
-        :param data: Binary data belonging to the new data model
+        :param data: Binary data belonging to the new data model, either as bytes or as
+        [LazyData][ofrak.model.data_model.LazyData] which is only read as needed
 
         :return: The new data model object
 
@@ -137,6 +138,69 @@ class DataServiceInterface(AbstractOfrakService, metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    @overload
+    async def search(
+        self,
+        data_id: bytes,
+        query: bytes,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        max_matches: Optional[int] = None,
+    ) -> Tuple[int, ...]:
+        ...
+
+    @overload
+    async def search(
+        self,
+        data_id: bytes,
+        query: Pattern[bytes],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        max_matches: Optional[int] = None,
+    ) -> Tuple[Tuple[int, bytes], ...]:
+        ...
+
+    @abstractmethod
+    async def search(self, data_id, query, start=None, end=None, max_matches=None):
+        """
+        Search the data of a model for some bytes or a regular expression. All occurrences of bytes
+        are found, even if they overlap; the matches of a regular expression are found as by
+        `re.finditer`, as if the range of the data searched was all the data.
+
+        :param data_id: A unique ID for a data model
+        :param query: The bytes or the compiled regular expression (on bytes) to search for
+        :param start: Offset in the model's data where the search starts (0 by default)
+        :param end: Offset in the model's data where the search ends (the end of the data by
+        default); occurrences must end before it
+        :param max_matches: The maximum number of occurrences or matches to find
+
+        :return: The offsets of the occurrences of the bytes, or the offsets and bytes of the
+        matches of the regular expression, in order, relative to the model's data
+
+        :raises NotFoundError: if `data_id` is not associated with any known model
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def enable_search_index(self):
+        """
+        Start indexing the data of each root model, so that searches with `search` only read the
+        parts of the data which may contain what they search for. The data of new root models is
+        indexed in the background as they are created, and other root models start being indexed the
+        first time they are searched. Searches read all the searched data until its index is built,
+        rather than waiting for it. Indexes are updated as data is patched.
+
+        :raises ModuleNotFoundError: if NumPy, which indexes the data, is not installed
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def disable_search_index(self):
+        """
+        Stop indexing data and drop the existing indexes.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def apply_patches(
         self,
@@ -1,6 +1,6 @@
 import functools
 import logging
-from typing import Set, List, Iterable, Dict, cast
+from typing import Set, List, Iterable, Dict, Optional, Tuple, cast
 
 from ofrak.model.component_model import ComponentContext
 from ofrak.model.data_model import DataPatchesResult, DataModel
@@ -9,6 +9,8 @@ from ofrak.model.resource_model import (
     ResourceAttributeDependency,
     MutableResourceModel,
     Data,
+    ComponentRun,
+    StaleResource,
 )
 from ofrak.service.data_service_i import DataServiceInterface
 from ofrak.service.resource_service_i import ResourceServiceInterface
@@ -140,6 +142,7 @@ class DependencyHandler:
     def create_resource_dependencies(
         self,
         component_id: bytes,
+        target_resource_id: Optional[bytes] = None,
     ):
         """
         Register dependencies between a resource with some attributes and the resources which
@@ -153,10 +156,22 @@ class DependencyHandler:
         Whenever a [Modifier][ofrak.component.modifier.Modifier] is run, these resource attribute
         dependencies are invalidated so as to force analysis to be rerun.
 
+        If the component recorded that it ran on the target resource but did not add any attributes
+        to it (like an identifier or an unpacker), a dependency on the run itself is also
+        registered, using [ComponentRun][ofrak.model.resource_model.ComponentRun] as a stand-in for
+        the attributes. When it is invalidated, the component is allowed to run again. Likewise,
+        each resource created by the component depends on the data the component read through
+        [StaleResource][ofrak.model.resource_model.StaleResource], which is added to the resource
+        when that dependency is invalidated. A resource created mapping a range of its parent's
+        data only depends on what the component read in that range, so that modifying the data of
+        one child of an unpacked resource does not make its siblings stale.
+
         :param bytes component_id:
+        :param bytes target_resource_id: ID of the resource the component ran on, if any
         """
         self._validate_resource_context_complete()
         resource_dependencies = []
+        mapped_stale_dependencies: List[Tuple[bytes, Range, ResourceAttributeDependency]] = []
 
         # Create dependency for each attribute on newly created resources
         for resource_id in self._component_context.resources_created:
@@ -169,6 +184,20 @@ class DependencyHandler:
                         attributes,
                     )
                 )
+            if target_resource_id is not None:
+                stale_dependency = ResourceAttributeDependency(
+                    resource_id,
+                    component_id,
+                    StaleResource,
+                )
+                mapping = self._component_context.mapped_resources_created.get(resource_id)
+                if (
+                    mapping is not None
+                    and mapping[0] not in self._component_context.resources_created
+                ):
+                    mapped_stale_dependencies.append((*mapping, stale_dependency))
+                else:
+                    resource_dependencies.append(stale_dependency)
 
         # Create dependency for each new attribute on modified resources
         for resource_id in self._component_context.modification_trackers.keys():
@@ -182,6 +211,24 @@ class DependencyHandler:
                     )
                 )
 
+        # Create dependency for the run itself if its results are not attributes of the target
+        if target_resource_id is not None and all(
+            resource_dependency.dependent_resource_id != target_resource_id
+            for resource_dependency in resource_dependencies
+        ):
+            target_resource_m = self._resource_context.resource_models.get(target_resource_id)
+            if (
+                target_resource_m is not None
+                and target_resource_m.get_component_version(component_id) is not None
+            ):
+                resource_dependencies.append(
+                    ResourceAttributeDependency(
+                        target_resource_id,
+                        component_id,
+                        ComponentRun,
+                    )
+                )
+
         # Add dependencies to all resources which were accessed
         for resource_id, access_tracker in self._component_context.access_trackers.items():
             if resource_id in self._component_context.resources_created:
@@ -199,6 +246,15 @@ class DependencyHandler:
             for accessed_range in merged_accessed_ranges:
                 for resource_dependency in resource_dependencies:
                     accessed_resource_m.add_data_dependency(resource_dependency, accessed_range)
+            # Add data dependency of mapped resources on the accessed data in the range they map
+            for parent_id, mapped_range, stale_dependency in mapped_stale_dependencies:
+                if parent_id != resource_id:
+                    continue
+                for accessed_range in merged_accessed_ranges:
+                    if accessed_range.overlaps(mapped_range):
+                        accessed_resource_m.add_data_dependency(
+                            stale_dependency, accessed_range.intersect(mapped_range)
+                        )
 
     def _validate_resource_context_complete(self):
         for resource_id in self._component_context.resources_created:
@@ -279,13 +335,28 @@ class DependencyHandler:
 
             # The component id is not necessarily present. It could have been invalidated already
             # by a previous patch that impacted other resources that this resource depends on.
-            if resource_m.get_component_id_by_attributes(dependency.attributes):
+            if dependency.attributes is ComponentRun:
+                # Forget that the component ran, so that it is allowed to run again
+                if resource_m.get_component_version(dependency.component_id) is not None:
+                    LOGGER.debug(
+                        f"Invalidating run of {dependency.component_id!r} on resource "
+                        f"{dependency.dependent_resource_id.hex()}"
+                    )
+                    resource_m.remove_component(dependency.component_id, None)
+                    self._component_context.mark_resource_modified(resource_m.id)
+            elif dependency.attributes is StaleResource:
+                # The component which created the resource would not create it the same way again
+                if not resource_m.has_attributes(StaleResource):
+                    LOGGER.debug(f"Marking resource {resource_m.id.hex()} as stale")
+                    resource_m.add_attributes(StaleResource(dependency.component_id))
+                    self._component_context.mark_resource_modified(resource_m.id)
+            elif resource_m.get_component_id_by_attributes(dependency.attributes):
                 resource_m.remove_component(dependency.component_id, dependency.attributes)
                 self._component_context.mark_resource_modified(resource_m.id)
 
             # Find other dependencies to invalidate due to the invalidation of the attributes
             invalidated_dependencies = set()
-            for next_dependency in resource_m.attribute_dependencies[dependency.attributes]:
+            for next_dependency in resource_m.attribute_dependencies.get(dependency.attributes, ()):
                 # Make sure the dependency wasn't already handled
                 if next_dependency not in handled_dependencies:
                     LOGGER.debug(
@@ -1,24 +1,27 @@
 import asyncio
 import logging
 from collections import defaultdict
-from dataclasses import dataclass
-from functools import lru_cache
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from typing import (
     Awaitable,
     Dict,
     Iterable,
     List,
     Optional,
+    Sequence,
     Set,
     Tuple,
     TypeVar,
     Union,
     cast,
     Any,
+    Type,
 )
 
 from ofrak.component.unpacker import Unpacker
 
+from ofrak.component.abstract import AbstractBatchComponent
 from ofrak.component.analyzer import Analyzer
 from ofrak.component.identifier import Identifier
 from ofrak.component.interface import ComponentInterface
@@ -34,8 +37,13 @@ from ofrak.model.job_request_model import (
     JobComponentRequest,
     JobMultiComponentRequest,
 )
-from ofrak.model.resource_model import EphemeralResourceContextFactory
+from ofrak.model.resource_model import (
+    EphemeralResourceContextFactory,
+    ResourceModel,
+    StaleResource,
+)
 from ofrak.model.tag_model import ResourceTag
+from ofrak.model.telemetry_model import JobTelemetry, measure_component_run
 from ofrak.model.viewable_tag_model import ResourceViewContext
 from ofrak.service.component_locator_i import (
     ComponentLocatorInterface,
@@ -73,14 +81,46 @@ UNPACKERS_FILTER = ComponentTypeFilter(Unpacker)  # type: ignore
 PACKERS_FILTER = ComponentTypeFilter(Packer)  # type: ignore
 
 M = TypeVar("M")
+R = TypeVar("R")
 
 _RunTaskResultT = Tuple[Union[ComponentRunResult, BaseException], M]
 
 
 @dataclass
 class _ComponentAutoRunRequest:
+    """
+    Request to run all components matching a filter on a resource.
+
+    If `target_tags` is given, the filter is only applied to the components which target at least
+    one of those tags (optionally restricted to the `target_category` component type), looked up
+    in the component locator's index. This is only valid if the filter never allows a component
+    which does not target one of `target_tags`, as is the case for filters built with
+    `_build_tag_filter(target_tags)`.
+
+    Components whose version is recorded in `component_versions_run` are known to have already
+    run on the resource, and are skipped.
+    """
+
     target_resource_id: bytes
     component_filter: ComponentFilter
+    target_tags: Optional[Tuple[ResourceTag, ...]] = None
+    target_category: Optional[Type[ComponentInterface]] = None
+    component_versions_run: Optional[Dict[bytes, int]] = None
+
+
+@dataclass
+class _ComponentBatch:
+    """
+    Runs of a batch component which are waiting to be passed to it in a single call. Each run is
+    the ID of the target resource, the job context of the run, the metadata to return with its
+    result, and the future to set with that result.
+    """
+
+    component: AbstractBatchComponent
+    job_id: bytes
+    runs: List[Tuple[bytes, JobRunContext, Any, "asyncio.Future[_RunTaskResultT]"]] = field(
+        default_factory=list
+    )
 
 
 class JobService(JobServiceInterface):
@@ -98,12 +138,62 @@ class JobService(JobServiceInterface):
         self._job_context_factory = job_context_factory
 
         self._active_component_tasks: Dict[Tuple[bytes, bytes], Awaitable[_RunTaskResultT]] = dict()
+        self._pending_component_batches: Dict[Tuple[bytes, bytes], _ComponentBatch] = dict()
+        self._component_batch_tasks: Set[Awaitable[None]] = set()
+        self._telemetry_enabled = False
+        self._job_telemetry: Dict[bytes, JobTelemetry] = dict()
 
     async def create_job(self, id: bytes, name: str) -> JobModel:
         model = JobModel(id, name)
         self._job_store[id] = model
         return model
 
+    def enable_telemetry(self):
+        self._telemetry_enabled = True
+
+    def disable_telemetry(self):
+        self._telemetry_enabled = False
+
+    def get_job_telemetry(self, job_id: bytes) -> JobTelemetry:
+        job_telemetry = self._job_telemetry.get(job_id)
+        if job_telemetry is None:
+            return JobTelemetry(job_id)
+        return job_telemetry
+
+    def pop_job_telemetry(self, job_id: bytes) -> JobTelemetry:
+        job_telemetry = self._job_telemetry.pop(job_id, None)
+        if job_telemetry is None:
+            return JobTelemetry(job_id)
+        return job_telemetry
+
+    def clear_telemetry(self):
+        self._job_telemetry.clear()
+
+    async def _measure_run(
+        self,
+        job_id: bytes,
+        component: ComponentInterface,
+        resource_ids: Sequence[bytes],
+        run: Awaitable[R],
+    ) -> R:
+        """
+        Await a component run, measuring it if telemetry is enabled.
+        """
+        if not self._telemetry_enabled:
+            return await run
+        job_telemetry = self._job_telemetry.get(job_id)
+        if job_telemetry is None:
+            job_telemetry = JobTelemetry(job_id)
+            self._job_telemetry[job_id] = job_telemetry
+        with measure_component_run(
+            job_telemetry, component.get_id(), resource_ids
+        ) as run_telemetry:
+            try:
+                return await run
+            except Exception:
+                run_telemetry.errors += 1
+                raise
+
     async def _run_component(
         self,
         metadata: M,
@@ -130,15 +220,21 @@ class JobService(JobServiceInterface):
         fresh_resource_view_context = ResourceViewContext()
         result: Union[ComponentRunResult, BaseException]
         try:
-            result = await component.run(
+            run_result = await self._measure_run(
                 job_id,
-                resource_id,
-                job_context,
-                fresh_resource_context,
-                fresh_resource_view_context,
-                config,
+                component,
+                (resource_id,),
+                component.run(
+                    job_id,
+                    resource_id,
+                    job_context,
+                    fresh_resource_context,
+                    fresh_resource_view_context,
+                    config,
+                ),
             )
-            _log_component_run_result_info(job_id, resource_id, component, result)
+            _log_component_run_result_info(job_id, resource_id, component, run_result)
+            result = run_result
         except Exception as e:
             result = e
         component_task_id = (resource_id, component.get_id())
@@ -165,6 +261,14 @@ class JobService(JobServiceInterface):
             duplicate_task = self._active_component_tasks[component_task_id]
 
             return duplicate_task
+        elif config is None and isinstance(component, AbstractBatchComponent):
+            component_task = self._add_run_to_component_batch(
+                metadata,
+                job_id,
+                resource_id,
+                component,
+                job_context,
+            )
         else:
             component_task = asyncio.create_task(
                 self._run_component(
@@ -176,8 +280,120 @@ class JobService(JobServiceInterface):
                     config,
                 )
             )
-            self._active_component_tasks[component_task_id] = component_task
-            return component_task
+        self._active_component_tasks[component_task_id] = component_task
+        return component_task
+
+    def _add_run_to_component_batch(
+        self,
+        metadata: Any,
+        job_id: bytes,
+        resource_id: bytes,
+        component: AbstractBatchComponent,
+        job_context: JobRunContext,
+    ) -> Awaitable[_RunTaskResultT]:
+        """
+        Add a run of a batch component to the pending batch of runs of that component, creating
+        the batch (and the task which will run it) if there is none.
+        """
+        batch_key = (component.get_id(), job_id)
+        batch = self._pending_component_batches.get(batch_key)
+        if batch is None:
+            batch = _ComponentBatch(component, job_id)
+            self._pending_component_batches[batch_key] = batch
+            batch_task = asyncio.create_task(self._run_component_batch(batch_key, batch))
+            self._component_batch_tasks.add(batch_task)
+            batch_task.add_done_callback(partial(self._finish_component_batch, batch_key, batch))
+        run_result: "asyncio.Future[_RunTaskResultT]" = asyncio.get_running_loop().create_future()
+        batch.runs.append((resource_id, job_context, metadata, run_result))
+        return run_result
+
+    async def _run_component_batch(self, batch_key: Tuple[bytes, bytes], batch: _ComponentBatch):
+        """
+        Run a batch component on all the resources in the batch, and set the result of each run.
+
+        Runs keep being added to the batch until a full iteration of the event loop passes without
+        any new run, so all the runs needed by tasks running concurrently (for example, the
+        analyses started by the same `asyncio.gather`) are part of the batch.
+        """
+        n_runs = 0
+        while n_runs != len(batch.runs):
+            n_runs = len(batch.runs)
+            await asyncio.sleep(0)
+        del self._pending_component_batches[batch_key]
+        component = batch.component
+        if len(batch.runs) == 1:
+            ((resource_id, job_context, metadata, run_result),) = batch.runs
+            run_result.set_result(
+                await self._run_component(
+                    metadata, batch.job_id, resource_id, component, job_context, None
+                )
+            )
+            return
+
+        resource_ids = [resource_id for resource_id, _, _, _ in batch.runs]
+        LOGGER.info(
+            f"JOB {batch.job_id.hex()} - Running {component.get_id().decode()} on "
+            f"{len(resource_ids)} resources"
+        )
+        results: Sequence[Union[ComponentRunResult, BaseException]]
+        try:
+            results = await self._measure_run(
+                batch.job_id,
+                component,
+                resource_ids,
+                component.run_batch(
+                    batch.job_id,
+                    resource_ids,
+                    [job_context for _, job_context, _, _ in batch.runs],
+                    self._resource_context_factory.create(),
+                    ResourceViewContext(),
+                    None,
+                ),
+            )
+            for resource_id, result in zip(resource_ids, results):
+                _log_component_run_result_info(
+                    batch.job_id, resource_id, component, cast(ComponentRunResult, result)
+                )
+        except Exception as e:
+            LOGGER.warning(
+                f"JOB {batch.job_id.hex()} - {component.get_id().decode()} failed on "
+                f"{len(resource_ids)} resources ({e!r}), running it on each resource alone"
+            )
+            # The failed batch saved nothing, so run each resource alone, so that only the runs
+            # which fail on their own fail
+            run_task_results = await asyncio.gather(
+                *(
+                    self._run_component(
+                        metadata, batch.job_id, resource_id, component, job_context, None
+                    )
+                    for resource_id, job_context, metadata, _ in batch.runs
+                )
+            )
+            for (_, _, _, run_result), run_task_result in zip(batch.runs, run_task_results):
+                run_result.set_result(run_task_result)
+            return
+        for (resource_id, _, metadata, run_result), result in zip(batch.runs, results):
+            del self._active_component_tasks[(resource_id, component.get_id())]
+            run_result.set_result((result, metadata))
+
+    def _finish_component_batch(
+        self, batch_key: Tuple[bytes, bytes], batch: _ComponentBatch, batch_task: asyncio.Task
+    ):
+        """
+        Once the task running a batch is done, cancel the runs it did not finish (if it was
+        cancelled, possibly before it even started), so that nothing waits for them forever, and
+        allow them to run again.
+        """
+        self._component_batch_tasks.discard(batch_task)
+        if self._pending_component_batches.get(batch_key) is batch:
+            del self._pending_component_batches[batch_key]
+        for resource_id, _, _, run_result in batch.runs:
+            if run_result.done():
+                continue
+            component_task_id = (resource_id, batch.component.get_id())
+            if self._active_component_tasks.get(component_task_id) is run_result:
+                del self._active_component_tasks[component_task_id]
+            run_result.cancel()
 
     async def run_component(
         self,
@@ -210,17 +426,18 @@ class JobService(JobServiceInterface):
             job_context = self._job_context_factory.create()
 
         target_resource_model = await self._resource_service.get_by_id(request.resource_id)
+        target_tags = tuple(target_resource_model.get_tags())
         # There may be an analyzer that outputs ALL the requested attributes at once
         # If there is (as is usually the case for views), only run that one
         one_analyzer_for_all_attributes: ComponentFilter = ComponentAndMetaFilter(
             AnalyzerOutputFilter(*request.attributes),
-            _build_tag_filter(tuple(target_resource_model.get_tags())),
+            _build_tag_filter(target_tags),
         )
         # Otherwise, look for individual analyzers for each attributes type
         analyzer_for_each_attribute: List[ComponentFilter] = [
             ComponentAndMetaFilter(
                 AnalyzerOutputFilter(attr_t),
-                _build_tag_filter(tuple(target_resource_model.get_tags())),
+                _build_tag_filter(target_tags),
             )
             for attr_t in request.attributes
         ]
@@ -238,6 +455,8 @@ class JobService(JobServiceInterface):
                 _ComponentAutoRunRequest(
                     request.resource_id,
                     component_filter,
+                    target_tags,
+                    Analyzer,
                 ),
             ),
             request.job_id,
@@ -280,6 +499,7 @@ class JobService(JobServiceInterface):
                     _ComponentAutoRunRequest(
                         request.resource_id,
                         final_filter,
+                        tags_to_target,
                     ),
                 ),
                 request.job_id,
@@ -299,16 +519,29 @@ class JobService(JobServiceInterface):
         components_result = ComponentRunResult()
         component_filter = _build_auto_run_filter(request)
 
-        initial_target_resource_models = await self._get_initial_recursive_target_resources(
-            request.resource_id, component_filter
+        initial_target_resource_models = list(
+            await self._get_initial_recursive_target_resources(
+                request.resource_id, component_filter
+            )
         )
+        # Stale resources will be deleted and replaced when their parent is unpacked again, so
+        # there is no point running anything on them or their descendants
+        stale_resource_ids = _get_stale_subtrees(initial_target_resource_models)
 
         # Create a mock context to match all existing tags
         previous_job_context: JobRunContext = self._job_context_factory.create()
+        # Results of components which already ran on the existing resources are reused, and only
+        # components which never ran (or whose results were invalidated) run again
+        component_versions_run: Dict[bytes, Dict[bytes, int]] = dict()
         for existing_resource_model in initial_target_resource_models:
+            if existing_resource_model.id in stale_resource_ids:
+                continue
             previous_job_context.trackers[existing_resource_model.id].tags_added.update(
                 existing_resource_model.tags
             )
+            component_versions_run[existing_resource_model.id] = dict(
+                existing_resource_model.component_versions
+            )
         iterations = 0
         tags_added_count = 1  # initialize just so loop starts
 
@@ -316,16 +549,21 @@ class JobService(JobServiceInterface):
             job_context = self._job_context_factory.create()
             _run_components_requests = []
             for resource_id, previous_tracker in previous_job_context.trackers.items():
+                tags_added = tuple(previous_tracker.tags_added)
                 final_filter = ComponentAndMetaFilter(
                     component_filter,
-                    _build_tag_filter(tuple(previous_tracker.tags_added)),
+                    _build_tag_filter(tags_added),
                 )
                 _run_components_requests.append(
                     _ComponentAutoRunRequest(
                         resource_id,
                         final_filter,
+                        tags_added,
+                        component_versions_run=component_versions_run.get(resource_id),
                     )
                 )
+            # Only the existing resources' models are known up front
+            component_versions_run = dict()
 
             iteration_components_result = await self._auto_run_components(
                 _run_components_requests,
@@ -333,6 +571,10 @@ class JobService(JobServiceInterface):
                 job_context,
             )
             components_result.update(iteration_components_result)
+            # Resources deleted in this iteration (like the stale children of a resource unpacked
+            # again) must not be targeted in the next one
+            for resource_id in iteration_components_result.resources_deleted:
+                job_context.trackers.pop(resource_id, None)
 
             tags_added_count = 0
             for resource_id, tracker in job_context.trackers.items():
@@ -380,14 +622,17 @@ class JobService(JobServiceInterface):
 
         for depth in sorted(resources_by_depth.keys(), reverse=True):
             for resource in resources_by_depth[depth]:
+                resource_tags = tuple(resource.get_tags())
                 component_filter: ComponentFilter = ComponentAndMetaFilter(
                     PACKERS_FILTER,
-                    _build_tag_filter(tuple(resource.get_tags())),
+                    _build_tag_filter(resource_tags),
                 )
 
                 request = _ComponentAutoRunRequest(
                     resource.id,
                     component_filter,
+                    resource_tags,
+                    Packer,
                 )
 
                 component_result = await self._auto_run_components(
@@ -417,6 +662,20 @@ class JobService(JobServiceInterface):
         )
         return initial_target_resource_models
 
+    def _get_components_for_request(
+        self, request: _ComponentAutoRunRequest
+    ) -> Set[ComponentInterface]:
+        if request.target_tags is None:
+            return self._component_locator.get_components_matching_filter(request.component_filter)
+        # Only the (few) components targeting the resource's tags can pass the filter, so find
+        # them in the locator's index instead of filtering all registered components
+        candidate_components = self._component_locator.get_components_targeting(
+            request.target_tags, request.target_category
+        )
+        if not candidate_components:
+            return candidate_components
+        return request.component_filter.filter(candidate_components)
+
     async def _auto_run_components(
         self,
         requests: Iterable[_ComponentAutoRunRequest],
@@ -425,9 +684,7 @@ class JobService(JobServiceInterface):
     ) -> ComponentRunResult:
         queue: List[Tuple[_ComponentAutoRunRequest, ComponentInterface]] = []
         for request in requests:
-            components = self._component_locator.get_components_matching_filter(
-                request.component_filter
-            )
+            components = self._get_components_for_request(request)
             if not components:
                 if LOGGER.isEnabledFor(logging.DEBUG):
                     LOGGER.debug(
@@ -437,32 +694,69 @@ class JobService(JobServiceInterface):
                     )
             else:
                 for component in components:
+                    if (
+                        request.component_versions_run is not None
+                        and request.component_versions_run.get(component.get_id())
+                        == component.get_version()
+                    ):
+                        continue
                     queue.append((request, component))
 
-        concurrent_run_tasks: List[Awaitable[_RunTaskResultT]] = list()
+        # Runs of batch components are all merged into one task per component, so all the runs of
+        # a batch component are started together, and only count as one run against the limit
+        run_groups: List[List[Tuple[_ComponentAutoRunRequest, ComponentInterface]]] = []
+        batch_run_groups: Dict[
+            bytes, List[Tuple[_ComponentAutoRunRequest, ComponentInterface]]
+        ] = {}
+        for request, component in queue:
+            if not isinstance(component, AbstractBatchComponent):
+                run_groups.append([(request, component)])
+                continue
+            batch_run_group = batch_run_groups.get(component.get_id())
+            if batch_run_group is None:
+                batch_run_group = []
+                batch_run_groups[component.get_id()] = batch_run_group
+                run_groups.append(batch_run_group)
+            batch_run_group.append((request, component))
+
+        concurrent_run_tasks: Set[Awaitable[_RunTaskResultT]] = set()
+        # Number of unfinished runs of the group each task belongs to
+        run_group_remaining: Dict[Awaitable[_RunTaskResultT], List[int]] = dict()
+
+        def start_run_group():
+            group_tasks = {
+                self._create_run_component_task(
+                    (request, type(component).__name__),
+                    job_id,
+                    request.target_resource_id,
+                    component,
+                    job_context,
+                )
+                for request, component in run_groups.pop()
+            }
+            remaining = [len(group_tasks)]
+            for group_task in group_tasks:
+                run_group_remaining[group_task] = remaining
+            concurrent_run_tasks.update(group_tasks)
 
-        n_tasks_to_add = min(MAX_CONCURRENT_COMPONENTS, len(queue))
-        for _ in range(n_tasks_to_add):
-            request, component = queue.pop()
-            run_component_task = self._create_run_component_task(
-                (request, type(component).__name__),
-                job_id,
-                request.target_resource_id,
-                component,
-                job_context,
-            )
-            concurrent_run_tasks.append(run_component_task)
+        for _ in range(min(MAX_CONCURRENT_COMPONENTS, len(run_groups))):
+            start_run_group()
 
         components_result = ComponentRunResult(set(), set(), set(), set())
-        while len(queue) > 0 or len(concurrent_run_tasks) > 0:
+        while len(run_groups) > 0 or len(concurrent_run_tasks) > 0:
             completed, pending = await asyncio.wait(
                 concurrent_run_tasks, return_when=asyncio.FIRST_COMPLETED
             )
             LOGGER.debug(
                 f"Completed {len(completed)} component run tasks, {len(pending)} pending and "
-                f"{len(queue)} still in queue"
+                f"{len(run_groups)} still in queue"
             )
+            n_groups_completed = 0
             for completed_task in completed:
+                remaining = run_group_remaining.pop(completed_task)
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    n_groups_completed += 1
                 component_run_result, component_run_metadata = completed_task.result()
                 if isinstance(component_run_result, ComponentRunResult):
                     components_result.update(component_run_result)
@@ -475,18 +769,9 @@ class JobService(JobServiceInterface):
                         component_name.encode(),
                     )
 
-            concurrent_run_tasks = list(pending)
-            n_tasks_to_add = min(len(completed), len(queue))
-            for _ in range(n_tasks_to_add):
-                request, component = queue.pop()
-                run_component_task = self._create_run_component_task(
-                    (request, type(component).__name__),
-                    job_id,
-                    request.target_resource_id,
-                    component,
-                    job_context,
-                )
-                concurrent_run_tasks.append(run_component_task)
+            concurrent_run_tasks = set(pending)
+            for _ in range(min(n_groups_completed, len(run_groups))):
+                start_run_group()
 
         return components_result
 
@@ -532,6 +817,40 @@ def _log_component_run_result_info(
     )
 
 
+def _get_stale_subtrees(resource_models: Iterable[ResourceModel]) -> Set[bytes]:
+    """
+    Find which of the given resources are stale, or descend from a stale resource.
+
+    :param resource_models: Models of resources, with their ancestors appearing among them
+
+    :return: The IDs of the resources which are stale or have a stale ancestor
+    """
+    models_by_id = {resource_model.id: resource_model for resource_model in resource_models}
+    is_stale_by_id: Dict[bytes, bool] = dict()
+
+    def is_stale(resource_id: bytes) -> bool:
+        path = []
+        stale = False
+        current_id: Optional[bytes] = resource_id
+        while current_id is not None:
+            if current_id in is_stale_by_id:
+                stale = is_stale_by_id[current_id]
+                break
+            resource_model = models_by_id.get(current_id)
+            if resource_model is None:
+                break
+            path.append(current_id)
+            if resource_model.has_attributes(StaleResource):
+                stale = True
+                break
+            current_id = resource_model.parent_id
+        for path_id in path:
+            is_stale_by_id[path_id] = stale
+        return stale
+
+    return {resource_id for resource_id in models_by_id if is_stale(resource_id)}
+
+
 @lru_cache(None)
 def _build_tag_filter(tags: Tuple[ResourceTag]) -> ComponentFilter:
     """
@@ -11,6 +11,7 @@ from ofrak.model.job_request_model import (
     JobComponentRequest,
     JobMultiComponentRequest,
 )
+from ofrak.model.telemetry_model import JobTelemetry
 from ofrak.service.abstract_ofrak_service import AbstractOfrakService
 from ofrak.service.component_locator_i import ComponentFilter
 
@@ -24,6 +25,49 @@ class JobServiceInterface(AbstractOfrakService, metaclass=ABCMeta):
     async def create_job(self, id: bytes, name: str) -> JobModel:
         pass
 
+    @abstractmethod
+    def enable_telemetry(self):
+        """
+        Start measuring each component run: its wall and CPU time, the CPU time of its
+        subprocesses, how much data it read and wrote and how many resources it created. This adds
+        a small overhead to each component run, so it is disabled by default.
+        """
+
+    @abstractmethod
+    def disable_telemetry(self):
+        """
+        Stop measuring component runs. The measurements made so far are kept.
+        """
+
+    @abstractmethod
+    def get_job_telemetry(self, job_id: bytes) -> JobTelemetry:
+        """
+        Get the measurements of the component runs in a job made while telemetry was enabled. They
+        are kept until they are popped with `pop_job_telemetry` or cleared with `clear_telemetry`.
+
+        :param job_id: ID of the job
+
+        :return: The measurements of each component run in the job, which can be summed up per
+        component or exported as JSON or as a Chrome trace
+        """
+
+    @abstractmethod
+    def pop_job_telemetry(self, job_id: bytes) -> JobTelemetry:
+        """
+        Get the measurements of the component runs in a job made while telemetry was enabled, and
+        forget them, so that the measurements of the next runs in the job start over.
+
+        :param job_id: ID of the job
+
+        :return: The measurements of each component run in the job since they were last popped
+        """
+
+    @abstractmethod
+    def clear_telemetry(self):
+        """
+        Forget the measurements of the component runs in all jobs.
+        """
+
     @abstractmethod
     async def run_component(
         self,
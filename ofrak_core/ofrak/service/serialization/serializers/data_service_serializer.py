@@ -77,4 +77,7 @@ class DataServiceSerializer(SerializerInterface):
         data_service: DataService = DataService.__new__(DataService)
         data_service._model_store = model_store
         data_service._roots = roots
+        # Search indexes are not serialized; they can be enabled again on the deserialized service
+        data_service._search_indexes = {}
+        data_service._search_index_executor = None
         return data_service
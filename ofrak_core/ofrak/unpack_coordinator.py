@@ -0,0 +1,370 @@
+import asyncio
+import importlib
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
+
+from ofrak_type.range import Range
+
+from ofrak.component.interface import ComponentInterface
+from ofrak.core.filesystem import File
+from ofrak.model.component_model import ComponentRunResult
+from ofrak.model.job_request_model import JobMultiComponentRequest
+from ofrak.model.resource_model import Data, ResourceAttributes, ResourceModel
+from ofrak.model.tag_model import ResourceTag
+from ofrak.ofrak_context import OFRAK, OFRAKContext
+from ofrak.resource import Resource
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _SubtreeUnpackRequest:
+    """
+    Request sent to a worker to recursively unpack a resource, given its data, tags and attributes.
+    """
+
+    data: bytes
+    tags: Tuple[ResourceTag, ...]
+    attributes: Tuple[ResourceAttributes, ...]
+    components_disallowed: Tuple[bytes, ...]
+    tags_ignored: Tuple[ResourceTag, ...]
+
+
+@dataclass(frozen=True)
+class _SubtreeResource:
+    """
+    A resource of an unpacked subtree, as sent back by a worker. Its parent is the resource at
+    `parent_index` in the subtree, and its data either maps `data_range` of its parent's data or is
+    `data`; if both are `None`, the resource has no data.
+    """
+
+    parent_index: int
+    tags: Tuple[ResourceTag, ...]
+    attributes: Tuple[ResourceAttributes, ...]
+    data: Optional[bytes] = None
+    data_range: Optional[Range] = None
+
+
+@dataclass(frozen=True)
+class _SubtreeUnpackResult:
+    """
+    Result of a `_SubtreeUnpackRequest`. The tags and attributes of the unpacked resource itself
+    are in `root_tags` and `root_attributes`, and its descendants are listed in `resources` in an
+    order where each resource comes after its parent. A `parent_index` of 0 refers to the unpacked
+    resource itself, and `i > 0` to `resources[i - 1]`.
+    """
+
+    root_tags: Tuple[ResourceTag, ...]
+    root_attributes: Tuple[ResourceAttributes, ...]
+    resources: Tuple[_SubtreeResource, ...]
+    components_run: Tuple[bytes, ...]
+
+
+class UnpackCoordinator:
+    """
+    Recursively unpack resources with the help of a pool of local worker processes.
+
+    The coordinator owns the resource tree: it unpacks the target resource in the OFRAK context
+    it was created with, and each time unpacking creates a resource rooting an independent subtree
+    (by default, each file extracted from a filesystem or archive), it sends that resource's data,
+    tags and attributes to a worker. The worker, which has its own OFRAK context, recursively
+    unpacks the resource, then sends back the resources it created, which the coordinator adds to
+    its own tree as soon as they arrive.
+
+    Only the tags, attributes and data of the resources are sent back, so components which ran in a
+    worker are not known to have run on the resources of the coordinator, and their results are not
+    invalidated when the resources are modified.
+
+    The workers discover the core OFRAK components, as well as the components in `worker_modules`;
+    these should be the same modules which were discovered to create the coordinator's OFRAK
+    context.
+
+    ```python
+    async with UnpackCoordinator(ofrak_context, worker_count=8) as coordinator:
+        await coordinator.unpack_recursively(root_resource)
+    ```
+    """
+
+    def __init__(
+        self,
+        ofrak_context: OFRAKContext,
+        worker_count: Optional[int] = None,
+        worker_modules: Iterable[str] = (),
+        exclude_components_missing_dependencies: bool = False,
+    ):
+        """
+        :param ofrak_context: OFRAK context owning the resources to unpack
+        :param worker_count: Number of worker processes; defaults to the number of CPUs
+        :param worker_modules: Names of the modules to discover in each worker, in addition to the
+        core OFRAK components
+        :param exclude_components_missing_dependencies: Whether workers should exclude components
+        missing some dependencies, as in [OFRAK][ofrak.ofrak_context.OFRAK]
+        """
+        self._ofrak_context = ofrak_context
+        self._worker_count = worker_count
+        self._worker_modules = tuple(worker_modules)
+        self._exclude_components_missing_dependencies = exclude_components_missing_dependencies
+        self._executor: Optional[Executor] = None
+
+    def start(self):
+        """
+        Start the worker processes.
+        """
+        if self._executor is not None:
+            return
+        # Workers run their own event loop, so they must not inherit the coordinator's by forking
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker,
+            initargs=(self._worker_modules, self._exclude_components_missing_dependencies),
+        )
+
+    def shutdown(self):
+        """
+        Stop the worker processes, after they finish unpacking the subtrees they were sent.
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown()
+        self._executor = None
+
+    async def __aenter__(self) -> "UnpackCoordinator":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+
+    async def unpack_recursively(
+        self,
+        resource: Resource,
+        subtree_tags: Iterable[ResourceTag] = (File,),
+        blacklisted_components: Iterable[Type[ComponentInterface]] = tuple(),
+        do_not_unpack: Iterable[ResourceTag] = tuple(),
+    ) -> ComponentRunResult:
+        """
+        Recursively unpack a resource, like
+        [Resource.unpack_recursively][ofrak.resource.Resource.unpack_recursively], but unpacking
+        independent subtrees in the worker processes.
+
+        Resources are unpacked in the coordinator, one level at a time, until unpacking creates
+        resources with data and no children which have one of `subtree_tags`. These resources are
+        unpacked recursively by the workers, while the coordinator keeps unpacking the others.
+
+        :param resource: Resource to unpack recursively
+        :param subtree_tags: Tags of the resources rooting subtrees which are unpacked by workers
+        :param blacklisted_components: Components which are blocked from running on this resource
+        or any descendants
+        :param do_not_unpack: Do not unpack resources with this tag
+
+        :return: A ComponentRunResult containing information on resources affected by the
+        components, in the coordinator or in the workers
+        """
+        self.start()
+        subtree_tags = tuple(subtree_tags)
+        blacklisted_components = tuple(blacklisted_components)
+        do_not_unpack = tuple(do_not_unpack)
+        components_result = ComponentRunResult()
+        subtree_tasks: List[asyncio.Task] = []
+        resources_to_unpack = [resource]
+        try:
+            while resources_to_unpack:
+                unpack_results = await asyncio.gather(
+                    *(
+                        resource_to_unpack.auto_run(
+                            all_identifiers=True,
+                            all_unpackers=True,
+                            blacklisted_components=blacklisted_components,
+                            blacklisted_tags=do_not_unpack,
+                        )
+                        for resource_to_unpack in resources_to_unpack
+                    )
+                )
+                resources_created: Set[bytes] = set()
+                for unpack_result in unpack_results:
+                    components_result.update(unpack_result)
+                    resources_created.update(unpack_result.resources_created)
+
+                created_resources = list(
+                    await self._ofrak_context.resource_factory.create_many(
+                        resource.get_job_id(),
+                        resources_created,
+                        resource.get_resource_context(),
+                        resource.get_resource_view_context(),
+                        resource.get_component_context(),
+                    )
+                )
+                parent_ids = {
+                    created_resource.get_model().parent_id for created_resource in created_resources
+                }
+                resources_to_unpack = []
+                for created_resource in created_resources:
+                    if (
+                        created_resource.get_id() not in parent_ids
+                        and created_resource.get_data_id() is not None
+                        and any(created_resource.has_tag(tag) for tag in subtree_tags)
+                    ):
+                        subtree_tasks.append(
+                            asyncio.create_task(
+                                self._unpack_subtree(
+                                    created_resource,
+                                    tuple(c.get_id() for c in blacklisted_components),
+                                    do_not_unpack,
+                                )
+                            )
+                        )
+                    else:
+                        resources_to_unpack.append(created_resource)
+
+            for subtree_result in await asyncio.gather(*subtree_tasks):
+                components_result.update(subtree_result)
+        finally:
+            for subtree_task in subtree_tasks:
+                subtree_task.cancel()
+        return components_result
+
+    async def _unpack_subtree(
+        self,
+        resource: Resource,
+        components_disallowed: Tuple[bytes, ...],
+        tags_ignored: Tuple[ResourceTag, ...],
+    ) -> ComponentRunResult:
+        resource_model = resource.get_model()
+        request = _SubtreeUnpackRequest(
+            await resource.get_data(),
+            tuple(resource_model.get_most_specific_tags()),
+            _get_transferable_attributes(resource_model),
+            components_disallowed,
+            tags_ignored,
+        )
+        subtree = await asyncio.get_running_loop().run_in_executor(
+            self._executor, _unpack_subtree_in_worker, request
+        )
+        LOGGER.debug(
+            f"Worker unpacked {len(subtree.resources)} resources under {resource.get_id().hex()}"
+        )
+
+        resource.add_tag(*subtree.root_tags)
+        resource.add_attributes(*subtree.root_attributes)
+        await resource.save()
+        subtree_resources = [resource]
+        for subtree_resource in subtree.resources:
+            parent = subtree_resources[subtree_resource.parent_index]
+            subtree_resources.append(
+                await parent.create_child(
+                    tags=subtree_resource.tags,
+                    attributes=subtree_resource.attributes,
+                    data=subtree_resource.data,
+                    data_range=subtree_resource.data_range,
+                )
+            )
+
+        resources_created = {created.get_id() for created in subtree_resources[1:]}
+        return ComponentRunResult(
+            components_run=set(subtree.components_run),
+            resources_modified={resource.get_id(), *resources_created},
+            resources_created=resources_created,
+        )
+
+
+def _get_transferable_attributes(resource_model: ResourceModel) -> Tuple[ResourceAttributes, ...]:
+    # The Data attributes describe where the data lies in the parent, and are recreated along with
+    # the data of the resource
+    return tuple(
+        attributes
+        for attributes in resource_model.attributes.values()
+        if not isinstance(attributes, Data)
+    )
+
+
+# OFRAK context of a worker process, and the event loop it runs in
+_WORKER_CONTEXT: Optional[Tuple[asyncio.AbstractEventLoop, OFRAKContext]] = None
+
+
+def _initialize_worker(worker_modules: Sequence[str], exclude_components_missing_dependencies):
+    global _WORKER_CONTEXT
+    ofrak = OFRAK(
+        logging.getLogger().getEffectiveLevel(),
+        exclude_components_missing_dependencies=exclude_components_missing_dependencies,
+    )
+    for module_name in worker_modules:
+        ofrak.discover(importlib.import_module(module_name))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    _WORKER_CONTEXT = loop, loop.run_until_complete(ofrak.create_ofrak_context())
+
+
+def _unpack_subtree_in_worker(request: _SubtreeUnpackRequest) -> _SubtreeUnpackResult:
+    assert _WORKER_CONTEXT is not None, "Unpack worker was not initialized"
+    loop, ofrak_context = _WORKER_CONTEXT
+    return loop.run_until_complete(_unpack_subtree(ofrak_context, request))
+
+
+async def _unpack_subtree(
+    ofrak_context: OFRAKContext, request: _SubtreeUnpackRequest
+) -> _SubtreeUnpackResult:
+    root = await ofrak_context.create_root_resource("subtree", request.data, request.tags)
+    root.add_attributes(*request.attributes)
+    await root.save()
+    components_result = await ofrak_context.job_service.run_components_recursively(
+        JobMultiComponentRequest(
+            root.get_job_id(),
+            root.get_id(),
+            components_disallowed=request.components_disallowed,
+            tags_ignored=request.tags_ignored,
+            all_unpackers=True,
+            all_identifiers=True,
+        )
+    )
+
+    resource_service = ofrak_context.resource_service
+    data_service = ofrak_context.data_service
+    root_model = await resource_service.get_by_id(root.get_id())
+    children_by_parent: Dict[bytes, List[ResourceModel]] = dict()
+    for descendant_model in await resource_service.get_descendants_by_id(root_model.id):
+        assert descendant_model.parent_id is not None
+        children_by_parent.setdefault(descendant_model.parent_id, []).append(descendant_model)
+
+    # Walk the subtree breadth-first, so that each resource comes after its parent
+    subtree_resources: List[_SubtreeResource] = []
+    parents_to_visit: List[Tuple[int, ResourceModel]] = [(0, root_model)]
+    while parents_to_visit:
+        next_parents_to_visit = []
+        for parent_index, parent_model in parents_to_visit:
+            for child_model in children_by_parent.get(parent_model.id, ()):
+                data: Optional[bytes] = None
+                data_range: Optional[Range] = None
+                if child_model.data_id is not None:
+                    data_model = await data_service.get_by_id(child_model.data_id)
+                    if data_model.is_mapped() and parent_model.data_id is not None:
+                        data_range = await data_service.get_range_within_other(
+                            child_model.data_id, parent_model.data_id
+                        )
+                    else:
+                        data = await data_service.get_data(child_model.data_id)
+                subtree_resources.append(
+                    _SubtreeResource(
+                        parent_index,
+                        tuple(child_model.get_most_specific_tags()),
+                        _get_transferable_attributes(child_model),
+                        data,
+                        data_range,
+                    )
+                )
+                next_parents_to_visit.append((len(subtree_resources), child_model))
+        parents_to_visit = next_parents_to_visit
+
+    # The worker only keeps resources while unpacking them
+    await root.delete()
+    await root.save()
+
+    return _SubtreeUnpackResult(
+        tuple(root_model.get_most_specific_tags()),
+        _get_transferable_attributes(root_model),
+        tuple(subtree_resources),
+        tuple(components_result.components_run),
+    )
@@ -55,6 +55,7 @@ setuptools.setup(
     extras_require={
         "docs": read_requirements("requirements-docs.txt"),
         "test": read_requirements("requirements-test.txt"),
+        "squashfs": ["python-lzo", "lz4", "zstandard"],
     },
     author="Red Balloon Security",
     author_email="ofrak@redballoonsecurity.com",
@@ -26,13 +26,19 @@ BINWALK_TEST_CASES = [
         1,
         {0: "POSIX tar archive (GNU)"},
     ),
-    BinwalkTestCase(
-        "firmware.zip",
-        None,
-        {
-            0: "Zip archive data, at least v1.0 to extract, name: dir655_revB_FW_203NA/",
-            6410581: "End of Zip archive, footer length: 22",
-        },
+    pytest.param(
+        BinwalkTestCase(
+            "firmware.zip",
+            None,
+            {
+                0: "Zip archive data, at least v1.0 to extract, name: dir655_revB_FW_203NA/",
+                6410581: "End of Zip archive, footer length: 22",
+            },
+        ),
+        marks=pytest.mark.skipif(
+            not os.path.exists(os.path.join(BINWALK_ASSETS_PATH, "firmware.zip")),
+            reason="firmware.zip is missing from the binwalk assets",
+        ),
     ),
     BinwalkTestCase(
         "foobar.lzma",
@@ -54,7 +60,7 @@ BINWALK_TEST_CASES = [
 ]
 
 
-@pytest.mark.parametrize("test_case", BINWALK_TEST_CASES, ids=lambda tc: tc.filename)
+@pytest.mark.parametrize("test_case", BINWALK_TEST_CASES, ids=lambda test_case: test_case.filename)
 async def test_binwalk_component(ofrak_context, test_case):
     asset_path = os.path.join(BINWALK_ASSETS_PATH, test_case.filename)
     root_resource = await ofrak_context.create_root_resource_from_file(asset_path)
@@ -1,10 +1,16 @@
 import os
+import stat
+import struct
 import subprocess
 import tempfile
 
+import pytest
+
 from ofrak import OFRAKContext
+from ofrak.component.unpacker import UnpackerError
 from ofrak.resource import Resource
-from ofrak.core.cpio import CpioFilesystem
+from ofrak.core.cpio import CpioArchiveType, CpioFilesystem
+from ofrak.core.filesystem import SymbolicLink
 from ofrak.core.strings import StringPatchingConfig, StringPatchingModifier
 from pytest_ofrak.patterns.unpack_modify_pack import UnpackModifyPackPattern
 
@@ -53,3 +59,188 @@ class TestCpioUnpackModifyPack(UnpackModifyPackPattern):
                 with open(os.path.join(temp_flush_dir, CPIO_ENTRY_NAME), "rb") as f:
                     patched_data = f.read()
                 assert patched_data == EXPECTED_DATA
+
+
+def _pad(data: bytes, alignment: int) -> bytes:
+    return data + b"\x00" * (-len(data) % alignment)
+
+
+def _create_newc_entry(name: str, mode: int, ino: int, nlink: int, data: bytes) -> bytes:
+    encoded_name = name.encode() + b"\x00"
+    fields = (ino, mode, 1234, 5678, nlink, 1600000000, len(data), 0, 0, 0, 0)
+    header = b"070701" + b"".join(b"%08X" % f for f in fields)
+    header += b"%08X%08X" % (len(encoded_name), 0)
+    return _pad(header + encoded_name, 4) + _pad(data, 4)
+
+
+def _create_odc_entry(name: str, mode: int, ino: int, nlink: int, data: bytes) -> bytes:
+    encoded_name = name.encode() + b"\x00"
+    header = b"070707%06o%06o%06o%06o%06o%06o%06o" % (0, ino, mode, 1234, 5678, nlink, 0)
+    header += b"%011o%06o%011o" % (1600000000, len(encoded_name), len(data))
+    return header + encoded_name + data
+
+
+def _create_binary_entry(
+    name: str, mode: int, ino: int, nlink: int, data: bytes, byte_order: str = "<"
+) -> bytes:
+    encoded_name = name.encode() + b"\x00"
+    mtime, size = 1600000000, len(data)
+    header = struct.pack(
+        byte_order + "13H",
+        0o070707,
+        *(0, ino, mode, 1234, 5678, nlink, 0, mtime >> 16, mtime & 0xFFFF),
+        *(len(encoded_name), size >> 16, size & 0xFFFF),
+    )
+    return _pad(header + encoded_name, 2) + _pad(data, 2)
+
+
+def _create_big_endian_binary_entry(
+    name: str, mode: int, ino: int, nlink: int, data: bytes
+) -> bytes:
+    return _create_binary_entry(name, mode, ino, nlink, data, ">")
+
+
+@pytest.mark.parametrize(
+    "create_entry",
+    [_create_newc_entry, _create_odc_entry, _create_binary_entry, _create_big_endian_binary_entry],
+)
+async def test_cpio_unpacker(ofrak_context: OFRAKContext, create_entry):
+    """
+    Test that unpacking a CPIO archive of each format keeps the stat of its entries, and unpacks
+    hard links (whose data may be stored in the first or last entry of the group) as files.
+    """
+    archive = b"".join(
+        [
+            create_entry(".", stat.S_IFDIR | 0o755, 1, 2, b""),
+            create_entry("folder", stat.S_IFDIR | 0o700, 2, 2, b""),
+            create_entry("folder/file.txt", stat.S_IFREG | 0o751, 3, 1, b"hello world"),
+            create_entry("symlink", stat.S_IFLNK | 0o777, 4, 1, b"folder/file.txt"),
+            create_entry("link_0", stat.S_IFREG | 0o644, 5, 3, b""),
+            create_entry("link_1", stat.S_IFREG | 0o644, 5, 3, b"linked"),
+            create_entry("link_2", stat.S_IFREG | 0o644, 5, 3, b""),
+            create_entry("TRAILER!!!", 0, 0, 1, b""),
+        ]
+    )
+    root = await ofrak_context.create_root_resource("test.cpio", archive)
+    root.add_view(CpioFilesystem(CpioArchiveType.NEW_ASCII))
+    await root.save()
+    await root.unpack()
+    cpio_view = await root.view_as(CpioFilesystem)
+
+    assert set((await cpio_view.list_dir()).keys()) == {
+        "folder",
+        "symlink",
+        "link_0",
+        "link_1",
+        "link_2",
+    }
+    folder = await cpio_view.get_entry("folder")
+    assert folder.stat.st_mode == stat.S_IFDIR | 0o700
+    file = await cpio_view.get_entry("folder/file.txt")
+    assert await file.resource.get_data() == b"hello world"
+    assert file.stat.st_mode == stat.S_IFREG | 0o751
+    assert (file.stat.st_uid, file.stat.st_gid) == (1234, 5678)
+    assert (file.stat.st_size, file.stat.st_mtime) == (len(b"hello world"), 1600000000)
+    symlink = await cpio_view.get_entry("symlink")
+    assert (await symlink.resource.view_as(SymbolicLink)).source_path == "folder/file.txt"
+    for link_name in ("link_0", "link_1", "link_2"):
+        link = await cpio_view.get_entry(link_name)
+        assert await link.resource.get_data() == b"linked"
+        assert link.stat.st_size == len(b"linked")
+
+
+async def test_cpio_unpacker_truncated(ofrak_context: OFRAKContext):
+    """
+    Test that unpacking a truncated CPIO archive fails.
+    """
+    archive = _create_newc_entry("file.txt", stat.S_IFREG | 0o644, 1, 1, b"hello world")
+    root = await ofrak_context.create_root_resource("test.cpio", archive[:-8])
+    root.add_view(CpioFilesystem(CpioArchiveType.NEW_ASCII))
+    await root.save()
+    with pytest.raises(UnpackerError):
+        await root.unpack()
+
+
+@pytest.mark.parametrize(
+    "archive_type",
+    [
+        CpioArchiveType.BINARY,
+        CpioArchiveType.OLD_ASCII,
+        CpioArchiveType.NEW_ASCII,
+        CpioArchiveType.CRC_ASCII,
+    ],
+)
+async def test_cpio_packer(ofrak_context: OFRAKContext, archive_type: CpioArchiveType):
+    """
+    Test that packing a CPIO archive of each format keeps the stat of its entries, writes them
+    with folders before their contents and sorted by name, and always gives the same archive.
+    """
+    archive = b"".join(
+        [
+            _create_newc_entry("b.txt", stat.S_IFREG | 0o640, 1, 1, b"b.txt"),
+            _create_newc_entry("a/c.txt", stat.S_IFREG | 0o640, 2, 1, b"a/c.txt"),
+            _create_newc_entry("a", stat.S_IFDIR | 0o700, 3, 2, b""),
+            _create_newc_entry("a/symlink", stat.S_IFLNK | 0o777, 4, 1, b"c.txt"),
+            _create_newc_entry("TRAILER!!!", 0, 0, 1, b""),
+        ]
+    )
+    root = await ofrak_context.create_root_resource("test.cpio", archive)
+    root.add_view(CpioFilesystem(archive_type))
+    await root.save()
+    await root.unpack()
+    await root.pack()
+    packed_data = await root.get_data()
+    await root.pack()
+    assert await root.get_data() == packed_data
+    assert len(packed_data) % 512 == 0
+
+    repacked_root = await ofrak_context.create_root_resource("repacked.cpio", packed_data)
+    repacked_root.add_view(CpioFilesystem(archive_type))
+    await repacked_root.save()
+    await repacked_root.unpack()
+    cpio_view = await repacked_root.view_as(CpioFilesystem)
+    assert [path for path, _ in await cpio_view.get_entries_with_paths()] == [
+        "a",
+        "a/c.txt",
+        "a/symlink",
+        "b.txt",
+    ]
+    folder = await cpio_view.get_entry("a")
+    assert folder.stat.st_mode == stat.S_IFDIR | 0o700
+    for name in ("b.txt", "a/c.txt"):
+        file = await cpio_view.get_entry(name)
+        assert await file.resource.get_data() == name.encode()
+        assert file.stat.st_mode == stat.S_IFREG | 0o640
+        assert (file.stat.st_uid, file.stat.st_gid) == (1234, 5678)
+        assert file.stat.st_mtime == 1600000000
+    symlink = await cpio_view.get_entry("a/symlink")
+    assert (await symlink.resource.view_as(SymbolicLink)).source_path == "c.txt"
+
+
+async def test_cpio_packer_big_endian(ofrak_context: OFRAKContext):
+    """
+    Test that packing a big-endian binary CPIO archive keeps its byte order.
+    """
+    archive = b"".join(
+        [
+            _create_big_endian_binary_entry("file.txt", stat.S_IFREG | 0o640, 1, 1, b"hello"),
+            _create_big_endian_binary_entry("TRAILER!!!", 0, 0, 1, b""),
+        ]
+    )
+    root = await ofrak_context.create_root_resource("test.cpio", archive)
+    root.add_view(CpioFilesystem(CpioArchiveType.BINARY))
+    await root.save()
+    await root.unpack()
+    await root.pack()
+    packed_data = await root.get_data()
+    assert packed_data.startswith(b"\x71\xc7")
+
+    repacked_root = await ofrak_context.create_root_resource("repacked.cpio", packed_data)
+    repacked_root.add_view(CpioFilesystem(CpioArchiveType.BINARY))
+    await repacked_root.save()
+    await repacked_root.unpack()
+    cpio_view = await repacked_root.view_as(CpioFilesystem)
+    file = await cpio_view.get_entry("file.txt")
+    assert await file.resource.get_data() == b"hello"
+    assert file.stat.st_mode == stat.S_IFREG | 0o640
+    assert (file.stat.st_uid, file.stat.st_gid) == (1234, 5678)
@@ -4,6 +4,7 @@ import pytest
 
 import test_ofrak.components
 from ofrak import OFRAKContext, Resource
+from ofrak.core.binary import BinaryPatchConfig, BinaryPatchModifier
 from ofrak.core import (
     ElfProgramHeader,
     Elf,
@@ -130,3 +131,29 @@ async def test_elf_segments(elf_no_sections: Resource):
     elf = await elf_no_sections.view_as(Elf)
     for segment in await elf.get_segments():
         assert isinstance(segment, ElfSegment)
+
+
+async def test_elf_incremental_unpack_recursively(elf_resource: Resource):
+    """
+    Test that re-running `Resource.unpack_recursively` after patching one section of an ELF keeps
+    the other children of the ELF, with their IDs and attributes.
+    """
+    await elf_resource.unpack_recursively()
+    elf = await elf_resource.view_as(Elf)
+    data_section = await elf.get_section_by_name(".data")
+    attributes_by_child_id = {
+        child.get_id(): dict(child.get_model().attributes)
+        for child in await elf_resource.get_children()
+    }
+
+    patch = b"\xff" * 4
+    await data_section.resource.run(BinaryPatchModifier, BinaryPatchConfig(0, patch))
+    await elf_resource.unpack_recursively()
+
+    children = await elf_resource.get_children()
+    assert {child.get_id() for child in children} == set(attributes_by_child_id)
+    for child in children:
+        if child.get_id() != data_section.resource.get_id():
+            assert child.get_model().attributes == attributes_by_child_id[child.get_id()]
+    patched_section = await (await elf_resource.view_as(Elf)).get_section_by_name(".data")
+    assert (await patched_section.resource.get_data()).startswith(patch)
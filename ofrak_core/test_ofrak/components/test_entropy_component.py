@@ -1,12 +1,17 @@
+import math
 import os.path
 
 import pytest
 from ofrak.core.entropy import DataSummaryAnalyzer, DataSummary
+from ofrak.core.entropy.entropy import sample_entropy, update_entropy_samples
 
 from ofrak import OFRAKContext
 import test_ofrak.components
+from ofrak_type.range import Range
 from ofrak.core.entropy.entropy_py import entropy_py
 from ofrak.core.entropy.entropy_c import entropy_c
+from ofrak.core.entropy.entropy_numpy import entropy_numpy, sample_entropy_numpy, sample_numpy
+from ofrak.core.entropy.pyramid import DataSummaryPyramid
 
 TEST_FILES = [
     "hello.out",
@@ -67,3 +72,129 @@ def _almost_equal(bytes1: bytes, bytes2: bytes) -> bool:
             print(f"Inputs differ at byte {i} ({bytes1[i]} != {bytes2[i]})")
             return False
     return True
+
+
+@pytest.mark.parametrize(
+    "test_file_path",
+    [os.path.join(test_ofrak.components.ASSETS_DIR, filename) for filename in TEST_FILES],
+)
+def test_numpy_entropy(test_file_path):
+    """
+    Test that the NumPy implementation matches the reference implementation.
+    """
+    with open(test_file_path, "rb") as f:
+        data = f.read()
+    assert _almost_equal(entropy_numpy(data, 256), entropy_py(data, 256))
+
+
+@pytest.mark.parametrize("max_samples", [10, 100, 1000])
+def test_sample_entropy_numpy(max_samples):
+    """
+    Test that sampling the entropy with NumPy gives the same samples as computing the entropy of
+    every window and sampling it, whether it computes the entropy of every window or only of the
+    sampled ones.
+    """
+    data = bytes(range(256)) * 4 + b"\x00" * 1000 + bytes(i * i % 7 for i in range(3000))
+    entropy = entropy_py(data, 256)
+    skip = len(entropy) / max_samples
+    expected_samples = bytes(entropy[math.floor(i * skip)] for i in range(max_samples))
+    assert _almost_equal(sample_entropy_numpy(data, 256, max_samples), expected_samples)
+    skip = len(data) / max_samples
+    assert sample_numpy(data, max_samples) == bytes(
+        data[math.floor(i * skip)] for i in range(max_samples)
+    )
+
+
+@pytest.mark.parametrize("max_samples", [2**20, 1000])
+def test_update_entropy_samples(max_samples):
+    """
+    Test that updating the entropy samples of patched data gives the same samples as sampling the
+    entropy of the patched data.
+    """
+    data = bytes(range(256)) * 400 + b"\x00" * 20000 + bytes(i * i % 7 for i in range(40000))
+    entropy_samples = sample_entropy(data, b"", max_samples=max_samples)
+    patch_ranges = [Range(0, 3), Range(50000, 50100), Range(120000, 120001), Range(160997, 161000)]
+    patched_data = bytearray(data)
+    for patch_range in patch_ranges:
+        patched_data[patch_range.start : patch_range.end] = b"\xff" * patch_range.length()
+    patched_data = bytes(patched_data)
+
+    updated_samples = update_entropy_samples(
+        patched_data, entropy_samples, patch_ranges, max_samples=max_samples
+    )
+    expected_samples = sample_entropy(patched_data, b"", max_samples=max_samples)
+    assert updated_samples != entropy_samples
+    assert _almost_equal(updated_samples, expected_samples)
+
+
+async def test_analyzer_after_patch(ofrak_context: OFRAKContext):
+    """
+    Test that analyzing a resource again after patching it gives the summary of the patched data.
+    """
+    data = bytes(range(256)) * 1000 + b"\x00" * 100000
+    resource = await ofrak_context.create_root_resource("data", data)
+    await resource.run(DataSummaryAnalyzer)
+    resource.queue_patch(Range(0x20000, 0x20004), b"\xff" * 4)
+    await resource.save()
+    await resource.run(DataSummaryAnalyzer)
+
+    patched_data = await resource.get_data()
+    data_summary = resource.get_attributes(DataSummary)
+    assert _almost_equal(data_summary.entropy_samples, sample_entropy(patched_data, b""))
+    assert data_summary.magnitude_samples == patched_data
+
+
+@pytest.mark.parametrize("length", [100, 256, 1000, 70001])
+def test_data_summary_pyramid(length: int):
+    """
+    Test that the tiles of each level of a pyramid summarize the windows and bytes of data they
+    cover.
+    """
+    data = (bytes(range(256)) * 100 + b"\x00" * 10000 + bytes(i * i % 7 for i in range(70000)))[
+        :length
+    ]
+    pyramid = DataSummaryPyramid(data)
+    windows = [data[i : i + 256] for i in range(0, length - 255, 256)]
+    if length % 256 != 0 and length >= 256:
+        windows.append(data[-256:])
+    window_entropy = entropy_py(b"".join(windows), 256, lambda percent: None)[::256]
+
+    for level in range(pyramid.level_count):
+        tiles = pyramid.get_tiles(level, Range(0, length))
+        windows_per_tile = tiles.tile_size // 256
+        assert tiles.data_range == Range(0, length)
+        for i in range(len(tiles.magnitude_min)):
+            tile_data = data[i * tiles.tile_size : (i + 1) * tiles.tile_size]
+            assert tiles.magnitude_min[i] == min(tile_data)
+            assert tiles.magnitude_max[i] == max(tile_data)
+            assert abs(tiles.magnitude_mean[i] - sum(tile_data) / len(tile_data)) <= 1
+            tile_entropy = window_entropy[i * windows_per_tile : (i + 1) * windows_per_tile]
+            if tile_entropy:
+                assert tiles.entropy_min[i] == min(tile_entropy)
+                assert tiles.entropy_max[i] == max(tile_entropy)
+    assert len(pyramid.get_tiles(pyramid.level_count - 1, Range(0, length)).entropy_mean) == 1
+    assert pyramid.get_level(Range(0, length), 1) == pyramid.level_count - 1
+    assert pyramid.get_level(Range(0, 256), 1) == 0
+
+
+async def test_data_summary_pyramid_after_patch(ofrak_context: OFRAKContext):
+    """
+    Test that the pyramid of a resource is updated in place once it is patched, rather than copied
+    to and from the process computing the summary.
+    """
+    data = bytes(range(256)) * 1000 + b"\x00" * 100000
+    resource = await ofrak_context.create_root_resource("data", data)
+    analyzer = ofrak_context.component_locator.get_by_type(DataSummaryAnalyzer)
+    pyramid = await analyzer.get_data_summary_pyramid(resource)
+    assert pyramid.data_length == len(data)
+    resource.queue_patch(Range(0x20000, 0x20004), b"\xff" * 4)
+    resource.queue_patch(Range(len(data) - 1, len(data)), b"\xff")
+    await resource.save()
+
+    updated_pyramid = await analyzer.get_data_summary_pyramid(resource)
+    assert updated_pyramid is pyramid
+    expected_pyramid = DataSummaryPyramid(await resource.get_data())
+    for level in range(pyramid.level_count):
+        assert pyramid.get_tiles(level, Range(0, len(data))) == expected_pyramid.get_tiles(
+            level, Range(0, len(data))
+        )
@@ -2,14 +2,20 @@ import os
 import re
 import stat
 import subprocess
+import sys
 import tempfile
+from dataclasses import dataclass
 
 import pytest
 
 from ofrak import OFRAKContext
+from ofrak.component.modifier import Modifier
+from ofrak.model.component_model import ComponentConfig
 from ofrak.core import FilesystemRoot
+from ofrak.core import filesystem
 from ofrak.core.binary import GenericBinary
 from ofrak.core.filesystem import (
+    File,
     FilesystemEntry,
     Folder,
 )
@@ -60,6 +66,30 @@ class FilesystemRootDirectory(tempfile.TemporaryDirectory):
         return temp_dir
 
 
+@dataclass
+class RemoveEntryModifierConfig(ComponentConfig):
+    path: str
+
+
+class RemoveEntryModifier(Modifier[RemoveEntryModifierConfig]):
+    """
+    Remove an entry through the `FilesystemRoot` view of the component, which is not the view of
+    the client.
+    """
+
+    targets = (FilesystemRoot,)
+
+    async def modify(self, resource: Resource, config: RemoveEntryModifierConfig):
+        filesystem_root = await resource.view_as(FilesystemRoot)
+        await filesystem_root.remove_file(config.path)
+
+
+@pytest.fixture
+def ofrak(ofrak):
+    ofrak.discover(sys.modules[__name__])
+    return ofrak
+
+
 @pytest.fixture
 async def filesystem_root(ofrak_context: OFRAKContext) -> Resource:
     with FilesystemRootDirectory() as temp_dir:
@@ -91,6 +121,39 @@ class TestFilesystemRoot:
             initialized_tree = await resource.summarize_tree()
             assert original_tree != initialized_tree
 
+    async def test_initialize_from_disk_entries(self, ofrak_context: OFRAKContext, tmp_path):
+        """
+        Test that FilesystemRoot.initialize_from_disk adds every entry of a tree under the right
+        parent, with the contents of each file.
+        """
+        expected_files = {}
+        for i in range(3):
+            for j in range(10):
+                file_path = os.path.join(f"dir{i}", f"subdir{j % 2}", f"file{j}")
+                expected_files[file_path] = os.urandom(j * 0x100)
+                os.makedirs(tmp_path / os.path.dirname(file_path), exist_ok=True)
+                (tmp_path / file_path).write_bytes(expected_files[file_path])
+        os.symlink(os.path.join("dir0", "subdir0"), tmp_path / "link")
+
+        resource = await ofrak_context.create_root_resource(
+            name="root", data=b"", tags=[FilesystemRoot]
+        )
+        filesystem_root = await resource.view_as(FilesystemRoot)
+        await filesystem_root.initialize_from_disk(str(tmp_path))
+
+        entries = dict(await filesystem_root.get_entries_with_paths())
+        assert set(entries.keys()) == {
+            *expected_files.keys(),
+            *(f"dir{i}" for i in range(3)),
+            *(f"dir{i}/subdir{j}" for i in range(3) for j in range(2)),
+            "link",
+        }
+        for file_path, data in expected_files.items():
+            assert entries[file_path].is_file()
+            assert await entries[file_path].resource.get_data() == data
+            assert await entries[file_path].get_path() == file_path
+        assert entries["link"].is_link()
+
     async def test_flush_to_disk(self, ofrak_context: OFRAKContext):
         """
         Test that FilesystemRoot.flush_to_disk correctly flushes the filesystem resources.
@@ -107,6 +170,39 @@ class TestFilesystemRoot:
 
                 diff_directories(temp_dir, flush_dir, extra_diff_flags="")
 
+    async def test_flush_to_disk_batches(self, ofrak_context: OFRAKContext, tmp_path, monkeypatch):
+        """
+        Test that FilesystemRoot.flush_to_disk writes every file and applies its stat when files
+        are written in many batches.
+        """
+        monkeypatch.setattr(filesystem, "FLUSH_BATCH_FILES", 2)
+        monkeypatch.setattr(filesystem, "FLUSH_MAX_PENDING_BATCHES", 1)
+        source_dir = tmp_path / "source"
+        for i in range(9):
+            file_path = source_dir / f"dir{i % 3}" / f"file{i}"
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(os.urandom(i * 0x100))
+            # Read-only files can only have their mode set once they are written
+            os.chmod(file_path, 0o444)
+            os.utime(file_path, (1000 + i, 2000 + i))
+        os.symlink("dir0", source_dir / "link")
+
+        resource = await ofrak_context.create_root_resource(
+            name="root", data=b"", tags=[FilesystemRoot]
+        )
+        filesystem_root = await resource.view_as(FilesystemRoot)
+        await filesystem_root.initialize_from_disk(str(source_dir))
+        flush_dir = tmp_path / "flush"
+        flush_dir.mkdir()
+        await filesystem_root.flush_to_disk(str(flush_dir))
+
+        diff_directories(str(source_dir), str(flush_dir), extra_diff_flags="")
+        for i in range(9):
+            file_stat = os.stat(flush_dir / f"dir{i % 3}" / f"file{i}")
+            assert stat.S_IMODE(file_stat.st_mode) == 0o444
+            assert file_stat.st_mtime == 2000 + i
+        assert os.readlink(flush_dir / "link") == "dir0"
+
     async def test_get_entry(self, filesystem_root: FilesystemRoot):
         """
         Test that FilesystemRoot.get_entry returns the correct entry.
@@ -162,6 +258,79 @@ class TestFilesystemRoot:
         await filesystem_root.remove_file(CHILD_TEXTFILE_NAME)
         updated_list_dir_output = await filesystem_root.list_dir()
         assert CHILD_TEXTFILE_NAME not in updated_list_dir_output
+        assert await filesystem_root.get_entry(CHILD_TEXTFILE_NAME) is None
+
+    async def test_remove_folder(self, filesystem_root: FilesystemRoot):
+        """
+        Test that removing a folder with FilesystemRoot.remove_file also removes the entries under
+        it.
+        """
+        subchild_path = os.path.join(CHILD_FOLDER, SUBCHILD_TEXTFILE_NAME)
+        assert await filesystem_root.get_entry(subchild_path) is not None
+
+        await filesystem_root.remove_file(CHILD_FOLDER)
+        assert await filesystem_root.get_entry(CHILD_FOLDER) is None
+        assert await filesystem_root.get_entry(subchild_path) is None
+        await filesystem_root.add_folder(CHILD_FOLDER)
+        assert await filesystem_root.get_entry(subchild_path) is None
+
+    async def test_remove_entry_other_view(self, filesystem_root: FilesystemRoot):
+        """
+        Test that entries removed through another view of the same FilesystemRoot are no longer
+        found.
+        """
+        subchild_path = os.path.join(CHILD_FOLDER, SUBCHILD_TEXTFILE_NAME)
+        assert await filesystem_root.get_entry(subchild_path) is not None
+
+        await filesystem_root.resource.run(
+            RemoveEntryModifier, RemoveEntryModifierConfig(CHILD_FOLDER)
+        )
+        assert await filesystem_root.get_entry(CHILD_FOLDER) is None
+        assert await filesystem_root.get_entry(subchild_path) is None
+        assert CHILD_FOLDER not in await filesystem_root.list_dir()
+
+    async def test_rename_entry(self, filesystem_root: FilesystemRoot):
+        """
+        Test that FilesystemRoot.rename_entry renames an entry, and that the entries under a
+        renamed folder are found at their new paths.
+        """
+        subchild_path = os.path.join(CHILD_FOLDER, SUBCHILD_TEXTFILE_NAME)
+        subchild = await filesystem_root.get_entry(subchild_path)
+        assert await subchild.get_path() == subchild_path
+
+        await filesystem_root.rename_entry(CHILD_FOLDER, "renamed_folder")
+        new_subchild_path = os.path.join("renamed_folder", SUBCHILD_TEXTFILE_NAME)
+        assert await filesystem_root.get_entry(CHILD_FOLDER) is None
+        assert await filesystem_root.get_entry(subchild_path) is None
+        assert await filesystem_root.get_entry(new_subchild_path) is subchild
+        assert await subchild.get_path() == new_subchild_path
+        with pytest.raises(ValueError):
+            await filesystem_root.rename_entry(new_subchild_path, "a/b")
+        with pytest.raises(ValueError):
+            await filesystem_root.rename_entry("renamed_folder", CHILD_TEXTFILE_NAME)
+
+    async def test_get_entry_nested_filesystem(self, ofrak_context: OFRAKContext):
+        """
+        Test that FilesystemRoot.get_entry does not return the entries of a filesystem nested in
+        one of its files, nor entries added without going through the FilesystemRoot.
+        """
+        resource = await ofrak_context.create_root_resource(
+            name="root", data=b"", tags=[FilesystemRoot]
+        )
+        filesystem_root = await resource.view_as(FilesystemRoot)
+        nested_file = await filesystem_root.add_file("nested.fs", b"")
+        nested_file.add_tag(FilesystemRoot)
+        await nested_file.save()
+        nested_root = await nested_file.view_as(FilesystemRoot)
+        await nested_root.add_file("file.txt", b"nested")
+        assert await filesystem_root.get_entry("file.txt") is None
+        assert await filesystem_root.get_entry("nested.fs/file.txt") is None
+
+        folder = await filesystem_root.add_folder("folder")
+        await folder.resource.create_child_from_view(File("file.txt", None, None), data=b"")
+        file = await filesystem_root.get_entry("folder/file.txt")
+        assert file is not None
+        assert await file.resource.get_data() == b""
 
 
 class TestFilesystemEntry:
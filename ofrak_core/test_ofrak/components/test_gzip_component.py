@@ -1,3 +1,4 @@
+import gzip
 import os
 import subprocess
 import tempfile
@@ -8,7 +9,18 @@ import pytest
 
 from ofrak import OFRAKContext
 from ofrak.resource import Resource
-from ofrak.core.gzip import GzipData
+from ofrak_type.range import Range
+import ofrak.core.gzip as gzip_module
+from ofrak.component.unpacker import UnpackerError
+from ofrak.model.component_model import ComponentExternalTool
+from ofrak.core.gzip import (
+    GzipData,
+    GzipLazyData,
+    GzipPacker,
+    GzipPackerConfig,
+    decompress_gzip,
+    decompress_gzip_lazily,
+)
 from pytest_ofrak.patterns.compressed_filesystem_unpack_modify_pack import (
     CompressedFileUnpackModifyPackPattern,
 )
@@ -85,3 +97,134 @@ class TestGzipUnpackWithTrailingBytes(UnpackModifyPackPattern):
                     raise
 
             assert data == self.EXPECTED_DATA
+
+
+@pytest.mark.parametrize(
+    "pigz_min_compressed_size, gzip_chunk_size",
+    [
+        (None, gzip_module.GZIP_CHUNK_SIZE),
+        (None, 0x10),
+        (0, gzip_module.GZIP_CHUNK_SIZE),
+    ],
+)
+async def test_gzip_unpacker_multiple_members(
+    ofrak_context: OFRAKContext, monkeypatch, pigz_min_compressed_size, gzip_chunk_size
+):
+    """
+    Test that concatenated gzip members followed by trailing bytes are unpacked the same way,
+    whether in-process (in one or many chunks) or with pigz.
+    """
+    monkeypatch.setattr(gzip_module, "PIGZ_MIN_COMPRESSED_SIZE", pigz_min_compressed_size)
+    monkeypatch.setattr(gzip_module, "GZIP_CHUNK_SIZE", gzip_chunk_size)
+    members = [gzip.compress(b"first member " * 0x20), gzip.compress(b"second member" * 0x20)]
+    root = await ofrak_context.create_root_resource(
+        "multiple_members.gz", b"".join(members) + b"\xDE\xAD\xBE\xEF"
+    )
+    await root.unpack()
+
+    gzip_view = await root.view_as(GzipData)
+    child = await gzip_view.get_file()
+    assert await child.get_data() == b"first member " * 0x20 + b"second member" * 0x20
+
+
+class InstalledTool(ComponentExternalTool):
+    async def is_tool_installed(self) -> bool:
+        return True
+
+
+async def test_pigz_min_compressed_size_measured_once(monkeypatch):
+    """
+    Test that without `PIGZ_MIN_COMPRESSED_SIZE`, the size from which pigz is used is measured the
+    first time gzip data long enough is unpacked, and kept for later data.
+    """
+    measurements = []
+
+    async def measure_pigz_min_compressed_size():
+        measurements.append(None)
+        return 0x800000
+
+    monkeypatch.setattr(gzip_module, "PIGZ", InstalledTool("pigz", "", ""))
+    monkeypatch.setattr(
+        gzip_module, "measure_pigz_min_compressed_size", measure_pigz_min_compressed_size
+    )
+    monkeypatch.setattr(gzip_module, "_measured_pigz_min_compressed_size", None)
+
+    assert not await gzip_module._should_use_pigz(gzip_module.PIGZ_MEASUREMENT_MIN_SIZE - 1)
+    assert measurements == []
+    assert not await gzip_module._should_use_pigz(gzip_module.PIGZ_MEASUREMENT_MIN_SIZE)
+    assert await gzip_module._should_use_pigz(0x800000)
+    assert len(measurements) == 1
+
+
+@pytest.mark.parametrize(
+    "pigz_time_per_byte, expected_min_compressed_size",
+    [(0.5e-9, 2_000_000), (2e-9, float("inf"))],
+)
+async def test_measure_pigz_min_compressed_size(
+    monkeypatch, pigz_time_per_byte, expected_min_compressed_size
+):
+    """
+    Test that the size from which pigz is used is where its fixed and per-byte costs, estimated
+    from the timings on two sizes, make it faster than the in-process decompression.
+    """
+
+    async def time_gzip_decompression(size: int):
+        return size, 0.001 + size * 1e-9, 0.002 + size * pigz_time_per_byte
+
+    monkeypatch.setattr(gzip_module, "_time_gzip_decompression", time_gzip_decompression)
+
+    assert await gzip_module.measure_pigz_min_compressed_size() == pytest.approx(
+        expected_min_compressed_size
+    )
+
+
+def test_decompress_gzip_invalid():
+    """
+    Test that decompressing invalid or truncated gzip data raises an UnpackerError.
+    """
+    data = gzip.compress(b"hello world")
+    with pytest.raises(UnpackerError):
+        decompress_gzip(b"not gzip data")
+    with pytest.raises(UnpackerError):
+        decompress_gzip(data[:-4])
+    with pytest.raises(UnpackerError):
+        decompress_gzip(data[:10] + b"\xff" * 0x10)
+
+
+async def test_gzip_packer_threads(ofrak_context: OFRAKContext, monkeypatch):
+    """
+    Test that packing gzip data in parallel blocks gives valid gzip data, about as small as when
+    compressing with a single thread.
+    """
+    monkeypatch.setattr(gzip_module, "GZIP_BLOCK_SIZE", 0x10000)
+    data = b"".join(b"%d: " % i + os.urandom(0x10) + b" some text\n" * 8 for i in range(0x2000))
+    compressed_sizes = []
+    for threads in (1, 4):
+        root = await ofrak_context.create_root_resource("data.gz", gzip.compress(data))
+        await root.unpack()
+        await root.run(GzipPacker, GzipPackerConfig(compression_level=9, threads=threads))
+        compressed_data = await root.get_data()
+        assert gzip.decompress(compressed_data) == data
+        compressed_sizes.append(len(compressed_data))
+
+    single_thread_size, parallel_size = compressed_sizes
+    assert parallel_size <= single_thread_size * 1.01
+
+
+async def test_gzip_unpacker_lazy(ofrak_context: OFRAKContext, monkeypatch):
+    """
+    Test that large gzip data is decompressed lazily from its seek index, and that reading any
+    range of it gives the same data as decompressing it all.
+    """
+    monkeypatch.setattr(gzip_module, "GZIP_INDEX_MIN_SIZE", 0x1000)
+    monkeypatch.setattr(gzip_module, "GZIP_INDEX_SPAN", 0x1000)
+    data = b"".join(b"%d: " % i + os.urandom(0x10) + b" some text\n" for i in range(0x1000))
+    compressed_data = gzip.compress(data[:0x8000]) + gzip.compress(data[0x8000:])
+    assert isinstance(decompress_gzip_lazily(compressed_data), GzipLazyData)
+
+    root = await ofrak_context.create_root_resource("data.gz", compressed_data)
+    await root.unpack()
+    child = await (await root.view_as(GzipData)).get_file()
+    for start, end in [(0x0, 0x10), (0xFF0, 0x1010), (0x7FF0, 0x8010), (0x10, len(data) - 1)]:
+        assert await child.get_data(Range(start, end)) == data[start:end]
+    assert await child.get_data() == data
@@ -1,9 +1,20 @@
+import importlib
 import lzma
+import os
+import subprocess
 
 import pytest
 
+from ofrak import OFRAKContext
 from ofrak.resource import Resource
-from ofrak.core.lzma import LzmaData, XzData
+from ofrak_type.range import Range
+from ofrak.core.lzma import (
+    LzmaData,
+    LzmaPacker,
+    LzmaPackerConfig,
+    XzData,
+    compress_xz_blocks,
+)
 from pytest_ofrak.patterns.compressed_filesystem_unpack_modify_pack import (
     CompressedFileUnpackModifyPackPattern,
 )
@@ -47,3 +58,74 @@ class TestLzmaUnpackModifyPack(CompressedFileUnpackModifyPackPattern):
         patched_decompressed_data = lzma.decompress(patched_data, lzma.FORMAT_ALONE)
 
         assert patched_decompressed_data == self.EXPECTED_REPACKED_DATA
+
+
+async def test_xz_packer_threads(ofrak_context: OFRAKContext, monkeypatch):
+    """
+    Test that packing xz data in parallel blocks gives valid xz data, about as small as when
+    compressing with a single thread.
+    """
+    # `ofrak.core` re-exports the standard `lzma` module under the name of `ofrak.core.lzma`
+    lzma_module = importlib.import_module("ofrak.core.lzma")
+    monkeypatch.setattr(lzma_module, "XZ_BLOCK_SIZE", 0x10000)
+    data = b"".join(b"%d: " % i + os.urandom(0x10) + b" some text\n" * 8 for i in range(0x1000))
+    compressed_sizes = []
+    for threads in (1, 4):
+        root = await ofrak_context.create_root_resource(
+            "data.xz", lzma.compress(data, lzma.FORMAT_XZ)
+        )
+        await root.unpack()
+        await root.run(LzmaPacker, LzmaPackerConfig(threads=threads))
+        compressed_data = await root.get_data()
+        assert lzma.decompress(compressed_data, lzma.FORMAT_XZ) == data
+        compressed_sizes.append(len(compressed_data))
+
+    single_thread_size, parallel_size = compressed_sizes
+    assert parallel_size <= single_thread_size * 1.05
+
+
+async def test_xz_unpacker_lazy(ofrak_context: OFRAKContext, monkeypatch):
+    """
+    Test that large xz data made of several streams is decompressed lazily, and that reading any
+    range of it gives the same data as decompressing it all.
+    """
+    lzma_module = importlib.import_module("ofrak.core.lzma")
+    monkeypatch.setattr(lzma_module, "XZ_BLOCK_SIZE", 0x4000)
+    monkeypatch.setattr(lzma_module, "XZ_INDEX_MIN_SIZE", 0x1000)
+    data = b"".join(b"%d: " % i + os.urandom(0x10) + b" some text\n" for i in range(0x1000))
+    # Stream padding between streams is allowed and should be skipped
+    compressed_data = compress_xz_blocks(data[:0x8000], 1) + b"\x00" * 4
+    compressed_data += compress_xz_blocks(data[0x8000:], 1)
+    assert len(lzma_module._get_xz_blocks(compressed_data)) > 2
+
+    root = await ofrak_context.create_root_resource("data.xz", compressed_data)
+    await root.unpack()
+    child = await (await root.view_as(XzData)).get_child()
+    for start, end in [(0x0, 0x10), (0x3FF0, 0x4010), (0x7FF0, 0x8010), (0x10, len(data) - 1)]:
+        assert await child.resource.get_data(Range(start, end)) == data[start:end]
+    assert await child.resource.get_data() == data
+
+
+async def test_xz_unpacker_lazy_blocks(ofrak_context: OFRAKContext, monkeypatch):
+    """
+    Test that large xz data made of a single stream of several blocks (as written by `xz -T`) is
+    decompressed lazily, block by block.
+    """
+    lzma_module = importlib.import_module("ofrak.core.lzma")
+    monkeypatch.setattr(lzma_module, "XZ_INDEX_MIN_SIZE", 0x1000)
+    data = b"".join(b"%d: " % i + os.urandom(0x10) + b" some text\n" for i in range(0x1000))
+    compressed_data = subprocess.run(
+        ["xz", "-c", "--block-size=16KiB"], input=data, stdout=subprocess.PIPE, check=True
+    ).stdout
+    assert len(lzma_module._get_xz_blocks(compressed_data)) > 2
+
+    def decompress_eagerly(*args):
+        raise AssertionError("xz data was decompressed eagerly")
+
+    monkeypatch.setattr(lzma, "decompress", decompress_eagerly)
+    root = await ofrak_context.create_root_resource("data.xz", compressed_data)
+    await root.unpack()
+    child = await (await root.view_as(XzData)).get_child()
+    for start, end in [(0x0, 0x10), (0x3FF0, 0x4010), (0x7FF0, 0x8010), (0x10, len(data) - 1)]:
+        assert await child.resource.get_data(Range(start, end)) == data[start:end]
+    assert await child.resource.get_data() == data
@@ -3,12 +3,12 @@ from dataclasses import dataclass
 from typing import Dict
 
 import pytest
-from ofrak.core.filesystem import File
+from ofrak.core.filesystem import ArchiveUnpackerConfig, File
 
 from ofrak.resource import Resource
 
 from ofrak import OFRAKContext
-from ofrak.core.rar import RarArchive
+from ofrak.core.rar import RarArchive, RarUnpacker
 from pytest_ofrak.patterns.unpack_verify import (
     UnpackAndVerifyPattern,
     UnpackAndVerifyTestCase,
@@ -59,3 +59,9 @@ class TestRarUnpackAndVerify(UnpackAndVerifyPattern):
 
     async def verify_descendant(self, unpacked_descendant: bytes, specified_result: bytes):
         assert unpacked_descendant == specified_result
+
+
+class TestRarUnpackLazyMembersAndVerify(TestRarUnpackAndVerify):
+    async def unpack(self, root_resource: Resource):
+        await root_resource.identify()
+        await root_resource.run(RarUnpacker, ArchiveUnpackerConfig(lazy_members=True))
@@ -2,9 +2,13 @@ import os
 import subprocess
 import tempfile
 
+import pytest
+
 from ofrak import OFRAKContext
+from ofrak.component import external_tool
 from ofrak.resource import Resource
-from ofrak.core.seven_zip import SevenZFilesystem
+from ofrak.core.filesystem import ArchiveUnpackerConfig
+from ofrak.core.seven_zip import SevenZFilesystem, SevenZUnpacker
 from ofrak.core.strings import StringPatchingConfig, StringPatchingModifier
 from pytest_ofrak.patterns.unpack_modify_pack import UnpackModifyPackPattern
 
@@ -54,3 +58,47 @@ class TestPzUnpackModifyPack(UnpackModifyPackPattern):
                 with open(os.path.join(temp_flush_dir, SEVEN_ZIP_ENTRY_NAME), "rb") as f:
                     patched_data = f.read()
                 assert patched_data == EXPECTED_DATA
+
+
+@pytest.mark.parametrize("solid", [True, False])
+async def test_seven_zip_unpacker_lazy_members(ofrak_context: OFRAKContext, monkeypatch, solid):
+    """
+    Test unpacking a 7z archive with files only extracted once their data is read, where the files
+    of a solid archive are all extracted at once.
+    """
+    member_data = {f"folder/file{i}.bin": os.urandom(0x100) * (i + 1) for i in range(4)}
+    with tempfile.TemporaryDirectory() as d:
+        for name, data in member_data.items():
+            os.makedirs(os.path.dirname(os.path.join(d, name)), exist_ok=True)
+            with open(os.path.join(d, name), "wb") as f:
+                f.write(data)
+        target_file = os.path.join(d, TARGET_SEVEN_ZIP_FILE)
+        command = [
+            "7zz",
+            "a",
+            "-ms=on" if solid else "-ms=off",
+            target_file,
+            os.path.join(d, "folder"),
+        ]
+        subprocess.run(command, check=True, capture_output=True)
+        root = await ofrak_context.create_root_resource_from_file(target_file)
+
+    root.add_tag(SevenZFilesystem)
+    await root.save()
+    extract_cmds = []
+    run = subprocess.run
+
+    def run_extract_cmd(cmd, *args, **kwargs):
+        extract_cmds.append(cmd)
+        return run(cmd, *args, **kwargs)
+
+    monkeypatch.setattr(external_tool.subprocess, "run", run_extract_cmd)
+
+    await root.run(SevenZUnpacker, ArchiveUnpackerConfig(lazy_members=True))
+    seven_zip_v = await root.view_as(SevenZFilesystem)
+    assert (await seven_zip_v.get_entry("folder")).is_folder()
+    for name, data in member_data.items():
+        file = await seven_zip_v.get_entry(name)
+        assert await file.resource.get_data_length() == len(data)
+        assert await file.resource.get_data() == data
+    assert len(extract_cmds) == (1 if solid else len(member_data))
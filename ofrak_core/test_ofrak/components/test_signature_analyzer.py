@@ -0,0 +1,183 @@
+import bz2
+import gzip
+import io
+import lzma
+import random
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Dict
+
+import os
+import pytest
+
+from ofrak.core.bzip2 import Bzip2Data
+from ofrak.core.gzip import GzipData
+from ofrak.core.lzma import LzmaData, XzData
+from ofrak.core.signature_analyzer import SignatureAttributes
+from ofrak.core.signatures import Signature, SignatureScanner
+from ofrak.core.squashfs import SquashfsFilesystem
+from ofrak.core.tar import TarArchive
+from ofrak.core.zip import ZipArchive
+from ofrak.core.zlib import ZlibData
+from ofrak.model.tag_model import ResourceTag
+import test_ofrak.components
+
+BINWALK_ASSETS_PATH = os.path.join(test_ofrak.components.ASSETS_DIR, "binwalk_assets")
+
+
+@dataclass
+class SignatureTestCase:
+    filename: str
+    # The expected SignatureAttributes offsets
+    offsets: Dict[int, str]
+    # The expected SignatureAttributes tags
+    tags: Dict[int, ResourceTag]
+
+
+SIGNATURE_TEST_CASES = [
+    SignatureTestCase(
+        "dirtraversal.tar",
+        {0: "POSIX tar archive (GNU)"},
+        {0: TarArchive},
+    ),
+    SignatureTestCase(
+        "foobar.lzma",
+        {
+            0: "LZMA compressed data, properties: 0x5D, dictionary size: 8388608 bytes, uncompressed size: -1 bytes",
+        },
+        {0: LzmaData},
+    ),
+    SignatureTestCase(
+        "firmware.squashfs",
+        {
+            0: (
+                "Squashfs filesystem, little endian, version 4.0, compression:lzma, size: "
+                "3647665 bytes, 1811 inodes, blocksize: 524288 bytes, created: 2013-09-17 06:43:22"
+            )
+        },
+        {0: SquashfsFilesystem},
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "test_case", SIGNATURE_TEST_CASES, ids=lambda test_case: test_case.filename
+)
+async def test_signature_analyzer(ofrak_context, test_case):
+    asset_path = os.path.join(BINWALK_ASSETS_PATH, test_case.filename)
+    root_resource = await ofrak_context.create_root_resource_from_file(asset_path)
+    await root_resource.analyze(SignatureAttributes)
+    signature_attributes = root_resource.get_attributes(SignatureAttributes)
+    assert signature_attributes.offsets == test_case.offsets
+    assert signature_attributes.tags == test_case.tags
+
+
+def _random_bytes(rng: random.Random, size: int) -> bytes:
+    return bytes(rng.getrandbits(8) for _ in range(size))
+
+
+def _create_tar(payload: bytes) -> bytes:
+    tar_buffer = io.BytesIO()
+    with tarfile.open(fileobj=tar_buffer, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        info = tarfile.TarInfo("payload")
+        info.size = len(payload)
+        tar.addfile(info, io.BytesIO(payload))
+    return tar_buffer.getvalue()
+
+
+def _create_zip(payload: bytes) -> bytes:
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
+        zip_file.writestr("payload", payload)
+    return zip_buffer.getvalue()
+
+
+async def test_signature_analyzer_zip(ofrak_context):
+    """
+    Test that both the start and the end of a zip archive are found, as in binwalk's
+    `firmware.zip` test case.
+    """
+    rng = random.Random(0)
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
+        zip_file.writestr(zipfile.ZipInfo("firmware/"), b"")
+        zip_file.writestr("firmware/firmware.bin", _random_bytes(rng, 0x10000))
+    data = zip_buffer.getvalue()
+    root_resource = await ofrak_context.create_root_resource("firmware.zip", data)
+
+    await root_resource.analyze(SignatureAttributes)
+
+    signature_attributes = root_resource.get_attributes(SignatureAttributes)
+    end_of_zip_offset = len(data) - 22
+    assert {
+        0: "Zip archive data, at least v2.0 to extract, name: firmware/",
+        end_of_zip_offset: "End of Zip archive, footer length: 22",
+    }.items() <= signature_attributes.offsets.items()
+    assert signature_attributes.tags[0] == ZipArchive
+    assert signature_attributes.tags[end_of_zip_offset] == ZipArchive
+
+
+def test_signature_scanner():
+    """
+    Test that the formats in some data are found at their offsets, and that the signatures in the
+    data of the archives are not reported.
+    """
+    rng = random.Random(0)
+    payload = gzip.compress(b"OFRAK" * 100)
+    formats = [
+        (GzipData, payload),
+        (Bzip2Data, bz2.compress(b"OFRAK" * 100)),
+        (LzmaData, lzma.compress(b"OFRAK" * 100, format=lzma.FORMAT_ALONE)),
+        (XzData, lzma.compress(b"OFRAK" * 100)),
+        (ZlibData, zlib.compress(b"OFRAK" * 100)),
+        (TarArchive, _create_tar(payload)),
+        (ZipArchive, _create_zip(payload)),
+    ]
+    data = b""
+    expected_tags = {}
+    for tag, format_data in formats:
+        data += _random_bytes(rng, 0x100)
+        expected_tags[len(data)] = tag
+        data += format_data
+    end_of_zip_offset = len(data) - 22
+
+    matches = SignatureScanner.from_registered_signatures().scan(memoryview(data))
+    assert {match.offset: match.tag for match in matches} == {
+        **expected_tags,
+        end_of_zip_offset: ZipArchive,
+    }
+    descriptions = {match.offset: match.description for match in matches}
+    assert descriptions[end_of_zip_offset] == "End of Zip archive, footer length: 22"
+
+
+def test_signature_scanner_random_data():
+    """
+    Test that the magic bytes occurring in random data are not reported as signatures.
+    """
+    data = _random_bytes(random.Random(0), 0x400000)
+    assert SignatureScanner.from_registered_signatures().scan(data) == []
+
+
+class _TestFormat(ResourceTag):
+    pass
+
+
+def _parse_test_signature(data: bytes, offset: int):
+    # A byte before the magic bytes, then a null byte and the length of the data in the format
+    if data[offset + 3] != 0:
+        return None
+    return "Test format", data[offset + 4]
+
+
+def test_signature_scanner_magic_offset():
+    """
+    Test that signatures whose magic bytes are not at their start are found, and that signatures
+    are not looked for in the data of formats whose length is known.
+    """
+    scanner = SignatureScanner([Signature(_TestFormat, b"OF", _parse_test_signature, 1)])
+    data = b"\x00OF\x00\x08" + b"\x00OF\x00\x00" + b"\x00OF\x01\x00" + b"\x00OF\x00\x00"
+    matches = scanner.scan(data)
+    # The second header is in the data of the first one, and the third one is invalid
+    assert [(match.offset, match.length) for match in matches] == [(0, 8), (15, 0)]
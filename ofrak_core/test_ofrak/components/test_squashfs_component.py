@@ -1,11 +1,15 @@
 import os
+import stat
 import subprocess
 import tempfile
 
+import test_ofrak.components
 from ofrak import OFRAKContext
+from ofrak.core.filesystem import SymbolicLink
 from ofrak.resource import Resource
-from ofrak.core.squashfs import SquashfsFilesystem
+from ofrak.core.squashfs import SquashfsFilesystem, _SquashfsImage
 from ofrak.core.strings import StringPatchingConfig, StringPatchingModifier
+from ofrak_type.range import Range
 from pytest_ofrak.patterns.unpack_modify_pack import UnpackModifyPackPattern
 
 INITIAL_DATA = b"hello world"
@@ -50,3 +54,74 @@ class TestSquashfsUnpackModifyPack(UnpackModifyPackPattern):
                 with open(os.path.join(temp_flush_dir, SQUASH_ENTRY_NAME), "rb") as f:
                     patched_data = f.read()
                 assert patched_data == EXPECTED_DATA
+
+
+async def test_squashfs_unpacker(ofrak_context: OFRAKContext):
+    """
+    Test that a gzip-compressed SquashFS filesystem is unpacked in-process, with the stat of its
+    entries.
+    """
+    root = await ofrak_context.create_root_resource_from_file(
+        os.path.join(test_ofrak.components.ASSETS_DIR, "sample.sqsh")
+    )
+    await root.unpack()
+    squashfs_v = await root.view_as(SquashfsFilesystem)
+
+    paths = [path for path, _ in await squashfs_v.get_entries_with_paths()]
+    assert paths == [
+        "example_1.py",
+        "example_2.py",
+        "example_4.py",
+        "src",
+        "src/Makefile",
+        "src/program",
+        "src/program.c",
+        "src/program.o",
+    ]
+    source = await squashfs_v.get_entry("src")
+    assert source.is_folder()
+    assert stat.S_IMODE(source.stat.st_mode) == 0o775
+    program = await squashfs_v.get_entry("src/program")
+    assert program.stat.st_size == 8304
+    assert stat.S_IMODE(program.stat.st_mode) == 0o775
+    assert (await program.resource.get_data()).startswith(b"\x7fELF")
+    makefile = await squashfs_v.get_entry("src/Makefile")
+    assert (await makefile.resource.get_data()).startswith(b"CC=gcc")
+
+
+async def test_squashfs_unpacker_lazy(ofrak_context: OFRAKContext, monkeypatch):
+    """
+    Test that the data of files is only decompressed as it is read, for an lzma-compressed
+    SquashFS filesystem with several blocks per file.
+    """
+    read_blocks = []
+    read_file_block = _SquashfsImage.read_file_block
+
+    def _read_file_block(self, inode, block_index):
+        read_blocks.append((inode.stat.st_ino, block_index))
+        return read_file_block(self, inode, block_index)
+
+    monkeypatch.setattr(_SquashfsImage, "read_file_block", _read_file_block)
+    root = await ofrak_context.create_root_resource_from_file(
+        os.path.join(test_ofrak.components.ASSETS_DIR, "binwalk_assets", "firmware.squashfs")
+    )
+    await root.unpack()
+    assert read_blocks == []
+    squashfs_v = await root.view_as(SquashfsFilesystem)
+    assert len(await squashfs_v.get_entries_with_paths()) == 1810
+
+    link = await (await squashfs_v.get_entry("bin/cat")).resource.view_as(SymbolicLink)
+    assert link.source_path == "busybox"
+    device = await squashfs_v.get_entry("dev/null")
+    assert device.is_device()
+
+    library = await squashfs_v.get_entry("lib/libcrypto.so.0.9.8")
+    assert library.stat.st_size == 1517556
+    # Block size is 0x80000, so this range spans the end of the first block and start of the second
+    data_range = Range(0x7FFF0, 0x80010)
+    partial_data = await library.resource.get_data(data_range)
+    assert read_blocks == [(library.stat.st_ino, 0), (library.stat.st_ino, 1)]
+    data = await library.resource.get_data()
+    assert data.startswith(b"\x7fELF")
+    assert len(data) == library.stat.st_size
+    assert data[data_range.start : data_range.end] == partial_data
@@ -9,6 +9,9 @@ from ofrak.core.strings import (
     StringPatchingModifier,
     StringFindReplaceConfig,
     StringFindReplaceModifier,
+    MultiStringFindReplaceConfig,
+    MultiStringFindReplaceModifier,
+    compile_strings_pattern,
 )
 
 
@@ -85,3 +88,76 @@ async def test_string_replace_modifier_no_overflow(resource: Resource):
     config = StringFindReplaceConfig("me the way", "WHAT!!!!!!!!!!!!", allow_overflow=False)
     with pytest.raises(ModifierError):
         await resource.run(StringFindReplaceModifier, config)
+
+
+async def test_string_replace_modifier_special_characters(ofrak_context: OFRAKContext):
+    """
+    Test that the string to find is searched for as is, not as a regular expression.
+    """
+    resource = await ofrak_context.create_root_resource(
+        "text", b"a.c abc a.c", tags=(GenericBinary,)
+    )
+    await resource.run(StringFindReplaceModifier, StringFindReplaceConfig("a.c", "xyz", False))
+    assert await resource.get_data() == b"xyz abc xyz"
+
+
+async def test_string_replace_modifier_overflow(ofrak_context: OFRAKContext):
+    """
+    Test that a replacement overflowing into the next string found is overwritten by the next
+    replacement, as if the replacements were made one after the other.
+    """
+    resource = await ofrak_context.create_root_resource("text", b"abab..abc", tags=(GenericBinary,))
+    config = StringFindReplaceConfig("ab", "XYZ", False, allow_overflow=True)
+    await resource.run(StringFindReplaceModifier, config)
+    assert await resource.get_data() == b"XYXYZ.XYZ"
+
+    config = StringFindReplaceConfig("XYZ", "0123", False, allow_overflow=True)
+    with pytest.raises(ModifierError):
+        await resource.run(StringFindReplaceModifier, config)
+
+
+async def test_multi_string_replace_modifier(resource: Resource):
+    config = MultiStringFindReplaceConfig(
+        {
+            "me": "u",
+            "me the way": "WHAT!!!",
+            "paradise": "Ohio",
+            "not found": "",
+        },
+    )
+    await resource.run(MultiStringFindReplaceModifier, config)
+    patched_file = await resource.get_data()
+    expected_contents = b"""
+    Show WHAT!!!\0ay to go hou\0.\0
+    I would like to live in Ohio\0ise.\n
+    Show WHAT!!!\0ay to go hou\0.\0
+    I would like to live in Ohio\0ise.\n
+    Show WHAT!!!\0ay to go hou\0.\0
+    I would like to live in Ohio\0ise.\n
+    Show WHAT!!!\0ay to go hou\0.\0
+    I would like to live in Ohio\0ise.\n
+    """
+    assert patched_file == expected_contents
+
+
+async def test_multi_string_replace_modifier_no_overflow(resource: Resource):
+    config = MultiStringFindReplaceConfig({"me": "u", "home": "paradise"})
+    with pytest.raises(ModifierError):
+        await resource.run(MultiStringFindReplaceModifier, config)
+
+
+@pytest.mark.parametrize(
+    "strings, data, expected",
+    [
+        ([b"ab", b"abc", b"b"], b"xabcab b", [b"abc", b"ab", b"b"]),
+        ([b"show", b"show me", b"me"], b"show me, show", [b"show me", b"show"]),
+        ([b"a.b", b"a"], b"axb a.b", [b"a", b"a.b"]),
+    ],
+)
+def test_compile_strings_pattern(strings, data, expected):
+    """
+    Test that the pattern of some strings matches the longest of them at each offset, including
+    strings which are prefixes of others.
+    """
+    pattern = compile_strings_pattern(strings)
+    assert [match.group() for match in pattern.finditer(data)] == expected
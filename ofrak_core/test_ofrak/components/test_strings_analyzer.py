@@ -11,7 +11,15 @@ from test_ofrak.unit.component.analyzer.analyzer_test_case import (
 
 from ofrak.ofrak_context import OFRAKContext
 from ofrak.resource import Resource
-from ofrak.core.strings_analyzer import StringsAnalyzer, StringsAttributes
+from ofrak.core.strings_analyzer import (
+    StringEncoding,
+    StringsAnalyzer,
+    StringsAnalyzerConfig,
+    StringsAttributes,
+    _find_strings_re,
+    find_strings,
+    iter_strings,
+)
 
 
 @dataclass
@@ -55,3 +63,75 @@ class TestStringsAnalyzer(AnalyzerTests):
             NotFoundError, match="Unable to find any analyzer for attributes StringsAttributes"
         ):
             await super().test_resource_analyzer(test_case)
+
+
+STRINGS_DATA = (
+    b"\x00\x01ascii string\x00\xff"
+    + "little-endian\tstring".encode("utf-16-le")
+    + b"\x07short\x00"
+    + "big-endian string".encode("utf-16-be")
+    + b"\x00\x00tail string"
+)
+
+
+@pytest.mark.parametrize(
+    "encodings, expected_strings",
+    [
+        ((StringEncoding.ASCII,), {2: "ascii string", 57: "short", 99: "tail string"}),
+        ((StringEncoding.UTF16_LE,), {16: "little-endian\tstring", 64: "big-endian string"}),
+        # Strings in either byte order are also found, shifted by one byte, in the other
+        ((StringEncoding.UTF16_BE,), {17: "ittle-endian\tstring", 63: "big-endian string"}),
+        (
+            tuple(StringEncoding),
+            {
+                2: "ascii string",
+                16: "little-endian\tstring",
+                17: "ittle-endian\tstring",
+                57: "short",
+                63: "big-endian string",
+                64: "big-endian string",
+                99: "tail string",
+            },
+        ),
+    ],
+)
+async def test_strings_encodings(ofrak_context: OFRAKContext, encodings, expected_strings):
+    """
+    Test that the strings of each encoding are found, in order of their offsets.
+    """
+    resource = await ofrak_context.create_root_resource("strings", STRINGS_DATA)
+    await resource.run(StringsAnalyzer, StringsAnalyzerConfig(min_length=5, encodings=encodings))
+    attributes = resource.get_attributes(StringsAttributes)
+    assert list(attributes.strings.items()) == sorted(expected_strings.items())
+    assert find_strings(STRINGS_DATA, 5, encodings) == _find_strings_re(STRINGS_DATA, 5, encodings)
+
+
+@pytest.mark.parametrize("min_length", [1, 4, 8, 11])
+def test_find_strings(min_length: int):
+    """
+    Test that the NumPy and regular expression implementations find the same strings, including
+    strings at the boundaries of the data.
+    """
+    data = bytes(range(256)) * 4 + b"a" * 100 + bytes(range(0, 256, 3)) + b"b" * 10
+    encodings = tuple(StringEncoding)
+    assert find_strings(data, min_length, encodings) == _find_strings_re(
+        data, min_length, encodings
+    )
+    strings = dict(iter_strings(*find_strings(data, min_length)))
+    if min_length <= 10:
+        assert strings[len(data) - 10] == "b" * 10
+    else:
+        assert len(data) - 10 not in strings
+
+
+async def test_strings_whitespace(ofrak_context: OFRAKContext):
+    """
+    Test that trailing whitespace is stripped from the strings found by the analyzer, and that
+    strings made only of whitespace are left out.
+    """
+    data = b"\x00  leading and trailing \t \x00" + b" \t" * 8 + b"\x00"
+    resource = await ofrak_context.create_root_resource("strings", data)
+    await resource.run(StringsAnalyzer, StringsAnalyzerConfig(min_length=4))
+    attributes = resource.get_attributes(StringsAttributes)
+    assert attributes.strings == {1: "  leading and trailing"}
+    assert len(dict(iter_strings(*find_strings(data, 4)))) == 2
@@ -1,5 +1,8 @@
+import io
 import os
+import stat
 import subprocess
+import tarfile
 import tempfile
 
 import pytest
@@ -8,6 +11,7 @@ from ofrak import OFRAKContext
 from ofrak.component.unpacker import UnpackerError
 from ofrak.resource import Resource
 from ofrak.core.strings import StringPatchingConfig, StringPatchingModifier
+from ofrak.core.filesystem import SymbolicLink
 from ofrak.core.tar import TarArchive
 from pytest_ofrak.patterns.pack_unpack_filesystem import (
     FilesystemPackUnpackVerifyPattern,
@@ -228,3 +232,89 @@ class TestComplexTarWithSpecialFiles(FilesystemPackUnpackVerifyPattern):
 
             command = ["tar", "--xattrs", "-C", extract_dir, "-xf", tar.name]
             subprocess.run(command, check=True, capture_output=True)
+
+
+async def test_tar_unpacker_stat_and_xattrs(ofrak_context: OFRAKContext):
+    """
+    Test that unpacking a tar archive keeps the stat and xattrs of its members, and unpacks hard
+    links as files with the data of their target.
+    """
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        folder_info = tarfile.TarInfo("./folder")
+        folder_info.type = tarfile.DIRTYPE
+        folder_info.mode = 0o700
+        tar.addfile(folder_info)
+
+        file_info = tarfile.TarInfo("./folder/file.txt")
+        file_info.size = len(b"hello world")
+        file_info.mode = 0o751
+        file_info.uid, file_info.gid = 1234, 5678
+        file_info.mtime = 1600000000
+        file_info.pax_headers = {"SCHILY.xattr.user.comment": "some comment"}
+        tar.addfile(file_info, io.BytesIO(b"hello world"))
+
+        link_info = tarfile.TarInfo("hard_link.txt")
+        link_info.type = tarfile.LNKTYPE
+        link_info.linkname = "./folder/file.txt"
+        tar.addfile(link_info)
+
+        symlink_info = tarfile.TarInfo("symlink")
+        symlink_info.type = tarfile.SYMTYPE
+        symlink_info.linkname = "folder/file.txt"
+        tar.addfile(symlink_info)
+
+    root = await ofrak_context.create_root_resource("test.tar", archive.getvalue())
+    await root.unpack()
+    tar_view = await root.view_as(TarArchive)
+
+    folder = await tar_view.get_entry("folder")
+    assert folder.stat.st_mode == stat.S_IFDIR | 0o700
+    file = await tar_view.get_entry("folder/file.txt")
+    assert await file.resource.get_data() == b"hello world"
+    assert file.stat.st_mode == stat.S_IFREG | 0o751
+    assert (file.stat.st_uid, file.stat.st_gid) == (1234, 5678)
+    assert (file.stat.st_size, file.stat.st_mtime) == (len(b"hello world"), 1600000000)
+    assert file.xattrs == {"user.comment": b"some comment"}
+    hard_link = await tar_view.get_entry("hard_link.txt")
+    assert await hard_link.resource.get_data() == b"hello world"
+    symlink = await tar_view.get_entry("symlink")
+    assert (await symlink.resource.view_as(SymbolicLink)).source_path == "folder/file.txt"
+
+
+async def test_tar_packer(ofrak_context: OFRAKContext):
+    """
+    Test that packing a tar archive keeps the stat and xattrs of its entries, writes them with
+    folders before their contents and sorted by name, and always gives the same archive.
+    """
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for name in ("b.txt", "a/c.txt", "a/b.txt"):
+            file_info = tarfile.TarInfo(name)
+            file_info.size = len(name)
+            file_info.mode = 0o640
+            file_info.uid, file_info.gid = 1234, 5678
+            file_info.mtime = 1600000000
+            file_info.pax_headers = {"SCHILY.xattr.user.name": name}
+            tar.addfile(file_info, io.BytesIO(name.encode()))
+        symlink_info = tarfile.TarInfo("a/symlink")
+        symlink_info.type = tarfile.SYMTYPE
+        symlink_info.linkname = "c.txt"
+        tar.addfile(symlink_info)
+
+    root = await ofrak_context.create_root_resource("test.tar", archive.getvalue())
+    await root.unpack()
+    await root.pack()
+    packed_data = await root.get_data()
+    await root.pack()
+    assert await root.get_data() == packed_data
+
+    with tarfile.open(fileobj=io.BytesIO(packed_data)) as tar:
+        assert tar.getnames() == ["a", "a/b.txt", "a/c.txt", "a/symlink", "b.txt"]
+        for name in ("b.txt", "a/c.txt", "a/b.txt"):
+            member = tar.getmember(name)
+            assert tar.extractfile(member).read() == name.encode()
+            assert (member.mode, member.uid, member.gid) == (0o640, 1234, 5678)
+            assert member.mtime == 1600000000
+            assert member.pax_headers["SCHILY.xattr.user.name"] == name
+        assert tar.getmember("a/symlink").linkname == "c.txt"
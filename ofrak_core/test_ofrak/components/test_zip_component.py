@@ -0,0 +1,190 @@
+import io
+import os
+import stat
+import struct
+import zipfile
+
+import pytest
+
+from ofrak import OFRAKContext
+from ofrak.component.unpacker import UnpackerError
+from ofrak.core.filesystem import ArchiveUnpackerConfig, SymbolicLink
+from ofrak.core.zip import ZipArchive, ZipMemberData, ZipUnpacker
+from ofrak_type.range import Range
+
+
+async def test_zip_unpacker_stat(ofrak_context: OFRAKContext):
+    """
+    Test that unpacking a zip archive keeps the Unix mode, modification time and owner of its
+    members.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        folder_info = zipfile.ZipInfo("folder/")
+        folder_info.create_system = 3
+        folder_info.external_attr = (stat.S_IFDIR | 0o700) << 16
+        zip_file.writestr(folder_info, b"")
+
+        file_info = zipfile.ZipInfo("folder/file.txt")
+        file_info.create_system = 3
+        file_info.external_attr = (stat.S_IFREG | 0o751) << 16
+        # Extended timestamp and Unix UID/GID extra fields, as written by Info-ZIP
+        file_info.extra = struct.pack("<HHBi", 0x5455, 5, 1, 1600000000)
+        file_info.extra += struct.pack("<HHBBIBI", 0x7875, 11, 1, 4, 1234, 4, 5678)
+        zip_file.writestr(file_info, b"hello world")
+
+        symlink_info = zipfile.ZipInfo("symlink")
+        symlink_info.create_system = 3
+        symlink_info.external_attr = (stat.S_IFLNK | 0o777) << 16
+        zip_file.writestr(symlink_info, b"folder/file.txt")
+
+    root = await ofrak_context.create_root_resource("test.zip", archive.getvalue())
+    await root.unpack()
+    zip_view = await root.view_as(ZipArchive)
+
+    folder = await zip_view.get_entry("folder")
+    assert folder.stat.st_mode == stat.S_IFDIR | 0o700
+    file = await zip_view.get_entry("folder/file.txt")
+    assert await file.resource.get_data() == b"hello world"
+    assert file.stat.st_mode == stat.S_IFREG | 0o751
+    assert (file.stat.st_uid, file.stat.st_gid) == (1234, 5678)
+    assert (file.stat.st_size, file.stat.st_mtime) == (len(b"hello world"), 1600000000)
+    symlink = await zip_view.get_entry("symlink")
+    assert (await symlink.resource.view_as(SymbolicLink)).source_path == "folder/file.txt"
+
+
+async def test_zip_unpacker_directory_traversal(ofrak_context: OFRAKContext):
+    """
+    Test that unpacking a zip archive with a member outside of the archive root fails.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("../file.txt", b"hello world")
+
+    root = await ofrak_context.create_root_resource("test.zip", archive.getvalue())
+    root.add_tag(ZipArchive)
+    await root.save()
+    with pytest.raises(UnpackerError):
+        await root.unpack()
+
+
+async def test_zip_unpacker_absolute_path(ofrak_context: OFRAKContext):
+    """
+    Test that unpacking a zip archive with an absolute member path strips its leading slash, like
+    most archivers do.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("/folder/file.txt", b"hello world")
+    assert zipfile.ZipFile(archive).namelist() == ["/folder/file.txt"]
+
+    root = await ofrak_context.create_root_resource("test.zip", archive.getvalue())
+    await root.unpack()
+    zip_view = await root.view_as(ZipArchive)
+    file = await zip_view.get_entry("folder/file.txt")
+    assert await file.resource.get_data() == b"hello world"
+
+
+async def test_zip_unpacker_truncated_owner(ofrak_context: OFRAKContext):
+    """
+    Test that a Unix UID/GID extra field too short for the sizes it declares is ignored.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        file_info = zipfile.ZipInfo("file.txt")
+        file_info.extra = struct.pack("<HHBBIB", 0x7875, 7, 1, 4, 1234, 4)
+        zip_file.writestr(file_info, b"hello world")
+
+    root = await ofrak_context.create_root_resource("test.zip", archive.getvalue())
+    await root.unpack()
+    zip_view = await root.view_as(ZipArchive)
+    file = await zip_view.get_entry("file.txt")
+    assert (file.stat.st_uid, file.stat.st_gid) == (0, 0)
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+async def test_zip_unpacker_lazy_members(ofrak_context: OFRAKContext, monkeypatch, compression):
+    """
+    Test that members of a zip archive are only decompressed once their data is read when lazy
+    members are enabled, and all up front by default.
+    """
+    member_data = {f"file{i}.bin": os.urandom(0x100) * (i + 1) for i in range(4)}
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=compression) as zip_file:
+        for name, data in member_data.items():
+            zip_file.writestr(name, data)
+
+    read_ranges = []
+    read_member = ZipMemberData.read
+
+    def _read_member(self, data_range):
+        read_ranges.append(data_range)
+        return read_member(self, data_range)
+
+    monkeypatch.setattr(ZipMemberData, "read", _read_member)
+    root = await ofrak_context.create_root_resource("test.zip", archive.getvalue())
+    root.add_tag(ZipArchive)
+    await root.save()
+    await root.run(ZipUnpacker, ArchiveUnpackerConfig(lazy_members=True))
+    assert read_ranges == []
+
+    zip_view = await root.view_as(ZipArchive)
+    file = await zip_view.get_entry("file2.bin")
+    assert await file.resource.get_data_length() == len(member_data["file2.bin"])
+    assert await file.resource.get_data(Range(0x80, 0x180)) == member_data["file2.bin"][0x80:0x180]
+    assert read_ranges == [Range(0x80, 0x180)]
+    for name, data in member_data.items():
+        file = await zip_view.get_entry(name)
+        assert await file.resource.get_data() == data
+
+    eager_root = await ofrak_context.create_root_resource("test.zip", archive.getvalue())
+    eager_root.add_tag(ZipArchive)
+    await eager_root.save()
+    read_ranges.clear()
+    await eager_root.run(ZipUnpacker)
+    eager_view = await eager_root.view_as(ZipArchive)
+    assert (
+        await (await eager_view.get_entry("file0.bin")).resource.get_data()
+        == member_data["file0.bin"]
+    )
+    assert read_ranges == []
+
+
+async def test_zip_unpacker_encrypted(ofrak_context: OFRAKContext):
+    """
+    Test that an encrypted member fails unpacking, even when members are read lazily.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("file.txt", b"hello world")
+    archive_data = bytearray(archive.getvalue())
+    # Set the encrypted flag in the central directory entry
+    central_directory_offset = archive_data.rindex(b"PK\x01\x02")
+    archive_data[central_directory_offset + 8] |= 1
+
+    root = await ofrak_context.create_root_resource("test.zip", bytes(archive_data))
+    root.add_tag(ZipArchive)
+    await root.save()
+    with pytest.raises(UnpackerError):
+        await root.run(ZipUnpacker, ArchiveUnpackerConfig(lazy_members=True))
+
+
+async def test_zip_unpacker_lazy_member_corrupted(ofrak_context: OFRAKContext):
+    """
+    Test that reading a lazy member whose compressed data is corrupted raises an UnpackerError.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("file.txt", b"hello world" * 100)
+    archive_data = bytearray(archive.getvalue())
+    # Flip a byte of the compressed data, right after the local header and file name
+    archive_data[30 + len("file.txt") + 4] ^= 0xFF
+
+    root = await ofrak_context.create_root_resource("test.zip", bytes(archive_data))
+    root.add_tag(ZipArchive)
+    await root.save()
+    await root.run(ZipUnpacker, ArchiveUnpackerConfig(lazy_members=True))
+    zip_view = await root.view_as(ZipArchive)
+    file = await zip_view.get_entry("file.txt")
+    with pytest.raises(UnpackerError):
+        await file.resource.get_data()
@@ -2,11 +2,14 @@ import zlib
 
 import pytest
 
+from ofrak import OFRAKContext
+from ofrak.core.binary import BinaryPatchConfig, BinaryPatchModifier, GenericBinary
 from ofrak.resource import Resource
 from ofrak.core.zlib import ZlibData
 from pytest_ofrak.patterns.compressed_filesystem_unpack_modify_pack import (
     CompressedFileUnpackModifyPackPattern,
 )
+from ofrak_type.range import Range
 
 
 class TestZlibUnpackModifyPack(CompressedFileUnpackModifyPackPattern):
@@ -26,3 +29,29 @@ class TestZlibUnpackModifyPack(CompressedFileUnpackModifyPackPattern):
         patched_data = await repacked_root_resource.get_data()
         patched_decompressed_data = zlib.decompress(patched_data)
         assert patched_decompressed_data == self.EXPECTED_REPACKED_DATA
+
+
+async def test_incremental_unpack_recursively(ofrak_context: OFRAKContext):
+    """
+    Test that re-running `Resource.unpack_recursively` after a modification only re-unpacks the
+    resources whose data changed, replacing their stale children and keeping the rest of the tree.
+    """
+    first = zlib.compress(b"A" * 0x10, 0)
+    second = zlib.compress(b"B" * 0x10, 0)
+    root = await ofrak_context.create_root_resource("root", first + second, (GenericBinary,))
+    modified_child = await root.create_child(tags=(ZlibData,), data_range=Range(0, len(first)))
+    untouched_child = await root.create_child(
+        tags=(ZlibData,), data_range=Range(len(first), len(first) + len(second))
+    )
+    await root.unpack_recursively()
+    untouched_grandchild = await untouched_child.get_only_child()
+
+    await modified_child.run(
+        BinaryPatchModifier, BinaryPatchConfig(0, zlib.compress(b"C" * 0x10, 0))
+    )
+    await root.unpack_recursively()
+
+    modified_grandchild = await modified_child.get_only_child()
+    assert await modified_grandchild.get_data() == b"C" * 0x10
+    assert (await untouched_child.get_only_child()).get_id() == untouched_grandchild.get_id()
+    assert await untouched_grandchild.get_data() == b"B" * 0x10
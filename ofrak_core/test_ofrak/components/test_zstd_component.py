@@ -1,8 +1,11 @@
+import os
 import subprocess
 import tempfile
 
 import pytest
 
+from ofrak import OFRAKContext
+from ofrak.core.zstd import ZstdPacker, ZstdPackerConfig
 from ofrak.resource import Resource
 from pytest_ofrak.patterns.compressed_filesystem_unpack_modify_pack import (
     CompressedFileUnpackModifyPackPattern,
@@ -36,3 +39,33 @@ class TestZstdUnpackModifyPack(CompressedFileUnpackModifyPackPattern):
                 result = f.read()
 
             assert result == self.EXPECTED_REPACKED_DATA
+
+
+async def test_zstd_packer_threads(ofrak_context: OFRAKContext):
+    """
+    Test that packing zstd data with several worker threads gives valid zstd data, about as small
+    as when compressing with a single thread.
+    """
+    data = b"".join(b"%d: " % i + os.urandom(0x10) + b" some text\n" * 8 for i in range(0x1000))
+    with tempfile.TemporaryDirectory() as d:
+        uncompressed_filename = os.path.join(d, "data")
+        with open(uncompressed_filename, "wb") as f:
+            f.write(data)
+        compressed_filename = os.path.join(d, "data.zstd")
+        command = ["zstd", uncompressed_filename, "-o", compressed_filename]
+        subprocess.run(command, check=True, capture_output=True)
+
+        compressed_sizes = []
+        for threads in (1, 4):
+            root = await ofrak_context.create_root_resource_from_file(compressed_filename)
+            await root.unpack()
+            await root.run(ZstdPacker, ZstdPackerConfig(compression_level=19, threads=threads))
+            with open(compressed_filename, "wb") as f:
+                f.write(await root.get_data())
+            command = ["zstd", "-d", "-c", compressed_filename]
+            result = subprocess.run(command, check=True, capture_output=True)
+            assert result.stdout == data
+            compressed_sizes.append(os.path.getsize(compressed_filename))
+
+    single_thread_size, parallel_size = compressed_sizes
+    assert parallel_size <= single_thread_size * 1.05
@@ -365,3 +365,34 @@ def test_module_2_has_priority(populated_component_locator):
 
     registed_component_with_id = populated_component_locator.get_by_id(ITargetsRROutputsD.get_id())
     assert type(registed_component_with_id) is AlternativeTargetsRROutputsD
+
+
+@pytest.mark.parametrize(
+    "tags, category, expected_component_types",
+    [
+        ((AbstractionP,), None, {TargetsPOutputsA, AbstractionPUnpacker}),
+        ((AbstractionP,), Analyzer, {TargetsPOutputsA}),
+        ((AbstractionP, AbstractionRR), Unpacker, {AbstractionPUnpacker, AbstractionRRUnpacker}),
+        # Only strictly equal tags are matched, not subclasses
+        ((AbstractionCommon,), Unpacker, set()),
+        ((), None, set()),
+    ],
+)
+def test_get_components_targeting(
+    populated_component_locator, tags, category, expected_component_types
+):
+    components = populated_component_locator.get_components_targeting(tags, category)
+    assert {type(component) for component in components} == expected_component_types
+
+
+def test_get_components_targeting_invalid_category(populated_component_locator):
+    with pytest.raises(ValueError):
+        populated_component_locator.get_components_targeting((AbstractionP,), ComponentInterface)
+
+
+def test_get_components_targeting_after_add(populated_component_locator):
+    populated_component_locator.add_components(
+        [AlternativeTargetsRROutputsD()], [mock_library, mock_library2]
+    )
+    components = populated_component_locator.get_components_targeting((AbstractionRR,), Analyzer)
+    assert {type(component) for component in components} == {AlternativeTargetsRROutputsD}
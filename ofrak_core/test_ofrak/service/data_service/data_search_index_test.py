@@ -0,0 +1,157 @@
+"""
+Tests for the index of the data of root models which the DataService uses to speed up searches.
+"""
+import random
+import re
+import threading
+
+import pytest
+
+from ofrak.model.data_model import DataPatch
+from ofrak.service import data_service as data_service_module
+from ofrak.service.data_search_index import (
+    INDEX_BLOCK_SIZE,
+    DataSearchIndex,
+    get_required_literal,
+)
+from ofrak.service.data_service import DataService
+from ofrak_type.range import Range
+from test_ofrak.service.data_service.conftest import DATA_0, DATA_1
+
+NEEDLES = [b"ofrak", b"hello world", b"\x7fELF"]
+PATTERNS = [rb"hel+o w\w{0,4}", rb"ofrak|\x7fELF", rb"ELF.{4}", rb"^.{2}", rb"ofrak(?=\x00)"]
+
+
+def _create_data(size: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    data = bytearray(rng.getrandbits(8) for _ in range(size))
+    for _ in range(size // 0x800):
+        needle = rng.choice(NEEDLES)
+        offset = rng.randrange(size - len(needle))
+        data[offset : offset + len(needle)] = needle
+    return bytes(data)
+
+
+def _find_all(data: bytes, needle: bytes):
+    return tuple(offset for offset in range(len(data)) if data.startswith(needle, offset))
+
+
+async def _wait_for_search_index(data_service: DataService, data_id: bytes):
+    search_index = data_service._search_indexes.get(data_id)
+    if search_index is not None:
+        await search_index
+
+
+async def _check_search(data_service: DataService, data_id: bytes, data: bytes):
+    for needle in NEEDLES + [b"ofrakofrak", b"o"]:
+        assert await data_service.search(data_id, needle) == _find_all(data, needle)
+        expected = tuple(
+            offset
+            for offset in _find_all(data, needle)
+            if offset >= 0x1234 and offset + len(needle) <= 0x9876
+        )
+        assert await data_service.search(data_id, needle, 0x1234, 0x9876) == expected
+    for pattern in PATTERNS:
+        regex = re.compile(pattern, re.DOTALL)
+        expected_matches = tuple((match.start(), match.group()) for match in regex.finditer(data))
+        assert await data_service.search(data_id, regex) == expected_matches
+
+
+@pytest.mark.parametrize(
+    "use_index, search_in_thread", [(False, False), (True, False), (True, True)]
+)
+async def test_search_patched_data(use_index: bool, search_in_thread: bool, monkeypatch):
+    """
+    Test that searches find the same occurrences with or without an index, and on or off the event
+    loop, as data is patched with and without changing its length.
+    """
+    if search_in_thread:
+        monkeypatch.setattr(data_service_module, "SEARCH_IN_THREAD_MIN_SIZE", 0)
+    data_service = DataService()
+    if use_index:
+        data_service.enable_search_index()
+    data = _create_data(0x20000)
+    await data_service.create_root(DATA_0, data)
+    await data_service.create_mapped(DATA_1, DATA_0, Range(0x100, 0x10100))
+    await _wait_for_search_index(data_service, DATA_0)
+    await _check_search(data_service, DATA_0, data)
+    await _check_search(data_service, DATA_1, data[0x100:0x10100])
+
+    # Patch across the boundary of two blocks of the index
+    offset = INDEX_BLOCK_SIZE * 3 - 2
+    await data_service.apply_patches([DataPatch(Range(offset, offset + 5), DATA_1, b"ofrak")])
+    data = data[: 0x100 + offset] + b"ofrak" + data[0x100 + offset + 5 :]
+    await _check_search(data_service, DATA_0, data)
+
+    await data_service.apply_patches([DataPatch(Range(0x10, 0x12), DATA_0, b"hello world")])
+    data = data[:0x10] + b"hello world" + data[0x12:]
+    await _wait_for_search_index(data_service, DATA_0)
+    await _check_search(data_service, DATA_0, data)
+    await _check_search(data_service, DATA_1, data[0x109:0x10109])
+
+
+async def test_search_while_indexing(monkeypatch):
+    """
+    Test that searches scan the data instead of waiting for its index to be built, and that a patch
+    changing the length of the data cancels the build of the index of the data before it.
+    """
+    index_released = threading.Event()
+
+    def _build_index(data: bytes) -> DataSearchIndex:
+        index_released.wait()
+        return DataSearchIndex(data)
+
+    monkeypatch.setattr(data_service_module, "DataSearchIndex", _build_index)
+    data_service = DataService()
+    data_service.enable_search_index()
+    try:
+        data = _create_data(0x10000)
+        await data_service.create_root(DATA_0, data)
+        first_build = data_service._search_indexes[DATA_0]
+        assert await data_service.search(DATA_0, b"ofrak") == _find_all(data, b"ofrak")
+        assert not first_build.done()
+
+        await data_service.apply_patches([DataPatch(Range(0, 2), DATA_0, b"hello world")])
+        data = b"hello world" + data[2:]
+        assert first_build.cancelled()
+    finally:
+        index_released.set()
+    await _wait_for_search_index(data_service, DATA_0)
+    await _check_search(data_service, DATA_0, data)
+
+
+def test_candidate_ranges():
+    """
+    Test that the index rules out the blocks of data which cannot contain what is searched, and
+    keeps the blocks where it starts, even if it ends in another block.
+    """
+    data = bytearray(INDEX_BLOCK_SIZE * 8)
+    data[INDEX_BLOCK_SIZE * 2 : INDEX_BLOCK_SIZE * 2 + 5] = b"ofrak"
+    data[INDEX_BLOCK_SIZE * 6 - 3 : INDEX_BLOCK_SIZE * 6 + 2] = b"ofrak"
+    index = DataSearchIndex(bytes(data))
+    candidate_ranges = index.get_candidate_ranges(b"ofrak", Range(0, len(data)))
+    for offset in (INDEX_BLOCK_SIZE * 2, INDEX_BLOCK_SIZE * 6 - 3):
+        assert any(candidate_range.contains_value(offset) for candidate_range in candidate_ranges)
+    assert sum(candidate_range.length() for candidate_range in candidate_ranges) <= len(data) // 2
+
+    index.update(bytes(INDEX_BLOCK_SIZE * 8), [Range(0, len(data))])
+    assert index.get_candidate_ranges(b"ofrak", Range(0, len(data))) == []
+
+
+@pytest.mark.parametrize(
+    "pattern, literal",
+    [
+        (rb"ofrak", b"ofrak"),
+        (rb"\x7fELF[\x01\x02]", b"\x7fELF"),
+        (rb"ab\d{1,3}cdef", b"cdef"),
+        (rb"of", None),
+        (rb"ofrak|binary", None),
+        (rb"^ofrak", None),
+        (rb"(?<=\x00)ofrak", None),
+        (rb"ofrak\b", None),
+        (rb"ofrak.*", None),
+    ],
+)
+def test_get_required_literal(pattern, literal):
+    assert get_required_literal(re.compile(pattern)) == literal
+    assert get_required_literal(re.compile(pattern, re.IGNORECASE)) is None
@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from ofrak.model.data_model import DataPatch
@@ -103,6 +105,32 @@ class TestDataServiceInterface:
         d = await populated_data_service.get_data(DATA_0, Range(0x18, 0x20))
         assert d == b""
 
+    async def test_search(self, populated_data_service: DataServiceInterface):
+        # Occurrences of bytes may overlap, and must end in the searched range
+        assert await populated_data_service.search(DATA_2, b"\x00" * 6) == (0x0, 0x1, 0x2)
+        assert await populated_data_service.search(DATA_0, b"\x00\x10") == (0xF,)
+        assert await populated_data_service.search(DATA_0, b"\x00\x10", 0x10) == ()
+        assert await populated_data_service.search(DATA_0, b"\x00\x10", 0x0, 0x10) == ()
+        assert await populated_data_service.search(DATA_5, b"\x10", 0x2, 0x6) == (
+            0x2,
+            0x3,
+            0x4,
+            0x5,
+        )
+        assert await populated_data_service.search(DATA_5, b"\x10", max_matches=2) == (0x0, 0x1)
+
+        # Matches of regular expressions do not overlap, and the searched range is all the data
+        assert await populated_data_service.search(DATA_0, re.compile(b"\x00{3}\x10")) == (
+            (0xD, b"\x00\x00\x00\x10"),
+        )
+        assert await populated_data_service.search(DATA_4, re.compile(b"\x00\x00")) == (
+            (0x0, b"\x00\x00"),
+            (0x2, b"\x00\x00"),
+        )
+        assert await populated_data_service.search(DATA_0, re.compile(b"^\x10+"), 0x12) == (
+            (0x12, b"\x10" * 6),
+        )
+
     async def test_patches_out_of_bounds(self, populated_data_service: DataServiceInterface):
         with pytest.raises(OutOfBoundError):
             await populated_data_service.apply_patches(
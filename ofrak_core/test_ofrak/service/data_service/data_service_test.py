@@ -3,12 +3,14 @@ Tests for specific internals of the DataService implementation of the DataServic
 would be convoluted to test using only the public interface.
 
 """
+from typing import List
+
 import pytest
 
-from ofrak.model.data_model import DataModel
+from ofrak.model.data_model import DataModel, DataPatch, LazyData
 from ofrak.service.error import OutOfBoundError
 from ofrak_type.range import Range
-from test_ofrak.service.data_service.conftest import DATA_1
+from test_ofrak.service.data_service.conftest import DATA_0, DATA_1
 
 from ofrak.service.data_service import DataService, _DataRoot, _PatchResizeTracker
 from ofrak_type.error import NotFoundError
@@ -70,3 +72,50 @@ class TestPatchResizeTracker:
     async def test_add_new_resized_range(self, tracker: _PatchResizeTracker):
         tracker.add_new_resized_range(Range(0x8, 0xA), -0x6)
         assert tracker.get_total_size_diff() == 0x2
+
+
+class _RecordingLazyData(LazyData):
+    def __init__(self, data: bytes):
+        self.data = data
+        self.ranges_read: List[Range] = []
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def read(self, data_range: Range) -> bytes:
+        self.ranges_read.append(data_range)
+        return self.data[data_range.start : data_range.end]
+
+
+class TestLazyDataRoot:
+    async def test_get_data(self):
+        """
+        Test that reading part of a lazy data root only reads that range, and reading all of it
+        reads and keeps all the data.
+        """
+        data_service = DataService()
+        lazy_data = _RecordingLazyData(bytes(range(0x100)))
+        model = await data_service.create_root(DATA_0, lazy_data)
+        assert model.range == Range(0x0, 0x100)
+        await data_service.create_mapped(DATA_1, DATA_0, Range(0x10, 0x20))
+
+        assert await data_service.get_data(DATA_1, Range(0x4, 0x8)) == bytes(range(0x14, 0x18))
+        assert await data_service.get_data(DATA_1) == bytes(range(0x10, 0x20))
+        assert lazy_data.ranges_read == [Range(0x14, 0x18), Range(0x10, 0x20)]
+
+        assert await data_service.get_data(DATA_0) == bytes(range(0x100))
+        assert await data_service.get_data(DATA_1) == bytes(range(0x10, 0x20))
+        assert lazy_data.ranges_read[2:] == [Range(0x0, 0x100)]
+
+    async def test_apply_patches(self):
+        """
+        Test that patching a lazy data root reads all its data.
+        """
+        data_service = DataService()
+        lazy_data = _RecordingLazyData(b"\x00" * 0x10)
+        await data_service.create_root(DATA_0, lazy_data)
+        await data_service.apply_patches([DataPatch(Range(0x0, 0x4), DATA_0, b"\x01" * 0x8)])
+
+        assert await data_service.get_data(DATA_0) == b"\x01" * 0x8 + b"\x00" * 0xC
+        assert await data_service.get_data_length(DATA_0) == 0x14
+        assert lazy_data.ranges_read == [Range(0x0, 0x10)]
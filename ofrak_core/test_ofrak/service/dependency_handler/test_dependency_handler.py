@@ -17,6 +17,8 @@ from ofrak.model.resource_model import (
     ResourceAttributes,
     ModelAttributeDependenciesType,
     ModelDataDependenciesType,
+    ComponentRun,
+    StaleResource,
 )
 from ofrak.service.data_service_i import DataServiceInterface
 from ofrak.service.dependency_handler import DependencyHandler
@@ -396,3 +398,104 @@ async def test_dependency_creation(
     for r_id, expected_data_dependencies in test_case.expected_data_dependencies.items():
         resource_m = resource_context.resource_models[r_id]
         assert expected_data_dependencies == resource_m.data_dependencies
+
+
+async def test_component_run_dependency_creation(
+    dependency_handler: DependencyHandler,
+    resource_context: ResourceContext,
+):
+    """
+    A component which ran on a resource without adding attributes to it gets a dependency on its
+    run as a whole.
+    """
+    component_context = dependency_handler._component_context
+    target_m = MutableResourceModel.from_model(ResourceModel.create(b"target"))
+    target_m.add_component(COMPONENT_ID, 1)
+    resource_context.resource_models[b"target"] = target_m
+    component_context.mark_resource_modified(b"target")
+    component_context.access_trackers[b"target"].data_accessed.add(Range(0x10, 0x30))
+
+    dependency_handler.create_resource_dependencies(COMPONENT_ID, b"target")
+
+    assert target_m.data_dependencies == {
+        ResourceAttributeDependency(b"target", COMPONENT_ID, ComponentRun): {Range(0x10, 0x30)}
+    }
+
+
+async def test_component_run_invalidation(
+    dependency_handler: DependencyHandler,
+    resource_context: ResourceContext,
+    resource_service: ResourceServiceInterface,
+    data_service: DataServiceInterface,
+):
+    """
+    Invalidating a component's run on a resource forgets that the component ran, and marks the
+    children created by that run as stale.
+    """
+    parent = ResourceModel.create(b"parent", data_id=b"parent")
+    parent.component_versions[COMPONENT_ID] = 1
+    child = ResourceModel.create(
+        b"child",
+        data_id=b"child",
+        parent_id=b"parent",
+        attributes=(DEFAULT_ATTRS,),
+        created_by_component_id=COMPONENT_ID,
+        created_by_component_version=1,
+    )
+    for dependency in (
+        ResourceAttributeDependency(b"parent", COMPONENT_ID, ComponentRun),
+        ResourceAttributeDependency(b"child", COMPONENT_ID, DEFAULT_ATTRS_TYPE),
+        ResourceAttributeDependency(b"child", COMPONENT_ID, StaleResource),
+    ):
+        parent.data_dependencies[dependency].add(Range(0x0, 0x20))
+    for model in (parent, child):
+        await resource_service.create(model)
+        resource_context.resource_models[model.id] = MutableResourceModel.from_model(model)
+    await data_service.create_root(data_id=b"parent", data=b"e" * 0x20)
+
+    await dependency_handler.handle_post_patch_dependencies(
+        [DataPatchesResult(b"parent", [Range(0x9, 0x12)])]
+    )
+
+    parent_m = resource_context.resource_models[b"parent"]
+    child_m = resource_context.resource_models[b"child"]
+    assert parent_m.get_component_version(COMPONENT_ID) is None
+    assert child_m.get_attributes(StaleResource) == StaleResource(COMPONENT_ID)
+
+
+async def test_mapped_child_stale_dependency_creation(
+    dependency_handler: DependencyHandler,
+    resource_context: ResourceContext,
+):
+    """
+    A child created mapping a range of its parent only becomes stale when the data the component
+    read in that range changes, not when the data of its siblings does.
+    """
+    component_context = dependency_handler._component_context
+    target_m = MutableResourceModel.from_model(ResourceModel.create(b"target"))
+    target_m.add_component(COMPONENT_ID, 1)
+    resource_context.resource_models[b"target"] = target_m
+    component_context.access_trackers[b"target"].data_accessed.update(
+        {Range(0x0, 0x8), Range(0x10, 0x18), Range(0x30, 0x40)}
+    )
+    for child_id, mapped_range in ((b"child_0", Range(0x0, 0x20)), (b"child_1", Range(0x20, 0x40))):
+        resource_context.resource_models[child_id] = MutableResourceModel.from_model(
+            ResourceModel.create(child_id, parent_id=b"target")
+        )
+        component_context.resources_created.add(child_id)
+        component_context.mapped_resources_created[child_id] = (b"target", mapped_range)
+
+    dependency_handler.create_resource_dependencies(COMPONENT_ID, b"target")
+
+    assert target_m.data_dependencies == {
+        ResourceAttributeDependency(b"target", COMPONENT_ID, ComponentRun): {
+            Range(0x0, 0x8),
+            Range(0x10, 0x18),
+            Range(0x30, 0x40),
+        },
+        ResourceAttributeDependency(b"child_0", COMPONENT_ID, StaleResource): {
+            Range(0x0, 0x8),
+            Range(0x10, 0x18),
+        },
+        ResourceAttributeDependency(b"child_1", COMPONENT_ID, StaleResource): {Range(0x30, 0x40)},
+    }
@@ -0,0 +1,45 @@
+from ofrak import OFRAKContext
+from ofrak.model.component_filters import ComponentAndMetaFilter, ComponentTargetFilter
+from ofrak.model.job_request_model import JobMultiComponentRequest
+from ofrak.service.component_locator_i import ComponentLocatorInterface
+from ofrak.service.job_service import (
+    JobService,
+    _ComponentAutoRunRequest,
+    _build_auto_run_filter,
+    _build_tag_filter,
+)
+
+
+async def test_indexed_dispatch_matches_filter(ofrak_context: OFRAKContext):
+    """
+    Looking up the components targeting a resource's tags in the index, and dispatching through
+    it, find exactly the components that filtering all components would.
+    """
+    component_locator = await ofrak_context.injector.get_instance(ComponentLocatorInterface)
+    job_service = await ofrak_context.injector.get_instance(JobService)
+    auto_run_filter = _build_auto_run_filter(
+        JobMultiComponentRequest(
+            b"",
+            b"",
+            all_unpackers=True,
+            all_identifiers=True,
+            all_analyzers=True,
+        )
+    )
+    # A resource is tagged with a tag and all of its base tags
+    for tag in ofrak_context.get_all_tags():
+        tags = tuple(tag.tag_classes())
+
+        assert component_locator.get_components_targeting(
+            tags
+        ) == component_locator.get_components_matching_filter(
+            ComponentTargetFilter(*tags)
+        ), f"Targeting components differ for tags {tags}"
+
+        component_filter = ComponentAndMetaFilter(auto_run_filter, _build_tag_filter(tags))
+        components = job_service._get_components_for_request(
+            _ComponentAutoRunRequest(b"", component_filter, tags)
+        )
+        assert components == component_locator.get_components_matching_filter(
+            component_filter
+        ), f"Dispatch differs for tags {tags}"
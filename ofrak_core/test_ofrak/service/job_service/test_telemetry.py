@@ -0,0 +1,98 @@
+import json
+import zlib
+
+import pytest
+
+from ofrak import OFRAKContext
+from ofrak.core.zlib import ZlibData, ZlibUnpacker
+from ofrak.model.telemetry_model import ComponentRunTelemetry, JobTelemetry
+
+UNCOMPRESSED_DATA = b"hello world" * 100
+COMPRESSED_DATA = zlib.compress(UNCOMPRESSED_DATA)
+
+
+async def test_telemetry_disabled_by_default(ofrak_context: OFRAKContext):
+    resource = await ofrak_context.create_root_resource("zlib", COMPRESSED_DATA, (ZlibData,))
+    await resource.unpack()
+
+    assert ofrak_context.job_service.get_job_telemetry(resource.get_job_id()).runs == []
+
+
+async def test_component_telemetry(ofrak_context: OFRAKContext):
+    ofrak_context.job_service.enable_telemetry()
+    resource = await ofrak_context.create_root_resource("zlib", COMPRESSED_DATA, (ZlibData,))
+    await resource.unpack_recursively()
+    ofrak_context.job_service.disable_telemetry()
+    await resource.identify()
+
+    job_telemetry = ofrak_context.job_service.get_job_telemetry(resource.get_job_id())
+    component_totals = job_telemetry.get_component_totals()
+    unpacker_total = component_totals[ZlibUnpacker.get_id()]
+    assert unpacker_total.calls == 1
+    assert unpacker_total.bytes_read == len(COMPRESSED_DATA)
+    assert unpacker_total.bytes_written == len(UNCOMPRESSED_DATA)
+    assert unpacker_total.resources_created == 1
+    assert unpacker_total.errors == 0
+    assert unpacker_total.wall_time > 0
+    # Nothing is measured once telemetry is disabled
+    assert sum(total.calls for total in component_totals.values()) == len(job_telemetry.runs)
+
+    exported_json = json.loads(job_telemetry.to_json())
+    assert exported_json["components"][ZlibUnpacker.get_id().decode()]["calls"] == 1
+    assert len(exported_json["runs"]) == len(job_telemetry.runs)
+
+    chrome_trace = json.loads(job_telemetry.to_chrome_trace())
+    assert len(chrome_trace["traceEvents"]) == len(job_telemetry.runs)
+    assert {event["ph"] for event in chrome_trace["traceEvents"]} == {"X"}
+
+
+async def test_component_telemetry_error(ofrak_context: OFRAKContext):
+    ofrak_context.job_service.enable_telemetry()
+    resource = await ofrak_context.create_root_resource("zlib", b"not zlib", (ZlibData,))
+    with pytest.raises(zlib.error):
+        await resource.run(ZlibUnpacker)
+
+    job_telemetry = ofrak_context.job_service.get_job_telemetry(resource.get_job_id())
+    assert job_telemetry.get_component_totals()[ZlibUnpacker.get_id()].errors == 1
+
+
+async def test_pop_job_telemetry(ofrak_context: OFRAKContext):
+    """
+    Popping the telemetry of a job forgets it, so that the measurements of the next runs start
+    over, and clearing the telemetry forgets the measurements of all jobs.
+    """
+    ofrak_context.job_service.enable_telemetry()
+    resource = await ofrak_context.create_root_resource("zlib", COMPRESSED_DATA, (ZlibData,))
+    await resource.run(ZlibUnpacker)
+
+    job_telemetry = ofrak_context.job_service.pop_job_telemetry(resource.get_job_id())
+    assert job_telemetry.get_component_totals()[ZlibUnpacker.get_id()].calls == 1
+    assert ofrak_context.job_service.get_job_telemetry(resource.get_job_id()).runs == []
+
+    await resource.identify()
+    assert ofrak_context.job_service.get_job_telemetry(resource.get_job_id()).runs != []
+    ofrak_context.job_service.clear_telemetry()
+    assert ofrak_context.job_service.get_job_telemetry(resource.get_job_id()).runs == []
+
+
+def test_chrome_trace_rows():
+    """
+    Runs overlapping in time are in different rows of the trace, runs following each other share
+    a row.
+    """
+    job_telemetry = JobTelemetry(
+        b"job",
+        [
+            ComponentRunTelemetry(calls=1, component_id=b"A", start_time=1.0, wall_time=2.0),
+            ComponentRunTelemetry(calls=1, component_id=b"B", start_time=2.0, wall_time=2.0),
+            ComponentRunTelemetry(calls=1, component_id=b"C", start_time=3.0, wall_time=1.0),
+        ],
+    )
+
+    trace_events = json.loads(job_telemetry.to_chrome_trace())["traceEvents"]
+
+    assert [(event["name"], event["tid"], event["ts"]) for event in trace_events] == [
+        ("A", 0, 0.0),
+        ("B", 1, 1e6),
+        ("C", 0, 2e6),
+    ]
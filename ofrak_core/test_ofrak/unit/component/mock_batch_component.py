@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import List
+
+from ofrak.component.analyzer import BatchAnalyzer
+from ofrak.component.unpacker import BatchUnpacker
+from ofrak.core.binary import GenericBinary
+from ofrak.resource import Resource
+
+
+@dataclass
+class MockBatchFile(GenericBinary):
+    """
+    Mock file type, whose value is the data of the resource
+    """
+
+    value: bytes
+
+
+@dataclass
+class MockBatchChild(GenericBinary):
+    """
+    Mock file type unpacked from a MockBatchFile
+    """
+
+
+class MockBatchAnalyzer(BatchAnalyzer[None, MockBatchFile]):
+    """
+    Mock batch analyzer, recording the size of each batch it analyzes. Fails on resources with
+    the data `b"fail"`.
+    """
+
+    targets = (MockBatchFile,)
+    outputs = (MockBatchFile,)
+
+    batch_sizes: List[int] = []
+
+    async def analyze_batch(self, resources: List[Resource], config=None) -> List[MockBatchFile]:
+        self.batch_sizes.append(len(resources))
+        values = [await resource.get_data() for resource in resources]
+        if b"fail" in values:
+            raise ValueError("Mock batch analyzer failure")
+        return [MockBatchFile(value) for value in values]
+
+
+class MockBatchUnpacker(BatchUnpacker[None]):
+    """
+    Mock batch unpacker, recording the size of each batch it unpacks. Unpacks each resource into
+    one child with the same data.
+    """
+
+    targets = (MockBatchFile,)
+    children = (MockBatchChild,)
+
+    batch_sizes: List[int] = []
+
+    async def unpack_batch(self, resources: List[Resource], config=None):
+        self.batch_sizes.append(len(resources))
+        for resource in resources:
+            await resource.create_child(tags=(MockBatchChild,), data=await resource.get_data())
@@ -6,6 +6,7 @@ from ofrak.component.packer import Packer
 from ofrak.core.binary import GenericBinary
 from ofrak.model.component_model import ComponentConfig
 from ofrak.resource import Resource
+from ofrak_type.range import Range
 
 
 @dataclass
@@ -117,3 +118,57 @@ class MockFailFilePacker(Packer[None]):
 
     async def pack(self, resource: Resource, config=None):
         raise MockFailException("Raising an exception to mock a failing packer")
+
+
+class MockBlocks(GenericBinary):
+    """
+    Mock file type made of fixed-size blocks
+    """
+
+
+class MockBlock(GenericBinary):
+    """
+    Mock block of a MockBlocks file
+    """
+
+
+class MockBlocksUnpacker(Unpacker[None]):
+    """
+    Mock unpacker mapping each block of a file to a child, after reading the whole file
+    """
+
+    targets = (MockBlocks,)
+    children = (MockBlock,)
+
+    BLOCK_SIZE = 4
+
+    async def unpack(self, resource: Resource, config=None):
+        data = await resource.get_data()
+        for offset in range(0, len(data), self.BLOCK_SIZE):
+            await resource.create_child(
+                tags=(MockBlock,), data_range=Range.from_size(offset, self.BLOCK_SIZE)
+            )
+
+
+class MockRecords(GenericBinary):
+    """
+    Mock file type made of records separated by b"|"
+    """
+
+
+class MockRecordsUnpacker(Unpacker[None]):
+    """
+    Mock unpacker mapping each record of a file to a child, after reading the whole file
+    """
+
+    targets = (MockRecords,)
+    children = (MockBlock,)
+
+    async def unpack(self, resource: Resource, config=None):
+        data = await resource.get_data()
+        offset = 0
+        for record in data.split(b"|"):
+            await resource.create_child(
+                tags=(MockBlock,), data_range=Range.from_size(offset, len(record))
+            )
+            offset += len(record) + 1
@@ -0,0 +1,144 @@
+"""
+Test that the runs of batch components requested at the same time are merged into one call.
+"""
+import asyncio
+from typing import List
+
+import pytest
+
+from ofrak import OFRAKContext
+from ofrak.core.binary import BinaryPatchConfig, BinaryPatchModifier, GenericBinary
+from ofrak.resource import Resource
+from ofrak.service.job_service_i import JobServiceInterface
+from test_ofrak.unit.component import mock_batch_component
+from test_ofrak.unit.component.mock_batch_component import (
+    MockBatchAnalyzer,
+    MockBatchChild,
+    MockBatchFile,
+    MockBatchUnpacker,
+)
+
+N_CHILDREN = 16
+
+
+@pytest.fixture(autouse=True)
+def mock_batch_components(ofrak):
+    ofrak.injector.discover(mock_batch_component)
+    MockBatchAnalyzer.batch_sizes.clear()
+    MockBatchUnpacker.batch_sizes.clear()
+
+
+@pytest.fixture
+async def root_resource(ofrak_context: OFRAKContext) -> Resource:
+    root = await ofrak_context.create_root_resource("root", b"", (GenericBinary,))
+    for i in range(N_CHILDREN):
+        await root.create_child(tags=(MockBatchFile,), data=b"%02d" % i)
+    return root
+
+
+async def test_batch_analyzer(root_resource: Resource):
+    """
+    Views which are all requested at once are analyzed in a single batch, and each gets its own
+    results.
+    """
+    files: List[MockBatchFile] = list(await root_resource.get_descendants_as_view(MockBatchFile))
+
+    assert MockBatchAnalyzer.batch_sizes == [N_CHILDREN]
+    assert sorted(file.value for file in files) == [b"%02d" % i for i in range(N_CHILDREN)]
+    for file in files:
+        assert file.value == await file.resource.get_data()
+
+
+async def test_batch_analyzer_single_resource(ofrak_context: OFRAKContext):
+    resource = await ofrak_context.create_root_resource("file", b"data", (MockBatchFile,))
+    file = await resource.view_as(MockBatchFile)
+
+    assert file.value == b"data"
+    assert MockBatchAnalyzer.batch_sizes == [1]
+
+
+async def test_batch_analyzer_dependencies(root_resource: Resource):
+    """
+    The results on each resource of a batch only depend on that resource, so modifying one
+    resource only invalidates its own results.
+    """
+    await root_resource.get_descendants_as_view(MockBatchFile)
+    patched_child = next(iter(await root_resource.get_children()))
+    await patched_child.run(BinaryPatchModifier, BinaryPatchConfig(0, b"xx"))
+
+    files = await root_resource.get_descendants_as_view(MockBatchFile)
+
+    assert MockBatchAnalyzer.batch_sizes == [N_CHILDREN, 1]
+    assert sorted(file.value for file in files)[-1] == b"xx"
+
+
+async def test_batch_analyzer_failure(root_resource: Resource):
+    """
+    When analyzing a batch fails, each resource in the batch is analyzed alone, so that only the
+    resources which fail on their own fail.
+    """
+    await root_resource.create_child(tags=(MockBatchFile,), data=b"fail")
+    children = list(await root_resource.get_children())
+
+    results = await asyncio.gather(
+        *(child.view_as(MockBatchFile) for child in children), return_exceptions=True
+    )
+
+    assert MockBatchAnalyzer.batch_sizes == [N_CHILDREN + 1] + [1] * (N_CHILDREN + 1)
+    for child, result in zip(children, results):
+        if await child.get_data() == b"fail":
+            assert isinstance(result, ValueError)
+        else:
+            assert isinstance(result, MockBatchFile)
+            assert result.value == await child.get_data()
+
+
+async def test_batch_unpacker(root_resource: Resource):
+    """
+    All the resources matching a batch unpacker in one round of `unpack_recursively` are unpacked
+    in a single batch.
+    """
+    await root_resource.unpack_recursively()
+
+    assert MockBatchUnpacker.batch_sizes == [N_CHILDREN]
+    for child in await root_resource.get_children():
+        grandchild = await child.get_only_child()
+        assert grandchild.has_tag(MockBatchChild)
+        assert await grandchild.get_data() == await child.get_data()
+
+
+async def test_batch_unpacker_concurrency_limit(root_resource: Resource, monkeypatch):
+    """
+    A batch counts as a single run against the limit of concurrent component runs, so it is not
+    split even when the limit is lower than the number of resources in it.
+    """
+    monkeypatch.setattr("ofrak.service.job_service.MAX_CONCURRENT_COMPONENTS", 2)
+
+    await root_resource.unpack_recursively()
+
+    assert MockBatchUnpacker.batch_sizes == [N_CHILDREN]
+    for child in await root_resource.get_children():
+        assert (await child.get_only_child()).has_tag(MockBatchChild)
+
+
+async def test_batch_cancelled(ofrak_context: OFRAKContext, root_resource: Resource):
+    """
+    Cancelling a batch before it runs cancels the run of each resource in it, and allows them to
+    run again.
+    """
+    job_service = await ofrak_context.injector.get_instance(JobServiceInterface)
+    analysis = asyncio.create_task(root_resource.get_descendants_as_view(MockBatchFile))
+    while not job_service._component_batch_tasks:
+        await asyncio.sleep(0)
+    for batch_task in list(job_service._component_batch_tasks):
+        batch_task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await analysis
+    assert not job_service._active_component_tasks
+    assert not job_service._pending_component_batches
+    assert MockBatchAnalyzer.batch_sizes == []
+
+    files = list(await root_resource.get_descendants_as_view(MockBatchFile))
+    assert MockBatchAnalyzer.batch_sizes == [N_CHILDREN]
+    assert len(files) == N_CHILDREN
@@ -1,11 +1,24 @@
+import asyncio
 import os.path
 import subprocess
 
 import pytest
 
 from ofrak import Unpacker, OFRAKContext
+from ofrak.component import external_tool
 from ofrak.component.abstract import ComponentMissingDependencyError, ComponentSubprocessError
+from ofrak.component.external_tool import (
+    ExternalToolExecutor,
+    ToolInputFile,
+    ToolOutputData,
+    ToolOutputDirectory,
+    ToolOutputFileData,
+    run_tool,
+    scratch_directory,
+    tool_input_path,
+)
 from ofrak.model.component_model import ComponentExternalTool
+from ofrak_type.range import Range
 from ofrak.model.job_model import JobRunContext
 from ofrak.model.resource_model import ResourceContext
 from ofrak.model.viewable_tag_model import ResourceViewContext
@@ -102,3 +115,158 @@ async def test_tool_install_check(mock_dependency):
 
     echo_tool = ComponentExternalTool("echo", "", install_check_arg=".")
     assert await echo_tool.is_tool_installed()
+
+
+async def test_run_tool():
+    result = await run_tool(["cat"], input_data=b"piped data")
+    assert result.returncode == 0
+    assert result.stdout == b"piped data"
+
+    result = await run_tool(["pwd"], cwd="/")
+    assert result.stdout == b"/\n"
+
+    result = await run_tool(["sh", "-c", "echo failed >&2; exit 3"], check=False)
+    assert result.returncode == 3
+    assert result.stderr == b"failed\n"
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        await run_tool(["sh", "-c", "echo failed >&2; exit 3"])
+    assert error.value.stderr == b"failed\n"
+
+
+@pytest.mark.parametrize("suffix", ["", ".bin"])
+async def test_tool_input_path(suffix):
+    data = os.urandom(0x1000)
+    with tool_input_path(data, suffix=suffix) as path:
+        assert path.endswith(suffix)
+        result = await run_tool(["cat", path])
+        assert result.stdout == data
+    assert not os.path.exists(path)
+
+
+def test_tool_output_data(tmpdir):
+    """
+    Test that the tool is only run once its output is read, and only once for several reads.
+    """
+    data = os.urandom(0x1000)
+    input_file = ToolInputFile(data)
+    path = input_file.path
+    runs_path = os.path.join(str(tmpdir), "runs")
+    output = ToolOutputData(
+        ["sh", "-c", f'echo run >> "{runs_path}"; cat "{path}"'], len(data), input_file
+    )
+    del input_file
+    assert len(output) == len(data)
+    assert not os.path.exists(runs_path)
+
+    assert output.read(Range(0x10, 0x20)) == data[0x10:0x20]
+    assert output.read(Range(0x800, 0x1000)) == data[0x800:]
+    assert output.read(Range(0, len(data))) == data
+    with open(runs_path) as f:
+        assert f.read() == "run\n"
+    # The input file is deleted once the tool no longer needs it
+    assert not os.path.exists(path)
+
+    with pytest.raises(ValueError):
+        ToolOutputData(["cat", "/dev/null"], 1).read(Range(0, 1))
+
+
+async def test_tool_output_directory(tmpdir):
+    """
+    Test that the tool writing several files is only run once, the first time any of them is read,
+    and that the directory is deleted once all the files have been read in full.
+    """
+    files = {"a": os.urandom(0x100), "b/c": os.urandom(0x200)}
+    input_file = ToolInputFile(b"".join(files.values()))
+    runs_path = os.path.join(str(tmpdir), "runs")
+
+    def get_cmd(path):
+        return [
+            "sh",
+            "-c",
+            f'echo run >> "{runs_path}"; cd "{path}"; mkdir b; '
+            f'head -c 256 "{input_file.path}" > a; tail -c 512 "{input_file.path}" > b/c',
+        ]
+
+    directory = ToolOutputDirectory(get_cmd, 0x300, input_file)
+    directory_path = directory.path
+    input_path = input_file.path
+    del input_file
+    outputs = [ToolOutputFileData(directory, path, len(data)) for path, data in files.items()]
+    del directory
+    assert not os.path.exists(runs_path)
+
+    assert outputs[1].read(Range(0x10, 0x20)) == files["b/c"][0x10:0x20]
+    assert not os.path.exists(input_path)
+    for output, data in zip(outputs, files.values()):
+        assert output.read(Range(0, len(data))) == data
+    with open(runs_path) as f:
+        assert f.read() == "run\n"
+    assert not os.path.exists(directory_path)
+
+    # The tool runs through the executor when the directory is extracted before any file is read
+    directory = ToolOutputDirectory(lambda path: ["touch", os.path.join(path, "empty")])
+    await directory.extract()
+    assert ToolOutputFileData(directory, "empty", 0).read(Range(0, 0)) == b""
+    with pytest.raises(ValueError):
+        ToolOutputFileData(directory, "empty", 1).read(Range(0, 1))
+
+
+def test_scratch_directory(tmpdir, monkeypatch):
+    monkeypatch.setattr(external_tool, "SCRATCH_TMPFS_ROOT", str(tmpdir))
+    with scratch_directory() as scratch_dir:
+        assert os.path.dirname(scratch_dir) == str(tmpdir)
+        with open(os.path.join(scratch_dir, "output"), "wb") as f:
+            f.write(b"output")
+    assert not os.path.exists(scratch_dir)
+
+    # Too big for the free space of the tmpfs, so the default temporary directory is used
+    free_space = os.statvfs(str(tmpdir)).f_bavail * os.statvfs(str(tmpdir)).f_frsize
+    with scratch_directory(free_space) as scratch_dir:
+        assert os.path.dirname(scratch_dir) != str(tmpdir)
+
+
+async def test_external_tool_executor_limits():
+    """
+    Test that the executor bounds the processes running at once, overall and for each tool, and
+    that processes of a tool at its limit do not hold up those of other tools.
+    """
+    executor = ExternalToolExecutor(max_processes=3, tool_limits={"sleep": 1})
+    await asyncio.gather(
+        *(executor.run(["sleep", "0.05"]) for _ in range(3)),
+        *(executor.run(["sh", "-c", "sleep 0.05"]) for _ in range(4)),
+    )
+    stats = executor.get_stats()
+    assert stats["sleep"].runs == 3
+    assert stats["sleep"].max_running == 1
+    assert stats["sh"].runs == 4
+    assert stats["sh"].max_running == 2
+    assert stats["sh"].max_queued >= 2
+    assert stats["sleep"].wait_time > 0
+    for tool_stats in stats.values():
+        assert tool_stats.running == 0
+        assert tool_stats.queued == 0
+
+    executor.reset_stats()
+    assert executor.get_stats() == {}
+
+
+async def test_external_tool_executor_cancel():
+    """
+    Test that cancelling a queued process frees its place, and that failures are counted.
+    """
+    executor = ExternalToolExecutor(max_processes=1)
+    running = asyncio.create_task(executor.run(["sleep", "0.1"]))
+    queued = asyncio.create_task(executor.run(["sleep", "0.1"]))
+    await asyncio.sleep(0.01)
+    assert executor.get_stats()["sleep"].queued == 1
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    await running
+
+    with pytest.raises(subprocess.CalledProcessError):
+        await executor.run(["false"])
+    stats = executor.get_stats()
+    assert stats["sleep"].runs == 1
+    assert stats["sleep"].queued == 0
+    assert stats["false"].failures == 1
@@ -0,0 +1,96 @@
+import pytest
+
+from ofrak import OFRAKContext
+from ofrak.core.binary import BinaryPatchConfig, BinaryPatchModifier
+from ofrak.model.resource_model import StaleResource
+from test_ofrak.unit.component import mock_component
+from test_ofrak.unit.component.mock_component import (
+    MockBlocks,
+    MockBlocksUnpacker,
+    MockRecords,
+    MockUnpackerWithDefaultRequiresPopulated,
+)
+
+# Fails without its config, which unpack_recursively does not pass
+UNPACK_BLACKLIST = (MockUnpackerWithDefaultRequiresPopulated,)
+
+
+@pytest.fixture(autouse=True)
+def mock_unpacker_component(ofrak):
+    ofrak.injector.discover(mock_component)
+
+
+async def test_unpack_again_keeps_unchanged_children(ofrak_context: OFRAKContext):
+    """
+    Unpacking a resource again after patching the data of one of its children replaces that child
+    only, and keeps its siblings with their IDs.
+    """
+    root = await ofrak_context.create_root_resource("root", b"AAAABBBBCCCC", (MockBlocks,))
+    await root.unpack()
+    child_ids = [child.get_id() for child in await root.get_children()]
+
+    await root.run(BinaryPatchModifier, BinaryPatchConfig(5, b"X"))
+    assert [child.has_attributes(StaleResource) for child in await root.get_children()] == [
+        False,
+        True,
+        False,
+    ]
+    await root.unpack()
+
+    children = list(await root.get_children())
+    assert len(children) == 3
+    children_data = {child.get_id(): await child.get_data() for child in children}
+    assert children_data[child_ids[0]] == b"AAAA"
+    assert children_data[child_ids[2]] == b"CCCC"
+    assert child_ids[1] not in children_data
+    assert b"BXBB" in children_data.values()
+
+
+async def test_unpack_again_deletes_unmatched_children(ofrak_context: OFRAKContext):
+    """
+    Unpacking a resource again after a patch which changes the layout of its data deletes the
+    previous children which no fresh child replaces, even when the data they map is unchanged.
+    """
+    root = await ofrak_context.create_root_resource("root", b"AAAA|BBBB|CCCC", (MockRecords,))
+    await root.unpack()
+    child_ids = [child.get_id() for child in await root.get_children()]
+
+    await root.run(BinaryPatchModifier, BinaryPatchConfig(4, b"X"))
+    await root.unpack()
+
+    children = list(await root.get_children())
+    children_data = {child.get_id(): await child.get_data() for child in children}
+    assert sorted(children_data.values()) == [b"AAAAXBBBB", b"CCCC"]
+    assert child_ids[2] in children_data
+
+
+async def test_unpack_recursively_again(ofrak_context: OFRAKContext):
+    """
+    Unpacking recursively again does not run the unpacker again if the data it read is unchanged,
+    but does after the data is patched, as does running the unpacker explicitly.
+    """
+    root = await ofrak_context.create_root_resource("root", b"AAAABBBBCCCC", (MockBlocks,))
+    await root.unpack_recursively(UNPACK_BLACKLIST)
+    child_ids = [child.get_id() for child in await root.get_children()]
+
+    result = await root.unpack_recursively(UNPACK_BLACKLIST)
+    assert MockBlocksUnpacker.get_id() not in result.components_run
+    assert [child.get_id() for child in await root.get_children()] == child_ids
+
+    await root.run(BinaryPatchModifier, BinaryPatchConfig(5, b"X"))
+    result = await root.unpack_recursively(UNPACK_BLACKLIST)
+    assert MockBlocksUnpacker.get_id() in result.components_run
+    assert sorted([await child.get_data() for child in await root.get_children()]) == [
+        b"AAAA",
+        b"BXBB",
+        b"CCCC",
+    ]
+
+    await root.run(BinaryPatchModifier, BinaryPatchConfig(9, b"Y"))
+    result = await root.run(MockBlocksUnpacker)
+    assert MockBlocksUnpacker.get_id() in result.components_run
+    assert sorted([await child.get_data() for child in await root.get_children()]) == [
+        b"AAAA",
+        b"BXBB",
+        b"CYCC",
+    ]
@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+import pytest
+
+from ofrak.component.process_pool import (
+    SHARED_DATA_MIN_SIZE,
+    ComponentProcessPool,
+    SharedData,
+    open_shared_data,
+    share_data,
+)
+
+
+def _hash_shared_data(shared_data: SharedData) -> bytes:
+    with open_shared_data(shared_data) as data:
+        return hashlib.sha256(data).digest()
+
+
+def _exit_once(marker_path: str) -> int:
+    # Kill the worker the first time, breaking the pool
+    if not os.path.exists(marker_path):
+        open(marker_path, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+def _exit() -> None:
+    os._exit(1)
+
+
+@pytest.fixture
+def process_pool():
+    process_pool = ComponentProcessPool(max_workers=1, max_retries=2)
+    yield process_pool
+    process_pool.shutdown()
+
+
+@pytest.mark.parametrize("size", [0, 100, SHARED_DATA_MIN_SIZE, SHARED_DATA_MIN_SIZE * 16 + 1])
+async def test_share_data(process_pool: ComponentProcessPool, size: int):
+    """
+    Test that worker processes read the data which was shared, whether it is sent along with its
+    reference or in an in-memory file, and that the file is deleted after the context.
+    """
+    data = os.urandom(size)
+    with share_data(data) as shared_data:
+        assert (shared_data.path is None) == (size < SHARED_DATA_MIN_SIZE)
+        assert await process_pool.run(_hash_shared_data, shared_data) == (
+            hashlib.sha256(data).digest()
+        )
+    if shared_data.path is not None:
+        assert not os.path.exists(shared_data.path)
+
+
+async def test_broken_pool(process_pool: ComponentProcessPool, tmp_path):
+    """
+    Test that a function runs again in a new pool if its pool breaks.
+    """
+    worker_pid = await process_pool.run(_exit_once, str(tmp_path / "marker"))
+    assert worker_pid != os.getpid()
+    # The new pool keeps being used
+    assert await process_pool.run(_exit_once, str(tmp_path / "marker")) == worker_pid
+
+
+async def test_broken_pool_retries(process_pool: ComponentProcessPool):
+    """
+    Test that running a function fails once its pool broke more than `max_retries` times.
+    """
+    with pytest.raises(RuntimeError, match="broke more than 2 times"):
+        await process_pool.run(_exit)
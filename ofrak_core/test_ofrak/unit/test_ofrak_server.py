@@ -7,6 +7,7 @@ from multiprocessing import Process
 
 from aiohttp.test_utils import TestClient
 
+import ofrak.core.entropy.entropy
 from ofrak.core import File
 from ofrak.core.entropy import DataSummaryAnalyzer
 from ofrak.gui.server import AiohttpOFRAKServer, start_server
@@ -266,6 +267,61 @@ async def test_data_summary(ofrak_client: TestClient, ofrak_server, hello_world_
     assert resp_body["modified"][0]["attributes"] == json_result["modified"][0]["attributes"]
 
 
+async def test_data_summary_tiles(ofrak_client: TestClient):
+    data = bytes(range(256)) * 32 + b"\x00" * 0x2000
+    create_resp = await ofrak_client.post(
+        "/create_root_resource", params={"name": "data"}, data=data
+    )
+    create_body = await create_resp.json()
+    resp = await ofrak_client.get(
+        f"/{create_body['id']}/data_summary_tiles", params={"max_tiles": "16"}
+    )
+    assert resp.status == 200
+    resp_body = await resp.json()
+    assert resp_body["range"] == [0, len(data)]
+    assert resp_body["level"] > 0
+    assert len(data) // resp_body["tile_size"] <= 16
+    assert bytes.fromhex(resp_body["magnitude_max"])[0] == 0xFF
+    assert bytes.fromhex(resp_body["magnitude_max"])[-1] == 0
+    assert bytes.fromhex(resp_body["entropy_min"])[-1] == 0
+
+    # Zoom into the middle of the data, at the finest level
+    resp = await ofrak_client.get(
+        f"/{create_body['id']}/data_summary_tiles",
+        params={"range": json.dumps([0x1F00, 0x2100]), "level": "0"},
+    )
+    assert resp.status == 200
+    resp_body = await resp.json()
+    assert resp_body["level"] == 0
+    assert resp_body["tile_size"] == 0x100
+    assert resp_body["range"] == [0x1F00, 0x2100]
+    assert bytes.fromhex(resp_body["magnitude_max"]) == b"\xff\x00"
+    assert bytes.fromhex(resp_body["entropy_max"]) == b"\xff\x00"
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"max_tiles": "many"}, {"max_tiles": "0"}, {"level": "1.5"}, {"level": "-1"}, {"level": "99"}],
+)
+async def test_data_summary_tiles_bad_request(ofrak_client: TestClient, params):
+    create_resp = await ofrak_client.post(
+        "/create_root_resource", params={"name": "data"}, data=bytes(range(256)) * 32
+    )
+    create_body = await create_resp.json()
+    resp = await ofrak_client.get(f"/{create_body['id']}/data_summary_tiles", params=params)
+    assert resp.status == 400
+
+
+async def test_data_summary_tiles_without_numpy(ofrak_client: TestClient, monkeypatch):
+    monkeypatch.setattr(ofrak.core.entropy.entropy, "NUMPY_AVAILABLE", False)
+    create_resp = await ofrak_client.post(
+        "/create_root_resource", params={"name": "data"}, data=bytes(range(256)) * 32
+    )
+    create_body = await create_resp.json()
+    resp = await ofrak_client.get(f"/{create_body['id']}/data_summary_tiles")
+    assert resp.status == 501
+
+
 async def test_get_parent(ofrak_client: TestClient, hello_world_elf):
     create_resp = await ofrak_client.post(
         "/create_root_resource", params={"name": "hello_world_elf"}, data=hello_world_elf
@@ -377,6 +433,29 @@ async def test_search_for_vaddr(ofrak_client: TestClient, hello_world_elf):
     assert resp_body[0] is not None
 
 
+async def test_search_data(ofrak_client: TestClient):
+    create_resp = await ofrak_client.post(
+        "/create_root_resource", params={"name": "data"}, data=b"\x00ofrak\x00ofrak"
+    )
+    create_body = await create_resp.json()
+    resp = await ofrak_client.post(f"/{create_body['id']}/search_data", json=["ofrak", False, None])
+    assert resp.status == 200
+    resp_body = await resp.json()
+    assert [resource["id"] for resource, _, _ in resp_body] == [create_body["id"]] * 2
+    assert [(offset, match) for _, offset, match in resp_body] == [
+        (1, b"ofrak".hex()),
+        (7, b"ofrak".hex()),
+    ]
+
+    resp = await ofrak_client.post(f"/{create_body['id']}/search_data", json=["of.ak", True, 1])
+    assert resp.status == 200
+    resp_body = await resp.json()
+    assert [(offset, match) for _, offset, match in resp_body] == [(1, b"ofrak".hex())]
+
+    resp = await ofrak_client.post(f"/{create_body['id']}/search_data", json=["of(ak", True, None])
+    assert resp.status == 400
+
+
 async def test_get_all_tags(ofrak_client: TestClient):
     resp = await ofrak_client.get(f"/get_all_tags")
     assert resp.status == 200
@@ -1,3 +1,4 @@
+import re
 import tempfile
 from dataclasses import dataclass
 from io import BytesIO
@@ -159,6 +160,28 @@ async def test_add_view(resource: Resource):
     assert view.b == b
 
 
+async def test_create_children_from_views(resource: Resource):
+    """
+    Test that ``Resource.create_children_from_views`` creates children with the tags, attributes
+    and data of each view, in order.
+    """
+
+    @dataclass
+    class DummyView(ResourceView):
+        a: int
+
+    children = await resource.create_children_from_views(
+        [DummyView(i) for i in range(3)], [b"child0", b"child1", None]
+    )
+    assert len(children) == 3
+    for i, child in enumerate(children):
+        assert (await child.get_parent()).get_id() == resource.get_id()
+        assert child.has_tag(DummyView)
+        assert (await child.view_as(DummyView)).a == i
+    assert await children[1].get_data() == b"child1"
+    assert children[2].get_data_id() is None
+
+
 async def test_save_applies_patches(resource: Resource):
     original_data = await resource.get_data()
     resource.queue_patch(Range(2, 4), b"\xff")
@@ -313,6 +336,44 @@ async def test_create_child_data_and_data_range(ofrak_context: OFRAKContext):
         await resource.create_child(data=b"\x00", data_range=Range(0, 1))
 
 
+async def test_search_data(ofrak_context: OFRAKContext):
+    resource = await ofrak_context.create_root_resource("test_file", b"ofrak ofrakofrak")
+    assert await resource.search_data(b"ofrak") == (0, 6, 11)
+    assert await resource.search_data(b"ofrak", 1, 16) == (6, 11)
+    assert await resource.search_data(re.compile(b"(ofrak)+")) == (
+        (0, b"ofrak"),
+        (6, b"ofrakofrak"),
+    )
+
+
+async def test_search_data_in_tree(ofrak_context: OFRAKContext):
+    """
+    Test that occurrences in the data of a resource tree are attributed to the deepest resource
+    containing them, including in the data of descendants which is not mapped into the root's.
+    """
+    root = await ofrak_context.create_root_resource("test_file", b"ofrak" + b"\x00" * 11 + b"ofrak")
+    section = await root.create_child(data_range=Range(0x4, 0x15))
+    string = await section.create_child(data_range=Range(0xC, 0x11))
+    # The first occurrence starts before the section, so it is only in the root
+    unpacked = await section.create_child(data=b"unpacked ofrak")
+
+    results = await root.search_data_in_tree(b"ofrak")
+    assert sorted(
+        (resource.get_id(), offset, match) for resource, offset, match in results
+    ) == sorted(
+        [
+            (root.get_id(), 0, b"ofrak"),
+            (string.get_id(), 0, b"ofrak"),
+            (unpacked.get_id(), 9, b"ofrak"),
+        ]
+    )
+
+    results = await section.search_data_in_tree(re.compile(b"of.ak"))
+    assert sorted(
+        (resource.get_id(), offset, match) for resource, offset, match in results
+    ) == sorted([(string.get_id(), 0, b"ofrak"), (unpacked.get_id(), 9, b"ofrak")])
+
+
 async def test_get_contexts(resource: Resource):
     assert isinstance(resource.get_resource_context(), ResourceContext)
     assert isinstance(resource.get_resource_view_context(), ResourceViewContext)
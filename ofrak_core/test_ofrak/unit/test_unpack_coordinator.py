@@ -0,0 +1,70 @@
+import io
+import tarfile
+import zlib
+from typing import List, Optional, Set, Tuple
+
+from ofrak import OFRAKContext, Resource, ResourceFilter
+from ofrak.core.filesystem import File
+from ofrak.core.zlib import ZlibData, ZlibUnpacker
+from ofrak.model.tag_model import ResourceTag
+from ofrak.unpack_coordinator import UnpackCoordinator
+
+
+def _create_tar_archive() -> bytes:
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        for i in range(4):
+            file_data = zlib.compress(bytes([ord("A") + i]) * 0x100)
+            file_info = tarfile.TarInfo(f"folder/file{i}.zlib")
+            file_info.size = len(file_data)
+            tar.addfile(file_info, io.BytesIO(file_data))
+    return archive.getvalue()
+
+
+async def _get_tree(resource: Resource) -> List[Tuple[Set[ResourceTag], Optional[bytes]]]:
+    tree = []
+    for descendant in await resource.get_descendants():
+        data = await descendant.get_data() if descendant.get_data_id() is not None else None
+        tree.append((set(descendant.get_tags()), data))
+    return sorted(tree, key=lambda node: (node[1] or b"", sorted(t.__name__ for t in node[0])))
+
+
+async def test_unpack_recursively(ofrak_context: OFRAKContext):
+    """
+    Test that unpacking with worker processes gives the same tree as unpacking in-process.
+    """
+    archive = _create_tar_archive()
+    expected_root = await ofrak_context.create_root_resource("expected", archive)
+    await expected_root.unpack_recursively()
+
+    root = await ofrak_context.create_root_resource("coordinated", archive)
+    async with UnpackCoordinator(ofrak_context, worker_count=2) as unpack_coordinator:
+        result = await unpack_coordinator.unpack_recursively(root)
+
+    assert ZlibUnpacker.get_id() in result.components_run
+    files = list(await root.get_descendants(r_filter=ResourceFilter.with_tags(File)))
+    assert len(files) == 4
+    for file in files:
+        assert file.has_tag(ZlibData)
+        decompressed = await file.get_only_child()
+        assert decompressed.get_id() in result.resources_created
+    assert await _get_tree(root) == await _get_tree(expected_root)
+
+
+async def test_unpack_recursively_blacklist(ofrak_context: OFRAKContext):
+    """
+    Test that blacklisted components do not run in worker processes.
+    """
+    root = await ofrak_context.create_root_resource("coordinated", _create_tar_archive())
+    unpack_coordinator = UnpackCoordinator(ofrak_context, worker_count=1)
+    try:
+        result = await unpack_coordinator.unpack_recursively(
+            root, blacklisted_components=(ZlibUnpacker,)
+        )
+    finally:
+        unpack_coordinator.shutdown()
+
+    assert ZlibUnpacker.get_id() not in result.components_run
+    for file in await root.get_descendants(r_filter=ResourceFilter.with_tags(File)):
+        assert file.has_tag(ZlibData)
+        assert len(list(await file.get_children())) == 0